@@ -0,0 +1,343 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import ccxt
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ('closed', 'canceled', 'cancelled', 'expired', 'rejected')
+
+
+def parse_balance(raw) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """(free, total) by upper-case currency from a ccxt balance structure or a venue's raw reply"""
+    free, total = {}, {}
+    if not isinstance(raw, dict):
+        return free, total
+
+    free_field, total_field = raw.get('free'), raw.get('total')
+    if isinstance(total_field, dict):
+        # Standard ccxt structure; some streams (Kraken balances) only fill in totals
+        for currency, amount in total_field.items():
+            if amount is None:
+                continue
+            total[currency.upper()] = float(amount)
+            available = free_field.get(currency) if isinstance(free_field, dict) else None
+            free[currency.upper()] = float(available) if available is not None else float(amount)
+    elif isinstance(raw.get('info'), dict):
+        # Venue reply with plain currency -> amount pairs in 'info'
+        for key, value in raw['info'].items():
+            if isinstance(value, (int, float, str)):
+                try:
+                    amount = float(value)
+                except ValueError:
+                    continue
+                if amount > 0:
+                    free[key.upper()] = total[key.upper()] = amount
+    else:
+        # Already a currency -> amount dict
+        for key, value in raw.items():
+            if isinstance(key, str) and len(key) <= 6 and isinstance(value, (int, float)):
+                free[key.upper()] = total[key.upper()] = float(value)
+    return free, total
+
+
+class VenueAccount:
+    """Balances, open orders and recent fills of one venue, as last seen on its streams"""
+
+    def __init__(self, name: str, max_fills: int = 200):
+        self.name = name
+        self.free = {}
+        self.total = {}
+        self.orders = {}                    # order id -> latest ccxt order, open orders only
+        self.fills = deque(maxlen=max_fills)
+        self.updated_at = 0.0               # last change from any source
+        self.reconciled_at = 0.0            # last REST fetch_balance
+        self.balance_streamed = False       # True once the venue's balance stream delivered
+        self._progress = {}                 # order id -> (filled, cost, fee) already applied
+        self._trade_ids = deque(maxlen=max_fills)
+
+    def apply_balance(self, free: Dict[str, float], total: Dict[str, float]):
+        self.free, self.total = free, total
+        self.updated_at = time.time()
+
+    def apply_order(self, order: Dict, derive_fills: bool) -> bool:
+        """Track an order update; returns False when derived balances went negative (drift)"""
+        order_id = order.get('id')
+        if order_id is None:
+            return True
+        if order.get('status') in TERMINAL_STATUSES:
+            self.orders.pop(order_id, None)
+        else:
+            self.orders[order_id] = order
+        self.updated_at = time.time()
+
+        filled, cost = order.get('filled') or 0.0, order.get('cost') or 0.0
+        fee = (order.get('fee') or {}).get('cost') or 0.0
+        prev_filled, prev_cost, prev_fee = self._progress.get(order_id, (0.0, 0.0, 0.0))
+        if order.get('status') in TERMINAL_STATUSES:
+            self._progress.pop(order_id, None)
+        else:
+            self._progress[order_id] = (filled, cost, fee)
+
+        amount = filled - prev_filled
+        if not derive_fills or amount <= 0:
+            return True
+        cost_delta = cost - prev_cost
+        self.record_fill({
+            'id': f"{order_id}:{filled}",
+            'order': order_id,
+            'symbol': order.get('symbol'),
+            'side': order.get('side'),
+            'amount': amount,
+            'price': cost_delta / amount if amount else order.get('price'),
+            'cost': cost_delta,
+            'fee': {'cost': fee - prev_fee, 'currency': (order.get('fee') or {}).get('currency')},
+            'timestamp': order.get('lastTradeTimestamp') or order.get('timestamp')
+        })
+        return True if self.balance_streamed else self.apply_fill_to_balances(self.fills[-1])
+
+    def record_fill(self, trade: Dict) -> bool:
+        """Remember a fill once; returns False if the trade id was already seen"""
+        trade_id = trade.get('id')
+        if trade_id is not None:
+            if trade_id in self._trade_ids:
+                return False
+            self._trade_ids.append(trade_id)
+        self.fills.append(trade)
+        self.updated_at = time.time()
+        return True
+
+    def apply_fill_to_balances(self, fill: Dict) -> bool:
+        """Venue without a balance stream: move base/quote/fee by the fill"""
+        symbol = fill.get('symbol') or ''
+        if '/' not in symbol:
+            return True
+        base, quote = symbol.split('/')
+        sign = 1 if fill.get('side') == 'buy' else -1
+        changes = {base: sign * fill['amount'], quote: -sign * fill['cost']}
+        fee = fill.get('fee') or {}
+        if fee.get('cost') and fee.get('currency'):
+            changes[fee['currency'].upper()] = changes.get(fee['currency'].upper(), 0.0) - fee['cost']
+        consistent = True
+        for currency, change in changes.items():
+            self.total[currency] = self.total.get(currency, 0.0) + change
+            self.free[currency] = self.free.get(currency, 0.0) + change
+            if self.total[currency] < 0:
+                consistent = False
+        return consistent
+
+
+class AccountStreamManager:
+    """Keeps every venue's balances and order state current from its private WebSocket streams.
+
+    Streams per venue, as far as the ccxt.pro client supports them:
+    - watch_balance: Binance user data stream, Kraken balances channel
+    - watch_orders: Binance executionReport, Kraken openOrders, Coinbase user channel
+    - watch_my_trades: Binance/Kraken ownTrades fills
+
+    A venue without a balance stream has its balances moved by its fills.
+    REST fetch_balance only runs at start, every `reconcile_interval`
+    seconds, and soon after drift is suspected: a stream error (updates may
+    have been missed), a derived balance below zero, or request_reconcile().
+    A venue with no working stream at all is polled every `poll_interval`.
+    """
+
+    def __init__(self, clients: Dict, reconcile_interval: float = 300.0, poll_interval: float = 15.0,
+                 min_reconcile_gap: float = 5.0, drift_tolerance: float = 1e-6):
+        self.clients = clients
+        self.reconcile_interval = reconcile_interval
+        self.poll_interval = poll_interval
+        self.min_reconcile_gap = min_reconcile_gap
+        self.drift_tolerance = drift_tolerance
+
+        self.accounts = {name: VenueAccount(name) for name in clients}
+        self.streams = {}     # name -> set of stream methods currently running
+        self.dirty = set()    # venues to reconcile as soon as the gap allows
+        self.balance_listeners = []  # callbacks (name, free balances) after every balance change
+        self.order_listeners = []    # callbacks (name, ccxt order) for every execution report
+        self.tasks = []
+        self.running = False
+
+        self.stream_updates = 0
+        self.stream_errors = 0
+        self.reconciliations = 0
+        self.drift_events = 0
+
+    async def start(self):
+        """Seed every venue from REST, then start its private streams"""
+        self.running = True
+        await asyncio.gather(*(self.reconcile(name) for name in self.clients))
+        for name, client in self.clients.items():
+            has = getattr(client, 'has', {})
+            self.streams[name] = set()
+            # Private channels need API keys; without them the venue is polled over REST
+            if not client.check_required_credentials(False):
+                has = {}
+            for method, handler in (('watch_balance', self._on_balance),
+                                    ('watch_orders', self._on_orders),
+                                    ('watch_my_trades', self._on_trades)):
+                if has.get(self._capability(method)):
+                    self.streams[name].add(method)
+                    self.tasks.append(asyncio.create_task(self._watch(name, method, handler)))
+            logger.info(f"🔐 {name.upper()} account streams: {', '.join(sorted(self.streams[name])) or 'none (REST polling)'}")
+        self.tasks.append(asyncio.create_task(self._reconcile_loop()))
+
+    @staticmethod
+    def _capability(method: str) -> str:
+        head, *rest = method.split('_')
+        return head + ''.join(part.title() for part in rest)
+
+    async def _watch(self, name: str, method: str, handler):
+        client = self.clients[name]
+        backoff = 1.0
+        while self.running:
+            try:
+                result = await getattr(client, method)()
+                handler(name, result)
+                self.stream_updates += 1
+                backoff = 1.0
+            except asyncio.CancelledError:
+                raise
+            except (ccxt.AuthenticationError, ccxt.NotSupported, ccxt.PermissionDenied) as e:
+                logger.warning(f"⚠️  {name.upper()} {method} unavailable, relying on REST: {e}")
+                self.streams[name].discard(method)
+                return
+            except Exception as e:
+                # Updates may have been missed while the stream was down
+                self.stream_errors += 1
+                self.dirty.add(name)
+                logger.error(f"{name.upper()} {method} stream error: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    def _on_balance(self, name: str, balance: Dict):
+        account = self.accounts[name]
+        free, total = parse_balance(balance)
+        if not total:
+            return
+        # Streams may only report changed currencies; keep the rest
+        account.apply_balance({**account.free, **free}, {**account.total, **total})
+        account.balance_streamed = True
+        self._notify(name)
+
+    def _on_orders(self, name: str, orders: List[Dict]):
+        account = self.accounts[name]
+        # Fills come from watch_my_trades when the venue has it, else from order fill progress
+        derive_fills = 'watch_my_trades' not in self.streams.get(name, ())
+        for order in orders:
+            if not account.apply_order(order, derive_fills):
+                self._suspect_drift(name, f"balance below zero after order {order.get('id')}")
+            for listener in self.order_listeners:
+                try:
+                    listener(name, order)
+                except Exception as e:
+                    logger.error(f"Order listener error: {e}")
+        if derive_fills and not account.balance_streamed:
+            self._notify(name)
+
+    def _on_trades(self, name: str, trades: List[Dict]):
+        account = self.accounts[name]
+        for trade in trades:
+            if account.record_fill(trade) and not account.balance_streamed:
+                if not account.apply_fill_to_balances(trade):
+                    self._suspect_drift(name, f"balance below zero after trade {trade.get('id')}")
+        if not account.balance_streamed:
+            self._notify(name)
+
+    def _notify(self, name: str):
+        free = self.accounts[name].free
+        for listener in self.balance_listeners:
+            try:
+                listener(name, free)
+            except Exception as e:
+                logger.error(f"Balance listener error: {e}")
+
+    def _suspect_drift(self, name: str, reason: str):
+        if name not in self.dirty:
+            logger.warning(f"⚠️  {name.upper()} account state suspect ({reason}), reconciling")
+        self.dirty.add(name)
+
+    def request_reconcile(self, name: str):
+        """Ask for a REST reconciliation of one venue, e.g. after a failed or unwound trade"""
+        if name in self.accounts:
+            self.dirty.add(name)
+
+    async def _reconcile_loop(self):
+        while self.running:
+            await asyncio.sleep(1.0)
+            now = time.time()
+            for name, account in self.accounts.items():
+                age = now - account.reconciled_at
+                interval = self.reconcile_interval if self.streams.get(name) else self.poll_interval
+                if age >= interval or (name in self.dirty and age >= self.min_reconcile_gap):
+                    await self.reconcile(name)
+
+    async def reconcile(self, name: str) -> bool:
+        """Replace a venue's balances with a REST fetch, logging any drift from the streamed state"""
+        account = self.accounts[name]
+        try:
+            raw = await self.clients[name].fetch_balance()
+        except Exception as e:
+            logger.warning(f"⚠️  {name.upper()} balance reconciliation failed: {e}")
+            return False
+
+        free, total = parse_balance(raw)
+        if account.reconciled_at:
+            drift = self.compare(account.total, total)
+            if drift:
+                self.drift_events += 1
+                logger.warning(
+                    f"⚠️  {name.upper()} balance drift corrected: "
+                    + ', '.join(f"{c} {streamed:.8f}→{actual:.8f}" for c, (streamed, actual) in drift.items())
+                )
+        account.apply_balance(free, total)
+        account.reconciled_at = account.updated_at
+        self.dirty.discard(name)
+        self.reconciliations += 1
+        self._notify(name)
+        return True
+
+    def compare(self, streamed: Dict[str, float], actual: Dict[str, float]) -> Dict[str, Tuple[float, float]]:
+        """Currencies whose streamed total differs from the REST total beyond the tolerance"""
+        drift = {}
+        for currency in set(streamed) | set(actual):
+            a, b = streamed.get(currency, 0.0), actual.get(currency, 0.0)
+            if abs(a - b) > self.drift_tolerance * max(abs(b), 1.0):
+                drift[currency] = (a, b)
+        return drift
+
+    def get_account(self, name: str) -> Optional[VenueAccount]:
+        return self.accounts.get(name)
+
+    def open_orders(self, name: str) -> List[Dict]:
+        account = self.accounts.get(name)
+        return list(account.orders.values()) if account else []
+
+    async def stop(self):
+        self.running = False
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def get_stats(self) -> Dict:
+        now = time.time()
+        return {
+            'stream_updates': self.stream_updates,
+            'stream_errors': self.stream_errors,
+            'reconciliations': self.reconciliations,
+            'drift_events': self.drift_events,
+            'venues': {
+                name: {
+                    'streams': sorted(self.streams.get(name, ())),
+                    'balance_age_s': round(now - account.updated_at, 1) if account.updated_at else None,
+                    'open_orders': len(account.orders),
+                    'fills': len(account.fills),
+                    'suspect': name in self.dirty
+                }
+                for name, account in self.accounts.items()
+            }
+        }
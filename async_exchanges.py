@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import time
+import aiohttp
+import ccxt.pro as ccxtpro
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+
+def override_url(url: str, endpoint: Dict[str, str]) -> str:
+    """Move a venue URL onto an endpoint override, keeping its path.
+
+    http(s) URLs go to endpoint['rest'] and ws(s) URLs to endpoint['ws'];
+    URLs whose kind has no override are returned unchanged.
+    """
+    parts = urlsplit(url)
+    base = endpoint.get('ws' if parts.scheme in ('ws', 'wss') else 'rest')
+    if not base or not parts.scheme:
+        return url
+    path = parts.path.rstrip('/')
+    return base.rstrip('/') + path + (f"?{parts.query}" if parts.query else '')
+
+
+def apply_endpoint_override(exchange, endpoint: Optional[Dict[str, str]]):
+    """Point a ccxt client's REST and WebSocket URLs at an endpoint override (e.g. the local simulator)"""
+    if not endpoint:
+        return exchange
+
+    def rewrite(value):
+        if isinstance(value, dict):
+            return {key: rewrite(item) for key, item in value.items()}
+        if isinstance(value, str):
+            return override_url(value, endpoint)
+        return value
+
+    exchange.urls = dict(exchange.urls)
+    exchange.urls['api'] = rewrite(exchange.urls['api'])
+    return exchange
+
+
+async def call_exchange(exchange, method: str, *args, **kwargs) -> Any:
+    """Call a ccxt method without blocking the event loop.
+
+    Async clients (ccxt.async_support / ccxt.pro) are awaited directly; plain
+    ccxt clients are run in a worker thread so legacy callers keep working.
+    """
+    func = getattr(exchange, method)
+    if asyncio.iscoroutinefunction(func):
+        return await func(*args, **kwargs)
+    return await asyncio.to_thread(func, *args, **kwargs)
+
+
+class AsyncExchangeManager:
+    """Async REST clients for every venue, sharing one aiohttp session.
+
+    Clients are ccxt.pro instances, which extend ccxt.async_support, so the
+    same objects serve REST calls and the WebSocketFeed order book streams.
+    """
+
+    PRO_CLASSES = {
+        'kraken': 'kraken',
+        'binance': 'binanceus',
+        'coinbase': 'coinbase'
+    }
+
+    def __init__(self, exchanges: Dict, endpoints: Optional[Dict] = None, scheduler=None):
+        self.exchanges = exchanges  # sync clients: credentials and already-loaded markets
+        self.endpoints = endpoints or {}  # exchange name -> {'rest': ..., 'ws': ...} overrides
+        self.scheduler = scheduler  # RateLimitScheduler; ccxt's per-client throttle when None
+        self.clients = {}
+        self.session = None
+
+    async def start(self):
+        """Create the shared session and one async client per configured exchange"""
+        connector = aiohttp.TCPConnector(limit=100, ttl_dns_cache=300, enable_cleanup_closed=True)
+        self.session = aiohttp.ClientSession(connector=connector)
+
+        for name, exch in self.exchanges.items():
+            try:
+                config = {
+                    'apiKey': exch.apiKey,
+                    'secret': exch.secret,
+                    'enableRateLimit': True,
+                    'timeout': exch.timeout,
+                    'session': self.session,
+                    'options': dict(exch.options) if isinstance(exch.options, dict) else {}
+                }
+                if name == 'kraken':
+                    config['nonce'] = lambda: int(time.time() * 1000)
+
+                client = getattr(ccxtpro, self.PRO_CLASSES.get(name, name))(config)
+                apply_endpoint_override(client, self.endpoints.get(name))
+                if self.scheduler is not None:
+                    self.scheduler.install(name, client)
+
+                # Reuse the markets the sync client already loaded instead of another round trip
+                if exch.markets:
+                    client.set_markets(exch.markets, exch.currencies)
+                else:
+                    await client.load_markets()
+
+                self.clients[name] = client
+                logger.info(f"✅ Async client ready for {name.upper()}")
+
+            except Exception as e:
+                logger.error(f"❌ Failed to create async client for {name}: {e}")
+
+    def get(self, name: str):
+        return self.clients.get(name)
+
+    async def _gather(self, method: str, *args) -> Dict[str, Any]:
+        """Run one method on every client concurrently; failures come back as exceptions"""
+        names = list(self.clients.keys())
+        results = await asyncio.gather(
+            *(getattr(self.clients[name], method)(*args) for name in names),
+            return_exceptions=True
+        )
+        return dict(zip(names, results))
+
+    async def fetch_balances(self) -> Dict[str, Any]:
+        return await self._gather('fetch_balance')
+
+    async def fetch_times(self) -> Dict[str, Any]:
+        return await self._gather('fetch_time')
+
+    async def close(self):
+        for name, client in self.clients.items():
+            try:
+                await client.close()
+            except Exception as e:
+                logger.debug(f"Error closing async client {name}: {e}")
+
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
@@ -1,20 +1,58 @@
 import logging
-from typing import List, Tuple
+import time
+from typing import List, Optional, Tuple
 from market_context import MarketContext, AuctionState
+from microstructure import MicrostructureAnalytics
 
 class AuctionContextModule:
-    def __init__(self):
+    def __init__(self, flow_window: float = 60.0, profile_window: float = 900.0):
         self.logger = logging.getLogger(__name__)
+        self.flow_window = flow_window
+        self.profile_window = profile_window
+        self.analytics = {}  # symbol -> MicrostructureAnalytics, fed incrementally by books and trades
+    
+    def analytics_for(self, symbol: str) -> MicrostructureAnalytics:
+        analytics = self.analytics.get(symbol)
+        if analytics is None:
+            analytics = self.analytics[symbol] = MicrostructureAnalytics(self.flow_window, self.profile_window)
+        return analytics
+    
+    def on_trade(self, symbol: str, price: float, quantity: float, side: Optional[str] = None,
+                 context: Optional[MarketContext] = None, timestamp: Optional[float] = None):
+        """Fold one public trade into the symbol's delta and volume profile"""
+        now = timestamp if timestamp is not None else time.time()
+        analytics = self.analytics_for(symbol)
+        analytics.on_trade(price, quantity, side, now)
+        if context is not None:
+            self._apply_flow(analytics, context, now)
+    
+    def _apply_flow(self, analytics: MicrostructureAnalytics, context: MarketContext, now: float):
+        """Copy the running order flow values into the context (no recomputation)"""
+        analytics.expire(now)
+        context.order_flow_imbalance = analytics.order_flow_imbalance()
+        context.cumulative_delta = analytics.cumulative_delta
+        context.cycle_bias = analytics.delta_bias()
+        context.volume_poc = analytics.profile.poc()
+        context.microprice = analytics.microprice
     
     def analyze_order_book(self, bids: List[Tuple[float, float]], 
                           asks: List[Tuple[float, float]], 
                           last_price: float,
-                          context: MarketContext) -> MarketContext:
-        """Analyze order book to determine auction context"""
+                          context: MarketContext,
+                          exchange: Optional[str] = None,
+                          timestamp: Optional[float] = None) -> MarketContext:
+        """Analyze order book to determine auction context; timestamp is the event time in seconds"""
         try:
             if not bids or not asks:
                 return context
             
+            # Order flow: book changes feed the symbol's rolling windows (sized levels only)
+            if exchange is not None and len(bids[0]) > 1 and len(asks[0]) > 1:
+                now = timestamp if timestamp is not None else time.time()
+                analytics = self.analytics_for(context.primary_symbol)
+                analytics.on_book(exchange, bids, asks, now)
+                self._apply_flow(analytics, context, now)
+            
             # Calculate top 5 levels imbalance
             bid_vol = sum(qty for _, qty in bids[:5]) if len(bids[0]) > 1 else len(bids[:5])
             ask_vol = sum(qty for _, qty in asks[:5]) if len(asks[0]) > 1 else len(asks[:5])
@@ -63,9 +101,11 @@ class AuctionContextModule:
             total_vol = bid_vol + ask_vol
             context.volume_strength = min(total_vol / 100.0, 1.0)  # Normalized
             
-            self.logger.debug(f"Auction Analysis: {context.auction_state.value} "
-                            f"Score: {context.auction_imbalance_score:.3f} "
-                            f"Confidence: {context.execution_confidence:.2f}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Auction Analysis: {context.auction_state.value} "
+                                f"Score: {context.auction_imbalance_score:.3f} "
+                                f"OFI: {context.order_flow_imbalance:.3f} "
+                                f"Confidence: {context.execution_confidence:.2f}")
             
         except Exception as e:
             self.logger.error(f"Auction analysis error: {e}")
@@ -0,0 +1,808 @@
+import argparse
+import asyncio
+import heapq
+import importlib.util
+import itertools
+import json
+import logging
+import math
+import os
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import ccxt
+
+from data_feed import WebSocketFeed
+from market_recorder import MarketReplayer
+from rebalance_monitor import RebalanceMonitor
+
+logger = logging.getLogger(__name__)
+
+STABLECOINS = ('USDT', 'USDC', 'USD')
+
+DEFAULT_BALANCES = {
+    'binance': {'BTC': 0.1, 'USDT': 5000.0, 'USDC': 5000.0, 'BNB': 1.0},
+    'kraken': {'BTC': 0.1, 'USDT': 5000.0, 'USDC': 5000.0, 'USD': 1000.0},
+    'coinbase': {'BTC': 0.1, 'USDT': 5000.0, 'USDC': 5000.0, 'USD': 1000.0}
+}
+
+# Order round trip to each venue: (mean, jitter) in milliseconds
+DEFAULT_LATENCY_MS = {
+    'binance': (30.0, 10.0),
+    'kraken': (80.0, 25.0),
+    'coinbase': (60.0, 20.0)
+}
+
+_orchestrator = None
+
+
+def load_orchestrator():
+    """Import the orchestrator module (the entry point ships as 'system_orchestrator copy 3.py')"""
+    global _orchestrator
+    if _orchestrator is None:
+        try:
+            import system_orchestrator
+            _orchestrator = system_orchestrator
+        except ImportError:
+            path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'system_orchestrator copy 3.py')
+            spec = importlib.util.spec_from_file_location('system_orchestrator', path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            _orchestrator = module
+    return _orchestrator
+
+
+# ==================== FEES ====================
+
+class FeeSchedule:
+    """Taker fees from fee_state.json, with monthly fee credits drawn down as the backtest trades.
+
+    BNB-discounted venues pay discounted_taker. Credit programs (Kraken+,
+    Coinbase One) pay discounted_taker while the remaining credit covers the
+    standard fee, which is then taken from the credit; once the credit runs
+    out the standard taker rate applies.
+    """
+
+    def __init__(self, path: str = 'fee_state.json'):
+        state = {}
+        if path and os.path.exists(path):
+            with open(path, 'r') as f:
+                state = json.load(f)
+        self.exchanges = {name: dict(data) for name, data in state.get('exchanges', {}).items()}
+        self.fees_paid = {}  # exchange -> fees charged in quote currency
+
+    def get_current_taker_fee(self, exchange_name, trade_value_usd=0):
+        exch = self.exchanges.get(exchange_name.lower())
+        if not exch:
+            return {"effective_fee_rate": 0.001, "discount_active": False}
+
+        if exch.get('discount_active'):
+            if 'credit_remaining_usd' in exch:
+                if trade_value_usd * exch['standard_taker'] <= exch['credit_remaining_usd']:
+                    return {
+                        "effective_fee_rate": exch['discounted_taker'],
+                        "discount_active": True,
+                        "credit_remaining": exch['credit_remaining_usd']
+                    }
+            else:
+                return {
+                    "effective_fee_rate": exch['discounted_taker'],
+                    "discount_active": True,
+                    "credit_remaining": None
+                }
+
+        return {
+            "effective_fee_rate": exch['standard_taker'],
+            "discount_active": False,
+            "credit_remaining": exch.get('credit_remaining_usd', 0)
+        }
+
+    def charge(self, exchange_name: str, trade_value_usd: float) -> float:
+        """Fee for one fill; fee credits absorb the standard fee they cover"""
+        fee_info = self.get_current_taker_fee(exchange_name, trade_value_usd)
+        fee = trade_value_usd * fee_info['effective_fee_rate']
+
+        exch = self.exchanges.get(exchange_name.lower())
+        if exch and fee_info['discount_active'] and 'credit_remaining_usd' in exch:
+            covered = trade_value_usd * exch['standard_taker'] - fee
+            exch['credit_remaining_usd'] -= covered
+            exch['fees_used_this_month_usd'] = exch.get('fees_used_this_month_usd', 0.0) + covered
+
+        self.fees_paid[exchange_name] = self.fees_paid.get(exchange_name, 0.0) + fee
+        return fee
+
+
+# ==================== SIMULATED VENUES ====================
+
+class SimClock:
+    """Simulated time and the events (order arrivals) scheduled on it"""
+
+    def __init__(self, now_ns: int = 0):
+        self.now_ns = now_ns
+        self.events = []  # heap of (at_ns, seq, callback, args)
+        self._seq = itertools.count()
+
+    def schedule(self, at_ns: int, callback, *args):
+        heapq.heappush(self.events, (at_ns, next(self._seq), callback, args))
+
+    def run_until(self, t_ns: int):
+        """Fire every event due by t_ns, in time order, then move the clock to t_ns"""
+        events = self.events
+        while events and events[0][0] <= t_ns:
+            at_ns, _, callback, args = heapq.heappop(events)
+            self.now_ns = at_ns
+            callback(*args)
+        if t_ns > self.now_ns:
+            self.now_ns = t_ns
+
+
+class SimOrder:
+    __slots__ = ('id', 'symbol', 'base', 'quote', 'type', 'side', 'price', 'amount',
+                 'filled', 'cost', 'fee', 'status', 'timestamp', 'reserved')
+
+    def __init__(self, order_id, symbol, base, quote, order_type, side, amount, price, timestamp):
+        self.id = order_id
+        self.symbol = symbol
+        self.base = base
+        self.quote = quote
+        self.type = order_type
+        self.side = side
+        self.price = price
+        self.amount = amount
+        self.filled = 0.0
+        self.cost = 0.0
+        self.fee = 0.0
+        self.status = 'open'
+        self.timestamp = timestamp
+        self.reserved = 0.0  # funds still held for the unfilled remainder
+
+    def to_ccxt(self) -> Dict:
+        return {
+            'id': self.id,
+            'clientOrderId': None,
+            'timestamp': self.timestamp,
+            'datetime': None,
+            'lastTradeTimestamp': None,
+            'symbol': self.symbol,
+            'type': self.type,
+            'side': self.side,
+            'price': self.price,
+            'amount': self.amount,
+            'filled': self.filled,
+            'remaining': self.amount - self.filled,
+            'cost': self.cost,
+            'average': self.cost / self.filled if self.filled else None,
+            'status': self.status,
+            'fee': {'cost': self.fee, 'currency': self.quote},
+            'trades': [],
+            'info': {}
+        }
+
+
+class SimulatedExchange:
+    """ccxt-compatible venue that fills orders against the backtest's order books.
+
+    Orders reach the book after a sampled latency. A marketable order then
+    fills against the displayed levels the feed stores (top 5); the remainder
+    of a limit order rests and fills when a later top-of-book change crosses
+    it, while a market order's unfilled remainder is cancelled. Every fill pays
+    the FeeSchedule taker fee in the quote currency. The recorded books are not
+    depleted by our own fills (no market impact), and cancels take effect
+    immediately.
+    """
+
+    precisionMode = ccxt.TICK_SIZE
+    MARKET_RULES = {'tick_size': 0.01, 'lot_size': 1e-8, 'min_amount': 1e-5, 'min_notional': 1.0}
+
+    def __init__(self, name: str, feed, clock: SimClock, fee_schedule: FeeSchedule, balances: Dict,
+                 latency_ms: float = 50.0, jitter_ms: float = 10.0, rng: Optional[random.Random] = None):
+        self.id = name
+        self.feed = feed
+        self.clock = clock
+        self.fee_schedule = fee_schedule
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rng = rng or random.Random(0)
+
+        self.total = dict(balances)   # currency -> total balance
+        self.reserved = {}            # currency -> held by open limit orders
+        self.markets = {}
+        self.orders = {}              # id -> SimOrder
+        self.resting = {}             # symbol -> [SimOrder] waiting for the book to cross
+        self._ids = itertools.count(1)
+
+        self.order_count = 0
+        self.fill_count = 0
+        self.partial_fills = 0
+
+    # ==================== MARKETS & BALANCES ====================
+
+    def market(self, symbol: str) -> Dict:
+        market = self.markets.get(symbol)
+        if market is None:
+            base, quote = symbol.split('/')
+            rules = self.MARKET_RULES
+            market = self.markets[symbol] = {
+                'symbol': symbol,
+                'base': base,
+                'quote': quote,
+                'precision': {'price': rules['tick_size'], 'amount': rules['lot_size']},
+                'limits': {'amount': {'min': rules['min_amount']}, 'cost': {'min': rules['min_notional']}}
+            }
+        return market
+
+    def free(self, currency: str) -> float:
+        return self.total.get(currency, 0.0) - self.reserved.get(currency, 0.0)
+
+    def _book(self, symbol: str) -> Dict:
+        return self.feed.price_data.get(symbol, {}).get(self.id) or {}
+
+    # ==================== ccxt INTERFACE ====================
+
+    async def create_limit_order(self, symbol, side, amount, price, params=None):
+        return self._create(symbol, 'limit', side, amount, price)
+
+    async def create_market_order(self, symbol, side, amount, price=None, params=None):
+        return self._create(symbol, 'market', side, amount, None)
+
+    async def fetch_order(self, id, symbol=None, params=None):
+        order = self.orders.get(id)
+        if order is None:
+            raise ccxt.OrderNotFound(f"{self.id} order {id} not found")
+        return order.to_ccxt()
+
+    async def cancel_order(self, id, symbol=None, params=None):
+        order = self.orders.get(id)
+        if order is None:
+            raise ccxt.OrderNotFound(f"{self.id} order {id} not found")
+        if order.status == 'open':
+            self._close(order, 'canceled')
+        return order.to_ccxt()
+
+    async def fetch_balance(self, params=None):
+        balance = {'free': {}, 'used': {}, 'total': {}, 'info': {}}
+        for currency, total in self.total.items():
+            used = self.reserved.get(currency, 0.0)
+            balance['free'][currency] = total - used
+            balance['used'][currency] = used
+            balance['total'][currency] = total
+            balance[currency] = {'free': total - used, 'used': used, 'total': total}
+        return balance
+
+    async def fetch_ticker(self, symbol, params=None):
+        book = self._book(symbol)
+        bid, ask = book.get('bid'), book.get('ask')
+        last = (bid + ask) / 2 if bid and ask else None
+        return {'symbol': symbol, 'bid': bid, 'ask': ask, 'last': last}
+
+    # ==================== MATCHING ====================
+
+    def _create(self, symbol: str, order_type: str, side: str, amount: float, price: Optional[float]) -> Dict:
+        market = self.market(symbol)
+        if amount < market['limits']['amount']['min']:
+            raise ccxt.InvalidOrder(f"{self.id} {symbol} amount {amount} below minimum")
+
+        order = SimOrder(str(next(self._ids)), symbol, market['base'], market['quote'],
+                         order_type, side, amount, price, self.clock.now_ns // 1_000_000)
+
+        # Limit orders hold their funds; market orders are capped by what is free at fill time
+        if order_type == 'limit':
+            if side == 'buy':
+                notional = amount * price
+                currency = order.quote
+                needed = notional * (1 + self.fee_schedule.get_current_taker_fee(self.id, notional)['effective_fee_rate'])
+            else:
+                currency = order.base
+                needed = amount
+            if needed > self.free(currency) + 1e-12:
+                raise ccxt.InsufficientFunds(
+                    f"{self.id} {currency} free {self.free(currency):.8f} < required {needed:.8f}"
+                )
+            order.reserved = needed
+            self.reserved[currency] = self.reserved.get(currency, 0.0) + needed
+
+        self.orders[order.id] = order
+        self.order_count += 1
+
+        latency_ms = max(0.0, self.rng.gauss(self.latency_ms, self.jitter_ms))
+        self.clock.schedule(self.clock.now_ns + int(latency_ms * 1e6), self._on_arrival, order)
+        return order.to_ccxt()
+
+    def _on_arrival(self, order: SimOrder):
+        if order.status != 'open':
+            return  # cancelled in flight
+        self._match(order)
+        if order.status != 'open':
+            return
+        if order.type == 'market':
+            self._close(order, 'canceled')  # no more displayed liquidity
+        else:
+            self.resting.setdefault(order.symbol, []).append(order)
+
+    def on_book(self, symbol: str):
+        """Match resting orders after the symbol's top of book moved"""
+        orders = self.resting.get(symbol)
+        if not orders:
+            return
+        book = self._book(symbol)
+        best_bid, best_ask = book.get('bid'), book.get('ask')
+        for order in list(orders):
+            # Skip orders the new top of book does not cross
+            if order.side == 'buy' and not (best_ask and best_ask <= order.price):
+                continue
+            if order.side == 'sell' and not (best_bid and best_bid >= order.price):
+                continue
+            self._match(order)
+            if order.status != 'open':
+                orders.remove(order)
+        if not orders:
+            del self.resting[symbol]
+
+    def _match(self, order: SimOrder):
+        book = self._book(order.symbol)
+        buying = order.side == 'buy'
+        levels = book.get('asks' if buying else 'bids')
+        if not levels:
+            return
+
+        limit = order.price
+        filled_before = order.filled
+        for level in levels:
+            price, size = level[0], level[1]
+            if limit is not None and (price > limit if buying else price < limit):
+                break
+            remaining = order.amount - order.filled
+            quantity = min(remaining, size)
+            if buying and order.type == 'market':
+                # A market buy can only spend the quote currency it has
+                quantity = min(quantity, max(0.0, self.free(order.quote)) / (price * 1.01))
+            if quantity <= 0:
+                break
+            self._fill(order, quantity, price)
+            if order.amount - order.filled <= 1e-12:
+                self._close(order, 'closed')
+                return
+        if order.filled > filled_before:
+            self.partial_fills += 1
+
+    def _fill(self, order: SimOrder, quantity: float, price: float):
+        notional = quantity * price
+        fee = self.fee_schedule.charge(self.id, notional)
+        total = self.total
+        if order.side == 'buy':
+            total[order.base] = total.get(order.base, 0.0) + quantity
+            total[order.quote] = total.get(order.quote, 0.0) - notional - fee
+        else:
+            total[order.base] = total.get(order.base, 0.0) - quantity
+            total[order.quote] = total.get(order.quote, 0.0) + notional - fee
+
+        if order.reserved:
+            release = order.reserved * quantity / (order.amount - order.filled)
+            self._release(order, release)
+
+        order.filled += quantity
+        order.cost += notional
+        order.fee += fee
+        self.fill_count += 1
+
+    def _release(self, order: SimOrder, amount: float):
+        currency = order.quote if order.side == 'buy' else order.base
+        self.reserved[currency] = self.reserved.get(currency, 0.0) - amount
+        order.reserved -= amount
+
+    def _close(self, order: SimOrder, status: str):
+        order.status = status
+        if order.reserved:
+            self._release(order, order.reserved)
+        orders = self.resting.get(order.symbol)
+        if status == 'canceled' and orders and order in orders:
+            orders.remove(order)
+            if not orders:
+                del self.resting[order.symbol]
+
+
+class SimBalanceView:
+    """ExchangeWrapper-shaped view of a simulated venue for RebalanceMonitor"""
+
+    def __init__(self, exchange: SimulatedExchange):
+        self.name = exchange.id
+        self.exchange = exchange
+        self.balances = dict(exchange.total)
+        self.free_balances = {currency: exchange.free(currency) for currency in exchange.total}
+
+
+# ==================== SYNTHETIC MARKET ====================
+
+def synthetic_updates(count: int, exchanges=('binance', 'kraken', 'coinbase'), symbols=('BTC/USDT', 'BTC/USDC'),
+                      start_price: float = 60000.0, volatility_bps: float = 0.5, spread_bps: float = 1.0,
+                      basis_bps: float = 2.0, jump_bps: float = 70.0, jump_probability: float = 0.0005,
+                      interval_ms: float = 5.0, levels: int = 5, seed: int = 0,
+                      start_ns: int = 1_700_000_000_000_000_000) -> Iterator[Tuple]:
+    """Yield (recv_ns, exchange, symbol, bids, asks) from a random-walk market.
+
+    One mid price random-walks for every venue; each (exchange, symbol) book
+    carries its own mean-reverting basis with occasional jumps large enough to
+    open cross-exchange spreads, and `levels` levels of random size per side.
+    """
+    rng = random.Random(seed)
+    gauss, uniform, choice = rng.gauss, rng.random, rng.choice
+    markets = [(exchange, symbol) for exchange in exchanges for symbol in symbols]
+    basis = {market: 0.0 for market in markets}
+
+    mid = start_price
+    t_ns = start_ns
+    interval_ns = interval_ms * 1e6
+    for _ in range(count):
+        market = choice(markets)
+        mid *= 1.0 + gauss(0.0, volatility_bps) * 1e-4
+
+        drift = basis[market] * 0.98 + gauss(0.0, basis_bps) * 1e-4 * 0.2
+        if uniform() < jump_probability:
+            drift += (jump_bps if uniform() < 0.5 else -jump_bps) * 1e-4
+        basis[market] = drift
+
+        center = mid * (1.0 + drift)
+        half_spread = center * spread_bps * 0.5e-4
+        best_bid = round(center - half_spread, 2)
+        best_ask = max(round(center + half_spread, 2), best_bid + 0.01)
+        bids = [[best_bid - i * 0.5, 0.01 + uniform() * 0.5] for i in range(levels)]
+        asks = [[best_ask + i * 0.5, 0.01 + uniform() * 0.5] for i in range(levels)]
+
+        t_ns += int(rng.expovariate(1.0) * interval_ns) + 1
+        yield t_ns, market[0], market[1], bids, asks
+
+
+# ==================== BACKTESTER ====================
+
+@dataclass
+class BacktestResult:
+    """Outcome of one backtest run; PnL marks start and end balances to the final mid prices"""
+    params: Dict
+    updates: int
+    sim_seconds: float
+    wall_seconds: float
+    updates_per_minute: float
+    opportunities: int
+    trades_attempted: int
+    trades_executed: int
+    orders: int
+    fills: int
+    partial_fills: int
+    open_orders: int
+    fees_paid: float
+    start_value: float
+    end_value: float
+    pnl: float
+    rebalance_checks: int
+    rebalance_signals: int
+    triangular_cycles: int
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class Backtester:
+    """Run recorded or synthetic order books through the live ArbitrageBot decision path.
+
+    The bot is assembled offline (configuration, settings, executor, spread
+    scanner, currency graph) and attached to a real WebSocketFeed, so every
+    update takes the live parsing, top-of-book table, market context and
+    decision code. decision_mode='event' mirrors the live event-driven scan
+    (evaluate_tick on each top-of-book change); 'scan' calls
+    find_arbitrage_opportunities every scan_interval_ms of simulated time.
+    Executions go through the bot's executor against SimulatedExchanges on a
+    simulated clock, one at a time, with the live pause after each successful
+    trade.
+    """
+
+    def __init__(self, config_path: str = 'config/bot_config.json', fee_state_path: str = 'fee_state.json',
+                 context_multipliers: Optional[Dict] = None, balances: Optional[Dict] = None,
+                 latency_ms: Optional[Dict] = None, decision_mode: str = 'event',
+                 scan_interval_ms: float = 100.0, rebalance_interval_s: float = 300.0,
+                 trade_cooldown_s: float = 1.0, seed: int = 0):
+        self.decision_mode = decision_mode
+        self.scan_interval_ns = int(scan_interval_ms * 1e6)
+        self.rebalance_interval_ns = int(rebalance_interval_s * 1e9)
+        self.cooldown_ns = int(trade_cooldown_s * 1e9)
+
+        self.clock = SimClock()
+        self.fee_schedule = FeeSchedule(fee_state_path)
+        self.feed = WebSocketFeed({})
+        self.feed.running = True
+
+        balances = balances or DEFAULT_BALANCES
+        latency_ms = latency_ms or DEFAULT_LATENCY_MS
+        rng = random.Random(seed)
+        self.exchanges = {
+            name: SimulatedExchange(name, self.feed, self.clock, self.fee_schedule, holdings,
+                                    *latency_ms.get(name, (50.0, 10.0)), rng=rng)
+            for name, holdings in balances.items()
+        }
+        self.start_balances = {name: dict(holdings) for name, holdings in balances.items()}
+
+        self.bot = self._build_bot(config_path, context_multipliers)
+        self._sync_ledger()
+        self.feed.subscribe_top_of_book(self._on_top_of_book)
+
+        self.execution_queue = deque()
+        self.next_execution_ns = 0
+        self.next_periodic_ns = None
+        self.next_scan_ns = math.inf
+        self.next_rebalance_ns = math.inf
+        self.first_ns = None
+
+        self.opportunities = 0
+        self.trades_attempted = 0
+        self.trades_executed = 0
+        self.rebalance_checks = 0
+        self.rebalance_signals = 0
+
+    def _build_bot(self, config_path: str, context_multipliers: Optional[Dict]):
+        orchestrator = load_orchestrator()
+        bot = orchestrator.ArbitrageBot.__new__(orchestrator.ArbitrageBot)
+        bot.start_time = time.time()
+        bot.system_id = 'BACKTEST'
+        bot.config_path = config_path
+        bot.logger = logging.getLogger('backtester.bot')
+        bot.config = bot.load_configuration()
+        bot.settings = bot.initialize_settings()
+        for regime, multipliers in (context_multipliers or {}).items():
+            bot.settings['context_multipliers'][regime] = tuple(multipliers)
+
+        bot.system_metrics = orchestrator.SystemMetrics()
+        bot.is_shutting_down = False
+        bot.latest_balances = {}
+        bot.recent_opportunities = []
+        bot.health_monitor = None
+        bot.account_streams = None
+        bot.rebalance_monitor = RebalanceMonitor()
+        bot.bot_mode = 'LOW_LATENCY'
+        bot.initialize_executor()
+        bot.attach_data_feed(self.feed)
+
+        # Order legs are followed over the simulated REST interface; expiry is left to the simulator
+        tracker = bot.order_executor.order_tracker
+        tracker.clients = self.exchanges
+        tracker.stream_grace = 0.0
+        tracker.order_ttl = float('inf')
+        tracker.trade_listeners.append(bot.on_trade_settled)
+        return bot
+
+    # ==================== EVENT LOOP ====================
+
+    def _on_top_of_book(self, symbol: str, exchange: str, received_ns: int):
+        sim = self.exchanges.get(exchange)
+        if sim is not None and sim.resting:
+            sim.on_book(symbol)
+
+        if self.decision_mode == 'event':
+            decision = self.bot.evaluate_tick(symbol, exchange)
+            if decision is not None and decision[0]:
+                self._queue_opportunities(decision[0])
+
+    def _queue_opportunities(self, opportunities: List[Dict]):
+        self.opportunities += len(opportunities)
+        # Only one execution in flight, as live; candidates arriving meanwhile are dropped
+        if not self.execution_queue and self.clock.now_ns >= self.next_execution_ns:
+            self.execution_queue.extend(self.bot.rank_opportunities(opportunities))
+            self.next_execution_ns = self.clock.now_ns
+
+    async def advance(self, t_ns: int):
+        """Move simulated time to t_ns: executions, order arrivals and periodic checks due by then"""
+        clock = self.clock
+        if (
+            not self.execution_queue
+            and (not clock.events or clock.events[0][0] > t_ns)
+            and self.next_periodic_ns is not None and t_ns < self.next_periodic_ns
+        ):
+            clock.now_ns = t_ns
+            return
+
+        if self.first_ns is None:
+            self.first_ns = t_ns
+            if self.decision_mode == 'scan':
+                self.next_scan_ns = t_ns + self.scan_interval_ns
+            self.next_rebalance_ns = t_ns + self.rebalance_interval_ns
+
+        while self.execution_queue and self.next_execution_ns <= t_ns:
+            clock.run_until(self.next_execution_ns)
+            await self._execute_next()
+        clock.run_until(t_ns)
+
+        if t_ns >= self.next_scan_ns:
+            self.next_scan_ns = t_ns + self.scan_interval_ns
+            market_context = self.feed.market_contexts.get('BTC/USDT')
+            opportunities = self.bot.find_arbitrage_opportunities(self.bot.scan_symbols, market_context)
+            if opportunities:
+                self._queue_opportunities(opportunities)
+        if t_ns >= self.next_rebalance_ns:
+            self.next_rebalance_ns = t_ns + self.rebalance_interval_ns
+            self._check_rebalance()
+        self.next_periodic_ns = min(self.next_scan_ns, self.next_rebalance_ns)
+
+    async def _execute_next(self):
+        opportunity = self.execution_queue.popleft()
+        self.trades_attempted += 1
+        success = await self.bot.order_executor.execute_arbitrage(opportunity, self.exchanges)
+        self._sync_ledger()
+        if success:
+            self.trades_executed += 1
+            self.bot.system_metrics.total_trades += 1
+            self.next_execution_ns += self.cooldown_ns
+        await self.bot.order_executor.order_tracker.poll()
+
+    def _sync_ledger(self):
+        """Reconcile the executor's reservation ledger with the simulated balances, as the account streams do live"""
+        ledger = self.bot.order_executor.portfolio_state
+        ledger.settle_grace = 0.0  # simulated balances already include every acknowledged order
+        for name, exchange in self.exchanges.items():
+            ledger.sync_balances(name, {currency: exchange.free(currency) for currency in exchange.total})
+
+    def _check_rebalance(self):
+        self.rebalance_checks += 1
+        views = {name: SimBalanceView(exchange) for name, exchange in self.exchanges.items()}
+        if self.bot.rebalance_monitor.should_rebalance(views, self.feed.price_data):
+            self.rebalance_signals += 1
+
+    # ==================== RUNS ====================
+
+    async def run_updates(self, updates: Iterable[Tuple]) -> BacktestResult:
+        """Backtest over ccxt.pro-style book updates: (recv_ns, exchange, symbol, bids, asks)"""
+        on_orderbook = self.feed._on_pro_orderbook
+        advance = self.advance
+        count = 0
+        start = time.perf_counter()
+        for recv_ns, exchange, symbol, bids, asks in updates:
+            await advance(recv_ns)
+            on_orderbook(exchange, symbol, bids, asks, recv_ns // 1_000_000, recv_ns)
+            count += 1
+        return await self._finish(count, time.perf_counter() - start)
+
+    async def run_capture(self, path: str) -> BacktestResult:
+        """Backtest over a MarketRecorder capture, replayed as fast as possible"""
+        replayer = MarketReplayer(path, speed=0)
+        replayer.attach_feed(self.feed)
+        replayer.add_time_listener(self.advance)
+        start = time.perf_counter()
+        count = await replayer.run()
+        return await self._finish(count, time.perf_counter() - start)
+
+    async def _finish(self, updates: int, wall_seconds: float) -> BacktestResult:
+        end_ns = self.clock.now_ns
+        # Let queued executions and in-flight orders play out against the last books
+        await self.advance(max(end_ns, self.next_execution_ns) + 5_000_000_000)
+        while self.execution_queue:
+            await self.advance(self.next_execution_ns)
+        await self.bot.order_executor.order_tracker.poll()
+
+        mids = self._final_mids()
+        start_value = sum(self._value(holdings, mids) for holdings in self.start_balances.values())
+        end_value = sum(self._value(exchange.total, mids) for exchange in self.exchanges.values())
+        sim_seconds = (end_ns - self.first_ns) / 1e9 if self.first_ns is not None else 0.0
+
+        return BacktestResult(
+            params={
+                'decision_mode': self.decision_mode,
+                'context_multipliers': {k: list(v) for k, v in self.bot.settings['context_multipliers'].items()}
+            },
+            updates=updates,
+            sim_seconds=sim_seconds,
+            wall_seconds=wall_seconds,
+            updates_per_minute=updates / wall_seconds * 60 if wall_seconds else 0.0,
+            opportunities=self.opportunities,
+            trades_attempted=self.trades_attempted,
+            trades_executed=self.trades_executed,
+            orders=sum(exchange.order_count for exchange in self.exchanges.values()),
+            fills=sum(exchange.fill_count for exchange in self.exchanges.values()),
+            partial_fills=sum(exchange.partial_fills for exchange in self.exchanges.values()),
+            open_orders=sum(len(orders) for exchange in self.exchanges.values() for orders in exchange.resting.values()),
+            fees_paid=sum(self.fee_schedule.fees_paid.values()),
+            start_value=start_value,
+            end_value=end_value,
+            pnl=end_value - start_value,
+            rebalance_checks=self.rebalance_checks,
+            rebalance_signals=self.rebalance_signals,
+            triangular_cycles=self.bot.system_metrics.triangular_cycles_detected
+        )
+
+    def _final_mids(self) -> Dict[str, float]:
+        """Average mid per base currency in a stablecoin quote, across venues"""
+        sums = {}
+        for symbol, quotes in self.feed.price_data.items():
+            base, _, quote = symbol.partition('/')
+            if quote not in STABLECOINS:
+                continue
+            for entry in quotes.values():
+                if entry.get('bid') and entry.get('ask'):
+                    total, n = sums.get(base, (0.0, 0))
+                    sums[base] = (total + (entry['bid'] + entry['ask']) / 2, n + 1)
+        return {base: total / n for base, (total, n) in sums.items()}
+
+    @staticmethod
+    def _value(holdings: Dict, mids: Dict) -> float:
+        value = 0.0
+        for currency, amount in holdings.items():
+            if currency in STABLECOINS:
+                value += amount
+            else:
+                value += amount * mids.get(currency, 0.0)
+        return value
+
+
+# ==================== PARAMETER SWEEPS ====================
+
+def multiplier_grid(spread_scales=(0.8, 1.0, 1.2), position_scales=(0.8, 1.0, 1.2)) -> List[Dict]:
+    """Context multiplier sets that scale every regime of DEFAULT_CONTEXT_MULTIPLIERS"""
+    defaults = load_orchestrator().DEFAULT_CONTEXT_MULTIPLIERS
+    return [
+        {regime: (round(spread * s, 4), round(position * p, 4)) for regime, (spread, position) in defaults.items()}
+        for s in spread_scales
+        for p in position_scales
+    ]
+
+
+async def run_sweep(grid: List[Dict], capture: Optional[str] = None, synthetic: Optional[Dict] = None,
+                    **backtester_kwargs) -> List[BacktestResult]:
+    """One backtest per multiplier set, each on a fresh bot over the same data"""
+    results = []
+    for multipliers in grid:
+        backtester = Backtester(context_multipliers=multipliers, **backtester_kwargs)
+        if capture:
+            result = await backtester.run_capture(capture)
+        else:
+            result = await backtester.run_updates(synthetic_updates(**(synthetic or {})))
+        results.append(result)
+        logger.info(f"📈 Backtest {multipliers}: {result.trades_executed} trades, PnL ${result.pnl:.2f}")
+    return results
+
+
+def format_result(result: BacktestResult) -> str:
+    multipliers = ' '.join(
+        f"{regime[:3]}={spread:.2f}/{position:.2f}"
+        for regime, (spread, position) in result.params['context_multipliers'].items()
+    )
+    return (
+        f"{multipliers} | {result.updates:,} updates ({result.updates_per_minute / 1e6:.2f}M/min) | "
+        f"opps {result.opportunities} | trades {result.trades_executed}/{result.trades_attempted} | "
+        f"fills {result.fills} ({result.partial_fills} partial, {result.open_orders} open) | "
+        f"fees ${result.fees_paid:.2f} | PnL ${result.pnl:.2f}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest the arbitrage decision path on recorded or synthetic books")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--capture', help="MarketRecorder capture file to replay")
+    source.add_argument('--synthetic', type=int, default=1_000_000, help="number of synthetic book updates")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mode', choices=['event', 'scan'], default='event')
+    parser.add_argument('--config', default='config/bot_config.json')
+    parser.add_argument('--fee-state', default='fee_state.json')
+    parser.add_argument('--sweep', action='store_true', help="sweep the context multipliers")
+    parser.add_argument('--spread-scales', type=float, nargs='+', default=[0.8, 1.0, 1.2])
+    parser.add_argument('--position-scales', type=float, nargs='+', default=[0.8, 1.0, 1.2])
+    parser.add_argument('--output', help="write results as JSON")
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level)
+
+    grid = multiplier_grid(args.spread_scales, args.position_scales) if args.sweep else [None]
+    results = asyncio.run(run_sweep(
+        grid,
+        capture=args.capture,
+        synthetic={'count': args.synthetic, 'seed': args.seed},
+        config_path=args.config,
+        fee_state_path=args.fee_state,
+        decision_mode=args.mode,
+        seed=args.seed
+    ))
+
+    for result in results:
+        print(format_result(result))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump([result.to_dict() for result in results], f, indent=2)
@@ -0,0 +1,14 @@
+"""Latency, throughput and allocation benchmarks for the market data and decision hot paths.
+
+Run with `python -m benchmarks`; results are saved as JSON per commit and
+can be compared against a baseline file to catch regressions.
+"""
+from benchmarks.harness import (
+    BenchmarkResult, Recorder, save_results, load_results, compare_results,
+    format_results, format_comparison
+)
+
+__all__ = [
+    'BenchmarkResult', 'Recorder', 'save_results', 'load_results', 'compare_results',
+    'format_results', 'format_comparison'
+]
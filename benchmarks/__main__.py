@@ -0,0 +1,67 @@
+import argparse
+import logging
+import os
+import sys
+from dataclasses import replace
+
+from benchmarks.cases import CASES, QUICK, Settings, run_cases
+from benchmarks.harness import (
+    environment, save_results, load_results, compare_results, format_results, format_comparison
+)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description="Benchmark the parse, book update, context, scan and order dispatch paths"
+    )
+    parser.add_argument('--quick', action='store_true', help="small inputs and two rounds (smoke run)")
+    parser.add_argument('--filter', help="only run benchmarks whose name contains this text")
+    parser.add_argument('--rounds', type=int, help="timing rounds per benchmark")
+    parser.add_argument('--output', help="result file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument('--baseline', help="result file to compare against")
+    parser.add_argument('--max-regression', type=float, default=20.0,
+                        help="percent growth in p50/p99/peak allocation that counts as a regression")
+    parser.add_argument('--list', action='store_true', help="list benchmark names and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, (kind, _) in CASES.items():
+            print(f"{kind:6} {name}")
+        return 0
+
+    # The hot paths log at INFO on every order; keep handlers out of the measurements
+    logging.basicConfig(level=logging.WARNING)
+    logging.disable(logging.WARNING)
+
+    settings = QUICK if args.quick else Settings()
+    if args.rounds:
+        settings = replace(settings, rounds=args.rounds)
+
+    results = run_cases(settings, args.filter)
+    logging.disable(logging.NOTSET)
+    if not results:
+        print(f"No benchmark matches {args.filter!r}")
+        return 1
+    print(format_results(results))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{environment()['commit'] or 'unknown'}.json")
+    document = save_results(results, output, {**settings.to_dict(), 'quick': args.quick})
+    print(f"\n💾 Results saved to {output}")
+
+    if args.baseline:
+        rows = compare_results(load_results(args.baseline), document, args.max_regression)
+        print(f"\nAgainst {args.baseline}:")
+        print(format_comparison(rows))
+        regressions = [row for row in rows if row['regression']]
+        if regressions:
+            print(f"\n❌ {len(regressions)} metric(s) regressed by more than {args.max_regression:g}%")
+            return 2
+        print(f"\n✅ No regression above {args.max_regression:g}%")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
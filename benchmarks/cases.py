@@ -0,0 +1,335 @@
+import asyncio
+import gc
+import json
+import time
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from backtester import Backtester, synthetic_updates
+from data_feed import WebSocketFeed
+from market_context import MarketContext
+from message_decoding import loads, DECODER
+
+from benchmarks.fixtures import VENUES, record_frames, sync_client, client_payloads, build_backtester
+from benchmarks.harness import BenchmarkResult, Recorder
+
+
+@dataclass
+class Settings:
+    """Sizes of one benchmark run"""
+    rounds: int = 5           # timing rounds per benchmark (fresh state where the path is stateful)
+    frames: int = 20000       # raw frames recorded per venue
+    calls: int = 5000         # calls per round for micro benchmarks on prepared inputs
+    scans: int = 1000         # find_arbitrage_opportunities calls per round
+    orders: int = 1000        # execute_order calls per round
+    updates: int = 5000       # synthetic book updates per backtest round
+    alloc_calls: int = 1000   # calls traced in the allocation pass
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+QUICK = Settings(rounds=2, frames=3000, calls=1000, scans=200, orders=200, updates=1000, alloc_calls=200)
+
+# name -> (kind, function(settings) -> BenchmarkResult), in run order
+CASES = {}
+
+_frames = {}    # venue -> (frames, snapshot), shared by every case of one run
+_payloads = {}  # venue -> client callback payloads for those frames
+
+
+def benchmark(name: str, kind: str = 'micro'):
+    def register(func: Callable):
+        CASES[name] = (kind, func)
+        return func
+    return register
+
+
+def venue_frames(venue: str, settings: Settings) -> Tuple[List[str], Dict]:
+    cached = _frames.get(venue)
+    if cached is None or len(cached[0]) < settings.frames:
+        cached = _frames[venue] = record_frames(venue, settings.frames)
+        _payloads.pop(venue, None)
+    return cached
+
+
+def venue_payloads(venue: str, settings: Settings) -> List[Dict]:
+    frames, snapshot = venue_frames(venue, settings)
+    payloads = _payloads.get(venue)
+    if payloads is None:
+        payloads = _payloads[venue] = client_payloads(venue, frames, snapshot)
+    return payloads
+
+
+def cycle(items: List, count: int) -> List:
+    """count items taken from items in order, wrapping around"""
+    return [items[i % len(items)] for i in range(count)]
+
+
+def run_cases(settings: Settings, pattern: Optional[str] = None) -> List[BenchmarkResult]:
+    """Run every registered case whose name contains pattern (all when None)"""
+    results = []
+    for name, (kind, func) in CASES.items():
+        if pattern and pattern not in name:
+            continue
+        results.append(func(settings))
+    return results
+
+
+# ==================== DECODE ====================
+
+def _decode_case(venue: str):
+    def parse_case(name: str, parse: Callable, decoder: str):
+        @benchmark(name)
+        def decode(settings: Settings) -> BenchmarkResult:
+            frames, _ = venue_frames(venue, settings)
+            recorder = Recorder(name)
+            args = [(frame,) for frame in frames]
+            for _ in range(settings.rounds):
+                recorder.new_round()
+                recorder.time_calls(parse, args)
+            recorder.trace_calls(parse, args[:settings.alloc_calls])
+            recorder.extra['decoder'] = decoder
+            return recorder.result()
+
+    # The standard library parser is kept as the reference the clients' decoder is measured against
+    parse_case(f'decode.{venue}.stdlib', json.loads, 'json')
+    parse_case(f'decode.{venue}.json', loads, DECODER)
+
+    @benchmark(f'decode.{venue}.client')
+    def decode_client(settings: Settings) -> BenchmarkResult:
+        """Frame decoding plus the client's message handling, local book update and payload"""
+        frames, snapshot = venue_frames(venue, settings)
+        recorder = Recorder(f'decode.{venue}.client')
+        args = [(frame,) for frame in frames]
+
+        async def run():
+            for _ in range(settings.rounds):
+                client = await sync_client(venue, snapshot)
+
+                async def parse(frame: str):
+                    await client._handle_message(loads(frame))
+
+                recorder.new_round()
+                await recorder.time_async_calls(parse, args)
+
+            client = await sync_client(venue, snapshot)
+
+            async def parse(frame: str):
+                await client._handle_message(loads(frame))
+
+            await recorder.trace_async_calls(parse, args[:settings.alloc_calls])
+
+        asyncio.run(run())
+        return recorder.result()
+
+
+for _venue in VENUES:
+    _decode_case(_venue)
+
+
+# ==================== FEED AND CONTEXT ====================
+
+def _new_feed() -> WebSocketFeed:
+    feed = WebSocketFeed({})
+    feed.running = True
+    return feed
+
+
+@benchmark('feed.handle_websocket_data')
+def handle_websocket_data(settings: Settings) -> BenchmarkResult:
+    """Client payloads from all venues, interleaved, through the feed's callback"""
+    per_venue = [venue_payloads(venue, settings) for venue in VENUES]
+    mixed = [payload for group in zip(*per_venue) for payload in group]
+    args = [(payload,) for payload in cycle(mixed, settings.calls)]
+    recorder = Recorder('feed.handle_websocket_data')
+
+    async def run():
+        for _ in range(settings.rounds):
+            feed = _new_feed()
+            recorder.new_round()
+            await recorder.time_async_calls(feed._handle_websocket_data, args)
+        await recorder.trace_async_calls(_new_feed()._handle_websocket_data, args[:settings.alloc_calls])
+
+    asyncio.run(run())
+    return recorder.result()
+
+
+def _book_args(settings: Settings) -> List[Tuple]:
+    """(bids, asks, mid) from the Binance client's book updates"""
+    args = []
+    for payload in venue_payloads('binance', settings):
+        bids, asks = payload.get('bids'), payload.get('asks')
+        if bids and asks:
+            args.append((bids, asks, (float(bids[0][0]) + float(asks[0][0])) / 2))
+    return cycle(args, settings.calls)
+
+
+@benchmark('context.analyze_order_book')
+def analyze_order_book(settings: Settings) -> BenchmarkResult:
+    recorder = Recorder('context.analyze_order_book')
+    feed = _new_feed()
+    context = MarketContext(primary_symbol='BTC/USDT')
+    args = [(bids, asks, mid, context) for bids, asks, mid in _book_args(settings)]
+    for _ in range(settings.rounds):
+        recorder.new_round()
+        recorder.time_calls(feed.auction_analyzer.analyze_order_book, args)
+    recorder.trace_calls(feed.auction_analyzer.analyze_order_book, args[:settings.alloc_calls])
+    return recorder.result()
+
+
+@benchmark('feed.update_market_context')
+def update_market_context(settings: Settings) -> BenchmarkResult:
+    recorder = Recorder('feed.update_market_context')
+    feed = _new_feed()
+    args = [('BTC/USDT', 'binance', bids, asks, mid) for bids, asks, mid in _book_args(settings)]
+    for _ in range(settings.rounds):
+        recorder.new_round()
+        recorder.time_calls(feed.update_market_context, args)
+    recorder.trace_calls(feed.update_market_context, args[:settings.alloc_calls])
+    return recorder.result()
+
+
+# ==================== DECISION ====================
+
+@benchmark('bot.find_arbitrage_opportunities')
+def find_arbitrage_opportunities(settings: Settings) -> BenchmarkResult:
+    """One full scan per book update; the update itself is applied untimed"""
+    recorder = Recorder('bot.find_arbitrage_opportunities')
+    backtester = build_backtester()
+    feed, bot = backtester.feed, backtester.bot
+    updates = list(synthetic_updates(settings.scans, seed=1, jump_probability=0.01))
+    perf = time.perf_counter_ns
+    opportunities = 0
+
+    for _ in range(settings.rounds):
+        recorder.new_round()
+        gc.collect()
+        for recv_ns, exchange, symbol, bids, asks in updates:
+            feed._on_pro_orderbook(exchange, symbol, bids, asks, recv_ns // 1_000_000, recv_ns)
+            market_context = feed.market_contexts.get('BTC/USDT')
+            start = perf()
+            found = bot.find_arbitrage_opportunities(bot.scan_symbols, market_context)
+            recorder.add_sample(perf() - start)
+            opportunities += len(found or ())
+
+    market_context = feed.market_contexts.get('BTC/USDT')
+    recorder.trace_calls(bot.find_arbitrage_opportunities,
+                         [(bot.scan_symbols, market_context)] * min(settings.alloc_calls, settings.scans))
+    recorder.extra['opportunities_per_scan'] = opportunities / max(len(recorder.samples_ns), 1)
+    return recorder.result()
+
+
+# ==================== ORDER DISPATCH ====================
+
+ORDER_BALANCES = {'binance': {'BTC': 1e6, 'USDT': 1e12}}
+
+
+@benchmark('orders.execute_order')
+def execute_order(settings: Settings) -> BenchmarkResult:
+    """SmartOrderChaser limit orders against the backtester's simulated exchange.
+
+    Order arrival and matching run on the simulated clock between calls,
+    outside the timed region; sides alternate so balances stay level.
+    """
+    recorder = Recorder('orders.execute_order')
+    backtester = build_backtester(balances=ORDER_BALANCES)
+    chaser = backtester.bot.order_executor.order_chaser
+    exchange = backtester.exchanges['binance']
+    clock = backtester.clock
+    perf = time.perf_counter_ns
+    filled = 0
+
+    async def place(side: str):
+        return await chaser.execute_order(exchange, 'BTC/USDT', side, 0.001)
+
+    async def run():
+        nonlocal filled
+        await place('buy')  # builds the order template outside the timed region
+        for _ in range(settings.rounds):
+            recorder.new_round()
+            gc.collect()
+            for i in range(settings.orders):
+                start = perf()
+                order = await place('buy' if i % 2 == 0 else 'sell')
+                recorder.add_sample(perf() - start)
+                clock.run_until(clock.now_ns + 1_000_000_000)
+                filled += order is not None and exchange.orders[order['id']].status == 'closed'
+
+        sides = [('buy' if i % 2 == 0 else 'sell',) for i in range(min(settings.alloc_calls, settings.orders))]
+        await recorder.trace_async_calls(place, sides)
+
+    asyncio.run(run())
+    recorder.extra['filled_ratio'] = filled / max(len(recorder.samples_ns), 1)
+    return recorder.result()
+
+
+# ==================== PIPELINES ====================
+
+def _pipeline_case(venue: str):
+    @benchmark(f'pipeline.{venue}', kind='macro')
+    def pipeline(settings: Settings) -> BenchmarkResult:
+        """Raw frame to decision: decode, client book, feed, top-of-book listener and evaluate_tick"""
+        frames, snapshot = venue_frames(venue, settings)
+        recorder = Recorder(f'pipeline.{venue}', kind='macro')
+        args = [(frame,) for frame in frames]
+
+        async def connect() -> Callable:
+            backtester = build_backtester(decision_mode='event')
+            client = await sync_client(venue, snapshot)
+            client.subscribe(backtester.feed._handle_websocket_data)
+
+            async def parse(frame: str):
+                await client._handle_message(loads(frame))
+
+            return parse
+
+        async def run():
+            for _ in range(settings.rounds):
+                parse = await connect()
+                recorder.new_round()
+                await recorder.time_async_calls(parse, args)
+            parse = await connect()
+            await recorder.trace_async_calls(parse, args[:settings.alloc_calls])
+
+        asyncio.run(run())
+        return recorder.result()
+
+
+for _venue in VENUES:
+    _pipeline_case(_venue)
+
+
+@benchmark('backtest.event', kind='macro')
+def backtest_event(settings: Settings) -> BenchmarkResult:
+    """Per book update through the event-driven backtest loop, executions included"""
+    recorder = Recorder('backtest.event', kind='macro')
+    updates = list(synthetic_updates(settings.updates, seed=2))
+    perf = time.perf_counter_ns
+    trades = 0
+
+    async def run():
+        nonlocal trades
+        for _ in range(settings.rounds):
+            backtester = Backtester(decision_mode='event', seed=2)
+            on_orderbook, advance = backtester.feed._on_pro_orderbook, backtester.advance
+            recorder.new_round()
+            gc.collect()
+            for recv_ns, exchange, symbol, bids, asks in updates:
+                start = perf()
+                await advance(recv_ns)
+                on_orderbook(exchange, symbol, bids, asks, recv_ns // 1_000_000, recv_ns)
+                recorder.add_sample(perf() - start)
+            trades += backtester.trades_attempted
+
+        backtester = Backtester(decision_mode='event', seed=2)
+
+        async def step(recv_ns, exchange, symbol, bids, asks):
+            await backtester.advance(recv_ns)
+            backtester.feed._on_pro_orderbook(exchange, symbol, bids, asks, recv_ns // 1_000_000, recv_ns)
+
+        await recorder.trace_async_calls(step, updates[:settings.alloc_calls])
+
+    asyncio.run(run())
+    recorder.extra['trades_per_round'] = trades / settings.rounds
+    return recorder.result()
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from exchange_simulator import BinanceUSSimulator, KrakenSimulator, CoinbaseSimulator, Connection
+from exchanges_websocket import BinanceUSWebSocket, KrakenWebSocket, CoinbaseWebSocket
+from backtester import Backtester, synthetic_updates
+from message_decoding import loads
+
+logger = logging.getLogger(__name__)
+
+# Venue -> (simulator class, simulated symbol, client factory, subscription messages the client sends)
+VENUES = {
+    'binance': (
+        BinanceUSSimulator, 'BTC/USDT',
+        lambda: BinanceUSWebSocket("btcusdt"),
+        []
+    ),
+    'kraken': (
+        KrakenSimulator, 'BTC/USD',
+        lambda: KrakenWebSocket("XBT/USD"),
+        [{'event': 'subscribe', 'pair': ['XBT/USD'], 'subscription': {'name': 'book', 'depth': 10}}]
+    ),
+    'coinbase': (
+        CoinbaseSimulator, 'BTC/USD',
+        lambda: CoinbaseWebSocket("BTC-USD"),
+        [{'type': 'subscribe', 'channel': 'level2', 'product_ids': ['BTC-USD']}]
+    )
+}
+
+BINANCE_STREAMS = ('btcusdt@depth', 'btcusdt@trade')
+
+
+class _CaptureSocket:
+    """Stands in for a WebSocketResponse and keeps every frame sent to it"""
+
+    def __init__(self):
+        self.frames = []
+
+    async def send_str(self, message: str):
+        self.frames.append(message)
+
+
+async def _record_frames(venue: str, count: int, trade_ratio: float, seed: int) -> Tuple[List[str], Dict]:
+    simulator_class, symbol, _, subscriptions = VENUES[venue]
+    simulator = simulator_class({symbol: 60000.0}, trade_ratio=trade_ratio, seed=seed)
+    book = simulator.books[symbol]
+
+    socket = _CaptureSocket()
+    connection = Connection(socket)
+    if venue == 'binance':
+        connection.subscriptions.update(BINANCE_STREAMS)
+    for message in subscriptions:
+        await simulator.on_message(connection, message)
+    simulator.connections.add(connection)
+    snapshot = simulator.depth_snapshot(book) if venue == 'binance' else None
+
+    rng = simulator.rng
+    for _ in range(count):
+        if rng.random() < trade_ratio:
+            await simulator.emit_trade(book, book.trade())
+        else:
+            await simulator.emit_depth(book, book.step())
+    return socket.frames, snapshot
+
+
+def record_frames(venue: str, count: int = 20000, trade_ratio: float = 0.1, seed: int = 0) -> Tuple[List[str], Dict]:
+    """Protocol-accurate raw frames for one venue from the exchange simulator.
+
+    Returns (frames, snapshot): Binance streams need the REST depth snapshot
+    (applied before the first frame); Kraken and Coinbase frames start with
+    the subscription acknowledgement and book snapshot.
+    """
+    return asyncio.run(_record_frames(venue, count, trade_ratio, seed))
+
+
+def new_client(venue: str):
+    """An unconnected client that parses frames without touching the network"""
+    client = VENUES[venue][2]()
+    client.replaying = True
+    return client
+
+
+async def sync_client(venue: str, snapshot: Dict):
+    client = new_client(venue)
+    if snapshot is not None:
+        await client._apply_snapshot(snapshot)
+    return client
+
+
+async def _client_payloads(venue: str, frames: List[str], snapshot: Dict) -> List[Dict]:
+    payloads = []
+
+    async def collect(data: Dict):
+        payloads.append(data)
+
+    client = new_client(venue)
+    client.subscribe(collect)
+    if snapshot is not None:
+        await client._apply_snapshot(snapshot)
+    for frame in frames:
+        await client._handle_message(loads(frame))
+    return payloads
+
+
+def client_payloads(venue: str, frames: List[str], snapshot: Dict) -> List[Dict]:
+    """The callback payloads a client hands to WebSocketFeed for these frames"""
+    return asyncio.run(_client_payloads(venue, frames, snapshot))
+
+
+def build_backtester(updates: int = 2000, seed: int = 0, jump_probability: float = 0.002,
+                     decision_mode: str = 'scan', balances: Optional[Dict] = None) -> Backtester:
+    """Offline bot attached to a WebSocketFeed whose books are warmed with synthetic updates.
+
+    In scan mode the backtester's own listener never evaluates ticks, so
+    each micro benchmark drives exactly the call path it measures.
+    """
+    backtester = Backtester(decision_mode=decision_mode, balances=balances, seed=seed)
+    for recv_ns, exchange, symbol, bids, asks in synthetic_updates(updates, seed=seed, jump_probability=jump_probability):
+        backtester.feed._on_pro_orderbook(exchange, symbol, bids, asks, recv_ns // 1_000_000, recv_ns)
+    return backtester
@@ -0,0 +1,256 @@
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BenchmarkResult:
+    """Latency distribution, throughput and allocations of one benchmarked call path"""
+    name: str
+    kind: str                    # 'micro' (one function) or 'macro' (a pipeline, per message)
+    calls: int
+    p50_us: float
+    p99_us: float
+    mean_us: float
+    max_us: float
+    throughput_per_s: float      # calls per second of time spent inside the measured path
+    alloc_peak_bytes: float      # transient: peak traced memory above the pre-call level, per call
+    alloc_retained_bytes: float  # net traced memory still held after the call, per call
+    extra: Dict = field(default_factory=dict)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    """Collects per-call timings and allocation samples for one benchmark.
+
+    Timing and allocation tracking run in separate passes: tracemalloc slows
+    every allocation down, so it is only switched on for the allocation pass.
+    """
+
+    def __init__(self, name: str, kind: str = 'micro'):
+        self.name = name
+        self.kind = kind
+        self.samples_ns = []
+        self.round_starts = []   # sample index where each timing round began
+        self.alloc_peak = 0
+        self.alloc_retained = 0
+        self.alloc_calls = 0
+        self.extra = {}
+
+    # ==================== TIMING ====================
+
+    def new_round(self):
+        self.round_starts.append(len(self.samples_ns))
+
+    def time_calls(self, func: Callable, args_list: List[tuple]):
+        """Time func(*args) for every args tuple, in order"""
+        perf = time.perf_counter_ns
+        samples = self.samples_ns
+        gc.collect()
+        for args in args_list:
+            start = perf()
+            func(*args)
+            samples.append(perf() - start)
+
+    async def time_async_calls(self, func: Callable, args_list: List[tuple]):
+        perf = time.perf_counter_ns
+        samples = self.samples_ns
+        gc.collect()
+        for args in args_list:
+            start = perf()
+            await func(*args)
+            samples.append(perf() - start)
+
+    def add_sample(self, elapsed_ns: int):
+        self.samples_ns.append(elapsed_ns)
+
+    # ==================== ALLOCATIONS ====================
+
+    def trace_calls(self, func: Callable, args_list: List[tuple]):
+        """Allocation pass: per-call peak and retained traced memory"""
+        tracemalloc.start()
+        try:
+            for args in args_list:
+                before = self._before_call()
+                func(*args)
+                self._after_call(before)
+        finally:
+            tracemalloc.stop()
+
+    async def trace_async_calls(self, func: Callable, args_list: List[tuple]):
+        tracemalloc.start()
+        try:
+            for args in args_list:
+                before = self._before_call()
+                await func(*args)
+                self._after_call(before)
+        finally:
+            tracemalloc.stop()
+
+    def _before_call(self) -> int:
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    def _after_call(self, before: int):
+        current, peak = tracemalloc.get_traced_memory()
+        self.alloc_peak += peak - before
+        self.alloc_retained += current - before
+        self.alloc_calls += 1
+
+    # ==================== RESULT ====================
+
+    def round_medians_us(self) -> List[float]:
+        bounds = self.round_starts + [len(self.samples_ns)]
+        return [
+            statistics.median(self.samples_ns[start:end]) / 1000
+            for start, end in zip(bounds, bounds[1:]) if end > start
+        ]
+
+    def result(self) -> BenchmarkResult:
+        self.extra.update(summarize_rounds(self.round_medians_us()))
+        samples = sorted(self.samples_ns)
+        total_ns = sum(samples)
+        alloc_calls = max(self.alloc_calls, 1)
+        return BenchmarkResult(
+            name=self.name,
+            kind=self.kind,
+            calls=len(samples),
+            p50_us=percentile(samples, 50) / 1000,
+            p99_us=percentile(samples, 99) / 1000,
+            mean_us=(total_ns / len(samples) / 1000) if samples else 0.0,
+            max_us=(samples[-1] / 1000) if samples else 0.0,
+            throughput_per_s=(len(samples) / (total_ns / 1e9)) if total_ns else 0.0,
+            alloc_peak_bytes=self.alloc_peak / alloc_calls,
+            alloc_retained_bytes=self.alloc_retained / alloc_calls,
+            extra=self.extra
+        )
+
+
+# ==================== RESULT FILES ====================
+
+def environment() -> Dict:
+    """Commit and machine details stored with every result file"""
+    commit = None
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ).stdout.strip() or None
+    except Exception as e:
+        logger.debug(f"Could not read git commit: {e}")
+    return {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def save_results(results: List[BenchmarkResult], path: str, settings: Optional[Dict] = None) -> Dict:
+    document = {
+        'environment': environment(),
+        'settings': settings or {},
+        'benchmarks': {result.name: result.to_dict() for result in results}
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2)
+    return document
+
+
+def load_results(path: str) -> Dict:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+COMPARED_METRICS = ('p50_us', 'p99_us', 'alloc_peak_bytes')
+
+
+def compare_results(baseline: Dict, current: Dict, max_regression_pct: float = 20.0) -> List[Dict]:
+    """Per-benchmark metric changes between two result documents.
+
+    A metric regresses when it grew by more than max_regression_pct (latency
+    and allocation are lower-is-better). Benchmarks missing from either side
+    are skipped.
+    """
+    rows = []
+    for name, new in current.get('benchmarks', {}).items():
+        old = baseline.get('benchmarks', {}).get(name)
+        if old is None:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = old.get(metric, 0.0), new.get(metric, 0.0)
+            if before <= 0:
+                continue
+            change_pct = (after - before) / before * 100
+            rows.append({
+                'benchmark': name,
+                'metric': metric,
+                'baseline': before,
+                'current': after,
+                'change_pct': change_pct,
+                'regression': change_pct > max_regression_pct
+            })
+    return rows
+
+
+def format_results(results: List[BenchmarkResult]) -> str:
+    lines = [
+        f"{'benchmark':38} {'calls':>8} {'p50 us':>9} {'p99 us':>9} {'mean us':>9} "
+        f"{'calls/s':>11} {'peak B':>9} {'kept B':>8}"
+    ]
+    for r in results:
+        lines.append(
+            f"{r.name:38} {r.calls:8d} {r.p50_us:9.2f} {r.p99_us:9.2f} {r.mean_us:9.2f} "
+            f"{r.throughput_per_s:11,.0f} {r.alloc_peak_bytes:9.0f} {r.alloc_retained_bytes:8.0f}"
+        )
+    return '\n'.join(lines)
+
+
+def format_comparison(rows: List[Dict]) -> str:
+    lines = [f"{'benchmark':38} {'metric':17} {'baseline':>10} {'current':>10} {'change':>8}"]
+    for row in rows:
+        flag = '  ❌' if row['regression'] else ''
+        lines.append(
+            f"{row['benchmark']:38} {row['metric']:17} {row['baseline']:10.2f} {row['current']:10.2f} "
+            f"{row['change_pct']:+7.1f}%{flag}"
+        )
+    return '\n'.join(lines)
+
+
+def summarize_rounds(round_medians_us: List[float]) -> Dict:
+    """Spread of per-round medians, to tell noise from real changes"""
+    if len(round_medians_us) < 2:
+        return {}
+    return {
+        'round_p50_us': [round(value, 3) for value in round_medians_us],
+        'round_p50_stdev_us': round(statistics.stdev(round_medians_us), 3)
+    }
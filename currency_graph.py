@@ -0,0 +1,266 @@
+import logging
+import math
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CycleLeg:
+    """One trade in an arbitrage cycle"""
+    exchange: str
+    symbol: str
+    side: str            # 'buy' (quote -> base at the ask) or 'sell' (base -> quote at the bid)
+    price: float
+    from_currency: str
+    to_currency: str
+
+
+@dataclass
+class ArbitrageCycle:
+    """Profitable currency cycle; rate is the product of the legs' effective rates"""
+    legs: List[CycleLeg]
+    rate: float
+    start_currency: str
+    exchanges: List[str] = field(default_factory=list)
+
+    @property
+    def profit_pct(self) -> float:
+        return (self.rate - 1.0) * 100
+
+    @property
+    def kind(self) -> str:
+        return 'triangular' if len(self.legs) >= 3 else 'cross_exchange'
+
+    def describe(self) -> str:
+        path = ' → '.join(
+            [f"{self.legs[0].from_currency}@{self.legs[0].exchange}"]
+            + [f"{leg.to_currency}@{leg.exchange}" for leg in self.legs]
+        )
+        return f"{path} | {self.profit_pct:+.3f}%"
+
+    def __str__(self) -> str:
+        return f"[{', '.join(self.exchanges)}]: {self.describe()}"
+
+
+class CurrencyGraph:
+    """Currency graph for multi-leg arbitrage with incremental negative-cycle detection.
+
+    Nodes are (exchange, currency). Each (exchange, market) adds two edges:
+    quote -> base (buy at the ask) and base -> quote (sell at the bid), weighted
+    by -log(effective rate after the taker fee), so a cycle whose rates
+    multiply to more than 1 is a negative cycle. With cross_exchange enabled,
+    the same currency on two venues is linked by zero-weight edges (inventory
+    is pre-positioned on every exchange).
+
+    Distance labels are kept as a feasible potential (d[v] <= d[u] + w for
+    every active edge). A quote update can only break that for the two edges
+    it touched, so SPFA restarts from just those edges: any new negative cycle
+    must run through one of them. Cycles found are suppressed until one of
+    their edges ticks again, which lets the labels converge.
+    """
+
+    def __init__(self, fee_lookup: Optional[Callable[[str], float]] = None,
+                 min_profit_pct: float = 0.0, cross_exchange: bool = True):
+        self.fee_lookup = fee_lookup
+        self.min_profit_pct = min_profit_pct
+        self.cross_exchange = cross_exchange
+
+        self.nodes = []          # node -> (exchange, currency)
+        self.node_index = {}     # (exchange, currency) -> node
+        self.out_edges = []      # node -> [edge, ...]
+
+        self.edge_src = []
+        self.edge_dst = []
+        self.edge_weight = []
+        self.edge_price = []
+        self.edge_info = []      # edge -> (exchange, symbol, side) or None for transfers
+        self.market_edges = {}   # (symbol, exchange) -> (buy_edge, sell_edge)
+
+        self.dist = []
+        self.pred = []           # node -> edge that last lowered its label, -1 if none
+        self.suppressed = {}     # edge -> edges of the reported cycle it belongs to
+
+    # ==================== GRAPH BUILDING ====================
+
+    def _node(self, exchange: str, currency: str) -> int:
+        node = self.node_index.get((exchange, currency))
+        if node is not None:
+            return node
+
+        node = len(self.nodes)
+        self.nodes.append((exchange, currency))
+        self.node_index[(exchange, currency)] = node
+        self.out_edges.append([])
+        self.dist.append(0.0)
+        self.pred.append(-1)
+
+        if self.cross_exchange:
+            for (other_exchange, other_currency), other in list(self.node_index.items()):
+                if other_currency == currency and other_exchange != exchange:
+                    self._edge(node, other, 0.0, None)
+                    self._edge(other, node, 0.0, None)
+        return node
+
+    def _edge(self, src: int, dst: int, weight: float, info: Optional[Tuple[str, str, str]]) -> int:
+        edge = len(self.edge_src)
+        self.edge_src.append(src)
+        self.edge_dst.append(dst)
+        self.edge_weight.append(weight)
+        self.edge_price.append(0.0)
+        self.edge_info.append(info)
+        self.out_edges[src].append(edge)
+        return edge
+
+    def _market(self, symbol: str, exchange: str) -> Tuple[int, int]:
+        edges = self.market_edges.get((symbol, exchange))
+        if edges is None:
+            base, quote = symbol.split('/')
+            base_node = self._node(exchange, base)
+            quote_node = self._node(exchange, quote)
+            edges = (
+                self._edge(quote_node, base_node, math.inf, (exchange, symbol, 'buy')),
+                self._edge(base_node, quote_node, math.inf, (exchange, symbol, 'sell'))
+            )
+            self.market_edges[(symbol, exchange)] = edges
+        return edges
+
+    # ==================== UPDATES ====================
+
+    def update_quote(self, symbol: str, exchange: str, bid: float, ask: float) -> List[ArbitrageCycle]:
+        """Apply one top-of-book change and return the profitable cycles it created"""
+        edge_count = len(self.edge_src)
+        buy_edge, sell_edge = self._market(symbol, exchange)
+        fee = self.fee_lookup(exchange) if self.fee_lookup is not None else 0.0
+
+        # Edges created for a new market (including transfer links) are checked too
+        touched = [buy_edge, sell_edge]
+        touched.extend(range(edge_count, len(self.edge_src)))
+        if bid > 0 and ask > 0:
+            self._set_weight(buy_edge, -math.log((1.0 - fee) / ask), ask)
+            self._set_weight(sell_edge, -math.log(bid * (1.0 - fee)), bid)
+        else:
+            self._set_weight(buy_edge, math.inf, 0.0)
+            self._set_weight(sell_edge, math.inf, 0.0)
+
+        # A tick on any edge of a suppressed cycle re-arms the whole cycle
+        for edge in (buy_edge, sell_edge):
+            cycle_edges = self.suppressed.get(edge)
+            if cycle_edges:
+                for cycle_edge in cycle_edges:
+                    self.suppressed.pop(cycle_edge, None)
+                touched.extend(cycle_edges)
+
+        return self._relax_from(touched)
+
+    def invalidate(self, symbol: str, exchange: str) -> List[ArbitrageCycle]:
+        """Remove a market whose quote is no longer usable"""
+        if (symbol, exchange) not in self.market_edges:
+            return []
+        return self.update_quote(symbol, exchange, 0.0, 0.0)
+
+    def update_from_table(self, book_table) -> List[ArbitrageCycle]:
+        """Load every quote of a TopOfBookTable (polling mode / warm start)"""
+        cycles = []
+        for slot, (symbol, exchange) in enumerate(book_table.keys):
+            if '/' in symbol:
+                cycles.extend(self.update_quote(symbol, exchange, book_table.bid[slot], book_table.ask[slot]))
+        return cycles
+
+    def _set_weight(self, edge: int, weight: float, price: float):
+        self.edge_weight[edge] = weight
+        self.edge_price[edge] = price
+
+    # ==================== INCREMENTAL SPFA ====================
+
+    def _relax_from(self, edges: List[int]) -> List[ArbitrageCycle]:
+        dist, pred = self.dist, self.pred
+        weight, src, dst = self.edge_weight, self.edge_src, self.edge_dst
+        suppressed = self.suppressed
+
+        queue = deque()
+        queued = set()
+        for edge in edges:
+            u = src[edge]
+            if u not in queued:
+                queue.append(u)
+                queued.add(u)
+
+        cycles = []
+        budget = len(self.nodes) * max(len(self.edge_src), 1)
+        while queue and budget > 0:
+            u = queue.popleft()
+            queued.discard(u)
+            for edge in self.out_edges[u]:
+                if edge in suppressed:
+                    continue
+                candidate = dist[u] + weight[edge]
+                v = dst[edge]
+                if candidate < dist[v] - 1e-15:
+                    budget -= 1
+                    dist[v] = candidate
+                    pred[v] = edge
+                    cycle_edges = self._find_cycle(v)
+                    if cycle_edges:
+                        cycle = self._build_cycle(cycle_edges)
+                        for cycle_edge in cycle_edges:
+                            suppressed[cycle_edge] = cycle_edges
+                        if cycle is not None:
+                            cycles.append(cycle)
+                    if v not in queued:
+                        queue.append(v)
+                        queued.add(v)
+        return cycles
+
+    def _find_cycle(self, start: int) -> Optional[List[int]]:
+        """Walk predecessor edges back from start; returns the cycle's edges if it loops to start"""
+        pred, src = self.pred, self.edge_src
+        path = []
+        node = start
+        for _ in range(len(self.nodes)):
+            edge = pred[node]
+            if edge < 0:
+                return None
+            path.append(edge)
+            node = src[edge]
+            if node == start:
+                path.reverse()
+                return path
+        return None
+
+    def _build_cycle(self, cycle_edges: List[int]) -> Optional[ArbitrageCycle]:
+        """Convert a negative cycle into trade legs; None when below the profit threshold"""
+        total = sum(self.edge_weight[edge] for edge in cycle_edges)
+        if total >= 0:
+            return None
+        rate = math.exp(-total)
+        if (rate - 1.0) * 100 < self.min_profit_pct:
+            return None
+
+        # Start the cycle on its first trade so the legs read naturally
+        first_trade = next(i for i, edge in enumerate(cycle_edges) if self.edge_info[edge] is not None)
+        ordered = cycle_edges[first_trade:] + cycle_edges[:first_trade]
+
+        legs = []
+        for edge in ordered:
+            info = self.edge_info[edge]
+            if info is None:
+                continue
+            exchange, symbol, side = info
+            legs.append(CycleLeg(
+                exchange=exchange,
+                symbol=symbol,
+                side=side,
+                price=self.edge_price[edge],
+                from_currency=self.nodes[self.edge_src[edge]][1],
+                to_currency=self.nodes[self.edge_dst[edge]][1]
+            ))
+
+        exchanges = []
+        for leg in legs:
+            if leg.exchange not in exchanges:
+                exchanges.append(leg.exchange)
+
+        return ArbitrageCycle(legs=legs, rate=rate, start_currency=legs[0].from_currency, exchanges=exchanges)
@@ -1,15 +1,13 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-import ccxt
 import os
 import json
 import time
 import threading
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
+from state_snapshot import read_snapshot
 
-load_dotenv('/Users/dj3bosmacbookpro/Desktop/.env')
 
 FEE_STATE_PATH = '/Users/dj3bosmacbookpro/Desktop/QUANT_bot/fee_state.json'
 
@@ -210,69 +208,43 @@ footer {visibility: hidden;}
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_resource(ttl=300)
-def initialize_exchanges():
-    exchanges = {}
-    configs = {
-        'kraken': {
-            'class': ccxt.kraken,
-            'key': os.getenv('KRAKEN_KEY'),
-            'secret': os.getenv('KRAKEN_SECRET')
-        },
-        'binance': {
-            'class': ccxt.binanceus,
-            'key': os.getenv('BINANCE_KEY'),
-            'secret': os.getenv('BINANCE_SECRET')
-        },
-        'coinbase': {
-            'class': ccxt.coinbaseadvanced,
-            'key': os.getenv('COINBASE_KEY'),
-            'secret': os.getenv('COINBASE_SECRET').replace('\\n', '\n') if os.getenv('COINBASE_SECRET') else ''
-        }
-    }
-    
-    for name, config in configs.items():
-        try:
-            if not config['key'] or not config['secret']:
-                exchanges[name] = {'status': "❌ NO KEY", 'client': None}
-                continue
+# Published by the orchestrator (monitoring.state_snapshot_path); the dashboard never calls the exchanges
+SNAPSHOT_PATH = '/Users/dj3bosmacbookpro/Desktop/QUANT_bot/logs/state_snapshot.bin'
+SNAPSHOT_STALE_SECONDS = 10
+EXCHANGES = ['kraken', 'binance', 'coinbase']
+BTC_SYMBOLS = {'binance': 'BTC/USDT'}  # quote used for BTC valuation, BTC/USD elsewhere
 
-            exchange = config['class']({
-                'apiKey': config['key'],
-                'secret': config['secret'],
-                'enableRateLimit': True,
-            })
+@st.cache_data(ttl=1)
+def load_snapshot():
+    return read_snapshot(SNAPSHOT_PATH)
 
-            exchange.fetch_time()
-            exchanges[name] = {
-                'client': exchange,
-                'status': "✅ ONLINE",
-                'last_check': datetime.now()
-            }
-            
-        except Exception as e:
-            exchanges[name] = {
-                'client': None,
-                'status': f"❌ ERROR: {str(e)[:50]}",
-                'last_check': datetime.now()
-            }
-    
-    return exchanges
+def snapshot_online(snapshot):
+    return bool(snapshot) and snapshot.get('status') == 'running' and snapshot['age_seconds'] < SNAPSHOT_STALE_SECONDS
+
+def snapshot_quote(snapshot, symbol, exchange):
+    return snapshot.get('prices', {}).get(symbol, {}).get(exchange) if snapshot else None
+
+def snapshot_mid(snapshot, symbol, exchange=None):
+    """Mid price on one exchange, or the first exchange quoting the symbol"""
+    quotes = snapshot.get('prices', {}).get(symbol, {}) if snapshot else {}
+    quote = quotes.get(exchange) if exchange else next(iter(quotes.values()), None)
+    return (quote['bid'] + quote['ask']) / 2 if quote else 0
 
-@st.cache_data(ttl=10)
 def fetch_exchange_balances():
-    exchanges = initialize_exchanges()
+    snapshot = load_snapshot()
+    online = snapshot_online(snapshot)
     balance_data = []
     total_value = 0
     total_btc = 0
     total_gold = 0
     
-    for name, data in exchanges.items():
-        if data['status'] != "✅ ONLINE" or not data['client']:
+    for name in EXCHANGES:
+        balances = snapshot.get('balances', {}).get(name) if snapshot else None
+        if not online or not balances:
             balance_data.append({
                 'Exchange': name.upper(),
                 'Total': 0,
-                'Status': data['status'],
+                'Status': "❌ NO DATA" if online else "❌ BOT OFFLINE",
                 'Details': {},
                 'Primary': 'N/A',
                 'BTC': 0,
@@ -280,127 +252,88 @@ def fetch_exchange_balances():
             })
             continue
 
-        try:
-            client = data['client']
-            balance = client.fetch_balance()
-            
-            symbol = 'BTC/USDT' if name == 'binance' else 'BTC/USD'
-            ticker = client.fetch_ticker(symbol)
-            btc_price = ticker['last']
-            
-            exchange_total = 0
-            asset_details = {}
-            btc_amount = 0
-            gold_amount = 0
-            
-            for asset, amount in balance['total'].items():
-                if amount > 0:
-                    if asset in ['USD', 'USDT', 'USDC']:
-                        value = amount
-                    elif asset == 'BTC':
-                        value = amount * btc_price
-                        btc_amount = amount
-                        total_btc += amount
-                    elif asset == 'ETH':
-                        try:
-                            eth_price = client.fetch_ticker('ETH/USD')['last']
-                            value = amount * eth_price
-                        except:
-                            value = amount * btc_price * 0.05
-                    elif asset == 'PAXG':
-                        try:
-                            paxg_price = client.fetch_ticker('PAXG/USD')['last']
-                            value = amount * paxg_price
-                            gold_amount = amount
-                            total_gold += amount
-                        except:
-                            value = amount * btc_price
-                            gold_amount = amount
-                            total_gold += amount
-                    else:
-                        continue
-                    
-                    exchange_total += value
-                    asset_details[asset] = {
-                        'amount': amount,
-                        'value': value
-                    }
-            
-            primary_asset = 'Mixed'
-            if asset_details:
-                max_asset = max(asset_details.items(), key=lambda x: x[1]['value'])
-                primary_pct = (max_asset[1]['value'] / exchange_total * 100) if exchange_total > 0 else 0
-                if primary_pct > 50:
-                    primary_asset = f"{max_asset[0]}: {primary_pct:.1f}%"
-            
-            total_value += exchange_total
-            
-            balance_data.append({
-                'Exchange': name.upper(),
-                'Total': exchange_total,
-                'Status': data['status'],
-                'Details': asset_details,
-                'Primary': primary_asset,
-                'BTC': btc_amount,
-                'GOLD': gold_amount
-            })
-            
-        except Exception as e:
-            balance_data.append({
-                'Exchange': name.upper(),
-                'Total': 0,
-                'Status': f"❌ ERROR: {str(e)[:30]}",
-                'Details': {},
-                'Primary': 'N/A',
-                'BTC': 0,
-                'GOLD': 0
-            })
+        btc_price = (snapshot_mid(snapshot, BTC_SYMBOLS.get(name, 'BTC/USD'), name)
+                     or snapshot_mid(snapshot, 'BTC/USD') or snapshot_mid(snapshot, 'BTC/USDT'))
+        paxg_price = snapshot_mid(snapshot, 'PAXG/USD', name) or snapshot_mid(snapshot, 'PAXG/USD')
+        
+        exchange_total = 0
+        asset_details = {}
+        btc_amount = 0
+        gold_amount = 0
+        
+        for asset, amount in balances['total'].items():
+            if amount > 0:
+                if asset in ['USD', 'USDT', 'USDC']:
+                    value = amount
+                elif asset == 'BTC':
+                    value = amount * btc_price
+                    btc_amount = amount
+                    total_btc += amount
+                elif asset == 'PAXG':
+                    value = amount * (paxg_price or btc_price)
+                    gold_amount = amount
+                    total_gold += amount
+                elif asset == 'BNB':
+                    value = amount * snapshot_mid(snapshot, 'BNB/USDT')
+                else:
+                    continue
+                
+                exchange_total += value
+                asset_details[asset] = {
+                    'amount': amount,
+                    'value': value
+                }
+        
+        primary_asset = 'Mixed'
+        if asset_details:
+            max_asset = max(asset_details.items(), key=lambda x: x[1]['value'])
+            primary_pct = (max_asset[1]['value'] / exchange_total * 100) if exchange_total > 0 else 0
+            if primary_pct > 50:
+                primary_asset = f"{max_asset[0]}: {primary_pct:.1f}%"
+        
+        total_value += exchange_total
+        
+        balance_data.append({
+            'Exchange': name.upper(),
+            'Total': exchange_total,
+            'Status': "✅ ONLINE",
+            'Details': asset_details,
+            'Primary': primary_asset,
+            'BTC': btc_amount,
+            'GOLD': gold_amount
+        })
     
     return balance_data, total_value, total_btc, total_gold
 
-@st.cache_data(ttl=5)
 def fetch_realtime_prices():
-    exchanges = initialize_exchanges()
+    snapshot = load_snapshot()
+    online = snapshot_online(snapshot)
     price_data = []
     
-    for name, data in exchanges.items():
-        if data['status'] != "✅ ONLINE" or not data['client']:
+    for name in EXCHANGES:
+        quote = snapshot_quote(snapshot, BTC_SYMBOLS.get(name, 'BTC/USD'), name) if online else None
+        if not quote:
             price_data.append({
                 'exchange': name.upper(),
                 'btc_price': 0,
                 'latency_ms': 0,
-                'status': data['status'],
+                'status': "❌ NO QUOTE" if online else "❌ BOT OFFLINE",
                 'bid': 0,
                 'ask': 0
             })
             continue
         
-        try:
-            client = data['client']
-            start_time = time.time()
-            symbol = 'BTC/USDT' if name == 'binance' else 'BTC/USD'
-            ticker = client.fetch_ticker(symbol)
-            latency_ms = int((time.time() - start_time) * 1000)
-            
-            price_data.append({
-                'exchange': name.upper(),
-                'btc_price': ticker['last'],
-                'latency_ms': latency_ms,
-                'status': "✅ ONLINE",
-                'bid': ticker['bid'],
-                'ask': ticker['ask'],
-                'volume': ticker['quoteVolume']
-            })
-            
-        except Exception as e:
-            price_data.append({
-                'exchange': name.upper(),
-                'btc_price': 0,
-                'latency_ms': 0,
-                'status': f"❌ {str(e)[:30]}",
-                'bid': 0,
-                'ask': 0
-            })
+        # How old the bot's view of the quote is (last book update on the bot's clock)
+        latency_ms = int(max(0.0, time.time() - quote['updated_at']) * 1000)
+        
+        price_data.append({
+            'exchange': name.upper(),
+            'btc_price': (quote['bid'] + quote['ask']) / 2,
+            'latency_ms': latency_ms,
+            'status': "✅ ONLINE",
+            'bid': quote['bid'],
+            'ask': quote['ask']
+        })
     
     return price_data
 
@@ -481,10 +414,7 @@ def calculate_arbitrage_opportunities(price_data):
 
 def get_system_status():
     try:
-        import subprocess
-        result = subprocess.run(['pgrep', '-f', 'system_orchestrator.py'], 
-                              capture_output=True, text=True)
-        if result.returncode == 0:
+        if snapshot_online(load_snapshot()):
             try:
                 with open('/Users/dj3bosmacbookpro/Desktop/QUANT_bot/current_mode.txt', 'r') as f:
                     mode = f.read().strip()
@@ -8,15 +8,21 @@ from typing import Dict, List, Optional, Any
 from exchanges_websocket import BinanceUSWebSocket, KrakenWebSocket, CoinbaseWebSocket
 from market_context import MarketContext, AuctionState, MarketPhase, MacroSignal
 from auction_context_module import AuctionContextModule
+from async_exchanges import call_exchange, apply_endpoint_override
+from top_of_book import TopOfBookTable
+from redundant_stream import RedundantStream
+from shm_feed import SharedMemoryFeed
 
 logger = logging.getLogger(__name__)
 
 class DataFeed:
     def __init__(self, exchanges: Dict):
         self.exchanges = exchanges
-        self.price_data = {}
+        self.price_data = {}  # symbol -> exchange -> quote and top levels (housekeeping, context)
+        self.book_table = TopOfBookTable()  # hot-path best bid/ask, updated in place
         self.market_contexts = {}  # symbol -> MarketContext
         self.auction_analyzer = AuctionContextModule()
+        self.recorder = None  # MarketRecorder for raw message capture (streaming feeds)
         
     async def start(self):
         raise NotImplementedError
@@ -27,8 +33,37 @@ class DataFeed:
     async def get_prices(self, symbols: List[str]) -> Dict:
         raise NotImplementedError
         
-    def update_market_context(self, symbol: str, exchange: str, bids: List, asks: List, last_price: float):
-        """Update market context with new order book data"""
+    def get_top_of_book(self, symbol: str, exchange: str) -> Optional[tuple]:
+        """Latest (best_bid, best_ask) for one exchange/symbol, or None"""
+        return self.book_table.get(symbol, exchange)
+        
+    def _store_quote(self, symbol: str, exchange: str, best_bid: float, best_ask: float,
+                     bids: Optional[List] = None, asks: Optional[List] = None, timestamp: Any = None) -> bool:
+        """Write a quote to the top-of-book table and update price_data in place.
+        
+        Returns True when the best bid or ask changed.
+        """
+        bid_size = bids[0][1] if bids and len(bids[0]) > 1 else 0.0
+        ask_size = asks[0][1] if asks and len(asks[0]) > 1 else 0.0
+        changed = self.book_table.update(symbol, exchange, best_bid, best_ask, bid_size, ask_size, time.time())
+        
+        symbol_data = self.price_data.get(symbol)
+        if symbol_data is None:
+            symbol_data = self.price_data[symbol] = {}
+        entry = symbol_data.get(exchange)
+        if entry is None:
+            entry = symbol_data[exchange] = {}
+        entry['bid'] = best_bid
+        entry['ask'] = best_ask
+        if bids is not None:
+            entry['bids'] = bids[:5]  # Top 5 bids for context
+            entry['asks'] = asks[:5]  # Top 5 asks for context
+        entry['timestamp'] = timestamp if timestamp is not None else time.time()
+        return changed
+        
+    def update_market_context(self, symbol: str, exchange: str, bids: List, asks: List, last_price: float,
+                              timestamp: Optional[float] = None):
+        """Update market context with new order book data; timestamp is the exchange event time in ms"""
         try:
             if symbol not in self.market_contexts:
                 self.market_contexts[symbol] = MarketContext(primary_symbol=symbol)
@@ -37,7 +72,9 @@ class DataFeed:
             context.timestamp = time.time()
             
             # Update auction context
-            context = self.auction_analyzer.analyze_order_book(bids, asks, last_price, context)
+            # Flow windows run on exchange time so replays and backtests cover market seconds, not wall seconds
+            event_time = timestamp / 1000 if timestamp is not None else None
+            context = self.auction_analyzer.analyze_order_book(bids, asks, last_price, context, exchange, event_time)
             
             # Update market phase based on auction state
             self._update_market_phase(context)
@@ -46,13 +83,26 @@ class DataFeed:
             self._update_execution_confidence(context)
             
             # Log significant context changes
-            if context.auction_state != AuctionState.BALANCED:
+            if context.auction_state != AuctionState.BALANCED and logger.isEnabledFor(logging.DEBUG):
                 logger.debug(f"Market Context [{symbol}]: {context.to_dict()}")
                 
         except Exception as e:
             logger.error(f"Error updating market context: {e}")
 
 
+    def update_trade_flow(self, symbol: str, price: float, quantity: float, side: Optional[str] = None,
+                          timestamp: Optional[float] = None):
+        """Fold a public trade into the symbol's order flow analytics and context; timestamp in ms"""
+        try:
+            context = self.market_contexts.get(symbol)
+            if context is None:
+                context = self.market_contexts[symbol] = MarketContext(primary_symbol=symbol)
+            event_time = timestamp / 1000 if timestamp is not None else None
+            self.auction_analyzer.on_trade(symbol, price, quantity, side, context, event_time)
+        except Exception as e:
+            logger.error(f"Error updating trade flow: {e}")
+
+
     def _update_market_phase(self, context: MarketContext):
         """Update market phase based on auction analysis"""
         if context.auction_state == AuctionState.IMBALANCED_BUYING:
@@ -89,11 +139,58 @@ class DataFeed:
 
 
 class WebSocketFeed(DataFeed):
+    # BTC pairs feed the spread scan; the rest complete the currency graph for multi-leg cycles
+    WATCH_SYMBOLS = [
+        'BTC/USDT', 'BTC/USDC', 'BTC/USD',
+        'BNB/BTC', 'BNB/USDT', 'BNB/USDC',
+        'PAXG/BTC', 'PAXG/USDT', 'PAXG/USD',
+        'USDC/USDT', 'USDT/USD', 'USDC/USD'
+    ]
+    # Custom WebSocket symbols when the venue's markets are unknown (ccxt.pro not initialized)
+    DEFAULT_STREAM_SYMBOLS = {'binance': ['BTC/USDT'], 'kraken': ['BTC/USD'], 'coinbase': ['BTC/USD']}
+    CLIENT_EXCHANGES = {'binance_us': 'binance', 'kraken': 'kraken', 'coinbase': 'coinbase'}
+    
     def __init__(self, exchanges: Dict):
         super().__init__(exchanges)
         self.running = False
         self.ws_connections = {}
         self.pro_exchanges = {}
+        self.shared_pro_exchanges = set()  # owned by AsyncExchangeManager, not closed here
+        self.top_of_book_listeners = []
+        self.endpoints = {}  # exchange name -> {'rest': ..., 'ws': ...} overrides (local simulator)
+        self.stream_connections = 2       # racing custom WebSocket connections per venue
+        self.stream_recycle_seconds = 60.0
+        self.feed_processes = False       # parse each venue in its own process, read via shared memory
+        self.process_feed = None
+        self.event_times = {}  # (symbol, exchange) -> exchange time (ms) of the last applied update
+        self.stale_updates = 0
+        
+    def subscribe_top_of_book(self, callback):
+        """Register callback(symbol, exchange, received_ns) fired when a best bid/ask changes"""
+        self.top_of_book_listeners.append(callback)
+        
+    def _is_stale(self, symbol: str, exchange: str, event_ms) -> bool:
+        """True when an update is older than the last one applied to this book.
+        
+        ccxt.pro and the custom connections feed the same books; whichever
+        delivers a newer exchange time first wins and late copies are dropped.
+        """
+        if event_ms is None:
+            return False
+        key = (symbol, exchange)
+        if event_ms < self.event_times.get(key, 0):
+            self.stale_updates += 1
+            return True
+        self.event_times[key] = event_ms
+        return False
+        
+    def _publish_top_of_book(self, symbol: str, exchange: str, received_ns: int):
+        """Notify listeners synchronously after the top of book moved"""
+        for callback in self.top_of_book_listeners:
+            try:
+                callback(symbol, exchange, received_ns)
+            except Exception as e:
+                logger.error(f"Top-of-book listener error: {e}")
         
     async def start(self):
         """Start WebSocket connections with proper authentication"""
@@ -120,6 +217,13 @@ class WebSocketFeed(DataFeed):
         """Initialize authenticated ccxt.pro exchanges"""
         for name, exch in self.exchanges.items():
             try:
+                # Async clients from AsyncExchangeManager are already ccxt.pro instances
+                if hasattr(exch, 'watch_order_book'):
+                    self.pro_exchanges[name] = exch
+                    self.shared_pro_exchanges.add(name)
+                    logger.info(f"✅ ccxt.pro {name.upper()} shared with async REST client")
+                    continue
+                
                 # Create ccxt.pro exchange with same config
                 if name == 'kraken':
                     pro_config = {
@@ -147,6 +251,8 @@ class WebSocketFeed(DataFeed):
                     }
                     self.pro_exchanges[name] = ccxtpro.coinbase(pro_config)
                 
+                apply_endpoint_override(self.pro_exchanges[name], self.endpoints.get(name))
+                
                 # Load markets for pro exchange
                 await self.pro_exchanges[name].load_markets()
                 logger.info(f"✅ ccxt.pro {name.upper()} initialized")
@@ -155,73 +261,128 @@ class WebSocketFeed(DataFeed):
                 logger.error(f"❌ Failed to init ccxt.pro {name}: {e}")
                 
     async def _init_custom_websockets(self):
-        """Initialize custom WebSocket connections"""
+        """Initialize custom WebSocket connections: several racing sockets per venue,
+        each multiplexing every watched symbol the venue lists"""
+        if self.feed_processes:
+            await self._start_feed_processes()
+            return
         try:
             # Binance
-            binance_ws = BinanceUSWebSocket("btcusdt")
-            await binance_ws.connect()
-            binance_ws.subscribe(self._handle_websocket_data)
-            self.ws_connections['binance'] = binance_ws
+            endpoint = self.endpoints.get('binance', {})
+            self.ws_connections['binance'] = await self._open_stream('binance', lambda symbols: BinanceUSWebSocket(
+                symbols, ws_url=endpoint.get('ws'), rest_url=endpoint.get('rest')))
             
             # Kraken
-            kraken_ws = KrakenWebSocket("XBT/USD")
-            await kraken_ws.connect()
-            kraken_ws.subscribe(self._handle_websocket_data)
-            self.ws_connections['kraken'] = kraken_ws
+            self.ws_connections['kraken'] = await self._open_stream('kraken', lambda symbols: KrakenWebSocket(
+                symbols, ws_url=self.endpoints.get('kraken', {}).get('ws')))
             
             # Coinbase
-            coinbase_ws = CoinbaseWebSocket("BTC-USD")
-            await coinbase_ws.connect()
-            coinbase_ws.subscribe(self._handle_websocket_data)
-            self.ws_connections['coinbase'] = coinbase_ws
+            self.ws_connections['coinbase'] = await self._open_stream('coinbase', lambda symbols: CoinbaseWebSocket(
+                symbols, ws_url=self.endpoints.get('coinbase', {}).get('ws')))
             
             logger.info("✅ Custom WebSocket connections established")
             
         except Exception as e:
             logger.error(f"❌ Custom WebSocket init failed: {e}")
             
-    async def _handle_websocket_data(self, data: Dict):
-        """Handle incoming WebSocket data from custom connections"""
+    async def _start_feed_processes(self):
+        """One feed handler process per venue in place of the in-process sockets"""
         try:
-            exchange = data.get('exchange', '')
-            data_type = data.get('type', '')
+            self.process_feed = SharedMemoryFeed(
+                {name: self._venue_symbols(name) for name in self.DEFAULT_STREAM_SYMBOLS}, self.endpoints
+            )
+            self.process_feed.subscribe(self._handle_websocket_data)
+            await self.process_feed.start()
+            logger.info("✅ Feed handler processes started")
+        except Exception as e:
+            logger.error(f"❌ Feed handler processes failed to start: {e}")
+            
+    def _venue_symbols(self, name: str) -> List[str]:
+        """WATCH_SYMBOLS the venue lists, from its ccxt.pro markets when loaded"""
+        markets = getattr(self.pro_exchanges.get(name), 'markets', None)
+        if not markets:
+            return list(self.DEFAULT_STREAM_SYMBOLS[name])
+        return [symbol for symbol in self.WATCH_SYMBOLS if symbol in markets]
+            
+    async def _open_stream(self, name: str, factory) -> RedundantStream:
+        stream = RedundantStream(name, factory, self._venue_symbols(name),
+                                 self.stream_connections, self.stream_recycle_seconds)
+        stream.recorder = self.recorder
+        stream.subscribe(self._handle_websocket_data)
+        await stream.connect()
+        return stream
+            
+    async def add_stream_symbols(self, exchange: str, symbols: List[str]):
+        """Subscribe symbols on a venue's open custom connections at runtime"""
+        stream = self.ws_connections.get(exchange)
+        if stream is None:
+            logger.warning(f"No custom WebSocket stream for {exchange}")
+            return
+        await stream.add_symbols(symbols)
+            
+    async def remove_stream_symbols(self, exchange: str, symbols: List[str]):
+        stream = self.ws_connections.get(exchange)
+        if stream is None:
+            return
+        await stream.remove_symbols(symbols)
+        if exchange in self.pro_exchanges:
+            return  # ccxt.pro keeps the quote fresh
+        for symbol in symbols:
+            self.book_table.invalidate(symbol, exchange)
+            self.price_data.get(symbol, {}).pop(exchange, None)
+            
+    def stream_stats(self) -> List[Dict]:
+        """Per-venue dedup counts and per-connection arrival lag of the racing connections"""
+        return [ws.get_stats() for ws in self.ws_connections.values() if isinstance(ws, RedundantStream)]
+            
+    def process_stats(self) -> List[Dict]:
+        """Per-venue records read, ring backlog, overruns and restarts of the feed handler processes"""
+        return self.process_feed.get_stats() if self.process_feed else []
             
-            if data_type == 'orderbook':
+    async def _handle_websocket_data(self, data):
+        """Handle a BookUpdate/TradeUpdate from the custom WebSocket clients"""
+        received_ns = time.perf_counter_ns()
+        try:
+            if data.type == 'orderbook':
                 # Map exchange names
-                if exchange == 'binance_us':
-                    exchange = 'binance'
-                    symbol = 'BTC/USDT'
-                elif exchange == 'kraken':
-                    symbol = 'BTC/USD'
-                elif exchange == 'coinbase':
-                    symbol = 'BTC/USD'
+                exchange = self.CLIENT_EXCHANGES.get(data.exchange)
+                if exchange is None:
+                    return
+                symbol = data.symbol
+                
+                # Levels come from the client's local book: float tuples, bids[0]/asks[0] are the real top of book
+                book = data.book
+                if book is None:
+                    # Copied out of a feed handler process, which already checked sync: empty means reset
+                    invalid = not data.bids or not data.asks
                 else:
+                    invalid = not book.synced or book.is_crossed()
+                if invalid:
+                    self.book_table.invalidate(symbol, exchange)
+                    self.price_data.get(symbol, {}).pop(exchange, None)
                     return
                 
-                # Extract best bid/ask
-                bids = data.get('bids', [])
-                asks = data.get('asks', [])
+                if self._is_stale(symbol, exchange, data.timestamp):
+                    return
                 
+                bids = data.bids
+                asks = data.asks
                 if bids and asks:
-                    best_bid = float(bids[0][0]) if bids[0] else None
-                    best_ask = float(asks[0][0]) if asks[0] else None
+                    best_bid = bids[0][0]
+                    best_ask = asks[0][0]
                     
                     if best_bid and best_ask:
                         # Update price data
-                        if symbol not in self.price_data:
-                            self.price_data[symbol] = {}
-                        
-                        self.price_data[symbol][exchange] = {
-                            'bid': best_bid,
-                            'ask': best_ask,
-                            'bids': bids[:5],  # Top 5 bids for context
-                            'asks': asks[:5],  # Top 5 asks for context
-                            'timestamp': data.get('timestamp', time.time())
-                        }
+                        if self._store_quote(symbol, exchange, best_bid, best_ask, bids, asks, data.timestamp):
+                            self._publish_top_of_book(symbol, exchange, received_ns)
                         
                         # Update market context
                         last_price = (best_bid + best_ask) / 2
-                        self.update_market_context(symbol, exchange, bids, asks, last_price)
+                        self.update_market_context(symbol, exchange, bids, asks, last_price, data.timestamp)
+            
+            elif data.type == 'trade':
+                # Trades feed cumulative delta and the volume profile
+                self.update_trade_flow(data.symbol, data.price, data.quantity, data.side, data.timestamp)
                         
         except Exception as e:
             logger.error(f"WebSocket data handling error: {e}")
@@ -231,16 +392,8 @@ class WebSocketFeed(DataFeed):
         tasks = []
         
         for name, pro_exch in self.pro_exchanges.items():
-            # Determine symbols to watch for this exchange
-            symbols = []
-            if 'BTC/USDT' in pro_exch.markets:
-                symbols.append('BTC/USDT')
-            if 'BTC/USDC' in pro_exch.markets:
-                symbols.append('BTC/USDC')
-            if 'BTC/USD' in pro_exch.markets:
-                symbols.append('BTC/USD')
-            
-            for symbol in symbols:
+            # Watch every listed symbol this exchange trades
+            for symbol in self.WATCH_SYMBOLS:
                 if symbol in pro_exch.markets:
                     tasks.append(self._watch_single_book(name, pro_exch, symbol))
         
@@ -252,32 +405,14 @@ class WebSocketFeed(DataFeed):
         while self.running:
             try:
                 orderbook = await exchange.watch_order_book(symbol)
+                received_ns = time.perf_counter_ns()
                 
-                if symbol not in self.price_data:
-                    self.price_data[symbol] = {}
+                bids = orderbook['bids'][:10]
+                asks = orderbook['asks'][:10]
+                if self.recorder:
+                    self.recorder.record_book(f"ccxtpro:{exch_name}", symbol, bids, asks, orderbook['timestamp'])
                 
-                # Extract best bid/ask
-                best_bid = orderbook['bids'][0][0] if orderbook['bids'] else None
-                best_ask = orderbook['asks'][0][0] if orderbook['asks'] else None
-                
-                if best_bid and best_ask:
-                    self.price_data[symbol][exch_name] = {
-                        'bid': best_bid,
-                        'ask': best_ask,
-                        'bids': orderbook['bids'][:5],
-                        'asks': orderbook['asks'][:5],
-                        'timestamp': orderbook['timestamp']
-                    }
-                    
-                    # Update market context
-                    last_price = (best_bid + best_ask) / 2
-                    self.update_market_context(
-                        symbol, 
-                        exch_name, 
-                        orderbook['bids'][:10], 
-                        orderbook['asks'][:10], 
-                        last_price
-                    )
+                self._on_pro_orderbook(exch_name, symbol, bids, asks, orderbook['timestamp'], received_ns)
                 
                 # Small sleep to prevent overwhelming
                 await exchange.sleep(0.01)
@@ -286,6 +421,23 @@ class WebSocketFeed(DataFeed):
                 logger.error(f"ccxt.pro WebSocket error on {exch_name} {symbol}: {e}")
                 await asyncio.sleep(5)
                 
+    def _on_pro_orderbook(self, exch_name: str, symbol: str, bids: List, asks: List,
+                          timestamp: Any, received_ns: int):
+        """Apply one ccxt.pro order book update (live or replayed)"""
+        # Extract best bid/ask
+        best_bid = bids[0][0] if bids else None
+        best_ask = asks[0][0] if asks else None
+        
+        if best_bid and best_ask:
+            if self._is_stale(symbol, exch_name, timestamp):
+                return
+            if self._store_quote(symbol, exch_name, best_bid, best_ask, bids, asks, timestamp):
+                self._publish_top_of_book(symbol, exch_name, received_ns)
+            
+            # Update market context
+            last_price = (best_bid + best_ask) / 2
+            self.update_market_context(symbol, exch_name, bids, asks, last_price, timestamp)
+            
     async def _fallback_to_custom_websockets(self):
         """Fall back to using only custom WebSockets"""
         logger.warning("🔄 Falling back to custom WebSocket connections")
@@ -296,16 +448,8 @@ class WebSocketFeed(DataFeed):
             await asyncio.sleep(0.1)
             
     async def get_prices(self, symbols: List[str]) -> Dict[str, Dict]:
-        """Get current prices for requested symbols"""
-        result = {}
-        
-        for symbol in symbols:
-            if symbol in self.price_data:
-                result[symbol] = self.price_data[symbol].copy()
-            else:
-                result[symbol] = {}
-        
-        return result
+        """Get current prices for requested symbols (live views, not copies)"""
+        return {symbol: self.price_data.get(symbol, {}) for symbol in symbols}
         
     async def stop(self):
         """Stop all WebSocket connections"""
@@ -314,6 +458,8 @@ class WebSocketFeed(DataFeed):
         
         # Close ccxt.pro exchanges
         for name, exch in self.pro_exchanges.items():
+            if name in self.shared_pro_exchanges:
+                continue
             try:
                 await exch.close()
             except:
@@ -322,9 +468,12 @@ class WebSocketFeed(DataFeed):
         # Close custom WebSocket connections
         for name, ws in self.ws_connections.items():
             try:
-                await ws.ws.close()
+                await ws.close()
             except:
                 pass
+        
+        if self.process_feed is not None:
+            await self.process_feed.stop()
                 
         logger.info("✅ WebSocket feed stopped")
 
@@ -340,12 +489,9 @@ class RESTPollingFeed(DataFeed):
         
     async def get_prices(self, symbols: List[str]) -> Dict[str, Dict]:
         """Poll exchanges for ticker data"""
-        import concurrent.futures
-        
-        def fetch_ticker(args):
-            name, exchange, symbol = args
+        async def fetch_ticker(name, exchange, symbol):
             try:
-                ticker = exchange.fetch_ticker(symbol)
+                ticker = await call_exchange(exchange, 'fetch_ticker', symbol)
                 return (name, symbol, ticker['bid'], ticker['ask'], ticker['last'])
             except Exception as e:
                 logger.warning(f"Failed to fetch {symbol} from {name}: {e}")
@@ -356,11 +502,10 @@ class RESTPollingFeed(DataFeed):
         for name, exchange in self.exchanges.items():
             for symbol in symbols:
                 if symbol in exchange.markets:
-                    tasks.append((name, exchange, symbol))
+                    tasks.append(fetch_ticker(name, exchange, symbol))
         
-        # Use ThreadPoolExecutor for concurrent polling
-        with concurrent.futures.ThreadPoolExecutor(max_workers=len(tasks)) as executor:
-            results = list(executor.map(fetch_ticker, tasks))
+        # Poll every ticker concurrently on the event loop
+        results = await asyncio.gather(*tasks)
         
         # Process results
         for name, symbol, bid, ask, last in results:
@@ -368,11 +513,7 @@ class RESTPollingFeed(DataFeed):
                 self.price_data[symbol] = {}
             
             if bid and ask:
-                self.price_data[symbol][name] = {
-                    'bid': bid,
-                    'ask': ask,
-                    'timestamp': time.time()
-                }
+                self._store_quote(symbol, name, bid, ask)
                 
                 # Create simulated order book for market context
                 simulated_bids = [[bid * 0.999, 1.0], [bid * 0.998, 2.0], [bid * 0.997, 0.5]]
@@ -1,22 +1,37 @@
 import asyncio
 import logging
-from typing import Dict, Any, Callable, List
+from typing import Dict, Any, Callable, List, Optional
 from exchanges_websocket import BinanceUSWebSocket, KrakenWebSocket, CoinbaseWebSocket
+from message_bus import MessageBus, Subscription, ALL
+from shm_feed import SharedMemoryFeed
 
 class DataHub:
-    def __init__(self):
+    # Symbols per client when none are given
+    DEFAULT_SYMBOLS = {'binance_us': ['BTC/USDT'], 'kraken': ['BTC/USD'], 'coinbase': ['BTC/USD']}
+
+    def __init__(self, recorder=None, endpoints: Optional[Dict] = None, symbols: Optional[Dict[str, List[str]]] = None,
+                 processes: bool = False):
         self.logger = logging.getLogger(__name__)
         self.connections = {}
-        self.data_callbacks = []
+        self.bus = MessageBus()  # per-subscriber queues: the socket read loops never wait on consumers
+        self.processes = processes  # one feed handler process per venue, read through shared memory
+        self.process_feed = None
+        self.recorder = recorder  # optional MarketRecorder for raw message capture
+        self.endpoints = endpoints or {}  # exchange name -> {'rest': ..., 'ws': ...} overrides
+        self.symbols = {**self.DEFAULT_SYMBOLS, **(symbols or {})}  # client name -> unified symbols on its socket
     
     async def connect_all_exchanges(self):
         """Connect to all three US exchanges simultaneously"""
         self.logger.info("🔄 Connecting to all exchanges...")
+        if self.processes:
+            await self._start_feed_processes()
+            return
         
         # Create instances for US exchanges
-        binance_ws = BinanceUSWebSocket("btcusdt")
-        kraken_ws = KrakenWebSocket("XBT/USD")
-        coinbase_ws = CoinbaseWebSocket("BTC-USD")
+        binance = self.endpoints.get('binance', {})
+        binance_ws = BinanceUSWebSocket(self.symbols['binance_us'], ws_url=binance.get('ws'), rest_url=binance.get('rest'))
+        kraken_ws = KrakenWebSocket(self.symbols['kraken'], ws_url=self.endpoints.get('kraken', {}).get('ws'))
+        coinbase_ws = CoinbaseWebSocket(self.symbols['coinbase'], ws_url=self.endpoints.get('coinbase', {}).get('ws'))
         
         # Connect to all in parallel
         await asyncio.gather(
@@ -27,9 +42,22 @@ class DataHub:
         
         self.logger.info("✅ All exchange connections established")
     
+    async def _start_feed_processes(self):
+        """Parse and keep books in a process per venue; payloads arrive through shared-memory rings"""
+        if self.recorder:
+            self.logger.warning("⚠️ Raw capture is not available with feed processes")
+        venues = {'binance': 'binance_us', 'kraken': 'kraken', 'coinbase': 'coinbase'}
+        self.process_feed = SharedMemoryFeed(
+            {venue: self.symbols[name] for venue, name in venues.items()}, self.endpoints
+        )
+        self.process_feed.subscribe(self._process_incoming_data)
+        await self.process_feed.start()
+        self.logger.info("✅ Feed handler processes started")
+    
     async def _safe_add_exchange(self, name: str, ws_instance):
         """Safely add an exchange with error handling"""
         try:
+            ws_instance.recorder = self.recorder
             await ws_instance.connect()
             self.connections[name] = ws_instance
             ws_instance.subscribe(self._process_incoming_data)
@@ -37,16 +65,43 @@ class DataHub:
         except Exception as e:
             self.logger.error(f"❌ Failed to add {name}: {e}")
     
-    def subscribe(self, callback: Callable):
-        self.data_callbacks.append(callback)
+    async def add_symbols(self, name: str, symbols: List[str]):
+        """Subscribe more symbols on a connected exchange's socket"""
+        ws_instance = self.connections.get(name)
+        if ws_instance is None:
+            self.logger.warning(f"⚠️ {name} is not connected in this process")
+            return
+        await ws_instance.add_symbols(symbols)
+
+    async def remove_symbols(self, name: str, symbols: List[str]):
+        ws_instance = self.connections.get(name)
+        if ws_instance is not None:
+            await ws_instance.remove_symbols(symbols)
+
+    def subscribe(self, callback: Callable, policy: str = ALL, maxsize: int = 1000,
+                  interval: float = 1.0, name: Optional[str] = None) -> Subscription:
+        """Register an async callback with its own queue.
+        
+        policy 'all' delivers every message (oldest dropped past maxsize),
+        'latest' only the newest per (exchange, symbol, type), 'sampled' the
+        newest at most once per interval seconds.
+        """
+        return self.bus.subscribe(callback, policy, maxsize, interval, name)
+    
+    async def unsubscribe(self, subscription: Subscription):
+        await self.bus.unsubscribe(subscription)
     
     async def _process_incoming_data(self, data: Dict):
         """Process data from any exchange"""
-        for callback in self.data_callbacks:
-            try:
-                await callback(data)
-            except Exception as e:
-                self.logger.error(f"Data callback error: {e}")
+        self.bus.publish(data)
+    
+    def get_stats(self) -> List[Dict]:
+        """Per-subscriber published/delivered counts, queue depth, drops and lag"""
+        return self.bus.get_stats()
+    
+    def process_stats(self) -> List[Dict]:
+        """Per-venue records read, ring backlog, overruns and restarts of the feed processes"""
+        return self.process_feed.get_stats() if self.process_feed else []
     
     async def start(self):
         self.logger.info("🚀 DataHub starting with 3 US exchanges...")
@@ -54,4 +109,11 @@ class DataHub:
     
     async def stop(self):
         self.logger.info("🛑 DataHub stopping...")
-        # Cleanup logic here
\ No newline at end of file
+        for ws_instance in self.connections.values():
+            try:
+                await ws_instance.close()
+            except Exception as e:
+                self.logger.debug(f"Close failed: {e}")
+        if self.process_feed is not None:
+            await self.process_feed.stop()
+        await self.bus.close()
\ No newline at end of file
@@ -0,0 +1,101 @@
+import math
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+@dataclass
+class SweepResult:
+    """Profit-maximizing cross-book fill found by sweep_books"""
+    amount: float
+    buy_cost: float          # quote spent on the buy book, before fees
+    sell_proceeds: float     # quote received from the sell book, before fees
+    buy_vwap: float
+    sell_vwap: float
+    buy_worst_price: float   # deepest ask touched
+    sell_worst_price: float  # deepest bid touched
+    gross_profit: float
+    fees: float
+    net_profit: float
+    levels_used: int         # ask levels plus bid levels touched
+
+
+def sweep_books(asks: List, bids: List, buy_fee: float, sell_fee: float,
+                max_notional: float = math.inf, max_amount: float = math.inf) -> Optional[SweepResult]:
+    """Walk the buy-side asks and sell-side bids together, best level first.
+
+    Asks only get worse and bids only get worse as the walk goes deeper, so the
+    marginal per-unit profit bid * (1 - sell_fee) - ask * (1 + buy_fee) never
+    increases; the sweep stops at the first step where it is no longer
+    positive, or when the notional/amount caps are reached. Cumulative
+    quantity, cost and proceeds are carried as running prefix sums, so the
+    walk is O(levels) with no allocation. Returns None when not even the top
+    levels are profitable net of fees.
+    """
+    n_asks, n_bids = len(asks), len(bids)
+    if not n_asks or not n_bids:
+        return None
+
+    buy_mult = 1.0 + buy_fee
+    sell_mult = 1.0 - sell_fee
+
+    i = j = 0
+    ask_price, ask_left = float(asks[0][0]), float(asks[0][1])
+    bid_price, bid_left = float(bids[0][0]), float(bids[0][1])
+    amount = cost = proceeds = 0.0
+    buy_worst = sell_worst = 0.0
+    levels_used = 0
+
+    while True:
+        if bid_price * sell_mult <= ask_price * buy_mult:
+            break
+
+        step = ask_left if ask_left < bid_left else bid_left
+        capped = False
+        room = (max_notional - cost) / ask_price
+        if room <= step:
+            step, capped = room, True
+        room = max_amount - amount
+        if room <= step:
+            step, capped = room, True
+        if step <= 0:
+            break
+
+        amount += step
+        cost += step * ask_price
+        proceeds += step * bid_price
+        ask_left -= step
+        bid_left -= step
+        buy_worst, sell_worst = ask_price, bid_price
+        levels_used = i + j + 2
+        if capped:
+            break
+
+        if ask_left <= 0:
+            i += 1
+            if i >= n_asks:
+                break
+            ask_price, ask_left = float(asks[i][0]), float(asks[i][1])
+        if bid_left <= 0:
+            j += 1
+            if j >= n_bids:
+                break
+            bid_price, bid_left = float(bids[j][0]), float(bids[j][1])
+
+    if amount <= 0:
+        return None
+
+    fees = cost * buy_fee + proceeds * sell_fee
+    gross_profit = proceeds - cost
+    return SweepResult(
+        amount=amount,
+        buy_cost=cost,
+        sell_proceeds=proceeds,
+        buy_vwap=cost / amount,
+        sell_vwap=proceeds / amount,
+        buy_worst_price=buy_worst,
+        sell_worst_price=sell_worst,
+        gross_profit=gross_profit,
+        fees=fees,
+        net_profit=gross_profit - fees,
+        levels_used=levels_used
+    )
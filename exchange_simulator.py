@@ -0,0 +1,1466 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web, WSMsgType
+
+logger = logging.getLogger(__name__)
+
+# Unified symbol -> starting mid price
+DEFAULT_SYMBOLS = {'BTC/USDT': 60000.0, 'BTC/USDC': 60000.0, 'BTC/USD': 60000.0}
+
+DEFAULT_BALANCES = {'BTC': 1.0, 'USDT': 50000.0, 'USDC': 50000.0, 'USD': 50000.0}
+
+
+_last_iso = [0, '']
+
+
+def iso_time(ms: Optional[float] = None) -> str:
+    """RFC 3339 UTC timestamp at millisecond resolution (memoized: many messages share a millisecond)"""
+    ms = int(time.time() * 1000) if ms is None else int(ms)
+    if ms != _last_iso[0]:
+        _last_iso[0] = ms
+        _last_iso[1] = datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+    return _last_iso[1]
+
+
+# ==================== BOOK & ACCOUNT ====================
+
+class SimulatedBook:
+    """Random-walk L2 ladder in integer ticks, best level first.
+
+    Both sides keep `depth` contiguous levels. Each step either resizes one
+    level near the top or moves the market one tick, which adds a level at the
+    new best price and drops the far end of the ladder (and the opposite best
+    level when the spread would close). Steps return the changed levels as
+    (is_bid, ticks, size) with size 0 meaning the level was removed.
+    """
+
+    def __init__(self, symbol: str, mid: float, tick_size: float = 0.01, depth: int = 25,
+                 rng: Optional[random.Random] = None):
+        self.symbol = symbol
+        self.tick_size = tick_size
+        self.depth = depth
+        self.rng = rng or random.Random(0)
+
+        mid_ticks = int(round(mid / tick_size))
+        self.best_bid = mid_ticks - 1
+        self.best_ask = mid_ticks + 1
+        self.bids = {self.best_bid - i: self._size() for i in range(depth)}
+        self.asks = {self.best_ask + i: self._size() for i in range(depth)}
+        self.update_id = 1
+        self.trade_id = 1
+
+    def _size(self) -> float:
+        return round(0.001 + self.rng.random() * 0.75, 8)
+
+    def price(self, ticks: int) -> float:
+        return ticks * self.tick_size
+
+    def levels(self, is_bid: bool, depth: Optional[int] = None) -> List[Tuple[int, float]]:
+        """[(ticks, size), ...] from the best level outwards"""
+        depth = min(depth or self.depth, self.depth)
+        if is_bid:
+            return [(self.best_bid - i, self.bids[self.best_bid - i]) for i in range(depth)]
+        return [(self.best_ask + i, self.asks[self.best_ask + i]) for i in range(depth)]
+
+    def step(self) -> List[Tuple[bool, int, float]]:
+        rng = self.rng
+        self.update_id += 1
+        if rng.random() < 0.7:
+            # Resize one level, mostly near the top of the book
+            is_bid = rng.random() < 0.5
+            offset = min(int(rng.expovariate(0.4)), self.depth - 1)
+            ticks = self.best_bid - offset if is_bid else self.best_ask + offset
+            size = self._size()
+            (self.bids if is_bid else self.asks)[ticks] = size
+            return [(is_bid, ticks, size)]
+        return self._move(rng.random() < 0.5)
+
+    def _move(self, up: bool) -> List[Tuple[bool, int, float]]:
+        changes = []
+        if up:
+            # Bids step up; asks retreat if the spread would close
+            if self.best_bid + 1 >= self.best_ask:
+                changes.append((False, self.best_ask, 0.0))
+                del self.asks[self.best_ask]
+                self.best_ask += 1
+                new_ticks = self.best_ask + self.depth - 1
+                self.asks[new_ticks] = self._size()
+                changes.append((False, new_ticks, self.asks[new_ticks]))
+            self.best_bid += 1
+            self.bids[self.best_bid] = self._size()
+            changes.append((True, self.best_bid, self.bids[self.best_bid]))
+            dropped = self.best_bid - self.depth
+            del self.bids[dropped]
+            changes.append((True, dropped, 0.0))
+        else:
+            if self.best_ask - 1 <= self.best_bid:
+                changes.append((True, self.best_bid, 0.0))
+                del self.bids[self.best_bid]
+                self.best_bid -= 1
+                new_ticks = self.best_bid - self.depth + 1
+                self.bids[new_ticks] = self._size()
+                changes.append((True, new_ticks, self.bids[new_ticks]))
+            self.best_ask -= 1
+            self.asks[self.best_ask] = self._size()
+            changes.append((False, self.best_ask, self.asks[self.best_ask]))
+            dropped = self.best_ask + self.depth
+            del self.asks[dropped]
+            changes.append((False, dropped, 0.0))
+        return changes
+
+    def trade(self) -> Tuple[int, float, str, int]:
+        """A print at the touch: (ticks, size, taker side, trade id)"""
+        self.trade_id += 1
+        if self.rng.random() < 0.5:
+            return self.best_ask, round(self.rng.random() * 0.1 + 0.0001, 8), 'buy', self.trade_id
+        return self.best_bid, round(self.rng.random() * 0.1 + 0.0001, 8), 'sell', self.trade_id
+
+
+class SimulatedAccount:
+    """Balances and orders for one venue, matched against its simulated books.
+
+    Marketable orders fill immediately against the displayed levels (without
+    depleting them); a limit order's remainder rests and fills once the book
+    crosses its price. Taker fees are charged in the quote currency.
+    """
+
+    def __init__(self, books: Dict[str, SimulatedBook], balances: Dict[str, float], fee_rate: float = 0.001):
+        self.books = books
+        self.total = dict(balances)
+        self.locked = {}
+        self.fee_rate = fee_rate
+        self.orders = {}    # order id -> order dict
+        self.resting = {}   # symbol -> [order ids]
+
+    def free(self, currency: str) -> float:
+        return self.total.get(currency, 0.0) - self.locked.get(currency, 0.0)
+
+    def place(self, symbol: str, side: str, order_type: str, amount: float, price: Optional[float] = None,
+              client_order_id: Optional[str] = None) -> Dict:
+        """Create and match an order; raises ValueError on bad input or insufficient funds"""
+        book = self.books.get(symbol)
+        if book is None:
+            raise ValueError(f"unknown symbol {symbol}")
+        if amount <= 0:
+            raise ValueError("amount must be positive")
+        base, quote = symbol.split('/')
+
+        if order_type == 'limit':
+            if not price or price <= 0:
+                raise ValueError("limit order needs a price")
+            currency, needed = (quote, amount * price * (1 + self.fee_rate)) if side == 'buy' else (base, amount)
+        else:
+            reference = book.price(book.best_ask if side == 'buy' else book.best_bid)
+            currency, needed = (quote, amount * reference * (1 + self.fee_rate)) if side == 'buy' else (base, amount)
+        if needed > self.free(currency) + 1e-9:
+            raise ValueError(f"insufficient {currency}: free {self.free(currency):.8f}, required {needed:.8f}")
+
+        now = int(time.time() * 1000)
+        order = {
+            'id': uuid.uuid4().hex[:16],
+            'clientOrderId': client_order_id or uuid.uuid4().hex[:16],
+            'symbol': symbol,
+            'base': base,
+            'quote': quote,
+            'side': side,
+            'type': order_type,
+            'price': price,
+            'amount': amount,
+            'filled': 0.0,
+            'cost': 0.0,
+            'fee': 0.0,
+            'status': 'open',
+            'timestamp': now,
+            'updated': now,
+            'locked_currency': currency,
+            'locked': 0.0,
+            'trades': []
+        }
+        self.orders[order['id']] = order
+
+        if order_type == 'limit':
+            order['locked'] = needed
+            self.locked[currency] = self.locked.get(currency, 0.0) + needed
+
+        self._match(order)
+        if order['status'] == 'open':
+            if order_type == 'market':
+                self._finish(order, 'canceled')  # displayed depth exhausted
+            else:
+                self.resting.setdefault(symbol, []).append(order['id'])
+        return order
+
+    def cancel(self, order_id: str) -> Optional[Dict]:
+        order = self.orders.get(order_id)
+        if order is None:
+            return None
+        if order['status'] == 'open':
+            self._finish(order, 'canceled')
+        return order
+
+    def on_book_move(self, symbol: str):
+        """Fill resting orders the moved book now crosses"""
+        order_ids = self.resting.get(symbol)
+        if not order_ids:
+            return
+        for order_id in list(order_ids):
+            order = self.orders[order_id]
+            self._match(order)
+            if order['status'] != 'open':
+                order_ids.remove(order_id)
+
+    def _match(self, order: Dict):
+        book = self.books[order['symbol']]
+        buying = order['side'] == 'buy'
+        limit = order['price'] if order['type'] == 'limit' else None
+        for ticks, size in book.levels(not buying):
+            price = book.price(ticks)
+            if limit is not None and (price > limit + 1e-9 if buying else price < limit - 1e-9):
+                break
+            quantity = min(size, order['amount'] - order['filled'])
+            self._fill(order, quantity, price, book)
+            if order['amount'] - order['filled'] <= 1e-12:
+                self._finish(order, 'closed')
+                return
+
+    def _fill(self, order: Dict, quantity: float, price: float, book: SimulatedBook):
+        notional = quantity * price
+        fee = notional * self.fee_rate
+        base, quote = order['base'], order['quote']
+        if order['side'] == 'buy':
+            self.total[base] = self.total.get(base, 0.0) + quantity
+            self.total[quote] = self.total.get(quote, 0.0) - notional - fee
+        else:
+            self.total[base] = self.total.get(base, 0.0) - quantity
+            self.total[quote] = self.total.get(quote, 0.0) + notional - fee
+
+        if order['locked']:
+            release = order['locked'] * quantity / (order['amount'] - order['filled'])
+            self._unlock(order, release)
+
+        book.trade_id += 1
+        now = int(time.time() * 1000)
+        order['filled'] += quantity
+        order['cost'] += notional
+        order['fee'] += fee
+        order['updated'] = now
+        order['trades'].append({'id': book.trade_id, 'price': price, 'amount': quantity, 'fee': fee, 'timestamp': now})
+
+    def _unlock(self, order: Dict, amount: float):
+        currency = order['locked_currency']
+        self.locked[currency] = self.locked.get(currency, 0.0) - amount
+        order['locked'] -= amount
+
+    def _finish(self, order: Dict, status: str):
+        order['status'] = status
+        order['updated'] = int(time.time() * 1000)
+        if order['locked']:
+            self._unlock(order, order['locked'])
+        order_ids = self.resting.get(order['symbol'])
+        if order_ids and order['id'] in order_ids:
+            order_ids.remove(order['id'])
+
+
+# ==================== VENUES ====================
+
+class VenueSimulator:
+    """One simulated venue: books, account, WebSocket subscribers and REST routes.
+
+    Subclasses implement the venue's wire protocol: how a connection
+    subscribes, how book changes, snapshots and trades are encoded, and the
+    REST endpoints ccxt calls for markets, balances and orders.
+    """
+
+    name = ''
+    price_decimals = 2
+    size_decimals = 8
+
+    def __init__(self, symbols: Dict[str, float], rate: float = 100.0, trade_ratio: float = 0.1,
+                 balances: Optional[Dict[str, float]] = None, fee_rate: float = 0.001, depth: int = 25,
+                 seed: int = 0):
+        self.rng = random.Random(f"{self.name}:{seed}")
+        self.tick_size = 10 ** -self.price_decimals
+        self.books = {
+            symbol: SimulatedBook(symbol, mid, self.tick_size, depth, self.rng)
+            for symbol, mid in symbols.items()
+        }
+        self._price_text = {}
+        self._size_text = {}
+        self.account = SimulatedAccount(self.books, balances or DEFAULT_BALANCES, fee_rate)
+        self.rate = rate
+        self.trade_ratio = trade_ratio
+        self.connections = set()
+        self.messages_sent = 0
+
+    def fmt_price(self, value: float) -> str:
+        return f"{value:.{self.price_decimals}f}"
+
+    def fmt_size(self, value: float) -> str:
+        return f"{value:.{self.size_decimals}f}"
+
+    # Book levels are re-sent many times (snapshots, checksums, visible-depth
+    # diffs), so their wire strings are formatted once and cached.
+
+    def price_text(self, ticks: int) -> str:
+        text = self._price_text.get(ticks)
+        if text is None:
+            if len(self._price_text) > 100000:
+                self._price_text.clear()
+            text = self._price_text[ticks] = self.fmt_price(ticks * self.tick_size)
+        return text
+
+    def size_text(self, size: float) -> str:
+        text = self._size_text.get(size)
+        if text is None:
+            if len(self._size_text) > 100000:
+                self._size_text.clear()
+            text = self._size_text[size] = self.fmt_size(size)
+        return text
+
+    def routes(self, prefix: str) -> List[web.RouteDef]:
+        raise NotImplementedError
+
+    # ==================== PUBLISHING ====================
+
+    async def publish(self):
+        """Step books at `rate` messages per second; each step is one depth or trade message.
+
+        Work is done in batches of at most 10 ms worth of messages so REST
+        requests and client reads interleave with publishing. When the loop
+        falls behind, the backlog is skipped rather than burst out.
+        """
+        loop = asyncio.get_running_loop()
+        symbols = list(self.books)
+        max_batch = max(1, int(self.rate / 100))
+        start = loop.time()
+        emitted = 0
+        while True:
+            due = int((loop.time() - start) * self.rate) - emitted
+            for _ in range(min(due, max_batch)):
+                book = self.books[symbols[self.rng.randrange(len(symbols))]]
+                if self.rng.random() < self.trade_ratio:
+                    await self.emit_trade(book, book.trade())
+                else:
+                    changes = book.step()
+                    await self.emit_depth(book, changes)
+                    if len(changes) > 1 or changes[0][1] in (book.best_bid, book.best_ask):
+                        self.account.on_book_move(book.symbol)
+            emitted += max(due, 0)
+            await asyncio.sleep(max(0.0, (emitted + 1) / self.rate - (loop.time() - start)))
+
+    async def emit_depth(self, book: SimulatedBook, changes: List[Tuple[bool, int, float]]):
+        raise NotImplementedError
+
+    async def emit_trade(self, book: SimulatedBook, trade: Tuple[int, float, str, int]):
+        raise NotImplementedError
+
+    async def _send(self, connection: 'Connection', message: str):
+        try:
+            await connection.ws.send_str(message)
+            self.messages_sent += 1
+        except Exception as e:
+            logger.debug(f"{self.name} send failed, dropping connection: {e}")
+            self.connections.discard(connection)
+
+    async def _serve(self, request: web.Request, connection) -> web.WebSocketResponse:
+        """Run one WebSocket connection until the client leaves"""
+        ws = connection.ws
+        await ws.prepare(request)
+        self.connections.add(connection)
+        try:
+            await self.on_open(connection)
+            async for msg in ws:
+                if msg.type == WSMsgType.TEXT:
+                    try:
+                        await self.on_message(connection, json.loads(msg.data))
+                    except Exception as e:
+                        logger.warning(f"{self.name} bad client message {msg.data[:200]}: {e}")
+                elif msg.type in (WSMsgType.CLOSE, WSMsgType.ERROR):
+                    break
+        finally:
+            self.connections.discard(connection)
+        return ws
+
+    async def on_open(self, connection):
+        pass
+
+    async def on_message(self, connection, message):
+        pass
+
+
+class Connection:
+    __slots__ = ('ws', 'subscriptions', 'sequence', 'variant')
+
+    def __init__(self, ws: web.WebSocketResponse, variant: str = ''):
+        self.ws = ws
+        self.subscriptions = set()
+        self.sequence = 0
+        self.variant = variant   # protocol flavour: Binance 'combined' streams, Kraken 'v2'
+
+
+class BinanceUSSimulator(VenueSimulator):
+    """Binance.US spot: raw and combined streams (<symbol>@depth[@100ms], <symbol>@trade,
+    SUBSCRIBE/UNSUBSCRIBE) with U/u update ids, plus the /api/v3 REST endpoints."""
+
+    name = 'binance'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.market_ids = {symbol.replace('/', ''): symbol for symbol in self.books}
+
+    def routes(self, prefix: str) -> List[web.RouteDef]:
+        return [
+            web.get(f'{prefix}/ws', self.handle_ws),
+            web.get(f'{prefix}/ws/{{streams:.*}}', self.handle_ws),
+            web.get(f'{prefix}/stream', self.handle_ws),
+            web.get(f'{prefix}/api/v3/ping', self.handle_ping),
+            web.get(f'{prefix}/api/v3/time', self.handle_time),
+            web.get(f'{prefix}/api/v3/exchangeInfo', self.handle_exchange_info),
+            web.get(f'{prefix}/api/v3/depth', self.handle_depth),
+            web.get(f'{prefix}/api/v3/ticker/24hr', self.handle_ticker),
+            web.get(f'{prefix}/api/v3/ticker/bookTicker', self.handle_book_ticker),
+            web.get(f'{prefix}/api/v3/account', self.handle_account),
+            web.post(f'{prefix}/api/v3/order', self.handle_create_order),
+            web.get(f'{prefix}/api/v3/order', self.handle_fetch_order),
+            web.delete(f'{prefix}/api/v3/order', self.handle_cancel_order),
+            web.get(f'{prefix}/api/v3/openOrders', self.handle_open_orders),
+            web.get(f'{prefix}/sapi/v1/capital/config/getall', self.handle_empty_list),
+            web.get(f'{prefix}/sapi/v1/asset/tradeFee', self.handle_empty_list),
+        ]
+
+    # ==================== WEBSOCKET ====================
+
+    async def handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        variant = 'combined' if request.path.endswith('/stream') else ''
+        connection = Connection(web.WebSocketResponse(compress=False), variant)
+        streams = request.match_info.get('streams') or request.query.get('streams') or ''
+        connection.subscriptions.update(self._normalize(s) for s in streams.split('/') if s)
+        return await self._serve(request, connection)
+
+    @staticmethod
+    def _normalize(stream: str) -> str:
+        # depth@100ms and depth publish the same diff stream here
+        return stream.lower().replace('@100ms', '').replace('@1000ms', '')
+
+    async def on_message(self, connection: Connection, message: Dict):
+        method = message.get('method')
+        streams = [self._normalize(s) for s in message.get('params', [])]
+        if method == 'SUBSCRIBE':
+            connection.subscriptions.update(streams)
+        elif method == 'UNSUBSCRIBE':
+            connection.subscriptions.difference_update(streams)
+        await self._send(connection, json.dumps({'result': None, 'id': message.get('id')}))
+
+    async def _broadcast(self, stream: str, payload: str):
+        for connection in list(self.connections):
+            if stream in connection.subscriptions:
+                if connection.variant == 'combined':
+                    await self._send(connection, f'{{"stream":"{stream}","data":{payload}}}')
+                else:
+                    await self._send(connection, payload)
+
+    async def emit_depth(self, book: SimulatedBook, changes):
+        market_id = book.symbol.replace('/', '')
+        bids = [[self.price_text(t), self.size_text(s)] for is_bid, t, s in changes if is_bid]
+        asks = [[self.price_text(t), self.size_text(s)] for is_bid, t, s in changes if not is_bid]
+        payload = json.dumps({
+            'e': 'depthUpdate', 'E': int(time.time() * 1000), 's': market_id,
+            'U': book.update_id, 'u': book.update_id, 'b': bids, 'a': asks
+        })
+        await self._broadcast(f'{market_id.lower()}@depth', payload)
+
+    async def emit_trade(self, book: SimulatedBook, trade):
+        ticks, size, side, trade_id = trade
+        market_id = book.symbol.replace('/', '')
+        now = int(time.time() * 1000)
+        payload = json.dumps({
+            'e': 'trade', 'E': now, 's': market_id, 't': trade_id,
+            'p': self.price_text(ticks), 'q': self.size_text(size),
+            'T': now, 'm': side == 'sell', 'M': True
+        })
+        await self._broadcast(f'{market_id.lower()}@trade', payload)
+
+    # ==================== REST ====================
+
+    async def _params(self, request: web.Request) -> Dict:
+        params = dict(request.query)
+        if request.method in ('POST', 'DELETE', 'PUT') and request.can_read_body:
+            params.update(await request.post())
+        return params
+
+    def _book(self, market_id: str) -> SimulatedBook:
+        symbol = self.market_ids.get((market_id or '').upper())
+        if symbol is None:
+            raise web.HTTPBadRequest(text=json.dumps({'code': -1121, 'msg': 'Invalid symbol.'}),
+                                     content_type='application/json')
+        return self.books[symbol]
+
+    async def handle_ping(self, request):
+        return web.json_response({})
+
+    async def handle_time(self, request):
+        return web.json_response({'serverTime': int(time.time() * 1000)})
+
+    async def handle_empty_list(self, request):
+        return web.json_response([])
+
+    async def handle_exchange_info(self, request):
+        symbols = []
+        for market_id, symbol in self.market_ids.items():
+            base, quote = symbol.split('/')
+            symbols.append({
+                'symbol': market_id, 'status': 'TRADING',
+                'baseAsset': base, 'baseAssetPrecision': 8,
+                'quoteAsset': quote, 'quotePrecision': 8, 'quoteAssetPrecision': 8,
+                'baseCommissionPrecision': 8, 'quoteCommissionPrecision': 8,
+                'orderTypes': ['LIMIT', 'LIMIT_MAKER', 'MARKET', 'STOP_LOSS_LIMIT', 'TAKE_PROFIT_LIMIT'],
+                'icebergAllowed': True, 'ocoAllowed': True, 'quoteOrderQtyMarketAllowed': True,
+                'isSpotTradingAllowed': True, 'isMarginTradingAllowed': False,
+                'filters': [
+                    {'filterType': 'PRICE_FILTER', 'minPrice': '0.01', 'maxPrice': '1000000.00', 'tickSize': '0.01'},
+                    {'filterType': 'LOT_SIZE', 'minQty': '0.00001', 'maxQty': '9000.00', 'stepSize': '0.00001'},
+                    {'filterType': 'NOTIONAL', 'minNotional': '10.00', 'applyMinToMarket': True,
+                     'maxNotional': '9000000.00', 'applyMaxToMarket': False, 'avgPriceMins': 5}
+                ],
+                'permissions': ['SPOT'], 'permissionSets': [['SPOT']]
+            })
+        return web.json_response({
+            'timezone': 'UTC', 'serverTime': int(time.time() * 1000),
+            'rateLimits': [], 'exchangeFilters': [], 'symbols': symbols
+        })
+
+    def depth_snapshot(self, book: SimulatedBook, limit: int = 100) -> Dict:
+        return {
+            'lastUpdateId': book.update_id,
+            'bids': [[self.price_text(t), self.size_text(s)] for t, s in book.levels(True, limit)],
+            'asks': [[self.price_text(t), self.size_text(s)] for t, s in book.levels(False, limit)]
+        }
+
+    async def handle_depth(self, request):
+        book = self._book(request.query.get('symbol'))
+        return web.json_response(self.depth_snapshot(book, int(request.query.get('limit', 100))))
+
+    def _ticker(self, market_id: str, book: SimulatedBook) -> Dict:
+        bid_ticks, bid_size = book.levels(True, 1)[0]
+        ask_ticks, ask_size = book.levels(False, 1)[0]
+        last = self.price_text((bid_ticks + ask_ticks) // 2)
+        now = int(time.time() * 1000)
+        return {
+            'symbol': market_id, 'priceChange': '0', 'priceChangePercent': '0', 'weightedAvgPrice': last,
+            'prevClosePrice': last, 'lastPrice': last, 'lastQty': '0.001',
+            'bidPrice': self.price_text(bid_ticks), 'bidQty': self.fmt_size(bid_size),
+            'askPrice': self.price_text(ask_ticks), 'askQty': self.fmt_size(ask_size),
+            'openPrice': last, 'highPrice': last, 'lowPrice': last, 'volume': '0', 'quoteVolume': '0',
+            'openTime': now - 86400000, 'closeTime': now, 'firstId': 0, 'lastId': book.trade_id, 'count': book.trade_id
+        }
+
+    async def handle_ticker(self, request):
+        market_id = request.query.get('symbol')
+        if market_id:
+            return web.json_response(self._ticker(market_id.upper(), self._book(market_id)))
+        return web.json_response([self._ticker(m, self.books[s]) for m, s in self.market_ids.items()])
+
+    async def handle_book_ticker(self, request):
+        tickers = [self._ticker(m, self.books[s]) for m, s in self.market_ids.items()]
+        market_id = request.query.get('symbol')
+        keys = ('symbol', 'bidPrice', 'bidQty', 'askPrice', 'askQty')
+        tickers = [{k: t[k] for k in keys} for t in tickers if not market_id or t['symbol'] == market_id.upper()]
+        return web.json_response(tickers[0] if market_id else tickers)
+
+    async def handle_account(self, request):
+        account = self.account
+        balances = [
+            {'asset': currency, 'free': self.fmt_size(account.free(currency)),
+             'locked': self.fmt_size(account.locked.get(currency, 0.0))}
+            for currency in account.total
+        ]
+        return web.json_response({
+            'makerCommission': 10, 'takerCommission': 10, 'buyerCommission': 0, 'sellerCommission': 0,
+            'canTrade': True, 'canWithdraw': True, 'canDeposit': True,
+            'updateTime': int(time.time() * 1000), 'accountType': 'SPOT',
+            'balances': balances, 'permissions': ['SPOT']
+        })
+
+    STATUS = {'open': 'NEW', 'closed': 'FILLED', 'canceled': 'CANCELED'}
+
+    def _order_response(self, order: Dict, full: bool = True) -> Dict:
+        status = self.STATUS[order['status']]
+        if status == 'NEW' and order['filled'] > 0:
+            status = 'PARTIALLY_FILLED'
+        response = {
+            'symbol': order['symbol'].replace('/', ''),
+            'orderId': int(order['id'], 16) % (10 ** 12),
+            'orderListId': -1,
+            'clientOrderId': order['clientOrderId'],
+            'transactTime': order['timestamp'],
+            'time': order['timestamp'],
+            'updateTime': order['updated'],
+            'price': self.fmt_price(order['price'] or 0.0),
+            'origQty': self.fmt_size(order['amount']),
+            'executedQty': self.fmt_size(order['filled']),
+            'cummulativeQuoteQty': self.fmt_size(order['cost']),
+            'status': status,
+            'timeInForce': 'GTC',
+            'type': order['type'].upper(),
+            'side': order['side'].upper(),
+            'isWorking': order['status'] == 'open'
+        }
+        if full:
+            response['fills'] = [
+                {'price': self.fmt_price(t['price']), 'qty': self.fmt_size(t['amount']),
+                 'commission': self.fmt_size(t['fee']), 'commissionAsset': order['quote'], 'tradeId': t['id']}
+                for t in order['trades']
+            ]
+        return response
+
+    def _find_order(self, params: Dict) -> Dict:
+        order_id = params.get('orderId')
+        client_id = params.get('origClientOrderId')
+        for order in self.account.orders.values():
+            if (order_id and int(order['id'], 16) % (10 ** 12) == int(order_id)) or \
+                    (client_id and order['clientOrderId'] == client_id):
+                return order
+        raise web.HTTPBadRequest(text=json.dumps({'code': -2013, 'msg': 'Order does not exist.'}),
+                                 content_type='application/json')
+
+    async def handle_create_order(self, request):
+        params = await self._params(request)
+        book = self._book(params.get('symbol'))
+        try:
+            order = self.account.place(
+                book.symbol, params.get('side', '').lower(), params.get('type', 'LIMIT').lower(),
+                float(params.get('quantity', 0)), float(params['price']) if params.get('price') else None,
+                params.get('newClientOrderId')
+            )
+        except ValueError as e:
+            code = -2010 if 'insufficient' in str(e) else -1100
+            msg = 'Account has insufficient balance for requested action.' if code == -2010 else str(e)
+            return web.json_response({'code': code, 'msg': msg}, status=400)
+        return web.json_response(self._order_response(order))
+
+    async def handle_fetch_order(self, request):
+        return web.json_response(self._order_response(self._find_order(await self._params(request)), full=False))
+
+    async def handle_cancel_order(self, request):
+        params = await self._params(request)
+        order = self._find_order(params)
+        if order['status'] != 'open':
+            return web.json_response({'code': -2011, 'msg': 'Unknown order sent.'}, status=400)
+        self.account.cancel(order['id'])
+        return web.json_response(self._order_response(order, full=False))
+
+    async def handle_open_orders(self, request):
+        return web.json_response([
+            self._order_response(order, full=False)
+            for order in self.account.orders.values() if order['status'] == 'open'
+        ])
+
+
+class KrakenSimulator(VenueSimulator):
+    """Kraken WebSocket v1 and v2 (book-N with CRC32 checksums, trade) and the /0/public, /0/private REST API"""
+
+    name = 'kraken'
+    price_decimals = 1
+    size_decimals = 8
+
+    ASSETS = {'BTC': 'XXBT', 'USD': 'ZUSD', 'USDT': 'USDT', 'USDC': 'USDC'}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pairs = {}     # wsname (XBT/USD) -> unified symbol
+        self.rest_ids = {}  # REST pair id (XXBTZUSD) -> unified symbol
+        for symbol in self.books:
+            base, quote = symbol.split('/')
+            ws_base = 'XBT' if base == 'BTC' else base
+            self.pairs[f"{ws_base}/{quote}"] = symbol
+            self.rest_ids[self._rest_id(symbol)] = symbol
+        self.wsnames = {symbol: wsname for wsname, symbol in self.pairs.items()}
+        self.channel_ids = {}   # (name, wsname) -> channel id
+        self.visible = {}       # (symbol, depth) -> (bid levels, ask levels) as last published
+        self._checksum_prices = {}
+        self._checksum_sizes = {}
+        self._channels = itertools.count(100)
+
+    def _rest_id(self, symbol: str) -> str:
+        base, quote = symbol.split('/')
+        rest_base, rest_quote = self.ASSETS.get(base, base), self.ASSETS.get(quote, quote)
+        if rest_base.startswith('X') and rest_quote.startswith('Z'):
+            return rest_base + rest_quote
+        return ('XBT' if base == 'BTC' else base) + quote
+
+    def _altname(self, symbol: str) -> str:
+        base, quote = symbol.split('/')
+        return ('XBT' if base == 'BTC' else base) + quote
+
+    def _wsname(self, symbol: str) -> str:
+        return self.wsnames[symbol]
+
+    def routes(self, prefix: str) -> List[web.RouteDef]:
+        return [
+            web.get(f'{prefix}', self.handle_ws),
+            web.get(f'{prefix}/', self.handle_ws),
+            web.get(f'{prefix}/v2', self.handle_ws_v2),
+            web.get(f'{prefix}/0/public/Time', self.handle_time),
+            web.get(f'{prefix}/0/public/SystemStatus', self.handle_status),
+            web.get(f'{prefix}/0/public/Assets', self.handle_assets),
+            web.get(f'{prefix}/0/public/AssetPairs', self.handle_asset_pairs),
+            web.get(f'{prefix}/0/public/Depth', self.handle_depth),
+            web.get(f'{prefix}/0/public/Ticker', self.handle_ticker),
+            web.post(f'{prefix}/0/private/Balance', self.handle_balance),
+            web.post(f'{prefix}/0/private/BalanceEx', self.handle_balance_ex),
+            web.post(f'{prefix}/0/private/AddOrder', self.handle_add_order),
+            web.post(f'{prefix}/0/private/QueryOrders', self.handle_query_orders),
+            web.post(f'{prefix}/0/private/CancelOrder', self.handle_cancel_order),
+            web.post(f'{prefix}/0/private/OpenOrders', self.handle_open_orders),
+        ]
+
+    # ==================== WEBSOCKET ====================
+
+    async def handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        return await self._serve(request, Connection(web.WebSocketResponse(compress=False)))
+
+    async def handle_ws_v2(self, request: web.Request) -> web.WebSocketResponse:
+        return await self._serve(request, Connection(web.WebSocketResponse(compress=False), 'v2'))
+
+    async def on_open(self, connection: Connection):
+        if connection.variant == 'v2':
+            message = {'channel': 'status', 'type': 'update', 'data': [{
+                'version': '2.0.9', 'system': 'online', 'api_version': 'v2', 'connection_id': random.getrandbits(60)
+            }]}
+        else:
+            message = {'connectionID': random.getrandbits(60), 'event': 'systemStatus', 'status': 'online', 'version': '1.9.1'}
+        await self._send(connection, json.dumps(message))
+
+    async def on_message(self, connection: Connection, message: Dict):
+        if connection.variant == 'v2':
+            await self._on_message_v2(connection, message)
+            return
+
+        event = message.get('event')
+        if event == 'ping':
+            await self._send(connection, json.dumps({'event': 'pong', 'reqid': message.get('reqid')}))
+            return
+        if event not in ('subscribe', 'unsubscribe'):
+            return
+
+        subscription = message.get('subscription', {})
+        name = subscription.get('name')
+        depth = int(subscription.get('depth', 10)) if name == 'book' else None
+        channel_name = f"book-{depth}" if name == 'book' else name
+        for wsname in message.get('pair', []):
+            symbol = self.pairs.get(wsname)
+            status = {
+                'event': 'subscriptionStatus', 'pair': wsname, 'subscription': subscription,
+                'reqid': message.get('reqid')
+            }
+            if symbol is None or name not in ('book', 'trade'):
+                status.update({'status': 'error', 'errorMessage': f'Currency pair not supported {wsname}'})
+                await self._send(connection, json.dumps(status))
+                continue
+
+            key = (channel_name, wsname)
+            channel_id = self.channel_ids.setdefault(key, next(self._channels))
+            status.update({'channelID': channel_id, 'channelName': channel_name})
+            if event == 'subscribe':
+                connection.subscriptions.add(key)
+                status['status'] = 'subscribed'
+                await self._send(connection, json.dumps(status))
+                if name == 'book':
+                    bids, asks = self._track_depth(symbol, depth)
+                    timestamp = f"{time.time():.6f}"
+                    payload = {
+                        'as': [[self.price_text(t), self.size_text(s), timestamp] for t, s in asks.items()],
+                        'bs': [[self.price_text(t), self.size_text(s), timestamp] for t, s in bids.items()]
+                    }
+                    await self._send(connection, json.dumps([channel_id, payload, channel_name, wsname]))
+            else:
+                connection.subscriptions.discard(key)
+                status['status'] = 'unsubscribed'
+                await self._send(connection, json.dumps(status))
+
+    async def _on_message_v2(self, connection: Connection, message: Dict):
+        """WebSocket v2: JSON-object frames, unified symbols (BTC/USD), numeric prices"""
+        method = message.get('method')
+        req_id = message.get('req_id')
+        now = iso_time()
+        if method == 'ping':
+            await self._send(connection, json.dumps({'method': 'pong', 'req_id': req_id, 'time_in': now, 'time_out': now}))
+            return
+        if method not in ('subscribe', 'unsubscribe'):
+            return
+
+        params = message.get('params', {})
+        channel = params.get('channel')
+        depth = int(params.get('depth', 10))
+        for symbol in params.get('symbol', []):
+            result = {'channel': channel, 'symbol': symbol}
+            if channel == 'book':
+                result.update({'depth': depth, 'snapshot': params.get('snapshot', True)})
+            reply = {'method': method, 'req_id': req_id, 'time_in': now, 'time_out': now}
+            if symbol not in self.books or channel not in ('book', 'trade'):
+                reply.update({'success': False, 'error': f'Currency pair not supported {symbol}', 'symbol': symbol})
+                await self._send(connection, json.dumps(reply))
+                continue
+
+            key = ('book', depth, symbol) if channel == 'book' else ('trade', symbol)
+            reply.update({'result': result, 'success': True})
+            if method == 'unsubscribe':
+                connection.subscriptions.discard(key)
+                await self._send(connection, json.dumps(reply))
+                continue
+
+            connection.subscriptions.add(key)
+            await self._send(connection, json.dumps(reply))
+            if channel == 'book' and params.get('snapshot', True):
+                bids, asks = self._track_depth(symbol, depth)
+                await self._send(connection, self._v2_book_message(
+                    'snapshot', symbol, bids.items(), asks.items(), self.checksum(self.books[symbol])))
+
+    def _track_depth(self, symbol: str, depth: int) -> Tuple[Dict[int, float], Dict[int, float]]:
+        """Start (or reuse) visible-depth tracking for a book subscription; returns the current top `depth`"""
+        book = self.books[symbol]
+        bids, asks = dict(book.levels(True, depth)), dict(book.levels(False, depth))
+        self.visible[(symbol, depth)] = (bids, asks)
+        return bids, asks
+
+    def _v2_levels(self, levels) -> str:
+        return ','.join(f'{{"price":{self.price_text(t)},"qty":{self.size_text(s)}}}' for t, s in levels)
+
+    def _v2_book_message(self, msg_type: str, symbol: str, bids, asks, checksum: int) -> str:
+        # Built by hand so prices and sizes keep the pair precision the checksum is computed over
+        return (f'{{"channel":"book","type":"{msg_type}","data":[{{"symbol":"{symbol}",'
+                f'"bids":[{self._v2_levels(bids)}],"asks":[{self._v2_levels(asks)}],'
+                f'"checksum":{checksum},"timestamp":"{iso_time()}"}}]}}')
+
+    def checksum(self, book: SimulatedBook) -> int:
+        """CRC32 over the top 10 asks then top 10 bids, '.' removed and leading zeros stripped"""
+        price_tokens, size_tokens = self._checksum_prices, self._checksum_sizes
+        if len(size_tokens) > 100000:
+            price_tokens.clear()
+            size_tokens.clear()
+        parts = []
+        for is_bid in (False, True):
+            for ticks, size in book.levels(is_bid, 10):
+                token = price_tokens.get(ticks)
+                if token is None:
+                    token = price_tokens[ticks] = self.price_text(ticks).replace('.', '').lstrip('0')
+                parts.append(token)
+                token = size_tokens.get(size)
+                if token is None:
+                    token = size_tokens[size] = self.size_text(size).replace('.', '').lstrip('0')
+                parts.append(token)
+        return zlib.crc32(''.join(parts).encode()) & 0xffffffff
+
+    def _visible_changes(self, book: SimulatedBook, depth: int, is_bid: bool, previous: Dict[int, float]):
+        """Levels to publish so a client truncating to `depth` ends up with our top `depth`"""
+        current = dict(book.levels(is_bid, depth))
+        changes = [(t, s) for t, s in current.items() if previous.get(t) != s]
+        changes.extend((t, 0.0) for t in previous if t not in current)
+        return current, changes
+
+    async def emit_depth(self, book: SimulatedBook, changes):
+        symbol = book.symbol
+        wsname = self._wsname(symbol)
+        checksum = None
+        for (tracked, depth), previous in list(self.visible.items()):
+            if tracked != symbol:
+                continue
+            bids, bid_changes = self._visible_changes(book, depth, True, previous[0])
+            asks, ask_changes = self._visible_changes(book, depth, False, previous[1])
+            self.visible[(symbol, depth)] = (bids, asks)
+            if not bid_changes and not ask_changes:
+                continue
+
+            if checksum is None:
+                checksum = self.checksum(book)
+            v1_key, v2_key = (f"book-{depth}", wsname), ('book', depth, symbol)
+            v1_message = v2_message = None
+            for connection in list(self.connections):
+                if v1_key in connection.subscriptions:
+                    if v1_message is None:
+                        timestamp = f"{time.time():.6f}"
+                        payloads = []
+                        if ask_changes:
+                            payloads.append({'a': [[self.price_text(t), self.size_text(s), timestamp] for t, s in ask_changes]})
+                        if bid_changes:
+                            payloads.append({'b': [[self.price_text(t), self.size_text(s), timestamp] for t, s in bid_changes]})
+                        payloads[-1]['c'] = str(checksum)
+                        v1_message = json.dumps([self.channel_ids[v1_key], *payloads, v1_key[0], wsname])
+                    await self._send(connection, v1_message)
+                elif v2_key in connection.subscriptions:
+                    if v2_message is None:
+                        v2_message = self._v2_book_message('update', symbol, bid_changes, ask_changes, checksum)
+                    await self._send(connection, v2_message)
+
+    async def emit_trade(self, book: SimulatedBook, trade):
+        ticks, size, side, trade_id = trade
+        wsname = self._wsname(book.symbol)
+        v1_key, v2_key = ('trade', wsname), ('trade', book.symbol)
+        v1_message = v2_message = None
+        for connection in list(self.connections):
+            if v1_key in connection.subscriptions:
+                if v1_message is None:
+                    v1_message = json.dumps([
+                        self.channel_ids[v1_key],
+                        [[self.price_text(ticks), self.size_text(size), f"{time.time():.6f}", side[0], 'l', '']],
+                        'trade', wsname
+                    ])
+                await self._send(connection, v1_message)
+            elif v2_key in connection.subscriptions:
+                if v2_message is None:
+                    v2_message = (f'{{"channel":"trade","type":"update","data":[{{"symbol":"{book.symbol}",'
+                                  f'"side":"{side}","price":{self.price_text(ticks)},"qty":{self.size_text(size)},'
+                                  f'"ord_type":"limit","trade_id":{trade_id},"timestamp":"{iso_time()}"}}]}}')
+                await self._send(connection, v2_message)
+
+    # ==================== REST ====================
+
+    @staticmethod
+    def _result(result) -> web.Response:
+        return web.json_response({'error': [], 'result': result})
+
+    @staticmethod
+    def _error(message: str) -> web.Response:
+        return web.json_response({'error': [message]})
+
+    def _pair_symbol(self, pair: Optional[str]) -> Optional[str]:
+        if pair is None:
+            return None
+        for symbol in self.books:
+            if pair in (self._rest_id(symbol), self._altname(symbol), self._wsname(symbol)):
+                return symbol
+        return None
+
+    async def handle_time(self, request):
+        now = time.time()
+        return self._result({'unixtime': int(now), 'rfc1123': time.strftime('%a, %d %b %y %H:%M:%S +0000', time.gmtime(now))})
+
+    async def handle_status(self, request):
+        return self._result({'status': 'online', 'timestamp': iso_time()})
+
+    async def handle_assets(self, request):
+        return self._result({
+            rest: {'aclass': 'currency', 'altname': 'XBT' if code == 'BTC' else code,
+                   'decimals': 10 if code == 'BTC' else 4, 'display_decimals': 5 if code == 'BTC' else 2,
+                   'status': 'enabled'}
+            for code, rest in self.ASSETS.items()
+        })
+
+    async def handle_asset_pairs(self, request):
+        pairs = {}
+        for symbol in self.books:
+            base, quote = symbol.split('/')
+            pairs[self._rest_id(symbol)] = {
+                'altname': self._altname(symbol), 'wsname': self._wsname(symbol), 'aclass_base': 'currency',
+                'base': self.ASSETS.get(base, base), 'aclass_quote': 'currency', 'quote': self.ASSETS.get(quote, quote),
+                'lot': 'unit', 'cost_decimals': 5, 'pair_decimals': self.price_decimals,
+                'lot_decimals': self.size_decimals, 'lot_multiplier': 1,
+                'leverage_buy': [], 'leverage_sell': [],
+                'fees': [[0, 0.26]], 'fees_maker': [[0, 0.16]], 'fee_volume_currency': 'ZUSD',
+                'margin_call': 80, 'margin_stop': 40, 'ordermin': '0.0001', 'costmin': '0.5',
+                'tick_size': self.fmt_price(10 ** -self.price_decimals), 'status': 'online'
+            }
+        return self._result(pairs)
+
+    async def handle_depth(self, request):
+        symbol = self._pair_symbol(request.query.get('pair'))
+        if symbol is None:
+            return self._error('EQuery:Unknown asset pair')
+        book = self.books[symbol]
+        count = int(request.query.get('count', 100))
+        now = int(time.time())
+        return self._result({self._rest_id(symbol): {
+            'asks': [[self.price_text(t), self.size_text(s), now] for t, s in book.levels(False, count)],
+            'bids': [[self.price_text(t), self.size_text(s), now] for t, s in book.levels(True, count)]
+        }})
+
+    async def handle_ticker(self, request):
+        requested = request.query.get('pair')
+        symbols = [self._pair_symbol(p) for p in requested.split(',')] if requested else list(self.books)
+        result = {}
+        for symbol in filter(None, symbols):
+            book = self.books[symbol]
+            (bid, bid_size), (ask, ask_size) = book.levels(True, 1)[0], book.levels(False, 1)[0]
+            last = self.price_text((bid + ask) // 2)
+            result[self._rest_id(symbol)] = {
+                'a': [self.price_text(ask), '1', self.fmt_size(ask_size)],
+                'b': [self.price_text(bid), '1', self.fmt_size(bid_size)],
+                'c': [last, '0.001'], 'v': ['0', '0'], 'p': [last, last], 't': [0, 0],
+                'l': [last, last], 'h': [last, last], 'o': last
+            }
+        return self._result(result)
+
+    async def handle_balance(self, request):
+        return self._result({self.ASSETS.get(c, c): f"{v:.10f}" for c, v in self.account.total.items()})
+
+    async def handle_balance_ex(self, request):
+        return self._result({
+            self.ASSETS.get(c, c): {'balance': f"{v:.10f}", 'hold_trade': f"{self.account.locked.get(c, 0.0):.10f}"}
+            for c, v in self.account.total.items()
+        })
+
+    def _order_info(self, order: Dict) -> Dict:
+        pair = self._altname(order['symbol'])
+        status = 'canceled' if order['status'] == 'canceled' else order['status']
+        return {
+            'refid': None, 'userref': 0, 'status': status, 'reason': None,
+            'opentm': order['timestamp'] / 1000, 'closetm': order['updated'] / 1000 if status != 'open' else 0,
+            'starttm': 0, 'expiretm': 0,
+            'descr': {
+                'pair': pair, 'type': order['side'], 'ordertype': order['type'],
+                'price': self.fmt_price(order['price'] or 0.0), 'price2': '0', 'leverage': 'none',
+                'order': f"{order['side']} {self.fmt_size(order['amount'])} {pair} @ {order['type']} {order['price'] or ''}",
+                'close': ''
+            },
+            'vol': self.fmt_size(order['amount']), 'vol_exec': self.fmt_size(order['filled']),
+            'cost': f"{order['cost']:.5f}", 'fee': f"{order['fee']:.5f}",
+            'price': f"{(order['cost'] / order['filled']) if order['filled'] else 0.0:.5f}",
+            'stopprice': '0.00000', 'limitprice': '0.00000', 'misc': '', 'oflags': 'fciq'
+        }
+
+    async def handle_add_order(self, request):
+        params = await request.post()
+        symbol = self._pair_symbol(params.get('pair'))
+        if symbol is None:
+            return self._error('EQuery:Unknown asset pair')
+        try:
+            order = self.account.place(
+                symbol, params.get('type'), params.get('ordertype', 'limit'),
+                float(params.get('volume', 0)), float(params['price']) if params.get('price') else None,
+                params.get('cl_ord_id')
+            )
+        except ValueError as e:
+            return self._error('EOrder:Insufficient funds' if 'insufficient' in str(e) else f'EGeneral:Invalid arguments:{e}')
+        return self._result({'descr': {'order': self._order_info(order)['descr']['order']}, 'txid': [order['id']]})
+
+    async def handle_query_orders(self, request):
+        params = await request.post()
+        txids = (params.get('txid') or '').split(',')
+        return self._result({
+            txid: self._order_info(self.account.orders[txid]) for txid in txids if txid in self.account.orders
+        })
+
+    async def handle_cancel_order(self, request):
+        params = await request.post()
+        order = self.account.orders.get(params.get('txid'))
+        if order is None or order['status'] != 'open':
+            return self._error('EOrder:Unknown order')
+        self.account.cancel(order['id'])
+        return self._result({'count': 1})
+
+    async def handle_open_orders(self, request):
+        return self._result({'open': {
+            order['id']: self._order_info(order)
+            for order in self.account.orders.values() if order['status'] == 'open'
+        }})
+
+
+class CoinbaseSimulator(VenueSimulator):
+    """Coinbase Advanced Trade WebSocket (level2, market_trades, heartbeats) with per-connection
+    sequence_num, and the /api/v3/brokerage REST endpoints"""
+
+    name = 'coinbase'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.product_ids = {symbol.replace('/', '-'): symbol for symbol in self.books}
+
+    def routes(self, prefix: str) -> List[web.RouteDef]:
+        return [
+            web.get(f'{prefix}', self.handle_ws),
+            web.get(f'{prefix}/', self.handle_ws),
+            web.get(f'{prefix}/v2/time', self.handle_time),
+            web.get(f'{prefix}/api/v3/brokerage/time', self.handle_brokerage_time),
+            web.get(f'{prefix}/v2/currencies', self.handle_currencies),
+            web.get(f'{prefix}/v2/currencies/crypto', self.handle_currencies),
+            web.get(f'{prefix}/v2/exchange-rates', self.handle_exchange_rates),
+            web.get(f'{prefix}/api/v3/brokerage/market/products', self.handle_products),
+            web.get(f'{prefix}/api/v3/brokerage/products', self.handle_products),
+            web.get(f'{prefix}/api/v3/brokerage/market/products/{{product_id}}/ticker', self.handle_ticker),
+            web.get(f'{prefix}/api/v3/brokerage/products/{{product_id}}/ticker', self.handle_ticker),
+            web.get(f'{prefix}/api/v3/brokerage/market/product_book', self.handle_product_book),
+            web.get(f'{prefix}/api/v3/brokerage/product_book', self.handle_product_book),
+            web.get(f'{prefix}/api/v3/brokerage/best_bid_ask', self.handle_best_bid_ask),
+            web.get(f'{prefix}/api/v3/brokerage/transaction_summary', self.handle_transaction_summary),
+            web.get(f'{prefix}/api/v3/brokerage/accounts', self.handle_accounts),
+            web.get(f'{prefix}/v2/accounts', self.handle_wallets),
+            web.post(f'{prefix}/api/v3/brokerage/orders', self.handle_create_order),
+            web.get(f'{prefix}/api/v3/brokerage/orders/historical/batch', self.handle_list_orders),
+            web.get(f'{prefix}/api/v3/brokerage/orders/historical/{{order_id}}', self.handle_fetch_order),
+            web.post(f'{prefix}/api/v3/brokerage/orders/batch_cancel', self.handle_cancel_orders),
+        ]
+
+    # ==================== WEBSOCKET ====================
+
+    async def handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        return await self._serve(request, Connection(web.WebSocketResponse(compress=False)))
+
+    def _frame(self, connection: Connection, channel: str, events: str) -> str:
+        """Wrap pre-encoded events; sequence_num counts every message on the connection"""
+        sequence = connection.sequence
+        connection.sequence += 1
+        return (f'{{"channel":"{channel}","client_id":"","timestamp":"{iso_time()}",'
+                f'"sequence_num":{sequence},"events":{events}}}')
+
+    async def on_message(self, connection: Connection, message: Dict):
+        msg_type = message.get('type')
+        channel = message.get('channel')
+        products = [p for p in message.get('product_ids', []) if p in self.product_ids]
+        if msg_type not in ('subscribe', 'unsubscribe') or not channel:
+            return
+        channel = 'level2' if channel == 'l2_data' else channel
+
+        for product_id in products or [None]:
+            key = (channel, product_id)
+            if msg_type == 'subscribe':
+                connection.subscriptions.add(key)
+            else:
+                connection.subscriptions.discard(key)
+
+        subscriptions = {}
+        for name, product_id in connection.subscriptions:
+            subscriptions.setdefault(name, [])
+            if product_id:
+                subscriptions[name].append(product_id)
+        await self._send(connection, self._frame(connection, 'subscriptions', json.dumps([{'subscriptions': subscriptions}])))
+
+        if msg_type == 'subscribe' and channel == 'level2':
+            for product_id in products:
+                await self._send(connection, self._frame(connection, 'l2_data', self._snapshot_events(product_id)))
+
+    def _update(self, book: SimulatedBook, is_bid: bool, ticks: int, size: float, event_time: str) -> Dict:
+        return {
+            'side': 'bid' if is_bid else 'offer', 'event_time': event_time,
+            'price_level': self.price_text(ticks), 'new_quantity': self.size_text(size)
+        }
+
+    def _snapshot_events(self, product_id: str) -> str:
+        book = self.books[self.product_ids[product_id]]
+        event_time = iso_time()
+        updates = [self._update(book, True, t, s, event_time) for t, s in book.levels(True)]
+        updates.extend(self._update(book, False, t, s, event_time) for t, s in book.levels(False))
+        return json.dumps([{'type': 'snapshot', 'product_id': product_id, 'updates': updates}])
+
+    async def emit_depth(self, book: SimulatedBook, changes):
+        product_id = book.symbol.replace('/', '-')
+        event_time = iso_time()
+        events = json.dumps([{
+            'type': 'update', 'product_id': product_id,
+            'updates': [self._update(book, is_bid, t, s, event_time) for is_bid, t, s in changes]
+        }])
+        key = ('level2', product_id)
+        for connection in list(self.connections):
+            if key in connection.subscriptions:
+                await self._send(connection, self._frame(connection, 'l2_data', events))
+
+    async def emit_trade(self, book: SimulatedBook, trade):
+        ticks, size, side, trade_id = trade
+        product_id = book.symbol.replace('/', '-')
+        events = json.dumps([{'type': 'update', 'trades': [{
+            'trade_id': str(trade_id), 'product_id': product_id, 'price': self.price_text(ticks),
+            'size': self.size_text(size), 'side': side.upper(), 'time': iso_time()
+        }]}])
+        key = ('market_trades', product_id)
+        for connection in list(self.connections):
+            if key in connection.subscriptions:
+                await self._send(connection, self._frame(connection, 'market_trades', events))
+
+    # ==================== REST ====================
+
+    async def handle_time(self, request):
+        now = time.time()
+        return web.json_response({'data': {'iso': iso_time(now * 1000), 'epoch': int(now)}})
+
+    async def handle_brokerage_time(self, request):
+        now = time.time()
+        return web.json_response({'iso': iso_time(now * 1000), 'epochSeconds': str(int(now)),
+                                  'epochMillis': str(int(now * 1000))})
+
+    async def handle_currencies(self, request):
+        currencies = sorted({c for symbol in self.books for c in symbol.split('/')})
+        return web.json_response({'data': [
+            {'id': c, 'code': c, 'name': c, 'min_size': '0.00000001', 'type': 'crypto' if c == 'BTC' else 'fiat',
+             'exponent': 8, 'sort_index': i}
+            for i, c in enumerate(currencies)
+        ]})
+
+    async def handle_exchange_rates(self, request):
+        return web.json_response({'data': {'currency': request.query.get('currency', 'USD'), 'rates': {}}})
+
+    def _product(self, product_id: str) -> Dict:
+        book = self.books[self.product_ids[product_id]]
+        base, quote = product_id.split('-')
+        mid = self.price_text((book.best_bid + book.best_ask) // 2)
+        return {
+            'product_id': product_id, 'price': mid, 'price_percentage_change_24h': '0',
+            'volume_24h': '0', 'volume_percentage_change_24h': '0',
+            'base_increment': '0.00000001', 'quote_increment': self.fmt_price(book.tick_size),
+            'quote_min_size': '1', 'quote_max_size': '10000000', 'base_min_size': '0.00000001',
+            'base_max_size': '3400', 'base_name': base, 'quote_name': quote, 'watched': False,
+            'is_disabled': False, 'new': False, 'status': 'online', 'cancel_only': False,
+            'limit_only': False, 'post_only': False, 'trading_disabled': False, 'auction_mode': False,
+            'product_type': 'SPOT', 'quote_currency_id': quote, 'base_currency_id': base,
+            'fcm_trading_session_details': None, 'mid_market_price': '',
+            'alias': '', 'alias_to': [], 'base_display_symbol': base, 'quote_display_symbol': quote,
+            'view_only': False, 'price_increment': self.fmt_price(book.tick_size)
+        }
+
+    async def handle_products(self, request):
+        products = [self._product(p) for p in self.product_ids]
+        return web.json_response({'products': products, 'num_products': len(products)})
+
+    async def handle_ticker(self, request):
+        product_id = request.match_info['product_id']
+        if product_id not in self.product_ids:
+            return web.json_response({'error': 'NOT_FOUND', 'message': 'product not found'}, status=404)
+        book = self.books[self.product_ids[product_id]]
+        return web.json_response({
+            'trades': [], 'best_bid': self.price_text(book.best_bid),
+            'best_ask': self.price_text(book.best_ask)
+        })
+
+    def _pricebook(self, product_id: str, limit: Optional[int] = None) -> Dict:
+        book = self.books[self.product_ids[product_id]]
+        return {
+            'product_id': product_id,
+            'bids': [{'price': self.price_text(t), 'size': self.size_text(s)} for t, s in book.levels(True, limit)],
+            'asks': [{'price': self.price_text(t), 'size': self.size_text(s)} for t, s in book.levels(False, limit)],
+            'time': iso_time()
+        }
+
+    async def handle_product_book(self, request):
+        product_id = request.query.get('product_id')
+        if product_id not in self.product_ids:
+            return web.json_response({'error': 'NOT_FOUND', 'message': 'product not found'}, status=404)
+        limit = int(request.query['limit']) if request.query.get('limit') else None
+        return web.json_response({'pricebook': self._pricebook(product_id, limit)})
+
+    async def handle_best_bid_ask(self, request):
+        requested = request.query.getall('product_ids', list(self.product_ids))
+        return web.json_response({'pricebooks': [
+            self._pricebook(p, 1) for p in requested if p in self.product_ids
+        ]})
+
+    async def handle_transaction_summary(self, request):
+        rate = str(self.account.fee_rate)
+        return web.json_response({
+            'total_volume': 0, 'total_fees': 0,
+            'fee_tier': {'pricing_tier': 'Advanced 1', 'usd_from': '0', 'usd_to': '10000',
+                         'taker_fee_rate': rate, 'maker_fee_rate': rate},
+        })
+
+    async def handle_accounts(self, request):
+        account = self.account
+        accounts = [{
+            'uuid': f"{currency.lower()}-account", 'name': f"{currency} Wallet", 'currency': currency,
+            'available_balance': {'value': self.fmt_size(account.free(currency)), 'currency': currency},
+            'default': True, 'active': True, 'created_at': iso_time(), 'updated_at': iso_time(),
+            'deleted_at': None, 'type': 'ACCOUNT_TYPE_CRYPTO' if currency == 'BTC' else 'ACCOUNT_TYPE_FIAT',
+            'ready': True, 'hold': {'value': self.fmt_size(account.locked.get(currency, 0.0)), 'currency': currency}
+        } for currency in account.total]
+        return web.json_response({'accounts': accounts, 'has_next': False, 'cursor': '', 'size': len(accounts)})
+
+    async def handle_wallets(self, request):
+        # Sign-in-with-Coinbase v2 shape, ccxt's default fetch_balance endpoint
+        wallets = [{
+            'id': f"{currency.lower()}-wallet", 'name': f"{currency} Wallet", 'primary': True, 'type': 'wallet',
+            'currency': {'code': currency, 'name': currency, 'exponent': 8,
+                         'type': 'crypto' if currency == 'BTC' else 'fiat'},
+            'balance': {'amount': self.fmt_size(total), 'currency': currency},
+            'created_at': iso_time(), 'updated_at': iso_time(), 'resource': 'account',
+            'resource_path': f"/v2/accounts/{currency.lower()}-wallet"
+        } for currency, total in self.account.total.items()]
+        return web.json_response({'pagination': {'next_uri': None}, 'data': wallets})
+
+    STATUS = {'open': 'OPEN', 'closed': 'FILLED', 'canceled': 'CANCELLED'}
+
+    def _order(self, order: Dict) -> Dict:
+        product_id = order['symbol'].replace('/', '-')
+        if order['type'] == 'limit':
+            configuration = {'limit_limit_gtc': {
+                'base_size': self.fmt_size(order['amount']), 'limit_price': self.fmt_price(order['price']), 'post_only': False
+            }}
+        else:
+            configuration = {'market_market_ioc': {'base_size': self.fmt_size(order['amount'])}}
+        average = order['cost'] / order['filled'] if order['filled'] else 0.0
+        return {
+            'order_id': order['id'], 'product_id': product_id, 'user_id': 'simulator',
+            'order_configuration': configuration, 'side': order['side'].upper(),
+            'client_order_id': order['clientOrderId'], 'status': self.STATUS[order['status']],
+            'time_in_force': 'GOOD_UNTIL_CANCELLED' if order['type'] == 'limit' else 'IMMEDIATE_OR_CANCEL',
+            'created_time': iso_time(order['timestamp']), 'completion_percentage': f"{order['filled'] / order['amount'] * 100:.2f}",
+            'filled_size': self.fmt_size(order['filled']), 'average_filled_price': f"{average:.8f}",
+            'fee': '', 'number_of_fills': str(len(order['trades'])), 'filled_value': f"{order['cost']:.8f}",
+            'pending_cancel': False, 'size_in_quote': False, 'total_fees': f"{order['fee']:.8f}",
+            'size_inclusive_of_fees': False, 'total_value_after_fees': f"{order['cost'] + order['fee']:.8f}",
+            'trigger_status': 'INVALID_ORDER_TYPE', 'order_type': order['type'].upper(),
+            'reject_reason': '', 'settled': order['status'] != 'open', 'product_type': 'SPOT',
+            'reject_message': '', 'cancel_message': '', 'order_placement_source': 'RETAIL_ADVANCED',
+            'outstanding_hold_amount': self.fmt_size(order['locked']), 'is_liquidation': False,
+            'last_fill_time': iso_time(order['updated']) if order['trades'] else None
+        }
+
+    async def handle_create_order(self, request):
+        body = await request.json()
+        product_id = body.get('product_id')
+        side = (body.get('side') or '').lower()
+        configuration = body.get('order_configuration', {})
+        failure = {'success': False, 'failure_reason': 'UNKNOWN_FAILURE_REASON', 'order_id': '',
+                   'error_response': {}, 'order_configuration': configuration}
+        if product_id not in self.product_ids:
+            failure['error_response'] = {'error': 'INVALID_PRODUCT_ID', 'message': 'Invalid product_id'}
+            return web.json_response(failure)
+
+        symbol = self.product_ids[product_id]
+        book = self.books[symbol]
+        try:
+            if 'limit_limit_gtc' in configuration or 'limit_limit_gtd' in configuration:
+                config = configuration.get('limit_limit_gtc') or configuration['limit_limit_gtd']
+                order = self.account.place(symbol, side, 'limit', float(config['base_size']),
+                                           float(config['limit_price']), body.get('client_order_id'))
+            else:
+                config = configuration.get('market_market_ioc', {})
+                if 'base_size' in config:
+                    amount = float(config['base_size'])
+                else:
+                    # Market buys are sized in quote currency
+                    amount = float(config['quote_size']) / book.price(book.best_ask)
+                order = self.account.place(symbol, side, 'market', amount, None, body.get('client_order_id'))
+        except (ValueError, KeyError) as e:
+            reason = 'INSUFFICIENT_FUND' if 'insufficient' in str(e) else 'INVALID_ORDER_CONFIGURATION'
+            failure['error_response'] = {'error': reason, 'message': str(e), 'preview_failure_reason': reason}
+            return web.json_response(failure)
+
+        return web.json_response({
+            'success': True, 'failure_reason': 'UNKNOWN_FAILURE_REASON', 'order_id': order['id'],
+            'success_response': {'order_id': order['id'], 'product_id': product_id,
+                                 'side': side.upper(), 'client_order_id': order['clientOrderId']},
+            'order_configuration': configuration
+        })
+
+    async def handle_fetch_order(self, request):
+        order = self.account.orders.get(request.match_info['order_id'])
+        if order is None:
+            return web.json_response({'error': 'NOT_FOUND', 'message': 'order not found'}, status=404)
+        return web.json_response({'order': self._order(order)})
+
+    async def handle_list_orders(self, request):
+        statuses = request.query.getall('order_status', [])
+        orders = [
+            self._order(order) for order in self.account.orders.values()
+            if not statuses or self.STATUS[order['status']] in statuses
+        ]
+        return web.json_response({'orders': orders, 'sequence': '0', 'has_next': False, 'cursor': ''})
+
+    async def handle_cancel_orders(self, request):
+        body = await request.json()
+        results = []
+        for order_id in body.get('order_ids', []):
+            order = self.account.orders.get(order_id)
+            if order is None or order['status'] != 'open':
+                results.append({'success': False, 'failure_reason': 'UNKNOWN_CANCEL_ORDER', 'order_id': order_id})
+            else:
+                self.account.cancel(order_id)
+                results.append({'success': True, 'failure_reason': 'UNKNOWN_CANCEL_FAILURE_REASON', 'order_id': order_id})
+        return web.json_response({'results': results})
+
+
+# ==================== SERVER ====================
+
+class ExchangeSimulator:
+    """Local HTTP/WebSocket server hosting simulated venues under /binance, /kraken and /coinbase.
+
+    Point the bot at it with the `exchanges.endpoints` config section that
+    endpoints() returns; each venue's REST and WebSocket base URLs are then
+    rewritten to this server, for the custom WebSocket clients and the ccxt
+    clients alike.
+    """
+
+    VENUES = {
+        'binance': BinanceUSSimulator,
+        'kraken': KrakenSimulator,
+        'coinbase': CoinbaseSimulator
+    }
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, rate: float = 100.0,
+                 trade_ratio: float = 0.1, symbols: Optional[Dict[str, float]] = None,
+                 venues: Optional[List[str]] = None, seed: int = 0):
+        self.host = host
+        self.port = port
+        self.venues = {
+            name: self.VENUES[name](symbols or DEFAULT_SYMBOLS, rate=rate, trade_ratio=trade_ratio, seed=seed)
+            for name in (venues or self.VENUES)
+        }
+        self.app = web.Application()
+        for name, venue in self.venues.items():
+            self.app.add_routes(venue.routes(f'/{name}'))
+        self.runner = None
+        self.tasks = []
+
+    def endpoints(self) -> Dict[str, Dict[str, str]]:
+        """The exchanges.endpoints config section for this server"""
+        return {
+            name: {'rest': f'http://{self.host}:{self.port}/{name}', 'ws': f'ws://{self.host}:{self.port}/{name}'}
+            for name in self.venues
+        }
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        self.tasks = [asyncio.create_task(venue.publish()) for venue in self.venues.values()]
+        logger.info(f"🧪 Exchange simulator listening on {self.host}:{self.port} "
+                    f"({', '.join(self.venues)}; {next(iter(self.venues.values())).rate:g} msgs/s per venue)")
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    def stats(self) -> Dict[str, int]:
+        return {name: venue.messages_sent for name, venue in self.venues.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Binance.US / Kraken / Coinbase protocol simulator")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rate', type=float, default=100.0, help="book messages per second per venue (10 - 100000)")
+    parser.add_argument('--trade-ratio', type=float, default=0.1, help="share of messages that are trades")
+    parser.add_argument('--venues', nargs='+', choices=list(ExchangeSimulator.VENUES))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    async def main():
+        simulator = ExchangeSimulator(args.host, args.port, args.rate, args.trade_ratio,
+                                      venues=args.venues, seed=args.seed)
+        await simulator.start()
+        print(json.dumps({'exchanges': {'endpoints': simulator.endpoints()}}, indent=2))
+        try:
+            while True:
+                await asyncio.sleep(10)
+                logger.info(f"📤 Messages sent: {simulator.stats()}")
+        finally:
+            await simulator.stop()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -1,58 +1,205 @@
 import asyncio
+import itertools
 import json
 import logging
-import time
+import aiohttp
 import websockets
+from typing import Iterable, List, Optional, Union
+from order_book import OrderBook, BinanceOrderBook, KrakenOrderBook
+from message_decoding import loads, iso_to_ms, BookUpdate, TradeUpdate
+
+
+def symbol_list(symbols: Union[str, Iterable[str]]) -> List[str]:
+    """Accept one symbol, a comma-separated string (capture names) or any iterable of symbols"""
+    if isinstance(symbols, str):
+        return [s for s in symbols.split(',') if s]
+    return list(symbols)
+
 
 class BinanceUSWebSocket:
-    def __init__(self, symbol: str = "btcusdt"):
-        self.uri = f"wss://stream.binance.us:9443/ws/{symbol}@depth@100ms/{symbol}@trade"
+    """One combined-stream socket carrying depth and trades for every subscribed market"""
+    WS_URL = "wss://stream.binance.us:9443"
+    REST_URL = "https://api.binance.us"
+    QUOTES = ('USDT', 'USDC', 'BUSD', 'USD', 'BTC', 'ETH', 'BNB', 'DAI')  # to split BTCUSDT back into BTC/USDT
+
+    def __init__(self, symbols: Union[str, Iterable[str]] = "btcusdt", ws_url: str = None, rest_url: str = None,
+                 session: Optional[aiohttp.ClientSession] = None):
+        self.ws_base = ws_url or self.WS_URL
+        self.snapshot_uri = f"{rest_url or self.REST_URL}/api/v3/depth"
         self.ws = None
+        self.session = session               # REST snapshots reuse one keep-alive connection pool
+        self._owns_session = session is None
         self.logger = logging.getLogger(__name__)
         self.callbacks = []
+        self.markets = {}          # market id (BTCUSDT) -> unified symbol (BTC/USDT)
+        self.books = {}            # market id -> BinanceOrderBook
+        self._snapshot_tasks = {}  # market id -> REST snapshot fetch in flight
+        self._request_ids = itertools.count(1)
+        for symbol in symbol_list(symbols):
+            self._add_market(symbol)
+        self.capture_name = f"binance_us:{','.join(m.lower() for m in self.markets)}"
+        self.recorder = None     # MarketRecorder capturing raw frames, if enabled
+        self.replaying = False   # fed by MarketReplayer: no network calls
+
+    @classmethod
+    def market_id(cls, symbol: str) -> str:
+        """'BTC/USDT' or 'btcusdt' -> 'BTCUSDT'"""
+        return symbol.replace('/', '').upper()
+
+    @classmethod
+    def unified_symbol(cls, symbol: str) -> str:
+        if '/' in symbol:
+            return symbol.upper()
+        market = symbol.upper()
+        for quote in cls.QUOTES:
+            if market.endswith(quote) and len(market) > len(quote):
+                return f"{market[:-len(quote)]}/{quote}"
+        return market
+
+    def _add_market(self, symbol: str) -> Optional[str]:
+        market = self.market_id(symbol)
+        if market in self.books:
+            return None
+        self.markets[market] = self.unified_symbol(symbol)
+        self.books[market] = BinanceOrderBook('binance_us', self.markets[market])
+        return market
+
+    def get_book(self, symbol: str) -> Optional[BinanceOrderBook]:
+        return self.books.get(self.market_id(symbol))
+
+    @staticmethod
+    def _streams(markets: Iterable[str]) -> List[str]:
+        streams = []
+        for market in markets:
+            streams.append(f"{market.lower()}@depth@100ms")
+            streams.append(f"{market.lower()}@trade")
+        return streams
 
     async def connect(self):
         try:
-            self.ws = await websockets.connect(self.uri)
-            self.logger.info("✅ Binance.US WebSocket connected")
+            self.ws = await websockets.connect(f"{self.ws_base}/stream?streams={'/'.join(self._streams(self.markets))}")
+            self.logger.info(f"✅ Binance.US WebSocket connected ({len(self.markets)} markets)")
             asyncio.create_task(self._listen())
         except Exception as e:
             self.logger.error(f"Binance.US connection failed: {e}")
             raise
 
+    async def add_symbols(self, symbols: Union[str, Iterable[str]]):
+        """Subscribe more markets on the open socket"""
+        markets = [m for m in (self._add_market(s) for s in symbol_list(symbols)) if m]
+        if markets and self.ws is not None:
+            await self._send_subscription('SUBSCRIBE', markets)
+
+    async def remove_symbols(self, symbols: Union[str, Iterable[str]]):
+        markets = [m for m in (self.market_id(s) for s in symbol_list(symbols)) if m in self.books]
+        for market in markets:
+            del self.books[market]
+            del self.markets[market]
+        if markets and self.ws is not None:
+            await self._send_subscription('UNSUBSCRIBE', markets)
+
+    async def _send_subscription(self, method: str, markets: List[str]):
+        request = {'method': method, 'params': self._streams(markets), 'id': next(self._request_ids)}
+        await self.ws.send(json.dumps(request))
+
     async def _listen(self):
         try:
             async for message in self.ws:
-                data = json.loads(message)
-                await self._handle_message(data)
+                if self.recorder:
+                    self.recorder.record(self.capture_name, message)
+                await self._handle_message(loads(message))
         except Exception as e:
             self.logger.error(f"Binance.US listen error: {e}")
 
+    def _book(self, market: str) -> Optional[BinanceOrderBook]:
+        book = self.books.get(market)
+        if book is None and self.replaying and market:
+            # Markets added at runtime are not in the capture name
+            self._add_market(market)
+            book = self.books[market]
+        return book
+
     async def _handle_message(self, data: dict):
+        if 'stream' in data:
+            data = data['data']  # combined stream envelope
         msg_type = data.get('e')
         if msg_type == 'depthUpdate':
-            book_data = {
-                'exchange': 'binance_us',
-                'type': 'orderbook',
-                'bids': [[float(b[0]), float(b[1])] for b in data.get('b', [])[:10]],
-                'asks': [[float(a[0]), float(a[1])] for a in data.get('a', [])[:10]],
-                'timestamp': data.get('E')
-            }
-            await self._notify_callbacks(book_data)
+            market = data.get('s')
+            book = self._book(market)
+            if book is None:
+                return
+            if book.apply_diff(data):
+                await self._notify_callbacks(self._book_data(book, data.get('E')))
+            elif not book.synced:
+                self._request_snapshot(market)
         elif msg_type == 'trade':
-            trade_data = {
-                'exchange': 'binance_us',
-                'type': 'trade',
-                'price': float(data.get('p', 0)),
-                'quantity': float(data.get('q', 0)),
-                'timestamp': data.get('E')
-            }
-            await self._notify_callbacks(trade_data)
+            symbol = self.markets.get(data.get('s'))
+            if symbol is None:
+                return
+            # m: the buyer was the maker, so the aggressor sold
+            trade = TradeUpdate('binance_us', symbol, float(data.get('p', 0)), float(data.get('q', 0)),
+                                data.get('E'), data.get('t'), 'sell' if data.get('m') else 'buy')
+            await self._notify_callbacks(trade)
+
+    def _book_data(self, book: BinanceOrderBook, timestamp) -> BookUpdate:
+        return BookUpdate('binance_us', book.symbol, book, timestamp, book.last_update_id)
+
+    def _request_snapshot(self, market: str):
+        """Start a REST snapshot fetch unless one is already in flight"""
+        if self.replaying:
+            return  # the capture holds the snapshot that was loaded live
+        task = self._snapshot_tasks.get(market)
+        if task is None or task.done():
+            self._snapshot_tasks[market] = asyncio.create_task(self._load_snapshot(market))
+
+    async def _load_snapshot(self, market: str, max_attempts: int = 5):
+        """Fetch the depth snapshot and replay buffered diffs until the book is in sync"""
+        params = {'symbol': market, 'limit': 1000}
+        for attempt in range(max_attempts):
+            try:
+                async with self._http().get(self.snapshot_uri, params=params) as response:
+                    snapshot = await response.json()
+                snapshot['symbol'] = market  # the REST response does not say which market it is
+                if self.recorder:
+                    self.recorder.record_snapshot(self.capture_name, snapshot)
+                if await self._apply_snapshot(snapshot):
+                    return
+                self.logger.debug(f"Binance.US {market} snapshot older than stream, refetching")
+            except Exception as e:
+                self.logger.warning(f"Binance.US {market} snapshot attempt {attempt+1} failed: {e}")
+            await asyncio.sleep(0.5 * (attempt + 1))
+        self.logger.error(f"Binance.US {market} book could not be synced")
+
+    def _http(self) -> aiohttp.ClientSession:
+        """Shared snapshot session, opened on first use so it binds to the running loop"""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession()
+            self._owns_session = True
+        return self.session
+
+    async def _apply_snapshot(self, snapshot: dict) -> bool:
+        """Load a depth snapshot; subscribers are notified once the book is in sync"""
+        market = snapshot.get('symbol') or next(iter(self.books), None)  # older captures: single market
+        book = self._book(market)
+        if book is None or not book.load_snapshot(snapshot):
+            return False
+        self.logger.info(f"📚 Binance.US {market} book synced at update {book.last_update_id}")
+        # Exchange time of the last buffered diff replayed on top, if any (a local clock could run ahead)
+        await self._notify_callbacks(self._book_data(book, book.timestamp))
+        return True
 
     def subscribe(self, callback):
         self.callbacks.append(callback)
 
-    async def _notify_callbacks(self, data: dict):
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+        for task in self._snapshot_tasks.values():
+            task.cancel()
+        if self._owns_session and self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    async def _notify_callbacks(self, data):
         for callback in self.callbacks:
             try:
                 await callback(data)
@@ -60,48 +207,139 @@ class BinanceUSWebSocket:
                 self.logger.error(f"Callback error: {e}")
 
 class KrakenWebSocket:
-    def __init__(self, pair: str = "XBT/USD"):
-        self.uri = "wss://ws.kraken.com"
+    """One socket with a book subscription per pair; messages carry the pair they belong to"""
+    WS_URL = "wss://ws.kraken.com"
+    ASSET_NAMES = {'BTC': 'XBT', 'DOGE': 'XDG'}  # unified -> Kraken WebSocket v1 names
+
+    def __init__(self, pairs: Union[str, Iterable[str]] = "XBT/USD", depth: int = 10, ws_url: str = None):
+        self.uri = ws_url or self.WS_URL
         self.ws = None
-        self.pair = pair
+        self.depth = depth
         self.logger = logging.getLogger(__name__)
         self.callbacks = []
+        self.books = {}   # wsname (XBT/USD) -> KrakenOrderBook
+        self._resync_pending = set()  # pairs resubscribed after a mismatch, awaiting the new snapshot
+        for pair in symbol_list(pairs):
+            self._add_pair(pair)
+        self.capture_name = f"kraken:{','.join(self.books)}"
+        self.recorder = None     # MarketRecorder capturing raw frames, if enabled
+        self.replaying = False   # fed by MarketReplayer: no network calls
+
+    @classmethod
+    def wsname(cls, symbol: str) -> str:
+        """'BTC/USD' or 'XBT/USD' -> 'XBT/USD'"""
+        base, quote = symbol.upper().split('/')
+        return f"{cls.ASSET_NAMES.get(base, base)}/{cls.ASSET_NAMES.get(quote, quote)}"
+
+    @classmethod
+    def unified_symbol(cls, wsname: str) -> str:
+        names = {v: k for k, v in cls.ASSET_NAMES.items()}
+        base, quote = wsname.split('/')
+        return f"{names.get(base, base)}/{names.get(quote, quote)}"
+
+    def _add_pair(self, symbol: str) -> Optional[str]:
+        pair = self.wsname(symbol)
+        if pair in self.books:
+            return None
+        self.books[pair] = KrakenOrderBook('kraken', self.unified_symbol(pair), depth=self.depth)
+        return pair
+
+    def get_book(self, symbol: str) -> Optional[KrakenOrderBook]:
+        return self.books.get(self.wsname(symbol))
 
     async def connect(self):
         try:
             self.ws = await websockets.connect(self.uri)
-            self.logger.info("✅ Kraken WebSocket connected")
-            subscribe_msg = {
-                "event": "subscribe",
-                "pair": [self.pair],
-                "subscription": {"name": "book"}
-            }
-            await self.ws.send(json.dumps(subscribe_msg))
+            self.logger.info(f"✅ Kraken WebSocket connected ({len(self.books)} pairs)")
+            await self._send_subscription("subscribe", list(self.books))
             asyncio.create_task(self._listen())
         except Exception as e:
             self.logger.error(f"Kraken connection failed: {e}")
             raise
 
+    async def add_symbols(self, symbols: Union[str, Iterable[str]]):
+        """Subscribe more pairs on the open socket"""
+        pairs = [p for p in (self._add_pair(s) for s in symbol_list(symbols)) if p]
+        if pairs and self.ws is not None:
+            await self._send_subscription("subscribe", pairs)
+
+    async def remove_symbols(self, symbols: Union[str, Iterable[str]]):
+        pairs = [p for p in (self.wsname(s) for s in symbol_list(symbols)) if p in self.books]
+        for pair in pairs:
+            del self.books[pair]
+            self._resync_pending.discard(pair)
+        if pairs and self.ws is not None:
+            await self._send_subscription("unsubscribe", pairs)
+
+    async def _send_subscription(self, event: str, pairs: List[str]):
+        subscribe_msg = {
+            "event": event,
+            "pair": pairs,
+            "subscription": {"name": "book", "depth": self.depth}
+        }
+        await self.ws.send(json.dumps(subscribe_msg))
+
     async def _listen(self):
         try:
             async for message in self.ws:
-                data = json.loads(message)
-                if isinstance(data, list) and len(data) > 3:
-                    book_data = {
-                        'exchange': 'kraken',
-                        'type': 'orderbook',
-                        'bids': [[float(b[0]), float(b[1]), float(b[2])] for b in data[1].get('b', [])[:10]],
-                        'asks': [[float(a[0]), float(a[1]), float(a[2])] for a in data[1].get('a', [])[:10]],
-                        'timestamp': time.time() * 1000
-                    }
-                    await self._notify_callbacks(book_data)
+                if self.recorder:
+                    self.recorder.record(self.capture_name, message)
+                await self._handle_message(loads(message))
         except Exception as e:
             self.logger.error(f"Kraken listen error: {e}")
 
+    async def _handle_message(self, data):
+        if isinstance(data, list) and len(data) >= 4:
+            # [channelID, {payload}, ({payload},) channelName, pair]
+            pair = data[-1]
+            book = self.books.get(pair)
+            if book is None:
+                if not self.replaying:
+                    return  # unsubscribed, still in flight
+                self._add_pair(pair)
+                book = self.books[pair]
+            payloads = [p for p in data[1:-2] if isinstance(p, dict)]
+            if book.apply_message(payloads):
+                self._resync_pending.discard(pair)
+                await self._notify_callbacks(self._book_data(book, self._event_time(payloads)))
+            elif not book.synced and pair not in self._resync_pending:
+                # Deltas arriving until the new snapshot are dropped by the unsynced book
+                await self._resubscribe(pair)
+        elif isinstance(data, dict) and data.get('event') == 'subscriptionStatus' and data.get('status') == 'error':
+            self.logger.warning(f"Kraken subscription failed for {data.get('pair')}: {data.get('errorMessage')}")
+
+    @staticmethod
+    def _event_time(payloads: list):
+        """Latest level timestamp in a book message ('1534614248.123678'); Kraken sends no sequence numbers"""
+        latest = None
+        for payload in payloads:
+            for levels in payload.values():
+                if isinstance(levels, list):
+                    for level in levels:
+                        if latest is None or level[2] > latest:
+                            latest = level[2]
+        return latest
+
+    async def _resubscribe(self, pair: str):
+        """Request a fresh snapshot after a checksum mismatch"""
+        self._resync_pending.add(pair)
+        if self.replaying:
+            return  # the capture already holds the snapshot that followed
+        await self._send_subscription("unsubscribe", [pair])
+        await self._send_subscription("subscribe", [pair])
+
+    def _book_data(self, book: KrakenOrderBook, event_time: str = None) -> BookUpdate:
+        timestamp = float(event_time) * 1000 if event_time else None
+        return BookUpdate('kraken', book.symbol, book, timestamp, event_time)
+
     def subscribe(self, callback):
         self.callbacks.append(callback)
 
-    async def _notify_callbacks(self, data: dict):
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    async def _notify_callbacks(self, data):
         for callback in self.callbacks:
             try:
                 await callback(data)
@@ -109,48 +347,149 @@ class KrakenWebSocket:
                 self.logger.error(f"Callback error: {e}")
 
 class CoinbaseWebSocket:
-    def __init__(self, product_ids: str = "BTC-USD"):
-        self.uri = "wss://advanced-trade-ws.coinbase.com"
+    """One level2 subscription for every product; events carry their product_id"""
+    WS_URL = "wss://advanced-trade-ws.coinbase.com"
+
+    def __init__(self, product_ids: Union[str, Iterable[str]] = "BTC-USD", ws_url: str = None):
+        self.uri = ws_url or self.WS_URL
         self.ws = None
-        self.product_ids = product_ids
         self.logger = logging.getLogger(__name__)
         self.callbacks = []
+        self.books = {}   # product id (BTC-USD) -> OrderBook
+        for product_id in symbol_list(product_ids):
+            self._add_product(product_id)
+        self.last_sequence = None
+        self.capture_name = f"coinbase:{','.join(self.books)}"
+        self.recorder = None     # MarketRecorder capturing raw frames, if enabled
+        self.replaying = False   # fed by MarketReplayer: no network calls
+
+    @staticmethod
+    def product_id(symbol: str) -> str:
+        """'BTC/USD' or 'BTC-USD' -> 'BTC-USD'"""
+        return symbol.upper().replace('/', '-')
+
+    def _add_product(self, symbol: str) -> Optional[str]:
+        product_id = self.product_id(symbol)
+        if product_id in self.books:
+            return None
+        self.books[product_id] = OrderBook('coinbase', product_id.replace('-', '/'))
+        return product_id
+
+    def get_book(self, symbol: str) -> Optional[OrderBook]:
+        return self.books.get(self.product_id(symbol))
 
     async def connect(self):
         try:
             self.ws = await websockets.connect(self.uri)
-            self.logger.info("✅ Coinbase WebSocket connected")
-            subscribe_msg = {
-                "type": "subscribe",
-                "channel": "level2",
-                "product_ids": [self.product_ids]
-            }
-            await self.ws.send(json.dumps(subscribe_msg))
+            self.logger.info(f"✅ Coinbase WebSocket connected ({len(self.books)} products)")
+            await self._send_subscription("subscribe", list(self.books))
             asyncio.create_task(self._listen())
         except Exception as e:
             self.logger.error(f"Coinbase connection failed: {e}")
             raise
 
+    async def add_symbols(self, symbols: Union[str, Iterable[str]]):
+        """Subscribe more products on the open socket"""
+        product_ids = [p for p in (self._add_product(s) for s in symbol_list(symbols)) if p]
+        if product_ids and self.ws is not None:
+            await self._send_subscription("subscribe", product_ids)
+
+    async def remove_symbols(self, symbols: Union[str, Iterable[str]]):
+        product_ids = [p for p in (self.product_id(s) for s in symbol_list(symbols)) if p in self.books]
+        for product_id in product_ids:
+            del self.books[product_id]
+        if product_ids and self.ws is not None:
+            await self._send_subscription("unsubscribe", product_ids)
+
+    async def _send_subscription(self, msg_type: str, product_ids: List[str]):
+        subscribe_msg = {
+            "type": msg_type,
+            "channel": "level2",
+            "product_ids": product_ids
+        }
+        await self.ws.send(json.dumps(subscribe_msg))
+
     async def _listen(self):
         try:
             async for message in self.ws:
-                data = json.loads(message)
-                if data.get('channel') == 'level2':
-                    book_data = {
-                        'exchange': 'coinbase',
-                        'type': 'orderbook',
-                        'bids': [[float(b[0]), float(b[1])] for b in data.get('bids', [])[:10]],
-                        'asks': [[float(a[0]), float(a[1])] for a in data.get('asks', [])[:10]],
-                        'timestamp': time.time() * 1000
-                    }
-                    await self._notify_callbacks(book_data)
+                if self.recorder:
+                    self.recorder.record(self.capture_name, message)
+                await self._handle_message(loads(message))
         except Exception as e:
             self.logger.error(f"Coinbase listen error: {e}")
 
+    async def _handle_message(self, data: dict):
+        if not self._check_sequence(data.get('sequence_num')):
+            await self._resubscribe()
+            return
+        if data.get('channel') == 'l2_data':
+            event_time = data.get('timestamp')
+            for book in self._apply_events(data.get('events', [])):
+                await self._notify_callbacks(self._book_data(book, event_time))
+
+    def _check_sequence(self, sequence) -> bool:
+        """sequence_num increases by one per message on the connection; a jump means we lost data"""
+        if sequence is None:
+            return True
+        if (self.last_sequence is not None and sequence != self.last_sequence + 1
+                and any(book.synced for book in self.books.values())):
+            self.logger.warning(f"Coinbase sequence gap: expected {self.last_sequence + 1}, got {sequence}")
+            self.last_sequence = None
+            for book in self.books.values():
+                book.reset()
+            return False
+        self.last_sequence = sequence
+        return True
+
+    def _apply_events(self, events: list) -> List[OrderBook]:
+        """Apply level2 events; returns the books that changed, in event order"""
+        changed = []
+        for event in events:
+            product_id = event.get('product_id')
+            book = self.books.get(product_id)
+            if book is None:
+                if not self.replaying or not product_id:
+                    continue
+                self._add_product(product_id)
+                book = self.books[product_id]
+
+            bids = []
+            asks = []
+            for update in event.get('updates', []):
+                level = (update['price_level'], update['new_quantity'])
+                if update.get('side') == 'bid':
+                    bids.append(level)
+                else:
+                    asks.append(level)
+
+            if event.get('type') == 'snapshot':
+                book.apply_snapshot(bids, asks)
+            elif book.synced:
+                book.apply_delta(bids, asks)
+            else:
+                continue
+            if book not in changed:
+                changed.append(book)
+        return changed
+
+    async def _resubscribe(self):
+        """Resubscribe so Coinbase sends fresh snapshots"""
+        if self.replaying:
+            return  # the capture already holds the snapshot that followed
+        await self._send_subscription("unsubscribe", list(self.books))
+        await self._send_subscription("subscribe", list(self.books))
+
+    def _book_data(self, book: OrderBook, event_time: str = None) -> BookUpdate:
+        return BookUpdate('coinbase', book.symbol, book, iso_to_ms(event_time), event_time)
+
     def subscribe(self, callback):
         self.callbacks.append(callback)
 
-    async def _notify_callbacks(self, data: dict):
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    async def _notify_callbacks(self, data):
         for callback in self.callbacks:
             try:
                 await callback(data)
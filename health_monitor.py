@@ -8,6 +8,7 @@ class HealthMonitor:
         self.cycle_times = deque(maxlen=window_size)
         self.api_errors = deque(maxlen=50)
         self.fill_rates = deque(maxlen=30)
+        self.decision_latencies_us = deque(maxlen=1000)
         self.mode = "HIGH_LATENCY"
     def adjust_cycle_time(self, last_cycle_time, current_mode):
         self.cycle_times.append(last_cycle_time)
@@ -22,4 +23,16 @@ class HealthMonitor:
         self.api_errors.append((time.time(), exchange_name))
         error_rate = len([e for e in self.api_errors if time.time() - e[0] < 300]) / 5.0
         if error_rate > 0.5:
-            logger.warning(f"⚠️  High API error rate detected: {error_rate:.1f}/min")
\ No newline at end of file
+            logger.warning(f"⚠️  High API error rate detected: {error_rate:.1f}/min")
+    def record_decision_latency(self, latency_us):
+        self.decision_latencies_us.append(latency_us)
+    def get_decision_latency_stats(self):
+        if not self.decision_latencies_us:
+            return {'count': 0, 'p50_us': 0.0, 'p99_us': 0.0, 'max_us': 0.0}
+        samples = sorted(self.decision_latencies_us)
+        return {
+            'count': len(samples),
+            'p50_us': samples[len(samples) // 2],
+            'p99_us': samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+            'max_us': samples[-1]
+        }
\ No newline at end of file
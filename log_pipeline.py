@@ -0,0 +1,155 @@
+import atexit
+import json
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional
+
+try:
+    import orjson
+
+    def _dumps(event: Dict) -> bytes:
+        return orjson.dumps(event, default=str)
+except ImportError:
+    def _dumps(event: Dict) -> bytes:
+        return json.dumps(event, separators=(',', ':'), ensure_ascii=False, default=str).encode()
+
+# Pass as extra= on per-tick log calls: at most one record per call site per sample interval
+SAMPLE = {'sample': True}
+
+# Attributes every LogRecord has; anything else on a record came from extra= and goes into the event
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'sample'}
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves all formatting to the writer thread.
+
+    The stock handler merges msg % args (and renders exc_info) on the calling
+    thread; here the record is queued as is, so a `logger.info("... %s", x)`
+    on the event loop costs the LogRecord and a queue put. Arguments are
+    formatted later, so pass values, not objects that are mutated afterwards.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """Rate-limits records logged with extra=SAMPLE, per call site.
+
+    The first record of a site passes, the next ones within `interval` seconds
+    are dropped; the next record that passes notes how many were suppressed.
+    Records without the flag are never sampled.
+    """
+
+    def __init__(self, interval: float = 5.0):
+        super().__init__()
+        self.interval = interval
+        self.sites = {}       # (pathname, lineno) -> [last passed, suppressed since]
+        self.suppressed = 0
+
+    def filter(self, record) -> bool:
+        if not getattr(record, 'sample', False):
+            return True
+        now = record.created
+        site = self.sites.get((record.pathname, record.lineno))
+        if site is None:
+            self.sites[(record.pathname, record.lineno)] = [now, 0]
+            return True
+        if now - site[0] < self.interval:
+            site[1] += 1
+            self.suppressed += 1
+            return False
+        if site[1]:
+            record.suppressed = site[1]
+        site[0], site[1] = now, 0
+        return True
+
+
+class SuppressedCountFormatter(logging.Formatter):
+    """Text formatter that appends the sampled-away count to a line"""
+
+    def format(self, record) -> str:
+        line = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        return f"{line} (+{suppressed} similar suppressed)" if suppressed else line
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, msg, src, plus any extra= fields"""
+
+    def format(self, record) -> str:
+        event = {
+            'ts': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'src': f"{record.filename}:{record.lineno}"
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                event[key] = value
+        if record.exc_info:
+            event['exc'] = self.formatException(record.exc_info)
+        return _dumps(event).decode()
+
+
+class LogPipeline:
+    """Moves log output off the event loop.
+
+    Loggers get a single DeferredQueueHandler; a QueueListener thread owns the
+    real handlers (console, files) and does all formatting and I/O. The
+    sampling filter sits on the queue handler, so suppressed records never
+    reach the queue.
+    """
+
+    def __init__(self, handlers: List[logging.Handler], sample_interval: float = 5.0):
+        self.queue = queue.SimpleQueue()
+        self.sampler = SamplingFilter(sample_interval)
+        self.handler = DeferredQueueHandler(self.queue)
+        self.handler.addFilter(self.sampler)
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def attach(self, logger: logging.Logger, level: Optional[int] = None):
+        logger.handlers.clear()
+        logger.addHandler(self.handler)
+        logger.propagate = False
+        if level is not None:
+            logger.setLevel(level)
+
+    def stop(self):
+        """Flush everything queued so far and stop the writer thread"""
+        if self.listener._thread is not None:
+            self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.flush()
+
+    def get_stats(self) -> Dict:
+        return {
+            'queued': self.queue.qsize(),
+            'suppressed': self.sampler.suppressed,
+            'sampled_sites': len(self.sampler.sites),
+            'writer_alive': bool(self.listener._thread and self.listener._thread.is_alive())
+        }
+
+
+_pipelines = []
+_lock = threading.Lock()
+
+
+def stop_all():
+    """atexit hook: flush every pipeline started in this process"""
+    with _lock:
+        while _pipelines:
+            _pipelines.pop().stop()
+
+
+def start_pipeline(handlers: List[logging.Handler], sample_interval: float = 5.0) -> LogPipeline:
+    pipeline = LogPipeline(handlers, sample_interval)
+    with _lock:
+        if not _pipelines:
+            atexit.register(stop_all)
+        _pipelines.append(pipeline)
+    return pipeline
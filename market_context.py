@@ -34,9 +34,11 @@ class MarketContext:
     key_support: Optional[float] = None
     
     # Volume DNA
-    cumulative_delta: int = 0
+    cumulative_delta: float = 0.0
     volume_poc: Optional[float] = None
     volume_strength: float = 0.0
+    order_flow_imbalance: float = 0.0
+    microprice: Optional[float] = None
     
     # Cycle & Phase
     market_phase: MarketPhase = MarketPhase.UNKNOWN
@@ -62,6 +64,10 @@ class MarketContext:
             "symbol": self.primary_symbol,
             "auction": self.auction_state.value,
             "auction_score": round(self.auction_imbalance_score, 3),
+            "ofi": round(self.order_flow_imbalance, 3),
+            "delta": round(self.cumulative_delta, 4),
+            "poc": self.volume_poc,
+            "cycle_bias": round(self.cycle_bias, 3),
             "phase": self.market_phase.value,
             "sentiment": round(self.market_sentiment, 3),
             "confidence": round(self.execution_confidence, 1),
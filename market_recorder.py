@@ -0,0 +1,240 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import struct
+import time
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+from exchanges_websocket import BinanceUSWebSocket, KrakenWebSocket, CoinbaseWebSocket
+from message_decoding import loads
+
+logger = logging.getLogger(__name__)
+
+# File layout: MAGIC, then records of RECORD_HEADER + payload.
+# RECORD_HEADER = receive time (ns since epoch), source id, record kind, payload length.
+MAGIC = b'ARBCAP01'
+RECORD_HEADER = struct.Struct('<QHBI')
+
+KIND_SOURCE = 0     # payload: source name, defines the source id used by later records
+KIND_MESSAGE = 1    # payload: raw WebSocket frame as received
+KIND_SNAPSHOT = 2   # payload: REST depth snapshot (JSON) the stream was synced from
+KIND_BOOK = 3       # payload: ccxt.pro order book update (JSON: symbol, bids, asks, timestamp)
+
+
+class MarketRecorder:
+    """Append-only binary capture of raw market data messages.
+
+    Every record carries its receive timestamp so a capture can be replayed at
+    the original pace. With compress=True the file is a gzip stream; appending
+    to an existing capture adds a new gzip member, which readers handle
+    transparently.
+    """
+
+    def __init__(self, path: str, compress: bool = False, buffer_size: int = 1 << 20):
+        self.path = path
+        self.compress = compress
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if compress:
+            self.file = gzip.open(path, 'ab', compresslevel=6)
+        else:
+            self.file = open(path, 'ab', buffering=buffer_size)
+        if is_new:
+            self.file.write(MAGIC)
+
+        self.source_ids = {}
+        self.records = 0
+        self.bytes_written = 0
+
+    def _source_id(self, source: str, recv_ns: int) -> int:
+        source_id = self.source_ids.get(source)
+        if source_id is None:
+            source_id = len(self.source_ids)
+            self.source_ids[source] = source_id
+            self._write(recv_ns, source_id, KIND_SOURCE, source.encode())
+        return source_id
+
+    def _write(self, recv_ns: int, source_id: int, kind: int, payload: bytes):
+        self.file.write(RECORD_HEADER.pack(recv_ns, source_id, kind, len(payload)))
+        self.file.write(payload)
+        self.records += 1
+        self.bytes_written += RECORD_HEADER.size + len(payload)
+
+    def record(self, source: str, payload: Union[str, bytes], kind: int = KIND_MESSAGE,
+               recv_ns: Optional[int] = None):
+        """Append one raw message; source names the stream it came from"""
+        if self.file is None:
+            return
+        if recv_ns is None:
+            recv_ns = time.time_ns()
+        if isinstance(payload, str):
+            payload = payload.encode()
+        self._write(recv_ns, self._source_id(source, recv_ns), kind, payload)
+
+    def record_snapshot(self, source: str, snapshot: Dict, recv_ns: Optional[int] = None):
+        """Append the REST depth snapshot a stream was synced from"""
+        self.record(source, json.dumps(snapshot), KIND_SNAPSHOT, recv_ns)
+
+    def record_book(self, source: str, symbol: str, bids, asks, timestamp, recv_ns: Optional[int] = None):
+        """Append a ccxt.pro order book update (top levels only)"""
+        payload = json.dumps({'symbol': symbol, 'bids': bids, 'asks': asks, 'timestamp': timestamp})
+        self.record(source, payload, KIND_BOOK, recv_ns)
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            logger.info(f"💾 Market capture closed: {self.path} ({self.records} records, {self.bytes_written / 1e6:.1f} MB raw)")
+
+
+def read_records(path: str) -> Iterator[Tuple[int, str, int, bytes]]:
+    """Yield (recv_ns, source, kind, payload) from a capture, compressed or not"""
+    with open(path, 'rb') as raw:
+        is_gzip = raw.read(2) == b'\x1f\x8b'
+    opener = gzip.open if is_gzip else open
+
+    with opener(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a market capture")
+
+        sources = {}
+        header_size = RECORD_HEADER.size
+        while True:
+            header = f.read(header_size)
+            if len(header) < header_size:
+                return
+            recv_ns, source_id, kind, length = RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                logger.warning(f"Truncated record at end of {path}")
+                return
+            if kind == KIND_SOURCE:
+                sources[source_id] = payload.decode()
+                continue
+            yield recv_ns, sources.get(source_id, str(source_id)), kind, payload
+
+
+class MarketReplayer:
+    """Feed a capture back through WebSocketFeed and/or DataHub.
+
+    speed=1.0 replays at the original pace, speed=N runs N times faster and
+    speed=0 replays as fast as possible. Custom WebSocket client streams are
+    re-parsed by fresh, unconnected client instances, so order book sync,
+    checksums and sequence handling run exactly as they did live.
+    """
+
+    CLIENT_CLASSES = {
+        'binance_us': BinanceUSWebSocket,
+        'kraken': KrakenWebSocket,
+        'coinbase': CoinbaseWebSocket
+    }
+
+    def __init__(self, path: str, speed: float = 1.0):
+        self.path = path
+        self.speed = speed
+        self.feeds = []
+        self.hubs = []
+        self.clients = {}   # source -> client instance
+        self.time_listeners = []  # async callback(recv_ns) awaited before each record
+        self.records = 0
+
+    def attach_feed(self, feed):
+        self.feeds.append(feed)
+
+    def attach_hub(self, hub):
+        self.hubs.append(hub)
+
+    def add_time_listener(self, callback):
+        """Await callback(recv_ns) before each record is dispatched (simulated clocks)"""
+        self.time_listeners.append(callback)
+
+    def _client(self, source: str):
+        client = self.clients.get(source)
+        if client is None:
+            name, _, arg = source.partition(':')
+            client = self.CLIENT_CLASSES[name](arg)
+            client.replaying = True  # never touch the network
+            for feed in self.feeds:
+                client.subscribe(feed._handle_websocket_data)
+                feed.ws_connections[name] = client
+            for hub in self.hubs:
+                client.subscribe(hub._process_incoming_data)
+                hub.connections[name] = client
+            self.clients[source] = client
+        return client
+
+    async def _dispatch(self, source: str, kind: int, payload: bytes):
+        if kind == KIND_BOOK:
+            book = loads(payload)
+            exchange_name = source.partition(':')[2]
+            received_ns = time.perf_counter_ns()
+            for feed in self.feeds:
+                feed._on_pro_orderbook(exchange_name, book['symbol'], book['bids'], book['asks'],
+                                       book['timestamp'], received_ns)
+        elif kind == KIND_SNAPSHOT:
+            await self._client(source)._apply_snapshot(loads(payload))
+        elif kind == KIND_MESSAGE:
+            await self._client(source)._handle_message(loads(payload))
+
+    async def run(self) -> int:
+        """Replay the whole capture; returns the number of records dispatched"""
+        logger.info(f"▶️  Replaying {self.path} at {'max' if not self.speed else f'{self.speed:g}x'} speed")
+        first_ns = None
+        start = time.perf_counter()
+
+        for recv_ns, source, kind, payload in read_records(self.path):
+            if first_ns is None:
+                first_ns = recv_ns
+
+            if self.speed:
+                delay = (recv_ns - first_ns) / 1e9 / self.speed - (time.perf_counter() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif self.records % 1000 == 0:
+                await asyncio.sleep(0)  # let listeners' tasks run
+
+            for callback in self.time_listeners:
+                await callback(recv_ns)
+
+            try:
+                await self._dispatch(source, kind, payload)
+            except Exception as e:
+                logger.error(f"Replay error on {source} record {self.records}: {e}")
+            self.records += 1
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"⏹️  Replay finished: {self.records} records in {elapsed:.2f}s")
+        return self.records
+
+
+if __name__ == "__main__":
+    import argparse
+    from data_feed import WebSocketFeed
+
+    parser = argparse.ArgumentParser(description="Replay a market data capture through WebSocketFeed")
+    parser.add_argument('path')
+    parser.add_argument('--speed', type=float, default=0.0, help="1 = original pace, N = N x faster, 0 = max")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    async def main():
+        feed = WebSocketFeed({})
+        feed.running = True
+        replayer = MarketReplayer(args.path, speed=args.speed)
+        replayer.attach_feed(feed)
+        await replayer.run()
+        for symbol, quotes in feed.price_data.items():
+            for exchange, quote in quotes.items():
+                print(f"{symbol:12} {exchange:10} bid={quote['bid']:.2f} ask={quote['ask']:.2f}")
+
+    asyncio.run(main())
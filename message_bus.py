@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Delivery policies
+ALL = 'all'            # every message, oldest dropped when the queue is full
+LATEST = 'latest'      # only the newest message per (exchange, symbol, type) is pending
+SAMPLED = 'sampled'    # like LATEST, delivered at most once per interval
+POLICIES = (ALL, LATEST, SAMPLED)
+
+
+def conflation_key(data) -> tuple:
+    return data.get('exchange'), data.get('symbol'), data.get('type')
+
+
+class Subscription:
+    """One subscriber of a MessageBus with its own bounded queue and delivery task.
+
+    offer() never blocks or awaits: the publisher (a socket's read loop) only
+    appends to the queue, and a separate task awaits the callback. Pending
+    messages are kept with their publish time so lag can be measured.
+    """
+
+    def __init__(self, name: str, callback: Callable, policy: str = ALL,
+                 maxsize: int = 1000, interval: float = 1.0):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown delivery policy {policy!r}, expected one of {POLICIES}")
+        self.name = name
+        self.callback = callback
+        self.policy = policy
+        self.maxsize = max(1, maxsize)
+        self.interval = interval if policy == SAMPLED else 0.0
+
+        self._queue = deque()   # ALL: (published ns, message)
+        self._pending = {}      # LATEST/SAMPLED: conflation key -> (published ns, message), insertion ordered
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self.closed = False
+
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0      # ALL: overflowed the queue
+        self.conflated = 0    # LATEST/SAMPLED: replaced by a newer message before delivery
+        self.errors = 0
+        self.last_lag_us = 0.0
+        self.max_lag_us = 0.0
+
+    def offer(self, data, now_ns: int):
+        if self.closed:
+            return
+        self.published += 1
+        if self.policy == ALL:
+            if len(self._queue) >= self.maxsize:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append((now_ns, data))
+        else:
+            key = conflation_key(data)
+            first = self._pending.pop(key, None)
+            if first is not None:
+                self.conflated += 1
+            elif len(self._pending) >= self.maxsize:
+                self._pending.pop(next(iter(self._pending)))
+                self.dropped += 1
+            # Keep the original publish time: lag is how stale the slot's first undelivered update is
+            self._pending[key] = (first[0] if first is not None else now_ns, data)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+
+    def depth(self) -> int:
+        return len(self._queue) if self.policy == ALL else len(self._pending)
+
+    def oldest_age_us(self) -> float:
+        """Age of the oldest undelivered message"""
+        if self.policy == ALL:
+            oldest = self._queue[0][0] if self._queue else None
+        else:
+            oldest = min((published for published, _ in self._pending.values()), default=None)
+        return (time.perf_counter_ns() - oldest) / 1000 if oldest is not None else 0.0
+
+    def _next(self):
+        """Oldest pending (published ns, message), or None"""
+        if self.policy == ALL:
+            return self._queue.popleft() if self._queue else None
+        if not self._pending:
+            return None
+        return self._pending.pop(next(iter(self._pending)))
+
+    async def _run(self):
+        while not self.closed:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # One at a time, so messages published meanwhile are still bounded/conflated
+            item = self._next()
+            while item is not None:
+                published_ns, data = item
+                lag_us = (time.perf_counter_ns() - published_ns) / 1000
+                self.last_lag_us = lag_us
+                if lag_us > self.max_lag_us:
+                    self.max_lag_us = lag_us
+                try:
+                    await self.callback(data)
+                    self.delivered += 1
+                except Exception as e:
+                    self.errors += 1
+                    logger.error(f"Subscriber {self.name} error: {e}")
+                item = self._next()
+            if self.interval:
+                await asyncio.sleep(self.interval)  # SAMPLED: newer updates conflate meanwhile
+
+    async def close(self):
+        self.closed = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def get_stats(self) -> Dict:
+        return {
+            'subscriber': self.name,
+            'policy': self.policy,
+            'published': self.published,
+            'delivered': self.delivered,
+            'pending': self.depth(),
+            'dropped': self.dropped,
+            'conflated': self.conflated,
+            'errors': self.errors,
+            'oldest_pending_us': round(self.oldest_age_us(), 1),
+            'last_lag_us': round(self.last_lag_us, 1),
+            'max_lag_us': round(self.max_lag_us, 1)
+        }
+
+
+class MessageBus:
+    """Fan-out of exchange payloads to independent subscribers.
+
+    publish() is synchronous and O(subscribers): a slow consumer only grows
+    (and eventually drops or conflates) its own queue, the caller never waits.
+    """
+
+    def __init__(self):
+        self.subscriptions = []
+
+    def subscribe(self, callback: Callable, policy: str = ALL, maxsize: int = 1000,
+                  interval: float = 1.0, name: Optional[str] = None) -> Subscription:
+        name = name or getattr(callback, '__qualname__', repr(callback))
+        subscription = Subscription(name, callback, policy, maxsize, interval)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+        await subscription.close()
+
+    def publish(self, data):
+        now = time.perf_counter_ns()
+        for subscription in self.subscriptions:
+            subscription.offer(data, now)
+
+    async def close(self):
+        for subscription in self.subscriptions:
+            await subscription.close()
+
+    def get_stats(self) -> List[Dict]:
+        return [subscription.get_stats() for subscription in self.subscriptions]
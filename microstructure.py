@@ -0,0 +1,156 @@
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+
+class RollingSum:
+    """Sum of the values added in the last `window` seconds; add() and value() are amortized O(1)"""
+    __slots__ = ('window', 'items', 'total')
+
+    def __init__(self, window: float):
+        self.window = window
+        self.items = deque()   # (timestamp, value)
+        self.total = 0.0
+
+    def add(self, timestamp: float, value: float):
+        self.items.append((timestamp, value))
+        self.total += value
+        self.expire(timestamp)
+
+    def expire(self, now: float):
+        items, cutoff = self.items, now - self.window
+        while items and items[0][0] < cutoff:
+            self.total -= items.popleft()[1]
+        if not items:
+            self.total = 0.0  # no float residue once the window is empty
+
+
+class VolumeProfile:
+    """Traded volume per price bucket over a rolling window, with its point of control.
+
+    The POC is tracked on every add; only when volume leaves the POC bucket
+    is it marked stale and found again on the next read.
+    """
+
+    def __init__(self, window: float, bucket_bps: float = 1.0):
+        self.window = window
+        self.bucket_bps = bucket_bps
+        self.step = None      # price bucket width, set from the first trade
+        self.trades = deque()  # (timestamp, bucket, quantity)
+        self.volume = {}       # bucket -> quantity
+        self._poc = None
+        self._poc_stale = False
+
+    def add(self, timestamp: float, price: float, quantity: float):
+        if self.step is None:
+            self.step = price * self.bucket_bps / 10000
+        bucket = int(price / self.step + 0.5)
+        self.trades.append((timestamp, bucket, quantity))
+        volume = self.volume.get(bucket, 0.0) + quantity
+        self.volume[bucket] = volume
+        if not self._poc_stale and (self._poc is None or volume > self.volume.get(self._poc, 0.0)):
+            self._poc = bucket
+        self.expire(timestamp)
+
+    def expire(self, now: float):
+        trades, volume, cutoff = self.trades, self.volume, now - self.window
+        while trades and trades[0][0] < cutoff:
+            _, bucket, quantity = trades.popleft()
+            remaining = volume[bucket] - quantity
+            if remaining <= 1e-12:
+                del volume[bucket]
+            else:
+                volume[bucket] = remaining
+            if bucket == self._poc:
+                self._poc_stale = True
+
+    def poc(self) -> Optional[float]:
+        """Price of the bucket with the most traded volume in the window"""
+        if self._poc_stale:
+            self._poc = max(self.volume, key=self.volume.get) if self.volume else None
+            self._poc_stale = False
+        return self._poc * self.step if self._poc is not None else None
+
+
+class MicrostructureAnalytics:
+    """Order flow state of one symbol across exchanges, updated per book change and trade.
+
+    - order flow imbalance: Cont/Kukanov/Stoikov OFI of each exchange's best
+      levels, summed over `flow_window` seconds and normalized to [-1, 1]
+    - cumulative delta: aggressor-signed traded quantity since start, plus
+      its rolling `flow_window` value relative to the window's volume
+    - volume profile: traded volume per 1bp bucket over `profile_window`
+      seconds and its point of control
+    - microprice: size-weighted mid of the last updated book
+    """
+
+    def __init__(self, flow_window: float = 60.0, profile_window: float = 900.0, bucket_bps: float = 1.0):
+        self.ofi = RollingSum(flow_window)
+        self.ofi_activity = RollingSum(flow_window)   # sum of |OFI events|, the normalizer
+        self.window_delta = RollingSum(flow_window)
+        self.window_volume = RollingSum(flow_window)
+        self.profile = VolumeProfile(profile_window, bucket_bps)
+        self.cumulative_delta = 0.0
+        self.microprice = None
+        self.last_trade_price = None
+        self._last_top = {}   # exchange -> (bid, bid_size, ask, ask_size)
+
+    def on_book(self, exchange: str, bids: List[Tuple[float, float]], asks: List[Tuple[float, float]],
+                timestamp: float):
+        bid, bid_size = bids[0][0], bids[0][1]
+        ask, ask_size = asks[0][0], asks[0][1]
+        if bid_size + ask_size > 0:
+            self.microprice = (bid * ask_size + ask * bid_size) / (bid_size + ask_size)
+
+        previous = self._last_top.get(exchange)
+        self._last_top[exchange] = (bid, bid_size, ask, ask_size)
+        if previous is None:
+            return
+        prev_bid, prev_bid_size, prev_ask, prev_ask_size = previous
+        event = 0.0
+        if bid >= prev_bid:
+            event += bid_size
+        if bid <= prev_bid:
+            event -= prev_bid_size
+        if ask <= prev_ask:
+            event -= ask_size
+        if ask >= prev_ask:
+            event += prev_ask_size
+        if event:
+            self.ofi.add(timestamp, event)
+            self.ofi_activity.add(timestamp, abs(event))
+
+    def on_trade(self, price: float, quantity: float, side: Optional[str], timestamp: float):
+        """side is the aggressor ('buy'/'sell'); when unknown the tick rule decides"""
+        if side is None:
+            last = self.last_trade_price
+            side = 'buy' if last is None or price >= last else 'sell'
+        self.last_trade_price = price
+        signed = quantity if side == 'buy' else -quantity
+        self.cumulative_delta += signed
+        self.window_delta.add(timestamp, signed)
+        self.window_volume.add(timestamp, quantity)
+        self.profile.add(timestamp, price, quantity)
+
+    def expire(self, now: float):
+        for rolling in (self.ofi, self.ofi_activity, self.window_delta, self.window_volume):
+            rolling.expire(now)
+        self.profile.expire(now)
+
+    def order_flow_imbalance(self) -> float:
+        activity = self.ofi_activity.total
+        return self.ofi.total / activity if activity > 0 else 0.0
+
+    def delta_bias(self) -> float:
+        """Rolling delta over rolling volume: -1 all selling, +1 all buying"""
+        volume = self.window_volume.total
+        return self.window_delta.total / volume if volume > 0 else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'order_flow_imbalance': round(self.order_flow_imbalance(), 3),
+            'cumulative_delta': round(self.cumulative_delta, 6),
+            'window_delta': round(self.window_delta.total, 6),
+            'delta_bias': round(self.delta_bias(), 3),
+            'volume_poc': self.profile.poc(),
+            'microprice': self.microprice
+        }
@@ -0,0 +1,256 @@
+import bisect
+import logging
+import zlib
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class BookSide:
+    """One side of an L2 book kept as sorted price-level arrays, best level first.
+
+    Levels are found by bisect in O(log n); inserting or removing a level
+    shifts the arrays behind it, O(n) but a memmove over books that are at
+    most a few hundred levels deep. Size changes at an existing level and
+    top-of-book reads are O(1) after the search.
+    """
+
+    def __init__(self, is_bid: bool):
+        self.is_bid = is_bid
+        self._keys = []    # ascending sort keys (-price for bids) so index 0 is always best
+        self._prices = []
+        self._sizes = []
+        self._raw = []     # original (price, size) strings, needed for exchange checksums
+
+    def __len__(self) -> int:
+        return len(self._prices)
+
+    def clear(self):
+        self._keys.clear()
+        self._prices.clear()
+        self._sizes.clear()
+        self._raw.clear()
+
+    def set_level(self, price: float, size: float, raw: Optional[Tuple[str, str]] = None):
+        """Insert, update or (size == 0) remove a price level: bisect search, list insert/delete"""
+        key = -price if self.is_bid else price
+        i = bisect.bisect_left(self._keys, key)
+        found = i < len(self._keys) and self._keys[i] == key
+
+        if size <= 0:
+            if found:
+                del self._keys[i]
+                del self._prices[i]
+                del self._sizes[i]
+                del self._raw[i]
+            return
+
+        if found:
+            self._sizes[i] = size
+            self._raw[i] = raw
+        else:
+            self._keys.insert(i, key)
+            self._prices.insert(i, price)
+            self._sizes.insert(i, size)
+            self._raw.insert(i, raw)
+
+    def truncate(self, depth: int):
+        """Drop every level beyond the given depth"""
+        del self._keys[depth:]
+        del self._prices[depth:]
+        del self._sizes[depth:]
+        del self._raw[depth:]
+
+    def best(self) -> Optional[Tuple[float, float]]:
+        if not self._prices:
+            return None
+        return self._prices[0], self._sizes[0]
+
+    def best_price(self) -> Optional[float]:
+        return self._prices[0] if self._prices else None
+
+    def levels(self, depth: Optional[int] = None) -> List[Tuple[float, float]]:
+        """Return [(price, size), ...] from the best level outwards"""
+        return list(zip(self._prices[:depth], self._sizes[:depth]))
+
+    def raw_levels(self, depth: Optional[int] = None) -> List[Optional[Tuple[str, str]]]:
+        return self._raw[:depth]
+
+
+class OrderBook:
+    """Local L2 order book for one exchange/symbol built from a snapshot plus deltas"""
+    keep_raw = False  # store the original level strings (only needed for exchange checksums)
+
+    def __init__(self, exchange: str, symbol: str, max_depth: Optional[int] = None):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.max_depth = max_depth
+        self.bids = BookSide(is_bid=True)
+        self.asks = BookSide(is_bid=False)
+        self.last_update_id = None
+        self.timestamp = None
+        self.synced = False
+        self.update_count = 0
+        self.resync_count = 0
+
+    def reset(self):
+        """Discard the book; it stays unsynced until the next snapshot"""
+        if self.synced:
+            self.resync_count += 1
+        self.bids.clear()
+        self.asks.clear()
+        self.last_update_id = None
+        self.synced = False
+
+    def apply_snapshot(self, bids: List, asks: List, update_id: Optional[int] = None,
+                       timestamp: Optional[float] = None):
+        """Replace the whole book with a snapshot"""
+        self.bids.clear()
+        self.asks.clear()
+        self._apply_levels(self.bids, bids)
+        self._apply_levels(self.asks, asks)
+        self.last_update_id = update_id
+        self.timestamp = timestamp
+        self.synced = True
+        self.update_count += 1
+
+    def apply_delta(self, bids: List, asks: List, update_id: Optional[int] = None,
+                    timestamp: Optional[float] = None):
+        """Apply absolute level updates (size 0 removes the level)"""
+        self._apply_levels(self.bids, bids)
+        self._apply_levels(self.asks, asks)
+        if update_id is not None:
+            self.last_update_id = update_id
+        self.timestamp = timestamp
+        self.update_count += 1
+
+    def _apply_levels(self, side: BookSide, levels: List):
+        set_level = side.set_level
+        if self.keep_raw:
+            for level in levels:
+                price, size = level[0], level[1]
+                set_level(float(price), float(size), (price, size))
+        else:
+            for level in levels:
+                set_level(float(level[0]), float(level[1]))
+        if self.max_depth:
+            side.truncate(self.max_depth)
+
+    def best_bid(self) -> Optional[float]:
+        return self.bids.best_price()
+
+    def best_ask(self) -> Optional[float]:
+        return self.asks.best_price()
+
+    def top(self, depth: int = 10) -> Tuple[List[Tuple[float, float]], List[Tuple[float, float]]]:
+        return self.bids.levels(depth), self.asks.levels(depth)
+
+    def is_crossed(self) -> bool:
+        best_bid = self.best_bid()
+        best_ask = self.best_ask()
+        return best_bid is not None and best_ask is not None and best_bid >= best_ask
+
+    def to_dict(self, depth: int = 10) -> Dict:
+        bids, asks = self.top(depth)
+        return {
+            'exchange': self.exchange,
+            'symbol': self.symbol,
+            'bids': bids,
+            'asks': asks,
+            'timestamp': self.timestamp,
+            'update_id': self.last_update_id
+        }
+
+
+class BinanceOrderBook(OrderBook):
+    """Binance diff-depth book synchronised with a REST snapshot via U/u update ids"""
+
+    def __init__(self, exchange: str, symbol: str, max_buffer: int = 1000):
+        super().__init__(exchange, symbol)
+        self._buffer = deque(maxlen=max_buffer)
+
+    def apply_diff(self, event: Dict) -> bool:
+        """Apply a depthUpdate event; returns True when the book changed.
+
+        Events are buffered while the book is unsynced. A gap in update ids
+        resets the book so the caller can fetch a fresh snapshot.
+        """
+        if not self.synced:
+            self._buffer.append(event)
+            return False
+
+        first_id, last_id = event['U'], event['u']
+        if last_id <= self.last_update_id:
+            return False
+        if first_id > self.last_update_id + 1:
+            logger.warning(f"Binance {self.symbol} depth gap: expected {self.last_update_id + 1}, got {first_id}")
+            self.reset()
+            self._buffer.append(event)
+            return False
+
+        self.apply_delta(event.get('b', []), event.get('a', []), update_id=last_id, timestamp=event.get('E'))
+        return True
+
+    def load_snapshot(self, snapshot: Dict) -> bool:
+        """Load a REST depth snapshot and replay buffered events on top of it.
+
+        Returns False when the snapshot is older than the buffered stream and
+        a newer one must be fetched.
+        """
+        snapshot_id = snapshot['lastUpdateId']
+        buffered = [e for e in self._buffer if e['u'] > snapshot_id]
+        self._buffer.clear()
+
+        if buffered and buffered[0]['U'] > snapshot_id + 1:
+            self._buffer.extend(buffered)
+            return False
+
+        self.apply_snapshot(snapshot.get('bids', []), snapshot.get('asks', []), update_id=snapshot_id)
+        for event in buffered:
+            if not self.apply_diff(event) and not self.synced:
+                return False
+        return True
+
+
+class KrakenOrderBook(OrderBook):
+    """Kraken book channel state with CRC32 checksum validation"""
+    keep_raw = True
+
+    def __init__(self, exchange: str, symbol: str, depth: int = 10):
+        super().__init__(exchange, symbol, max_depth=depth)
+        self.depth = depth
+
+    def apply_message(self, payloads: List[Dict]) -> bool:
+        """Apply the dict payloads of one book message; returns False on checksum mismatch"""
+        for payload in payloads:
+            if 'as' in payload or 'bs' in payload:
+                self.apply_snapshot(payload.get('bs', []), payload.get('as', []))
+                return True
+
+        if not self.synced:
+            return False
+
+        checksum = None
+        for payload in payloads:
+            self.apply_delta(payload.get('b', []), payload.get('a', []))
+            if 'c' in payload:
+                checksum = int(payload['c'])
+
+        if checksum is not None and checksum != self.checksum():
+            logger.warning(f"Kraken {self.symbol} checksum mismatch, resyncing")
+            self.reset()
+            return False
+        return True
+
+    def checksum(self) -> int:
+        """CRC32 over the top 10 asks then top 10 bids, as defined by Kraken"""
+        parts = []
+        for side in (self.asks, self.bids):
+            for raw in side.raw_levels(10):
+                if raw is None:
+                    continue
+                price, size = raw
+                parts.append(price.replace('.', '').lstrip('0'))
+                parts.append(size.replace('.', '').lstrip('0'))
+        return zlib.crc32(''.join(parts).encode()) & 0xffffffff
@@ -1,73 +1,173 @@
 import asyncio
+import itertools
 import logging
+import math
 import time
+import uuid
 import ccxt
-from decimal import Decimal, ROUND_DOWN
+from dataclasses import dataclass
+from decimal import Decimal
 from typing import Dict, List, Tuple, Optional
 import json
+from collections import deque
+from async_exchanges import call_exchange
+from order_tracker import OrderTracker
 
 logger = logging.getLogger(__name__)
 
+@dataclass
+class OrderTemplate:
+    """Precomputed order constraints and rounding for one (exchange, symbol)"""
+    symbol: str
+    tick_size: float
+    lot_size: float
+    min_amount: float
+    min_notional: float
+    price_decimals: int
+    amount_decimals: int
+    
+    @classmethod
+    def from_market(cls, exchange, market: Dict) -> 'OrderTemplate':
+        precision = market.get('precision') or {}
+        limits = market.get('limits') or {}
+        price_precision = precision.get('price')
+        amount_precision = precision.get('amount')
+        
+        # ccxt reports precision either as a tick size or as a number of decimals
+        if getattr(exchange, 'precisionMode', ccxt.TICK_SIZE) == ccxt.DECIMAL_PLACES:
+            tick_size = 10 ** -int(price_precision) if price_precision is not None else 0.01
+            lot_size = 10 ** -int(amount_precision) if amount_precision is not None else 1e-8
+        else:
+            tick_size = float(price_precision) if price_precision else 0.01
+            lot_size = float(amount_precision) if amount_precision else 1e-8
+        
+        return cls(
+            symbol=market.get('symbol', ''),
+            tick_size=tick_size,
+            lot_size=lot_size,
+            min_amount=(limits.get('amount') or {}).get('min') or 0.0,
+            min_notional=(limits.get('cost') or {}).get('min') or 0.0,
+            price_decimals=max(0, -Decimal(str(tick_size)).normalize().as_tuple().exponent),
+            amount_decimals=max(0, -Decimal(str(lot_size)).normalize().as_tuple().exponent)
+        )
+    
+    def round_price(self, price: float, side: str) -> float:
+        """Snap to the tick grid: buys round down, sells round up, never through the limit"""
+        ticks = price / self.tick_size
+        ticks = math.floor(ticks + 1e-9) if side == 'buy' else math.ceil(ticks - 1e-9)
+        return round(ticks * self.tick_size, self.price_decimals)
+    
+    def round_amount(self, amount: float) -> float:
+        return round(math.floor(amount / self.lot_size + 1e-9) * self.lot_size, self.amount_decimals)
+
+
 class SmartOrderChaser:
-    def __init__(self, fee_manager):
+    # Exchange ids whose price feed entries use a different venue name
+    FEED_NAMES = {'binanceus': 'binance'}
+    # Venue-native client order id params; ccxt does not map a unified clientOrderId on every venue
+    CLIENT_ID_PARAMS = {'binance': 'newClientOrderId', 'kraken': 'cl_ord_id', 'coinbase': 'client_order_id'}
+    
+    def __init__(self, fee_manager, price_feed=None):
         self.fee_manager = fee_manager
+        self.price_feed = price_feed  # DataFeed holding live top of book; REST ticker when None
         self.max_attempts = 3
         self.initial_wait = 0.1
         self.price_adjustment_pct = 0.0002
-        
-    def execute_order(self, exchange, symbol: str, side: str, amount: float, order_type: str = 'limit') -> Optional[Dict]:
-        """Execute order with exchange-specific handling"""
+        self.templates = {}  # (exchange id, symbol) -> OrderTemplate
+        
+    def get_template(self, exchange, symbol: str) -> OrderTemplate:
+        """Return the cached order template, building it from market info on first use"""
+        key = (exchange.id, symbol)
+        template = self.templates.get(key)
+        if template is None:
+            template = OrderTemplate.from_market(exchange, exchange.market(symbol))
+            self.templates[key] = template
+        return template
+    
+    def warm_templates(self, exchanges: Dict, symbols: List[str]):
+        """Build templates for every tradable symbol ahead of the first order"""
+        for exchange in exchanges.values():
+            for symbol in symbols:
+                if symbol in exchange.markets:
+                    self.get_template(exchange, symbol)
+        
+    async def _get_quote(self, exchange, symbol: str) -> Tuple[float, float]:
+        """Best (bid, ask) from the live feed, falling back to one REST ticker"""
+        if self.price_feed is not None:
+            feed_name = self.FEED_NAMES.get(exchange.id, exchange.id)
+            quote = self.price_feed.get_top_of_book(symbol, feed_name)
+            if quote:
+                return quote
+        ticker = await call_exchange(exchange, 'fetch_ticker', symbol)
+        return ticker['bid'], ticker['ask']
+    
+    def client_id_params(self, exchange, client_id: str) -> Dict:
+        """Order params that tag an order with our own id, so it can be found without the venue's"""
+        venue = self.FEED_NAMES.get(exchange.id, exchange.id)
+        return {self.CLIENT_ID_PARAMS.get(venue, 'clientOrderId'): client_id}
+        
+    async def execute_order(self, exchange, symbol: str, side: str, amount: float, order_type: str = 'limit',
+                            params: Optional[Dict] = None, limit_price: Optional[float] = None) -> Optional[Dict]:
+        """Execute order with exchange-specific handling; params go to create_order (e.g. a client order id).
+
+        limit_price fixes a limit order's price (e.g. the deepest level a depth
+        sweep sized it against) instead of chasing the top of book.
+        """
         exchange_name = exchange.id.lower()
         
         try:
-            # Get market info for validation
-            market = exchange.market(symbol)
-            min_amount = market.get('limits', {}).get('amount', {}).get('min', 0.0001)
+            # Cached market constraints for validation
+            template = self.get_template(exchange, symbol)
+            amount = template.round_amount(amount)
             
             # Validate minimum amount
-            if amount < min_amount:
-                logger.warning(f"Amount {amount} below minimum {min_amount} for {symbol}")
+            if amount <= 0 or amount < template.min_amount:
+                logger.warning(f"Amount {amount} below minimum {template.min_amount} for {symbol}")
                 return None
             
             # Execute based on order type
             if order_type == 'market':
-                return self._execute_market_order(exchange, symbol, side, amount, exchange_name)
+                return await self._execute_market_order(exchange, symbol, side, amount, exchange_name, params or {})
             else:
-                return self._execute_limit_order(exchange, symbol, side, amount, exchange_name)
+                return await self._execute_limit_order(exchange, symbol, side, amount, exchange_name, template,
+                                                       params or {}, limit_price)
                 
         except Exception as e:
             logger.error(f"Order execution failed: {e}")
             return None
     
-    def _execute_market_order(self, exchange, symbol: str, side: str, amount: float, exchange_name: str) -> Optional[Dict]:
+    async def _execute_market_order(self, exchange, symbol: str, side: str, amount: float, exchange_name: str,
+                                    params: Dict) -> Optional[Dict]:
         """Execute market order with exchange-specific handling"""
         try:
             if 'coinbase' in exchange_name and side == 'buy':
                 # Coinbase requires special handling for market buys
                 # For market buys, we need to specify cost (amount * price)
-                ticker = exchange.fetch_ticker(symbol)
-                price = ticker['ask'] * 1.005  # Slight premium to ensure execution
+                _, best_ask = await self._get_quote(exchange, symbol)
+                price = best_ask * 1.005  # Slight premium to ensure execution
                 
                 # Calculate cost (amount to spend in quote currency)
                 cost = amount * price
                 
                 # Create market buy with cost parameter
-                order = exchange.create_market_order(
+                order = await call_exchange(
+                    exchange,
+                    'create_market_order',
                     symbol, 
                     side, 
                     amount, 
-                    params={'createMarketBuyOrderRequiresPrice': False, 'cost': cost}
+                    params={**params, 'createMarketBuyOrderRequiresPrice': False, 'cost': cost}
                 )
                 logger.info(f"Coinbase market BUY: {order.get('id', 'N/A')} for ${cost:.2f}")
                 
             elif 'coinbase' in exchange_name and side == 'sell':
                 # For Coinbase market sells, we can use regular market order
-                order = exchange.create_market_order(symbol, side, amount)
+                order = await call_exchange(exchange, 'create_market_order', symbol, side, amount, params=params)
                 logger.info(f"Coinbase market SELL: {order.get('id', 'N/A')} of {amount}")
                 
             else:
                 # Standard market order for other exchanges
-                order = exchange.create_market_order(symbol, side, amount)
+                order = await call_exchange(exchange, 'create_market_order', symbol, side, amount, params=params)
                 logger.info(f"Market {side.upper()}: {order.get('id', 'N/A')} of {amount}")
             
             return order
@@ -79,29 +179,28 @@ class SmartOrderChaser:
             logger.error(f"Market order failed: {e}")
             return None
     
-    def _execute_limit_order(self, exchange, symbol: str, side: str, amount: float, exchange_name: str) -> Optional[Dict]:
-        """Execute limit order with chasing"""
+    async def _execute_limit_order(self, exchange, symbol: str, side: str, amount: float, exchange_name: str,
+                                   template: OrderTemplate, params: Dict,
+                                   limit_price: Optional[float] = None) -> Optional[Dict]:
+        """Execute limit order with chasing; retries reuse params, so a client order id stays idempotent"""
         for attempt in range(self.max_attempts):
             try:
-                # Get current market price
-                ticker = exchange.fetch_ticker(symbol)
-                
-                if side == 'buy':
-                    price = ticker['ask']
-                    # For buys, we add a small premium to get filled
-                    if attempt > 0:
-                        price = price * (1 + (self.price_adjustment_pct * attempt))
+                if limit_price is not None:
+                    # Already priced through every level the size needs; chasing would pay past it
+                    price = limit_price
                 else:
-                    price = ticker['bid']
-                    # For sells, we reduce price slightly to get filled
-                    if attempt > 0:
-                        price = price * (1 - (self.price_adjustment_pct * attempt))
+                    # Current top of book, from the live feed when available
+                    price = await self._chase_price(exchange, symbol, side, attempt)
+                
+                # Round price to the market's tick size
+                price = template.round_price(price, side)
                 
-                # Round price appropriately
-                price = float(Decimal(str(price)).quantize(Decimal('0.01'), rounding=ROUND_DOWN))
+                if template.min_notional and amount * price < template.min_notional:
+                    logger.warning(f"Order value ${amount * price:.2f} below minimum ${template.min_notional} for {symbol}")
+                    return None
                 
                 # Place limit order
-                order = exchange.create_limit_order(symbol, side, amount, price)
+                order = await call_exchange(exchange, 'create_limit_order', symbol, side, amount, price, params=params)
                 logger.info(f"Limit {side.upper()}: {order.get('id', 'N/A')} at ${price:.2f} for {amount}")
                 
                 return order
@@ -111,56 +210,137 @@ class SmartOrderChaser:
                 return None
             except ccxt.NetworkError as e:
                 logger.warning(f"Network error on attempt {attempt+1}: {e}")
-                time.sleep(self.initial_wait * (attempt + 1))
+                await asyncio.sleep(self.initial_wait * (attempt + 1))
             except Exception as e:
                 logger.error(f"Limit order failed on attempt {attempt+1}: {e}")
-                time.sleep(self.initial_wait * (attempt + 1))
+                await asyncio.sleep(self.initial_wait * (attempt + 1))
         
         logger.error(f"All limit order attempts failed for {side} {amount} {symbol}")
         return None
+    
+    async def _chase_price(self, exchange, symbol: str, side: str, attempt: int) -> float:
+        """Top of book, moved further into the book on each retry"""
+        best_bid, best_ask = await self._get_quote(exchange, symbol)
+        
+        if side == 'buy':
+            price = best_ask
+            # For buys, we add a small premium to get filled
+            if attempt > 0:
+                price = price * (1 + (self.price_adjustment_pct * attempt))
+        else:
+            price = best_bid
+            # For sells, we reduce price slightly to get filled
+            if attempt > 0:
+                price = price * (1 - (self.price_adjustment_pct * attempt))
+        return price
 
 
 class PortfolioState:
-    """Track portfolio state to avoid repeated insufficient funds errors"""
+    """Optimistic per-exchange balance ledger with reservations.
     
-    def __init__(self):
-        self.used_funds = {}  # exchange -> {currency: amount_used}
-        self.executed_trades = []
-        self.last_update = time.time()
+    free holds each exchange's free balances as last reconciled (account
+    streams or REST). An accepted opportunity reserves what its legs will
+    spend before any order is sent; the reservation is settled into free
+    on fill (spent out, received in) or released on cancel/failure.
+    available() is free minus open reservations, O(1).
+    
+    Exchanges never reconciled are not tracked: reservations on them always
+    succeed and available() returns None, so callers skip the check.
+    """
     
-    def reset_used_funds(self):
-        """Reset used funds tracker"""
-        self.used_funds = {}
+    def __init__(self, settle_grace: float = 5.0):
+        self.free = {}          # exchange -> {currency: free balance}
+        self.reserved = {}      # exchange -> {currency: amount held by open reservations}
+        self.reservations = {}  # reservation id -> [(exchange, currency, amount)]
+        self.settled = deque(maxlen=1000)  # (time, exchange, currency, delta) applied optimistically
+        self.settle_grace = settle_grace   # seconds a settled spend may be missing from reconciled balances
+        self.executed_trades = deque(maxlen=1000)
+        self.rejected = 0
         self.last_update = time.time()
+        self._ids = itertools.count(1)
     
-    def mark_funds_used(self, exchange_name: str, currency: str, amount: float):
-        """Mark funds as used on an exchange"""
-        if exchange_name not in self.used_funds:
-            self.used_funds[exchange_name] = {}
+    def sync_balances(self, exchange_name: str, free_balances: Dict[str, float]):
+        """Reconcile one exchange against its reported free balances.
         
-        if currency not in self.used_funds[exchange_name]:
-            self.used_funds[exchange_name][currency] = 0
+        Spends settled within settle_grace seconds are applied again, as the
+        report may predate them; settled receipts are not, so a stale
+        report can only understate what is available.
+        """
+        free = dict(free_balances)
+        cutoff = time.time() - self.settle_grace
+        for settled_at, name, currency, delta in self.settled:
+            if name == exchange_name and delta < 0 and settled_at >= cutoff:
+                free[currency] = free.get(currency, 0.0) + delta
+        self.free[exchange_name] = free
+        self.last_update = time.time()
+    
+    def available(self, exchange_name: str, currency: str) -> Optional[float]:
+        """Free minus reserved, or None when the exchange has not been reconciled yet"""
+        free = self.free.get(exchange_name)
+        if free is None:
+            return None
+        return free.get(currency, 0.0) - self.reserved.get(exchange_name, {}).get(currency, 0.0)
+    
+    def reserve(self, legs: List[Tuple[str, str, float]]) -> Optional[int]:
+        """Hold (exchange, currency, amount) for every leg, all or nothing; returns the reservation id"""
+        for exchange_name, currency, amount in legs:
+            available = self.available(exchange_name, currency)
+            if available is not None and amount > available + 1e-12:
+                self.rejected += 1
+                logger.warning(
+                    f"💸 Insufficient funds on {exchange_name}: {available:.8f} {currency} available, "
+                    f"{amount:.8f} needed"
+                )
+                return None
         
-        self.used_funds[exchange_name][currency] += amount
-        self.executed_trades.append({
-            'time': time.time(),
-            'exchange': exchange_name,
-            'currency': currency,
-            'amount': amount
-        })
+        reservation_id = next(self._ids)
+        for exchange_name, currency, amount in legs:
+            held = self.reserved.setdefault(exchange_name, {})
+            held[currency] = held.get(currency, 0.0) + amount
+        self.reservations[reservation_id] = legs
+        return reservation_id
+    
+    def release(self, reservation_id: Optional[int]):
+        """Drop a reservation without touching balances (order cancelled or never placed)"""
+        legs = self.reservations.pop(reservation_id, None)
+        for exchange_name, currency, amount in legs or ():
+            held = self.reserved[exchange_name]
+            remaining = held[currency] - amount
+            if remaining > 1e-12:
+                held[currency] = remaining
+            else:
+                del held[currency]
+    
+    def settle(self, reservation_id: Optional[int], deltas: List[Tuple[str, str, float]]):
+        """Release a reservation and apply the fills' (exchange, currency, delta) to free balances"""
+        self.release(reservation_id)
+        now = time.time()
+        for exchange_name, currency, delta in deltas:
+            self.executed_trades.append({
+                'time': now,
+                'exchange': exchange_name,
+                'currency': currency,
+                'amount': delta
+            })
+            free = self.free.get(exchange_name)
+            if free is None:
+                continue
+            free[currency] = free.get(currency, 0.0) + delta
+            self.settled.append((now, exchange_name, currency, delta))
     
     def get_available_funds(self, exchange_wrapper, currency: str) -> float:
-        """Get available funds considering what's already been used"""
-        exchange_name = exchange_wrapper.name
-        
-        # Get free balance from wrapper
-        free_balance = exchange_wrapper.free_balances.get(currency, 0)
-        
-        # Subtract used funds
-        used = self.used_funds.get(exchange_name, {}).get(currency, 0)
-        
-        available = max(0, free_balance - used)
-        return available
+        """Get available funds considering what is reserved; the wrapper's balance when not reconciled"""
+        available = self.available(exchange_wrapper.name, currency)
+        if available is None:
+            available = exchange_wrapper.free_balances.get(currency, 0)
+        return max(0, available)
+    
+    def get_stats(self) -> Dict:
+        return {
+            'open_reservations': len(self.reservations),
+            'reserved': {name: dict(held) for name, held in self.reserved.items() if held},
+            'rejected': self.rejected
+        }
 
 
 class OrderExecutor:
@@ -168,11 +348,62 @@ class OrderExecutor:
         self.fee_manager = fee_manager
         self.portfolio_state = PortfolioState()
         self.order_chaser = SmartOrderChaser(fee_manager)
+        self.price_feed = None
+        self.reservation_buffer = 0.005  # quote held on top of the buy notional for fees and price moves
+        self.order_tracker = OrderTracker()  # fills, realized P&L and per-venue execution stats
+    
+    def attach_price_feed(self, data_feed):
+        """Price orders and rebalances from the live feed instead of REST tickers"""
+        self.price_feed = data_feed
+        self.order_chaser.price_feed = data_feed
+        self.order_tracker.price_feed = data_feed
     
     async def execute_arbitrage(self, opportunity: Dict, exchanges: Dict) -> bool:
         """Execute arbitrage trade between exchanges"""
         raise NotImplementedError("Subclasses must implement execute_arbitrage")
     
+    @staticmethod
+    def buy_limit(opportunity: Dict) -> float:
+        """Highest price the buy leg can pay: the deepest ask swept when depth was known"""
+        return opportunity.get('buy_worst_price') or opportunity['buy_price']
+    
+    def arbitrage_holds(self, opportunity: Dict) -> List[Tuple[str, str, float]]:
+        """What the two legs spend: quote on the buy exchange, base on the sell exchange"""
+        base, quote = opportunity['symbol'].split('/')
+        amount = opportunity['amount']
+        return [
+            (opportunity['buy_exchange'], quote, amount * self.buy_limit(opportunity) * (1 + self.reservation_buffer)),
+            (opportunity['sell_exchange'], base, amount)
+        ]
+    
+    def fundable_amount(self, opportunity: Dict) -> Optional[float]:
+        """Largest base amount the ledger can fund on both legs; None when neither exchange is reconciled"""
+        base, quote = opportunity['symbol'].split('/')
+        limits = []
+        quote_available = self.portfolio_state.available(opportunity['buy_exchange'], quote)
+        if quote_available is not None:
+            limits.append(max(0.0, quote_available) / (self.buy_limit(opportunity) * (1 + self.reservation_buffer)))
+        base_available = self.portfolio_state.available(opportunity['sell_exchange'], base)
+        if base_available is not None:
+            limits.append(max(0.0, base_available))
+        return min(limits) if limits else None
+    
+    @staticmethod
+    def order_deltas(exchange_name: str, symbol: str, side: str, order: Dict, price: float) -> List[Tuple[str, str, float]]:
+        """Free balance changes of an acknowledged order.
+        
+        The whole order amount leaves free balance at once (venues lock it
+        while the order rests); only the filled part is credited, the rest
+        arrives with the next reconciliation.
+        """
+        base, quote = symbol.split('/')
+        amount = order.get('amount') or 0.0
+        filled = order.get('filled') or 0.0
+        price = order.get('average') or order.get('price') or price
+        if side == 'buy':
+            return [(exchange_name, quote, -amount * price), (exchange_name, base, filled)]
+        return [(exchange_name, base, -amount), (exchange_name, quote, filled * price)]
+    
     async def execute_rebalancing(self, exchange_wrappers: Dict, exchanges: Dict, 
                                   price_data: Dict, settings: Dict) -> bool:
         """
@@ -181,8 +412,9 @@ class OrderExecutor:
         """
         logger.info("🔄 EXECUTING PORTFOLIO REBALANCE: Buying BTC with stablecoins")
         
-        # Reset used funds tracker for new rebalance cycle
-        self.portfolio_state.reset_used_funds()
+        # Reconcile the ledger with the balances this rebalance is planned from
+        for wrapper in exchange_wrappers.values():
+            self.portfolio_state.sync_balances(wrapper.name, wrapper.free_balances)
         
         # Step 1: Calculate total available stablecoins
         stablecoin_allocation = self._calculate_stablecoin_allocation(exchange_wrappers)
@@ -319,6 +551,11 @@ class OrderExecutor:
                 logger.warning(f"      BTC amount {btc_amount:.6f} below minimum {settings['min_trade_amount']}")
                 continue
             
+            # Hold the funds so a concurrent opportunity cannot spend them meanwhile
+            reservation = self.portfolio_state.reserve([(exchange_name, target_currency, exchange_use_value)])
+            if reservation is None:
+                continue
+            
             # Execute trade
             trade_result = await self._execute_btc_purchase(
                 wrapper.exchange,
@@ -330,18 +567,27 @@ class OrderExecutor:
             
             if trade_result:
                 trades.append(trade_result)
-                # Mark funds as used
-                self.portfolio_state.mark_funds_used(exchange_name, target_currency, exchange_use_value)
+                self.portfolio_state.settle(reservation, [
+                    (exchange_name, target_currency, -exchange_use_value),
+                    (exchange_name, 'BTC', btc_amount)
+                ])
                 
                 # Update remaining use_value
                 use_value -= exchange_use_value
                 if use_value <= 0:
                     break
+            else:
+                self.portfolio_state.release(reservation)
         
         return trades
     
     def _get_best_price(self, exchange_name: str, symbol: str, price_data: Dict, side: str) -> Optional[float]:
         """Get best available price for a symbol on an exchange"""
+        if self.price_feed is not None:
+            quote = self.price_feed.get_top_of_book(symbol, exchange_name)
+            if quote:
+                return quote[1] if side == 'buy' else quote[0]
+        
         if symbol not in price_data:
             return None
         
@@ -366,7 +612,7 @@ class OrderExecutor:
             else:
                 order_type = 'market'
             
-            order = self.order_chaser.execute_order(
+            order = await self.order_chaser.execute_order(
                 exchange,
                 symbol,
                 'buy',
@@ -413,14 +659,19 @@ class OrderExecutor:
 
 
 class LowLatencyExecutor(OrderExecutor):
-    def __init__(self, fee_manager):
+    def __init__(self, fee_manager, dispatch_mode: str = 'simultaneous', leg_timeout: float = 2.0):
         super().__init__(fee_manager)
         self.max_attempts = 1
         self.price_aggressiveness = 0.0001
+        self.dispatch_mode = dispatch_mode  # 'simultaneous' or 'sequential'
+        self.leg_timeout = leg_timeout
+        self.leg_lookups = 3   # client order id lookups after a timeout, leg_timeout apart
+        self.leg_skews_ms = deque(maxlen=500)
+        self.recovered_legs = 0   # placed trades with a timed-out leg, kept out of the skew samples
     
     async def execute_arbitrage(self, opportunity: Dict, exchanges: Dict) -> bool:
         """Execute low-latency arbitrage trades"""
-        logger.info(f"⚡ EXECUTING LOW-LATENCY ARBITRAGE")
+        logger.info(f"⚡ EXECUTING LOW-LATENCY ARBITRAGE ({self.dispatch_mode})")
         logger.info(f"   Buy: {opportunity['amount']:.6f} {opportunity['symbol']} on {opportunity['buy_exchange']} at ${opportunity['buy_price']:.2f}")
         logger.info(f"   Sell: {opportunity['amount']:.6f} {opportunity['symbol']} on {opportunity['sell_exchange']} at ${opportunity['sell_price']:.2f}")
         
@@ -431,53 +682,65 @@ class LowLatencyExecutor(OrderExecutor):
             logger.error("❌ Invalid exchange references")
             return False
         
+        symbol = opportunity['symbol']
+        amount = opportunity['amount']
+        # Deepest levels the size was swept against, so each leg fills all of it; None: chase the top
+        buy_limit = opportunity.get('buy_worst_price')
+        sell_limit = opportunity.get('sell_worst_price')
+        
+        # Hold both legs' funds before any network call; concurrent opportunities see them taken
+        reservation = self.portfolio_state.reserve(self.arbitrage_holds(opportunity))
+        if reservation is None:
+            return False
+        buy_order = sell_order = None
+        submitted_at = time.time()
+        
         try:
-            # Execute buy order
-            buy_order = self.order_chaser.execute_order(
-                buy_exchange,
-                opportunity['symbol'],
-                'buy',
-                opportunity['amount'],
-                'limit'
-            )
-            
-            if not buy_order:
-                logger.error("❌ Buy order failed")
-                return False
-            
-            logger.info(f"  📥 BUY order placed: {buy_order.get('id', 'N/A')}")
-            
-            # Small delay for low-latency mode
-            await asyncio.sleep(0.05)
-            
-            # Execute sell order
-            sell_order = self.order_chaser.execute_order(
-                sell_exchange,
-                opportunity['symbol'],
-                'sell',
-                opportunity['amount'],
-                'limit'
-            )
-            
-            if not sell_order:
-                logger.error("❌ Sell order failed")
-                # Try to cancel buy order if sell fails
-                try:
-                    buy_exchange.cancel_order(buy_order['id'], opportunity['symbol'])
-                    logger.info("  📝 Buy order cancelled")
-                except:
-                    pass
-                return False
-            
-            logger.info(f"  📤 SELL order placed: {sell_order.get('id', 'N/A')}")
-            logger.info("✅ ARBITRAGE EXECUTED")
-            
-            # Calculate estimated profit
-            spread = opportunity['sell_price'] - opportunity['buy_price']
-            estimated_profit = spread * opportunity['amount']
-            logger.info(f"   Estimated profit: ${estimated_profit:.2f}")
-            
-            return True
+            if self.dispatch_mode == 'simultaneous':
+                # Fire both legs at once; each leg carries its own timeout
+                (buy_order, buy_ack), (sell_order, sell_ack) = await asyncio.gather(
+                    self._place_leg(buy_exchange, symbol, 'buy', amount, buy_limit),
+                    self._place_leg(sell_exchange, symbol, 'sell', amount, sell_limit)
+                )
+            else:
+                buy_order, buy_ack = await self._place_leg(buy_exchange, symbol, 'buy', amount, buy_limit)
+                if not buy_order:
+                    logger.error("❌ Buy order failed")
+                    return False
+                sell_order, sell_ack = await self._place_leg(sell_exchange, symbol, 'sell', amount, sell_limit)
+            
+            if buy_order and sell_order:
+                logger.info(f"  📥 BUY order placed: {buy_order.get('id', 'N/A')}")
+                logger.info(f"  📤 SELL order placed: {sell_order.get('id', 'N/A')}")
+                if buy_ack is not None and sell_ack is not None:
+                    leg_skew_ms = abs(sell_ack - buy_ack) * 1000
+                    self.leg_skews_ms.append(leg_skew_ms)
+                    opportunity['leg_skew_ms'] = leg_skew_ms
+                    logger.info(f"✅ ARBITRAGE PLACED | Leg skew: {leg_skew_ms:.1f}ms")
+                else:
+                    # A recovered leg's ack time is lookup latency, not dispatch skew
+                    self.recovered_legs += 1
+                    logger.info("✅ ARBITRAGE PLACED | Leg skew: n/a (timed-out leg recovered)")
+                
+                # Success here means both legs are working; fills and realized P&L come from the tracker
+                trade = self.order_tracker.track_trade(opportunity, buy_order, sell_order, submitted_at)
+                opportunity['trade_id'] = trade.trade_id
+                
+                # Net of fees, over the levels the size was swept across
+                logger.info(f"   Estimated profit: ${opportunity['net_profit']:.2f} net")
+                
+                return True
+            
+            # Only one leg (or none) was acknowledged: flatten the lone leg
+            if buy_order:
+                logger.error("❌ Sell order failed, unwinding buy leg")
+                await self._unwind_leg(buy_exchange, symbol, 'buy', buy_order)
+            elif sell_order:
+                logger.error("❌ Buy order failed, unwinding sell leg")
+                await self._unwind_leg(sell_exchange, symbol, 'sell', sell_order)
+            else:
+                logger.error("❌ Both legs failed")
+            return False
             
         except ccxt.InsufficientFunds as e:
             logger.error(f"❌ Insufficient funds: {e}")
@@ -485,6 +748,105 @@ class LowLatencyExecutor(OrderExecutor):
         except Exception as e:
             logger.error(f"❌ Arbitrage failed: {e}")
             return False
+        finally:
+            # Acknowledged legs move the ledger; unwinds are picked up by the next reconciliation
+            deltas = []
+            if buy_order:
+                deltas += self.order_deltas(opportunity['buy_exchange'], symbol, 'buy', buy_order, opportunity['buy_price'])
+            if sell_order:
+                deltas += self.order_deltas(opportunity['sell_exchange'], symbol, 'sell', sell_order, opportunity['sell_price'])
+            self.portfolio_state.settle(reservation, deltas)
+    
+    async def _place_leg(self, exchange, symbol: str, side: str, amount: float,
+                         limit_price: Optional[float] = None) -> Tuple[Optional[Dict], Optional[float]]:
+        """Place one leg under the per-leg timeout; returns (order, acknowledgement time).
+
+        A timed-out leg is looked up by its client order id before returning,
+        so the caller only unwinds or releases funds once its fate is known.
+        Its acknowledgement time is None: the venue's ack was never seen.
+        """
+        client_id = uuid.uuid4().hex
+        since_ms = int(time.time() * 1000) - 1000
+        try:
+            order = await asyncio.wait_for(
+                self.order_chaser.execute_order(
+                    exchange, symbol, side, amount, 'limit',
+                    params=self.order_chaser.client_id_params(exchange, client_id),
+                    limit_price=limit_price
+                ),
+                timeout=self.leg_timeout
+            )
+            return order, time.perf_counter()
+        except asyncio.TimeoutError:
+            # wait_for cannot recall a request already on the wire (or running in a worker thread)
+            logger.error(f"⏱️ {side.upper()} leg on {exchange.id} timed out after {self.leg_timeout:.1f}s, "
+                         f"looking up client order {client_id}")
+            order = await self._recover_leg(exchange, symbol, side, client_id, since_ms)
+        return order, None
+    
+    async def _recover_leg(self, exchange, symbol: str, side: str, client_id: str, since_ms: int) -> Optional[Dict]:
+        """Find a timed-out leg at the venue by client order id; None once it is clearly not there"""
+        for lookup in range(self.leg_lookups):
+            await asyncio.sleep(self.leg_timeout)
+            try:
+                order = await self._find_client_order(exchange, symbol, client_id, since_ms)
+            except Exception as e:
+                logger.warning(f"  ⚠️ Lookup {lookup + 1} of {side} client order {client_id} failed: {e}")
+                continue
+            if order is not None:
+                logger.warning(f"  🔎 Timed-out {side.upper()} leg reached {exchange.id}: "
+                               f"order {order.get('id')} {order.get('status')}, adopting it")
+                return order
+        logger.error(f"  ❌ {side.upper()} client order {client_id} not found on {exchange.id} "
+                     f"after {self.leg_lookups} lookups, treating it as never placed")
+        return None
+    
+    @staticmethod
+    async def _find_client_order(exchange, symbol: str, client_id: str, since_ms: int) -> Optional[Dict]:
+        has = getattr(exchange, 'has', {})
+        # fetch_orders covers every status; otherwise open, then closed (which includes cancelled)
+        methods = ('fetch_orders',) if has.get('fetchOrders') else ('fetch_open_orders', 'fetch_closed_orders')
+        for method in methods:
+            for order in await call_exchange(exchange, method, symbol, since_ms):
+                if order.get('clientOrderId') == client_id:
+                    return order
+        return None
+    
+    async def _unwind_leg(self, exchange, symbol: str, side: str, order: Dict):
+        """Compensate a lone leg: cancel whatever is still open, then flatten what already filled"""
+        filled = order.get('filled') or 0.0
+        
+        try:
+            await call_exchange(exchange, 'cancel_order', order['id'], symbol)
+            logger.info(f"  📝 {side.upper()} order {order['id']} cancelled")
+        except Exception as e:
+            logger.warning(f"  ⚠️ Could not cancel {side} order {order['id']}: {e}")
+        
+        try:
+            status = await call_exchange(exchange, 'fetch_order', order['id'], symbol)
+            filled = status.get('filled') or filled
+        except Exception as e:
+            logger.warning(f"  ⚠️ Could not fetch {side} order {order['id']} status: {e}")
+        
+        if filled > 0:
+            opposite_side = 'sell' if side == 'buy' else 'buy'
+            hedge = await self.order_chaser.execute_order(exchange, symbol, opposite_side, filled, 'market')
+            if hedge:
+                logger.info(f"  ↩️ Unwound {filled:.6f} {symbol} with market {opposite_side.upper()}")
+            else:
+                logger.critical(f"🚨 UNWIND FAILED: {filled:.6f} {symbol} {side} exposure left on {exchange.id}")
+    
+    def get_leg_skew_stats(self) -> Dict:
+        """Median and p99 skew between the two leg acknowledgements"""
+        if not self.leg_skews_ms:
+            return {'count': 0, 'p50_ms': 0.0, 'p99_ms': 0.0, 'recovered': self.recovered_legs}
+        samples = sorted(self.leg_skews_ms)
+        return {
+            'count': len(samples),
+            'recovered': self.recovered_legs,
+            'p50_ms': samples[len(samples) // 2],
+            'p99_ms': samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        }
 
 
 class HighLatencyExecutor(OrderExecutor):
@@ -505,18 +867,25 @@ class HighLatencyExecutor(OrderExecutor):
             logger.error("❌ Invalid exchange references")
             return False
         
+        reservation = self.portfolio_state.reserve(self.arbitrage_holds(opportunity))
+        if reservation is None:
+            return False
         success = False
+        deltas = []
         
         for attempt in range(self.max_attempts):
             try:
                 logger.info(f"  🔄 Attempt {attempt + 1}/{self.max_attempts}")
+                submitted_at = time.time()
                 
                 # Adjust price based on attempt
                 adjusted_buy_price = opportunity['buy_price'] * (1 - (self.price_adjustment * attempt))
                 adjusted_sell_price = opportunity['sell_price'] * (1 + (self.price_adjustment * attempt))
                 
                 # Execute buy with adjusted price
-                buy_order = buy_exchange.create_limit_order(
+                buy_order = await call_exchange(
+                    buy_exchange,
+                    'create_limit_order',
                     opportunity['symbol'],
                     'buy',
                     opportunity['amount'],
@@ -534,7 +903,9 @@ class HighLatencyExecutor(OrderExecutor):
                 await asyncio.sleep(1)
                 
                 # Execute sell with adjusted price
-                sell_order = sell_exchange.create_limit_order(
+                sell_order = await call_exchange(
+                    sell_exchange,
+                    'create_limit_order',
                     opportunity['symbol'],
                     'sell',
                     opportunity['amount'],
@@ -543,7 +914,7 @@ class HighLatencyExecutor(OrderExecutor):
                 
                 if sell_order:
                     logger.info(f"  📤 SELL placed at ${adjusted_sell_price:.2f}")
-                    logger.info(f"✅ ARBITRAGE SUCCEEDED on attempt {attempt + 1}")
+                    logger.info(f"✅ ARBITRAGE PLACED on attempt {attempt + 1}")
                     
                     # Calculate estimated profit
                     spread = adjusted_sell_price - adjusted_buy_price
@@ -551,13 +922,21 @@ class HighLatencyExecutor(OrderExecutor):
                     logger.info(f"   Estimated profit: ${estimated_profit:.2f}")
                     
                     success = True
+                    trade = self.order_tracker.track_trade(opportunity, buy_order, sell_order, submitted_at)
+                    opportunity['trade_id'] = trade.trade_id
+                    deltas = (
+                        self.order_deltas(opportunity['buy_exchange'], opportunity['symbol'], 'buy',
+                                          buy_order, adjusted_buy_price)
+                        + self.order_deltas(opportunity['sell_exchange'], opportunity['symbol'], 'sell',
+                                            sell_order, adjusted_sell_price)
+                    )
                     break
                 else:
                     logger.warning(f"  ⚠️ Sell order failed, cancelling buy")
                     
                     # Cancel buy order if sell fails
                     try:
-                        buy_exchange.cancel_order(buy_order['id'], opportunity['symbol'])
+                        await call_exchange(buy_exchange, 'cancel_order', buy_order['id'], opportunity['symbol'])
                         logger.info("  📝 Buy order cancelled")
                     except:
                         logger.warning("  ⚠️ Could not cancel buy order")
@@ -573,5 +952,7 @@ class HighLatencyExecutor(OrderExecutor):
         
         if not success:
             logger.error("❌ All arbitrage attempts failed")
+        # A buy whose cancel failed is picked up by the next reconciliation
+        self.portfolio_state.settle(reservation, deltas)
         
         return success
\ No newline at end of file
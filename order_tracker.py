@@ -0,0 +1,403 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Order states
+NEW = 'new'                            # submitted, no acknowledgement seen yet
+OPEN = 'open'                          # acknowledged, nothing filled
+PARTIALLY_FILLED = 'partially_filled'
+FILLED = 'filled'
+CANCELLED = 'cancelled'                # cancelled by us or the venue, possibly after partial fills
+EXPIRED = 'expired'                    # venue time-in-force ran out, or we cancelled it after order_ttl
+REJECTED = 'rejected'
+TERMINAL = (FILLED, CANCELLED, EXPIRED, REJECTED)
+
+CCXT_STATES = {
+    'open': OPEN,
+    'closed': FILLED,
+    'canceled': CANCELLED,
+    'cancelled': CANCELLED,
+    'expired': EXPIRED,
+    'rejected': REJECTED
+}
+
+# Quotes treated as interchangeable when pricing a fee currency that has no market in the trade's own quote
+STABLECOINS = ('USDT', 'USDC', 'USD')
+
+
+@dataclass
+class TrackedOrder:
+    """One order leg and its fills, moving from NEW to a terminal state"""
+    exchange: str
+    symbol: str
+    side: str
+    order_id: str
+    amount: float
+    price: Optional[float] = None
+    trade_id: Optional[int] = None
+    state: str = NEW
+    filled: float = 0.0
+    cost: float = 0.0          # quote spent (buy) or received (sell) by the fills
+    fee: float = 0.0           # fees in quote currency
+    other_fees: Dict[str, float] = field(default_factory=dict)  # fees in a third currency (e.g. BNB)
+    submitted_at: float = field(default_factory=time.time)
+    last_update: float = field(default_factory=time.time)
+    filled_at: Optional[float] = None
+    done_at: Optional[float] = None
+    expire_requested: bool = False
+
+    @property
+    def done(self) -> bool:
+        return self.state in TERMINAL
+
+    @property
+    def average(self) -> Optional[float]:
+        return self.cost / self.filled if self.filled else None
+
+    def apply(self, order: Dict) -> bool:
+        """Fold in a ccxt order (REST reply or execution report); returns True if anything changed"""
+        if self.done:
+            return False
+        state = CCXT_STATES.get(order.get('status'), self.state)
+        filled = order.get('filled')
+        if filled is None:
+            # Some acknowledgements carry no fill info; 'closed' still means completely filled
+            filled = self.amount if state == FILLED else self.filled
+        # Reports can arrive out of order (REST reply after a newer stream update): never go back
+        if filled < self.filled or (filled == self.filled and state == self.state):
+            return False
+
+        if filled > self.filled:
+            cost = order.get('cost')
+            if not cost:
+                cost = filled * (order.get('average') or order.get('price') or self.price or 0.0)
+            self.filled, self.cost = filled, cost
+            self._apply_fees(order)
+
+        if state == OPEN and self.filled > 0:
+            state = PARTIALLY_FILLED
+        if state == CANCELLED and self.expire_requested:
+            state = EXPIRED
+        self.state = state
+
+        now = time.time()
+        self.last_update = now
+        if state == FILLED:
+            self.filled_at = now
+        if self.done:
+            self.done_at = now
+        return True
+
+    def _apply_fees(self, order: Dict):
+        fees = order.get('fees') or ([order['fee']] if order.get('fee') else [])
+        base, quote = self.symbol.split('/')
+        quote_fee, other = 0.0, {}
+        for fee in fees:
+            cost, currency = fee.get('cost') or 0.0, fee.get('currency')
+            if currency == quote or currency is None:
+                quote_fee += cost
+            elif currency == base:
+                quote_fee += cost * (self.average or self.price or 0.0)
+            else:
+                other[currency] = other.get(currency, 0.0) + cost
+        # ccxt reports cumulative fees per order
+        self.fee, self.other_fees = quote_fee, other
+
+
+@dataclass
+class ArbitrageTrade:
+    """Both legs of one arbitrage; realized P&L once both are terminal"""
+    trade_id: int
+    symbol: str
+    buy: TrackedOrder
+    sell: TrackedOrder
+    estimated_profit: float
+    opened_at: float = field(default_factory=time.time)
+    realized_pnl: Optional[float] = None
+    residual: float = 0.0      # base bought but not sold (+) or sold but not bought (-)
+    pnl_complete: bool = True  # False when a third-currency fee could not be priced and is not in realized_pnl
+
+    @property
+    def done(self) -> bool:
+        return self.buy.done and self.sell.done
+
+    @property
+    def other_fees(self) -> Dict[str, float]:
+        """Fees both legs paid in a third currency (e.g. BNB), by currency"""
+        fees = dict(self.buy.other_fees)
+        for currency, cost in self.sell.other_fees.items():
+            fees[currency] = fees.get(currency, 0.0) + cost
+        return fees
+
+    def settle(self, price_of: Optional[Callable[[str, str], Optional[float]]] = None):
+        """P&L of the matched quantity at the actual fill prices, net of both legs' fees.
+
+        price_of(currency, quote) converts third-currency fees; a fee it cannot
+        price is left out and the P&L is marked incomplete.
+        """
+        matched = min(self.buy.filled, self.sell.filled)
+        pnl = 0.0 - self.buy.fee - self.sell.fee
+        if matched:
+            pnl += matched * (self.sell.average - self.buy.average)
+        quote = self.symbol.split('/')[1]
+        self.pnl_complete = True
+        for currency, cost in self.other_fees.items():
+            price = price_of(currency, quote) if price_of is not None else None
+            if price is None:
+                self.pnl_complete = False
+            else:
+                pnl -= cost * price
+        self.realized_pnl = pnl
+        self.residual = self.buy.filled - self.sell.filled
+
+    def to_dict(self) -> Dict:
+        return {
+            'trade_id': self.trade_id,
+            'symbol': self.symbol,
+            'buy': f"{self.buy.exchange} {self.buy.state} {self.buy.filled:.8f}/{self.buy.amount:.8f}",
+            'sell': f"{self.sell.exchange} {self.sell.state} {self.sell.filled:.8f}/{self.sell.amount:.8f}",
+            'estimated_profit': round(self.estimated_profit, 4),
+            'realized_pnl': round(self.realized_pnl, 4) if self.realized_pnl is not None else None,
+            'pnl_complete': self.pnl_complete,
+            'other_fees': self.other_fees,
+            'residual': self.residual
+        }
+
+
+class VenueExecutionStats:
+    """Outcome counts, fill ratio and submit-to-fill latency of one venue's finished orders"""
+
+    def __init__(self, samples: int = 500):
+        self.counts = {state: 0 for state in TERMINAL}
+        self.partial = 0            # finished without filling completely, but with some fill
+        self.ordered = 0.0
+        self.filled = 0.0
+        self.fill_latency_ms = deque(maxlen=samples)
+
+    def record(self, order: TrackedOrder):
+        self.counts[order.state] += 1
+        self.ordered += order.amount
+        self.filled += order.filled
+        if order.state != FILLED and order.filled > 0:
+            self.partial += 1
+        if order.filled_at is not None:
+            self.fill_latency_ms.append((order.filled_at - order.submitted_at) * 1000)
+
+    def to_dict(self) -> Dict:
+        samples = sorted(self.fill_latency_ms)
+        return {
+            'orders': sum(self.counts.values()),
+            **self.counts,
+            'partial': self.partial,
+            'fill_ratio': round(self.filled / self.ordered, 4) if self.ordered else None,
+            'fill_latency_p50_ms': round(samples[len(samples) // 2], 1) if samples else None,
+            'fill_latency_p99_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 1) if samples else None
+        }
+
+
+class OrderTracker:
+    """Follows every placed leg to a terminal state and books realized P&L.
+
+    Execution reports from the account streams (on_order_update) are the
+    primary source. Orders without a report for `stream_grace` seconds are
+    polled over REST, batched: one fetch_open_orders per venue and symbol,
+    then fetch_order only for orders that left the open list. Orders still
+    resting after `order_ttl` seconds are cancelled and end as EXPIRED.
+    """
+
+    def __init__(self, poll_interval: float = 1.0, stream_grace: float = 2.0, order_ttl: float = 30.0,
+                 max_completed: int = 500):
+        self.poll_interval = poll_interval
+        self.stream_grace = stream_grace
+        self.order_ttl = order_ttl
+
+        self.clients = {}
+        self.orders = {}       # (exchange, order id) -> TrackedOrder not yet terminal
+        self.trades = {}       # trade id -> ArbitrageTrade with a leg still working
+        self.completed = deque(maxlen=max_completed)
+        self.trade_listeners = []   # callbacks (ArbitrageTrade) once realized P&L is known
+        self.venues = {}       # exchange -> VenueExecutionStats
+        self.realized_pnl = 0.0
+        self.incomplete_pnl = 0     # settled trades with a third-currency fee that could not be priced
+        self.price_feed = None      # DataFeed whose top-of-book table prices third-currency fees
+        self.polls = 0
+
+        # Execution reports can beat the REST acknowledgement of the same order
+        self._early = OrderedDict()
+        self._ids = itertools.count(1)
+        self._task = None
+
+    def start(self, clients: Dict):
+        self.clients = clients
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ==================== TRACKING ====================
+
+    def track(self, exchange: str, symbol: str, side: str, order: Dict, amount: float,
+              trade_id: Optional[int] = None, submitted_at: Optional[float] = None) -> TrackedOrder:
+        tracked = TrackedOrder(exchange, symbol, side, str(order['id']), order.get('amount') or amount,
+                               order.get('price'), trade_id)
+        if submitted_at is not None:
+            tracked.submitted_at = submitted_at
+        key = (exchange, tracked.order_id)
+        self.orders[key] = tracked
+        self._update(tracked, order)
+        early = self._early.pop(key, None)
+        if early is not None:
+            self._update(tracked, early)
+        return tracked
+
+    def track_trade(self, opportunity: Dict, buy_order: Dict, sell_order: Dict,
+                    submitted_at: Optional[float] = None) -> ArbitrageTrade:
+        trade_id = next(self._ids)
+        symbol, amount = opportunity['symbol'], opportunity['amount']
+        trade = ArbitrageTrade(
+            trade_id,
+            symbol,
+            self.track(opportunity['buy_exchange'], symbol, 'buy', buy_order, amount, trade_id, submitted_at),
+            self.track(opportunity['sell_exchange'], symbol, 'sell', sell_order, amount, trade_id, submitted_at),
+            opportunity.get('net_profit', 0.0)
+        )
+        self.trades[trade_id] = trade
+        self._check_trade(trade)
+        return trade
+
+    def on_order_update(self, exchange: str, order: Dict):
+        """Execution report from a private stream"""
+        key = (exchange, str(order.get('id')))
+        tracked = self.orders.get(key)
+        if tracked is not None:
+            self._update(tracked, order)
+        else:
+            self._early[key] = order
+            if len(self._early) > 1000:
+                self._early.popitem(last=False)
+
+    def _update(self, tracked: TrackedOrder, order: Dict):
+        if not tracked.apply(order) or not tracked.done:
+            return
+        self.orders.pop((tracked.exchange, tracked.order_id), None)
+        self.venues.setdefault(tracked.exchange, VenueExecutionStats()).record(tracked)
+        trade = self.trades.get(tracked.trade_id)
+        if trade is not None:
+            self._check_trade(trade)
+
+    def _check_trade(self, trade: ArbitrageTrade):
+        if not trade.done:
+            return
+        self.trades.pop(trade.trade_id, None)
+        trade.settle(self.price_of)
+        self.realized_pnl += trade.realized_pnl
+        if not trade.pnl_complete:
+            self.incomplete_pnl += 1
+            logger.warning(f"⚠️  Trade #{trade.trade_id} P&L excludes unpriced fees: {trade.other_fees}")
+        self.completed.append(trade)
+        for listener in self.trade_listeners:
+            try:
+                listener(trade)
+            except Exception as e:
+                logger.error(f"Trade listener error: {e}")
+
+    def price_of(self, currency: str, quote: str) -> Optional[float]:
+        """Mid price of one unit of `currency` in `quote`, averaged over the venues quoting it"""
+        if currency == quote or (currency in STABLECOINS and quote in STABLECOINS):
+            return 1.0
+        if self.price_feed is None:
+            return None
+        quotes = [quote] + ([q for q in STABLECOINS if q != quote] if quote in STABLECOINS else [])
+        for candidate in quotes:
+            rows = self.price_feed.book_table.quotes(f"{currency}/{candidate}")
+            if rows:
+                return sum((bid + ask) / 2 for _, bid, ask in rows) / len(rows)
+        return None
+
+    # ==================== REST FALLBACK ====================
+
+    async def _poll_loop(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.error(f"Order polling error: {e}")
+
+    async def poll(self):
+        """One batched REST pass over the orders the streams have been quiet about"""
+        now = time.time()
+        groups = {}
+        for tracked in list(self.orders.values()):
+            if not tracked.expire_requested and now - tracked.submitted_at > self.order_ttl:
+                await self._expire(tracked)
+            if now - tracked.last_update >= self.stream_grace:
+                groups.setdefault((tracked.exchange, tracked.symbol), []).append(tracked)
+        if groups:
+            self.polls += 1
+            await asyncio.gather(*(self._poll_group(exchange, symbol, orders)
+                                   for (exchange, symbol), orders in groups.items()))
+
+    async def _poll_group(self, exchange: str, symbol: str, orders: List[TrackedOrder]):
+        client = self.clients.get(exchange)
+        if client is None:
+            return
+        try:
+            pending = orders
+            if len(orders) > 1 and getattr(client, 'has', {}).get('fetchOpenOrders'):
+                still_open = {str(order['id']): order for order in await client.fetch_open_orders(symbol)}
+                pending = []
+                for tracked in orders:
+                    order = still_open.get(tracked.order_id)
+                    if order is not None:
+                        self._update(tracked, order)
+                        tracked.last_update = time.time()
+                    else:
+                        pending.append(tracked)   # left the book: filled, cancelled or expired
+            for tracked in pending:
+                self._update(tracked, await client.fetch_order(tracked.order_id, symbol))
+                tracked.last_update = time.time()
+        except Exception as e:
+            logger.warning(f"⚠️  {exchange.upper()} order status poll failed: {e}")
+
+    async def _expire(self, tracked: TrackedOrder):
+        client = self.clients.get(tracked.exchange)
+        if client is None:
+            return
+        tracked.expire_requested = True
+        try:
+            await client.cancel_order(tracked.order_id, tracked.symbol)
+            logger.info(f"⌛ {tracked.exchange.upper()} {tracked.side} order {tracked.order_id} "
+                        f"unfilled after {self.order_ttl:.0f}s, cancelled")
+        except Exception as e:
+            # Usually filled meanwhile; the next poll tells
+            logger.debug(f"Cancel of {tracked.exchange} order {tracked.order_id} failed: {e}")
+
+    # ==================== STATS ====================
+
+    def get_venue_stats(self) -> Dict[str, Dict]:
+        return {name: stats.to_dict() for name, stats in self.venues.items()}
+
+    def get_stats(self) -> Dict:
+        return {
+            'working_orders': len(self.orders),
+            'open_trades': len(self.trades),
+            'settled_trades': len(self.completed),
+            'realized_pnl': round(self.realized_pnl, 4),
+            'incomplete_pnl': self.incomplete_pnl,
+            'rest_polls': self.polls,
+            'venues': self.get_venue_stats()
+        }
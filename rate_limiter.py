@@ -0,0 +1,241 @@
+import asyncio
+import contextvars
+import functools
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import ccxt
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, most urgent first
+ORDER, ORDER_STATUS, BALANCE, MARKET_DATA, HEALTH = range(5)
+PRIORITY_NAMES = ('order', 'order_status', 'balance', 'market_data', 'health')
+
+METHOD_PRIORITIES = {
+    'create_order': ORDER,
+    'create_limit_order': ORDER,
+    'create_market_order': ORDER,
+    'edit_order': ORDER,
+    'cancel_order': ORDER,
+    'cancel_orders': ORDER,
+    'cancel_all_orders': ORDER,
+    'fetch_order': ORDER_STATUS,
+    'fetch_orders': ORDER_STATUS,
+    'fetch_open_orders': ORDER_STATUS,
+    'fetch_closed_orders': ORDER_STATUS,
+    'fetch_my_trades': ORDER_STATUS,
+    'fetch_balance': BALANCE,
+    'fetch_ticker': MARKET_DATA,
+    'fetch_tickers': MARKET_DATA,
+    'fetch_order_book': MARKET_DATA,
+    'fetch_trades': MARKET_DATA,
+    'fetch_ohlcv': MARKET_DATA,
+    'fetch_time': HEALTH,
+    'fetch_status': HEALTH
+}
+
+# Published REST limits, in ccxt cost units: ccxt prices every endpoint with the
+# venue's own weight, in units of the client's rateLimit. Sustained rate plus burst
+# is kept at or under the venue's window. Venues not listed fall back to ccxt's rateLimit.
+VENUE_RULES = {
+    'binance': {'rate': 18.0, 'burst': 120.0},   # REQUEST_WEIGHT 1200/min: 120 + 60s * 18 = 1200
+    'kraken': {'rate': 1.0, 'burst': 42.0},      # API counter max 15 (3 units per point), decays 0.33/s; orders are free
+    'coinbase': {'rate': 29.0, 'burst': 29.0}    # Advanced Trade private REST: 30 requests/s
+}
+
+# Priority class of the REST call in progress; nested unified calls keep the most urgent one
+_priority = contextvars.ContextVar('rest_priority', default=None)
+
+
+class VenueLimiter:
+    """Token bucket for one venue that grants queued requests strictly by priority class.
+
+    Replaces the ccxt client's own throttle, so every REST request pays the
+    endpoint's ccxt cost. A request goes through at once while tokens last and
+    nothing more urgent is waiting; otherwise it queues and a drain task grants
+    the queue head as soon as the bucket has refilled enough for it.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float, samples: int = 500):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = time.monotonic()
+
+        self.waiters = []        # heap of (priority, seq, cost, future)
+        self.inflight = {}       # coalescing key -> task of the shared read
+        self._seq = itertools.count()
+        self._drainer = None
+
+        self.requests = [0] * len(PRIORITY_NAMES)
+        self.waited = [0] * len(PRIORITY_NAMES)    # requests that had to queue
+        self.coalesced = [0] * len(PRIORITY_NAMES)
+        self.wait_ms = [deque(maxlen=samples) for _ in PRIORITY_NAMES]
+        self.rate_limited = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    async def throttle(self, cost: Optional[float] = None):
+        """ccxt's fetch2 hook: wait for the bucket in the priority class of the current call"""
+        priority = _priority.get()
+        await self.acquire(1.0 if cost is None else cost, MARKET_DATA if priority is None else priority)
+
+    async def acquire(self, cost: float, priority: int):
+        self.requests[priority] += 1
+        if cost <= 0:
+            # Endpoint the venue does not count (e.g. Kraken AddOrder)
+            self.wait_ms[priority].append(0.0)
+            return
+        self._refill()
+        need = min(cost, self.burst)
+        if self.tokens >= need and (not self.waiters or priority < self.waiters[0][0]):
+            self.tokens -= cost
+            self.wait_ms[priority].append(0.0)
+            return
+
+        started = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        head = self.waiters[0][0] if self.waiters else None
+        heapq.heappush(self.waiters, (priority, next(self._seq), cost, future))
+        self.waited[priority] += 1
+        if self._drainer is None or self._drainer.done():
+            self._drainer = asyncio.create_task(self._drain())
+        elif head is None or priority < head:
+            # New queue head: the drainer is sleeping for the old head's deficit
+            self._drainer.cancel()
+            self._drainer = asyncio.create_task(self._drain())
+        await future
+        self.wait_ms[priority].append((time.perf_counter() - started) * 1000)
+
+    async def _drain(self):
+        while self.waiters:
+            _, _, cost, future = self.waiters[0]
+            if future.done():
+                heapq.heappop(self.waiters)   # caller was cancelled while queued
+                continue
+            self._refill()
+            need = min(cost, self.burst)
+            if self.tokens >= need:
+                heapq.heappop(self.waiters)
+                self.tokens -= cost
+                future.set_result(None)
+            else:
+                await asyncio.sleep((need - self.tokens) / self.rate)
+
+    def penalize(self):
+        """The venue answered 429 / DDoS protection: empty the bucket so everything backs off"""
+        self.rate_limited += 1
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+    def wrap(self, method: str, func, priority: int):
+        """Unified ccxt method running in `priority`; reads are coalesced with identical in-flight calls"""
+        coalesce = priority != ORDER
+
+        @functools.wraps(func)
+        async def call(*args, **kwargs):
+            outer = _priority.get()
+            token = _priority.set(priority if outer is None else min(outer, priority))
+            try:
+                if not coalesce or outer is not None:
+                    # Orders are never shared; nor are reads made inside another call,
+                    # which would wait in the other caller's class instead of their own
+                    return await func(*args, **kwargs)
+                key = (method, repr(args), repr(kwargs))
+                shared = self.inflight.get(key)
+                if shared is None:
+                    shared = asyncio.ensure_future(func(*args, **kwargs))
+                    self.inflight[key] = shared
+                    shared.add_done_callback(functools.partial(self._finished, key))
+                else:
+                    self.coalesced[priority] += 1
+                # Shielded: one caller giving up must not cancel the request for the others
+                return await asyncio.shield(shared)
+            except (ccxt.RateLimitExceeded, ccxt.DDoSProtection):
+                self.penalize()
+                raise
+            finally:
+                _priority.reset(token)
+
+        return call
+
+    def _finished(self, key, task):
+        if self.inflight.get(key) is task:
+            del self.inflight[key]
+        if not task.cancelled():
+            task.exception()   # retrieved here in case every waiter was cancelled
+
+    def get_stats(self) -> Dict:
+        self._refill()
+        depth = [0] * len(PRIORITY_NAMES)
+        for priority, _, _, future in self.waiters:
+            if not future.done():
+                depth[priority] += 1
+        classes = {}
+        for priority, name in enumerate(PRIORITY_NAMES):
+            if not self.requests[priority] and not self.coalesced[priority]:
+                continue
+            samples = sorted(self.wait_ms[priority])
+            classes[name] = {
+                'requests': self.requests[priority],
+                'queue_depth': depth[priority],
+                'waited': self.waited[priority],
+                'coalesced': self.coalesced[priority],
+                'wait_p50_ms': round(samples[len(samples) // 2], 2) if samples else None,
+                'wait_p99_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 2) if samples else None,
+                'wait_max_ms': round(samples[-1], 2) if samples else None
+            }
+        return {
+            'tokens': round(self.tokens, 2),
+            'rate': self.rate,
+            'burst': self.burst,
+            'queue_depth': sum(depth),
+            'inflight': len(self.inflight),
+            'rate_limited': self.rate_limited,
+            'classes': classes
+        }
+
+
+class RateLimitScheduler:
+    """Priority-aware REST rate limiting for the async ccxt clients.
+
+    install() puts a VenueLimiter in place of the client's ccxt throttle and
+    wraps its unified REST methods with their priority class: order placement
+    and cancels > order status > balances > market data > health pings. A
+    balance poll or fetch_time can no longer hold up an order behind it.
+    Identical reads in flight at the same time share one request; their
+    results are shared too, so treat them as read-only.
+    """
+
+    def __init__(self, rules: Optional[Dict[str, Dict]] = None):
+        self.rules = {**VENUE_RULES, **(rules or {})}
+        self.venues = {}   # exchange name -> VenueLimiter
+
+    def install(self, name: str, client) -> VenueLimiter:
+        rule = self.rules.get(name, {})
+        fallback = 1000.0 / client.rateLimit if getattr(client, 'rateLimit', None) else 10.0
+        rate = rule.get('rate', fallback)
+        limiter = VenueLimiter(name, rate, rule.get('burst', rate))
+
+        client.enableRateLimit = True   # fetch2 only prices and throttles requests when enabled
+        client.throttle = limiter.throttle
+        for method, priority in METHOD_PRIORITIES.items():
+            func = getattr(client, method, None)
+            if func is not None:
+                setattr(client, method, limiter.wrap(method, func, priority))
+
+        self.venues[name] = limiter
+        logger.info(f"🚦 REST scheduler on {name.upper()}: {limiter.rate:g} units/s, burst {limiter.burst:g}")
+        return limiter
+
+    def get_stats(self) -> Dict[str, Dict]:
+        return {name: limiter.get_stats() for name, limiter in self.venues.items()}
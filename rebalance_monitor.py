@@ -18,6 +18,7 @@ class RebalanceMonitor:
         self.STATIC_TARGETS = {'BTC': 0.5, 'USDT': 0.25, 'USDC': 0.25}
         self.last_rebalance_time = None
         self.MIN_REBALANCE_AMOUNT_USD = 10.0
+        self.book_table = None  # TopOfBookTable from the data feed, preferred over price_data dicts
         self._load_config()
         logger.info(f"⚖️ Rebalance Monitor Initialized. Mode: {'Hybrid' if self.HYBRID_STRATEGY else 'Static'}. Targets: {self.TARGET_ALLOCATIONS}")
 
@@ -41,6 +42,10 @@ class RebalanceMonitor:
         except Exception as e:
             logger.error(f"Failed to load rebalance config: {e}. Using defaults.")
 
+    def attach_book_table(self, book_table):
+        """Value holdings from the feed's shared top-of-book table"""
+        self.book_table = book_table
+
     def should_rebalance(self, exchange_wrappers, price_data):
         """Check if rebalancing is needed using exchange-specific prices"""
         try:
@@ -108,6 +113,13 @@ class RebalanceMonitor:
         # Try different BTC pairs
         btc_pairs = ['BTC/USDT', 'BTC/USDC', 'BTC/USD']
         
+        if self.book_table is not None:
+            for pair in btc_pairs:
+                quote = self.book_table.get(pair, exchange_name)
+                if quote:
+                    # Use bid price for valuation (conservative)
+                    return float(btc_amount) * quote[0]
+        
         for pair in btc_pairs:
             if pair in price_data and exchange_name in price_data[pair]:
                 price_info = price_data[pair][exchange_name]
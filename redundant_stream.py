@@ -0,0 +1,266 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, Union
+
+from exchanges_websocket import symbol_list
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionStats:
+    """Arrival statistics of one connection of a RedundantStream"""
+    __slots__ = ('index', 'connected_at', 'last_arrival_ns', 'first', 'late', 'lags_us', 'recycles')
+
+    def __init__(self, index: int, window: int = 1000):
+        self.index = index
+        self.lags_us = deque(maxlen=window)  # per copy: lag behind the first arrival (0 when first)
+        self.recycles = 0
+        self.reset()
+
+    def reset(self):
+        self.connected_at = time.time()
+        self.last_arrival_ns = time.perf_counter_ns()
+        self.first = 0   # updates this connection delivered first
+        self.late = 0    # copies that arrived after another connection's
+        self.lags_us.clear()
+
+    def mean_lag_us(self) -> float:
+        return sum(self.lags_us) / len(self.lags_us) if self.lags_us else 0.0
+
+    def to_dict(self) -> Dict:
+        lags = sorted(self.lags_us)
+        return {
+            'connection': self.index,
+            'first': self.first,
+            'late': self.late,
+            'win_rate': self.first / max(self.first + self.late, 1),
+            'mean_lag_us': round(self.mean_lag_us(), 1),
+            'p99_lag_us': round(lags[int(len(lags) * 0.99)], 1) if lags else 0.0,
+            'uptime_s': round(time.time() - self.connected_at, 1),
+            'recycles': self.recycles
+        }
+
+
+class RedundantStream:
+    """N parallel connections to the same venue stream; the first copy of each update wins.
+
+    Every client keeps its own local book, so a forwarded update is always a
+    complete view of the book as of that message. Copies are matched on the
+    exchange's ordering key (BookUpdate/TradeUpdate.sequence) plus its
+    ordinal among consecutive messages sharing that key, so venues that only
+    stamp event times still dedupe; keys are kept per symbol since one
+    socket multiplexes every subscribed market. Later copies are dropped and their lag
+    behind the first arrival recorded; an update older than the last one
+    forwarded is never passed on. Every recycle_interval seconds the
+    connection lagging most (or one that went silent) is reconnected.
+    """
+
+    def __init__(self, name: str, factory: Callable, symbols: Iterable[str], connections: int = 2,
+                 recycle_interval: float = 60.0, min_lag_us: float = 200.0,
+                 min_samples: int = 100, history: int = 4096):
+        self.name = name
+        self.factory = factory   # symbols -> unconnected client (BinanceUSWebSocket, KrakenWebSocket, ...)
+        self.symbols = list(symbols)  # unified symbols every connection subscribes
+        self.connections = max(1, connections)
+        self.recycle_interval = recycle_interval
+        self.min_lag_us = min_lag_us
+        self.min_samples = min_samples
+        self.history = history
+
+        self.clients = []
+        self.stats = []
+        self.callbacks = []
+        self.recorder = None     # raw capture stays on connection 0, so replays see one ordered stream
+        self.running = False
+        self._recycle_task = None
+
+        self._seen = {}          # copy key -> first arrival ns
+        self._seen_order = deque()
+        self._ordinals = []      # per connection: (type, symbol) -> [last sequence, ordinal]
+        self._last_timestamp = {}  # (type, symbol) -> exchange time of the last forwarded update
+        self.forwarded = 0
+        self.duplicates = 0
+        self.stale = 0
+
+    def subscribe(self, callback):
+        self.callbacks.append(callback)
+
+    # ==================== CONNECTIONS ====================
+
+    async def connect(self):
+        self.running = True
+        for index in range(self.connections):
+            self.stats.append(ConnectionStats(index))
+            self._ordinals.append({})
+            self.clients.append(await self._open(index))
+        if self.connections > 1 and self.recycle_interval:
+            self._recycle_task = asyncio.create_task(self._recycle_loop())
+        logger.info(f"🔀 {self.name}: {self.connections} racing connection(s)")
+
+    async def _open(self, index: int):
+        client = self.factory(list(self.symbols))
+        if index == 0:
+            client.recorder = self.recorder
+
+        async def on_update(data):
+            await self._on_update(index, data)
+
+        client.subscribe(on_update)
+        await client.connect()
+        return client
+
+    async def recycle(self, index: int, reason: str):
+        """Replace one connection: the new socket is up before the old one closes"""
+        old = self.clients[index]
+        try:
+            self.clients[index] = await self._open(index)
+        except Exception as e:
+            logger.warning(f"{self.name} connection {index} could not be recycled: {e}")
+            return
+        self._ordinals[index] = {}
+        stats = self.stats[index]
+        stats.recycles += 1
+        stats.reset()
+        logger.info(f"♻️  {self.name} connection {index} recycled ({reason})")
+        try:
+            await old.close()
+        except Exception as e:
+            logger.debug(f"{self.name} connection {index} close failed: {e}")
+
+    async def _recycle_loop(self):
+        while self.running:
+            await asyncio.sleep(self.recycle_interval)
+            try:
+                index, reason = self.recycle_candidate()
+                if index is not None:
+                    await self.recycle(index, reason)
+            except Exception as e:
+                logger.error(f"{self.name} recycle check failed: {e}")
+
+    def recycle_candidate(self):
+        """(index, reason) of the connection to replace, or (None, None)"""
+        now = time.perf_counter_ns()
+        newest = max(stats.last_arrival_ns for stats in self.stats)
+        for stats in self.stats:
+            # Silent while the others still deliver: dropped or stuck socket
+            if newest - stats.last_arrival_ns > self.recycle_interval * 1e9 / 2 and now - newest < 5e9:
+                return stats.index, "no data"
+
+        measured = [stats for stats in self.stats if len(stats.lags_us) >= self.min_samples]
+        if len(measured) < 2:
+            return None, None
+        slowest = max(measured, key=ConnectionStats.mean_lag_us)
+        lag = slowest.mean_lag_us()
+        if lag < self.min_lag_us:
+            return None, None
+        return slowest.index, f"mean lag {lag:.0f}us"
+
+    async def add_symbols(self, symbols: Union[str, Iterable[str]]):
+        """Subscribe more symbols on every connection without reconnecting"""
+        added = [s for s in symbol_list(symbols) if s not in self.symbols]
+        if not added:
+            return
+        self.symbols.extend(added)
+        for client in self.clients:
+            await client.add_symbols(added)
+        logger.info(f"➕ {self.name}: subscribed {', '.join(added)}")
+
+    async def remove_symbols(self, symbols: Union[str, Iterable[str]]):
+        removed = [s for s in symbol_list(symbols) if s in self.symbols]
+        if not removed:
+            return
+        self.symbols = [s for s in self.symbols if s not in removed]
+        for client in self.clients:
+            await client.remove_symbols(removed)
+        for key in [key for key in self._last_timestamp if key[1] in removed]:
+            del self._last_timestamp[key]
+        logger.info(f"➖ {self.name}: unsubscribed {', '.join(removed)}")
+
+    async def close(self):
+        self.running = False
+        if self._recycle_task is not None:
+            self._recycle_task.cancel()
+        for client in self.clients:
+            try:
+                await client.close()
+            except Exception:
+                pass
+
+    # ==================== DEDUPLICATION ====================
+
+    async def _on_update(self, index: int, data):
+        now = time.perf_counter_ns()
+        stats = self.stats[index]
+        stats.last_arrival_ns = now
+        kind = (data.type, data.symbol)
+
+        if data.type == 'orderbook' and not data.book.synced:
+            # A connection resyncing must not invalidate a quote the others still hold
+            if any(self._synced(client, data.symbol) for client in self.clients):
+                return
+            await self._forward(data)
+            return
+
+        sequence = data.sequence
+        if sequence is None:
+            await self._forward(data)
+            return
+
+        ordinals = self._ordinals[index]
+        state = ordinals.get(kind)
+        if state is not None and state[0] == sequence:
+            state[1] += 1
+        else:
+            state = ordinals[kind] = [sequence, 0]
+        key = (kind, sequence, state[1])
+
+        first_ns = self._seen.get(key)
+        if first_ns is not None:
+            stats.late += 1
+            stats.lags_us.append((now - first_ns) / 1000)
+            self.duplicates += 1
+            return
+
+        self._seen[key] = now
+        self._seen_order.append(key)
+        if len(self._seen_order) > self.history:
+            self._seen.pop(self._seen_order.popleft(), None)
+
+        timestamp = data.timestamp
+        last = self._last_timestamp.get(kind)
+        if timestamp is not None and last is not None and timestamp < last:
+            # Older than what was already forwarded (lagging beyond the dedup history)
+            stats.late += 1
+            self.stale += 1
+            return
+        if timestamp is not None:
+            self._last_timestamp[kind] = timestamp
+
+        stats.first += 1
+        stats.lags_us.append(0.0)
+        await self._forward(data)
+
+    @staticmethod
+    def _synced(client, symbol: str) -> bool:
+        book = client.get_book(symbol)
+        return book is not None and book.synced
+
+    async def _forward(self, data):
+        self.forwarded += 1
+        for callback in self.callbacks:
+            try:
+                await callback(data)
+            except Exception as e:
+                logger.error(f"{self.name} callback error: {e}")
+
+    def get_stats(self) -> Dict:
+        return {
+            'stream': self.name,
+            'symbols': len(self.symbols),
+            'forwarded': self.forwarded,
+            'duplicates': self.duplicates,
+            'stale': self.stale,
+            'connections': [stats.to_dict() for stats in self.stats]
+        }
@@ -0,0 +1,373 @@
+import asyncio
+import logging
+import math
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from exchanges_websocket import BinanceUSWebSocket, KrakenWebSocket, CoinbaseWebSocket
+from message_decoding import BookUpdate, TradeUpdate
+
+logger = logging.getLogger(__name__)
+
+# Record kinds
+BOOK = 1
+TRADE = 2
+RESET = 3    # the venue's local book lost sync: its quote is unusable until the next BOOK
+
+HEADER_SIZE = 64
+HEADER = np.dtype([('capacity', '<u8'), ('depth', '<u8'), ('write', '<u8')])
+
+SIDES = {None: 0, 'buy': 1, 'sell': 2}
+SIDE_NAMES = (None, 'buy', 'sell')
+
+# Venue -> client name used in payloads (matches the in-process clients)
+VENUE_EXCHANGES = {'binance': 'binance_us', 'kraken': 'kraken', 'coinbase': 'coinbase'}
+
+
+def record_dtype(depth: int) -> np.dtype:
+    """One fixed-size book or trade record; seq is written last and marks the slot complete"""
+    return np.dtype([
+        ('seq', '<u8'),
+        ('kind', 'u1'),
+        ('side', 'u1'),            # trades: 0 unknown, 1 buy, 2 sell aggressor
+        ('bid_levels', 'u1'),
+        ('ask_levels', 'u1'),
+        ('symbol', '<u2'),
+        ('timestamp', '<f8'),      # exchange event time in ms, NaN when the venue sent none
+        ('written_ns', '<i8'),     # time.perf_counter_ns() in the writer (same clock in every process)
+        ('price', '<f8'),
+        ('quantity', '<f8'),
+        ('bids', '<f8', (depth, 2)),
+        ('asks', '<f8', (depth, 2))
+    ], align=True)
+
+
+class SharedRing:
+    """Single-writer ring of fixed-size records in a multiprocessing.shared_memory block.
+
+    The writer clears a slot's seq, fills the record, sets seq to its index + 1
+    and then publishes the new write index. Readers copy records straight out
+    of the shared buffer and keep only those whose seq still matches after the
+    copy, so a slot overwritten mid-read is counted as an overrun instead of
+    being delivered torn.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        header = np.ndarray((), dtype=HEADER, buffer=shm.buf)
+        self.capacity = int(header['capacity'])
+        self.depth = int(header['depth'])
+        self._write = np.ndarray((), dtype='<u8', buffer=shm.buf, offset=HEADER.fields['write'][1])
+        self.records = np.ndarray((self.capacity,), dtype=record_dtype(self.depth), buffer=shm.buf,
+                                  offset=HEADER_SIZE)
+        self._seq = self.records['seq']
+        self._next = int(self._write)
+
+    @classmethod
+    def create(cls, capacity: int = 65536, depth: int = 10) -> 'SharedRing':
+        size = HEADER_SIZE + capacity * record_dtype(depth).itemsize
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        header = np.ndarray((), dtype=HEADER, buffer=shm.buf)
+        header['capacity'] = capacity
+        header['depth'] = depth
+        header['write'] = 0
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'SharedRing':
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def write_index(self) -> int:
+        return int(self._write)
+
+    # ==================== WRITER ====================
+
+    def take_over(self):
+        """Continue writing after the previous writer (another process) exited"""
+        self._next = self.write_index
+
+    def _begin(self) -> tuple:
+        index = self._next
+        slot = index % self.capacity
+        self._seq[slot] = 0
+        return index, self.records[slot]
+
+    def _commit(self, index: int, slot: int):
+        self._seq[slot] = index + 1
+        self._next = index + 1
+        self._write[...] = index + 1
+
+    def write_book(self, symbol: int, timestamp: Optional[float], bids: List, asks: List):
+        index, record = self._begin()
+        bids, asks = bids[:self.depth], asks[:self.depth]
+        record['kind'] = BOOK
+        record['symbol'] = symbol
+        record['timestamp'] = math.nan if timestamp is None else timestamp
+        record['written_ns'] = time.perf_counter_ns()
+        record['bid_levels'] = len(bids)
+        record['ask_levels'] = len(asks)
+        if bids:
+            record['bids'][:len(bids)] = bids
+        if asks:
+            record['asks'][:len(asks)] = asks
+        self._commit(index, index % self.capacity)
+
+    def write_trade(self, symbol: int, timestamp: Optional[float], price: float, quantity: float,
+                    side: Optional[str] = None):
+        index, record = self._begin()
+        record['kind'] = TRADE
+        record['side'] = SIDES.get(side, 0)
+        record['symbol'] = symbol
+        record['timestamp'] = math.nan if timestamp is None else timestamp
+        record['written_ns'] = time.perf_counter_ns()
+        record['price'] = price
+        record['quantity'] = quantity
+        self._commit(index, index % self.capacity)
+
+    def write_reset(self, symbol: int):
+        index, record = self._begin()
+        record['kind'] = RESET
+        record['symbol'] = symbol
+        record['timestamp'] = math.nan
+        record['written_ns'] = time.perf_counter_ns()
+        record['bid_levels'] = 0
+        record['ask_levels'] = 0
+        self._commit(index, index % self.capacity)
+
+    # ==================== READER ====================
+
+    def read(self, start: int, limit: int = 4096):
+        """(records, next index, overruns) for the records published since start.
+
+        At most limit records are copied, oldest first; if the writer lapped
+        the reader, the overwritten records are skipped and counted.
+        """
+        write = int(self._write)
+        overruns = 0
+        if write - start > self.capacity:
+            overruns = write - start - self.capacity
+            start = write - self.capacity
+        end = min(write, start + limit)
+        if end <= start:
+            return self.records[:0], start, overruns
+
+        first, last = start % self.capacity, (end - 1) % self.capacity
+        if first <= last:
+            batch = self.records[first:last + 1].copy()
+            seqs = self._seq[first:last + 1]
+        else:
+            batch = np.concatenate((self.records[first:], self.records[:last + 1]))
+            seqs = np.concatenate((self._seq[first:], self._seq[:last + 1]))
+        valid = seqs == np.arange(start + 1, end + 1, dtype='<u8')
+        if not valid.all():
+            overruns += int((~valid).sum())
+            batch = batch[valid]
+        return batch, end, overruns
+
+    def close(self):
+        self.records = self._seq = self._write = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# ==================== FEED HANDLER PROCESS ====================
+
+def _client(venue: str, symbols: List[str], endpoint: Dict):
+    if venue == 'binance':
+        return BinanceUSWebSocket(symbols, ws_url=endpoint.get('ws'), rest_url=endpoint.get('rest'))
+    if venue == 'kraken':
+        return KrakenWebSocket(symbols, ws_url=endpoint.get('ws'))
+    return CoinbaseWebSocket(symbols, ws_url=endpoint.get('ws'))
+
+
+async def _feed_handler(venue: str, symbols: List[str], endpoint: Dict, ring_name: str):
+    ring = SharedRing.attach(ring_name)
+    symbol_ids = {symbol: i for i, symbol in enumerate(symbols)}
+    client = _client(venue, symbols, endpoint)
+
+    async def write(data):
+        symbol = symbol_ids.get(data.symbol)
+        if symbol is None:
+            return
+        if data.type == 'trade':
+            ring.write_trade(symbol, data.timestamp, data.price, data.quantity, data.side)
+            return
+        book = data.book
+        if not book.synced or book.is_crossed():
+            ring.write_reset(symbol)
+        else:
+            ring.write_book(symbol, data.timestamp, data.bids, data.asks)
+
+    client.subscribe(write)
+    await client.connect()
+    await client.ws.wait_closed()
+    logger.warning(f"{venue} feed handler socket closed")
+
+
+def run_feed_handler(venue: str, symbols: List[str], endpoint: Dict, ring_name: str, log_level: int):
+    """Process entry point: one venue's socket, parsing and local books"""
+    logging.basicConfig(level=log_level, format=f'%(asctime)s [{venue}] %(levelname)s %(message)s')
+    try:
+        asyncio.run(_feed_handler(venue, symbols, endpoint, ring_name))
+    except KeyboardInterrupt:
+        pass
+
+
+class FeedProcess:
+    """One venue's feed handler process and the ring it writes"""
+
+    def __init__(self, venue: str, symbols: List[str], endpoint: Dict, capacity: int, depth: int):
+        self.venue = venue
+        self.exchange = VENUE_EXCHANGES[venue]
+        # Unified names in record order; an unconnected client normalizes 'btcusdt', 'XBT/USD', 'BTC-USD'
+        self.symbols = [book.symbol for book in _client(venue, symbols, endpoint).books.values()]
+        self.endpoint = endpoint
+        self.ring = SharedRing.create(capacity, depth)
+        self.process = None
+        self.read_index = 0
+        self.records = 0
+        self.overruns = 0
+        self.restarts = 0
+        self.started_at = 0.0
+
+    def start(self, context):
+        self.process = context.Process(
+            target=run_feed_handler, name=f'feed-{self.venue}', daemon=True,
+            args=(self.venue, self.symbols, self.endpoint, self.ring.name, logging.getLogger().level)
+        )
+        self.process.start()
+        self.started_at = time.time()
+
+    def stop(self):
+        if self.process is not None and self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=5)
+        self.ring.close()
+
+    def get_stats(self) -> Dict:
+        return {
+            'venue': self.venue,
+            'pid': self.process.pid if self.process else None,
+            'alive': bool(self.process and self.process.is_alive()),
+            'records': self.records,
+            'backlog': self.ring.write_index - self.read_index,
+            'overruns': self.overruns,
+            'restarts': self.restarts
+        }
+
+
+class SharedMemoryFeed:
+    """Runs each venue's feed handler in its own process and reads their rings.
+
+    The handlers parse frames and maintain local books on their own cores
+    and write normalized fixed-size records; this side copies records out of
+    shared memory (no pickling or JSON) and hands BookUpdate/TradeUpdate
+    payloads to the callback. Book payloads carry copied levels, not a live
+    book (book is None); an empty BookUpdate means the venue's book lost
+    sync. A handler whose process dies is restarted.
+    """
+
+    def __init__(self, symbols: Dict[str, List[str]], endpoints: Optional[Dict] = None,
+                 capacity: int = 65536, depth: int = 10, poll_interval: float = 0.0005,
+                 start_method: str = 'spawn'):
+        self.symbols = symbols          # venue (binance/kraken/coinbase) -> unified symbols
+        self.endpoints = endpoints or {}
+        self.capacity = capacity
+        self.depth = depth
+        self.poll_interval = poll_interval
+        self.context = multiprocessing.get_context(start_method)  # no fork of a running event loop
+        self.feeds = {}
+        self.callbacks = []
+        self.running = False
+        self._task = None
+
+    def subscribe(self, callback: Callable):
+        self.callbacks.append(callback)
+
+    async def start(self):
+        self.running = True
+        for venue, symbols in self.symbols.items():
+            try:
+                feed = FeedProcess(venue, symbols, self.endpoints.get(venue, {}), self.capacity, self.depth)
+                feed.start(self.context)
+                self.feeds[venue] = feed
+                logger.info(f"🧵 {venue} feed handler started in process {feed.process.pid}")
+            except Exception as e:
+                logger.error(f"❌ Failed to start {venue} feed handler: {e}")
+        self._task = asyncio.create_task(self._read_loop())
+
+    async def _read_loop(self):
+        last_check = time.time()
+        while self.running:
+            delivered = 0
+            for feed in self.feeds.values():
+                delivered += await self._drain(feed)
+            if time.time() - last_check > 1.0:
+                last_check = time.time()
+                self._supervise()
+            # Busy feeds are read back to back; idle ones polled every poll_interval
+            await asyncio.sleep(0 if delivered else self.poll_interval)
+
+    async def _drain(self, feed: FeedProcess) -> int:
+        batch, feed.read_index, overruns = feed.ring.read(feed.read_index)
+        if overruns:
+            feed.overruns += overruns
+            logger.warning(f"{feed.venue} ring overrun: {overruns} record(s) lost")
+        if not len(batch):
+            return 0
+        exchange, symbols = feed.exchange, feed.symbols
+        for record in batch:
+            kind = record['kind']
+            timestamp = float(record['timestamp'])
+            timestamp = None if timestamp != timestamp else timestamp
+            symbol = symbols[record['symbol']]
+            if kind == TRADE:
+                data = TradeUpdate(exchange, symbol, float(record['price']), float(record['quantity']), timestamp,
+                                   side=SIDE_NAMES[record['side']])
+            else:
+                bids = record['bids'][:record['bid_levels']].tolist()
+                asks = record['asks'][:record['ask_levels']].tolist()
+                data = BookUpdate.from_levels(exchange, symbol, bids, asks, timestamp)
+            await self._notify_callbacks(data)
+        feed.records += len(batch)
+        return len(batch)
+
+    def _supervise(self):
+        """Restart handlers whose process exited (socket closed, crash)"""
+        for feed in self.feeds.values():
+            if self.running and not feed.process.is_alive() and time.time() - feed.started_at > 5.0:
+                logger.warning(f"⚠️ {feed.venue} feed handler exited ({feed.process.exitcode}), restarting")
+                feed.restarts += 1
+                feed.ring.take_over()
+                for symbol in range(len(feed.symbols)):
+                    feed.ring.write_reset(symbol)  # the new handler starts unsynced
+                feed.start(self.context)
+
+    async def _notify_callbacks(self, data):
+        for callback in self.callbacks:
+            try:
+                await callback(data)
+            except Exception as e:
+                logger.error(f"Callback error: {e}")
+
+    async def stop(self):
+        self.running = False
+        if self._task is not None:
+            self._task.cancel()
+        for feed in self.feeds.values():
+            feed.stop()
+        self.feeds.clear()
+
+    def get_stats(self) -> List[Dict]:
+        return [feed.get_stats() for feed in self.feeds.values()]
@@ -0,0 +1,172 @@
+import logging
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from top_of_book import TopOfBookTable
+
+logger = logging.getLogger(__name__)
+
+
+class SpreadScanner:
+    """Vectorized cross-exchange arbitrage scan over the top-of-book table.
+
+    Every (symbol, buy exchange, sell exchange) combination is evaluated in one
+    NumPy pass: asks and bids are gathered from zero-copy views of the table
+    columns into a (symbols x exchanges) grid, broadcast into a spread matrix,
+    and per-exchange fee rates and size limits are applied as vectors. Only
+    the top-k surviving candidates are materialized as opportunity dicts
+    (callers log the ones they keep).
+    """
+
+    def __init__(self, book_table: TopOfBookTable, fee_lookup: Optional[Callable[[str], float]] = None,
+                 size_limits: Optional[Dict[str, float]] = None, default_fee_rate: float = 0.001):
+        self.book_table = book_table
+        self.fee_lookup = fee_lookup
+        self.default_fee_rate = default_fee_rate
+        self.size_limits = dict(size_limits or {})  # exchange -> max notional per leg
+        self.fee_rates = {}                         # exchange -> taker fee rate
+
+        # Zero-copy views; the table never resizes its columns
+        self.bid = np.frombuffer(book_table.bid, dtype=np.float64)
+        self.ask = np.frombuffer(book_table.ask, dtype=np.float64)
+
+        self.symbols = ()
+        self.exchanges = []
+        self._indexed_slots = -1
+        self._slot_grid = None   # (symbols, exchanges) -> table slot
+        self._present = None     # (symbols, exchanges) -> key exists in the table
+        self._fee_vector = None
+        self._limit_matrix = None
+        self._same_exchange = None
+
+    # ==================== PER-EXCHANGE TERMS ====================
+
+    def fee_rate(self, exchange: str) -> float:
+        """Taker fee rate for an exchange, cached from the fee lookup"""
+        rate = self.fee_rates.get(exchange)
+        if rate is None:
+            rate = self.default_fee_rate
+            if self.fee_lookup is not None:
+                try:
+                    rate = float(self.fee_lookup(exchange))
+                except Exception as e:
+                    logger.warning(f"⚠️  Fee lookup failed for {exchange}, using {rate}: {e}")
+            self.fee_rates[exchange] = rate
+        return rate
+
+    def size_limit(self, exchange: str) -> float:
+        return self.size_limits.get(exchange, np.inf)
+
+    def refresh_fees(self):
+        """Drop cached fee rates so the next scan re-reads them"""
+        self.fee_rates.clear()
+        self._indexed_slots = -1
+
+    def set_size_limit(self, exchange: str, notional: Optional[float]):
+        if notional is None:
+            self.size_limits.pop(exchange, None)
+        else:
+            self.size_limits[exchange] = notional
+        self._indexed_slots = -1
+
+    # ==================== INDEX ====================
+
+    def _reindex(self, symbols):
+        """Rebuild the slot grid and per-exchange vectors when symbols or table keys change"""
+        table = self.book_table
+        exchanges = sorted({exchange for symbol, exchange in table.keys if symbol in symbols})
+
+        grid = np.zeros((len(symbols), len(exchanges)), dtype=np.intp)
+        present = np.zeros((len(symbols), len(exchanges)), dtype=bool)
+        column = {name: j for j, name in enumerate(exchanges)}
+        for i, symbol in enumerate(symbols):
+            for exchange, slot in table.symbol_slots.get(symbol, ()):
+                grid[i, column[exchange]] = slot
+                present[i, column[exchange]] = True
+
+        limits = np.array([self.size_limit(name) for name in exchanges], dtype=np.float64)
+
+        self.symbols = tuple(symbols)
+        self.exchanges = exchanges
+        self._slot_grid = grid
+        self._present = present
+        self._fee_vector = np.array([self.fee_rate(name) for name in exchanges], dtype=np.float64)
+        self._limit_matrix = np.minimum(limits[:, None], limits[None, :])  # (buy, sell)
+        self._same_exchange = np.eye(len(exchanges), dtype=bool)
+        self._indexed_slots = len(table)
+
+    # ==================== SCAN ====================
+
+    def scan(self, symbols: List[str], params: Dict, min_trade_amount: float,
+             min_profit: float, top_k: int) -> List[Dict]:
+        """Return up to top_k opportunities, best net profit first"""
+        if tuple(symbols) != self.symbols or len(self.book_table) != self._indexed_slots:
+            self._reindex(symbols)
+        if len(self.exchanges) < 2 or top_k <= 0:
+            return []
+
+        bids = self.bid[self._slot_grid]   # (S, E)
+        asks = self.ask[self._slot_grid]
+        valid = self._present & (bids > 0) & (asks > 0)
+
+        # spread[s, b, k] = bid on sell exchange k - ask on buy exchange b
+        buy_ask = asks[:, :, None]
+        sell_bid = bids[:, None, :]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread = sell_bid - buy_ask
+            spread_pct = spread / buy_ask * 100
+
+            position = np.minimum(params['position_size'], self._limit_matrix)   # (B, K)
+            amount = position / buy_ask
+            estimated_profit = spread * amount
+            estimated_fees = position * (self._fee_vector[:, None] + self._fee_vector[None, :])
+            net_profit = estimated_profit - estimated_fees
+
+        candidates = (
+            valid[:, :, None] & valid[:, None, :] & ~self._same_exchange
+            & (spread > 0)
+            & (spread_pct > params['min_spread_pct'])
+            & (amount >= min_trade_amount)
+            & (net_profit >= min_profit)
+        )
+
+        flat = np.flatnonzero(candidates)
+        if flat.size == 0:
+            return []
+
+        flat_net = net_profit.ravel()[flat]
+        if flat.size > top_k:
+            keep = np.argpartition(-flat_net, top_k - 1)[:top_k]
+            flat, flat_net = flat[keep], flat_net[keep]
+        flat = flat[np.argsort(-flat_net, kind='stable')]
+
+        # ==================== MATERIALIZE TOP-K ====================
+        now = time.time()
+        shape = candidates.shape
+        opportunities = []
+        for s, b, k in zip(*np.unravel_index(flat, shape)):
+            symbol = self.symbols[s]
+            buy_exchange = self.exchanges[b]
+            sell_exchange = self.exchanges[k]
+            buy_price = float(asks[s, b])
+            sell_price = float(bids[s, k])
+            opportunities.append({
+                'symbol': symbol,
+                'buy_exchange': buy_exchange,
+                'sell_exchange': sell_exchange,
+                'buy_price': buy_price,
+                'sell_price': sell_price,
+                'spread': float(spread[s, b, k]),
+                'spread_percentage': float(spread_pct[s, b, k]),
+                'amount': float(amount[s, b, k]),
+                'estimated_profit': float(estimated_profit[s, b, k]),
+                'estimated_fees': float(estimated_fees[b, k]),
+                'net_profit': float(net_profit[s, b, k]),
+                'market_confidence': params['confidence'],
+                'auction_state': params['auction_state'],
+                'timestamp': now
+            })
+
+        return opportunities
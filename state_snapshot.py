@@ -0,0 +1,109 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+from typing import Dict, Optional
+
+from message_decoding import loads
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+
+    def _dumps(state: Dict) -> bytes:
+        return orjson.dumps(state, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+except ImportError:
+    def _dumps(state: Dict) -> bytes:
+        return json.dumps(state, separators=(',', ':'), default=str).encode()
+
+SNAPSHOT_VERSION = 1
+MAGIC = b'ARBS'
+# magic, format version, seqlock counter (odd while a write is in progress), payload length, publish time
+HEADER = struct.Struct('<4sIQIxxxxd')
+
+
+class StateSnapshotWriter:
+    """Publishes the bot's state as one JSON document in a memory-mapped file.
+
+    Readers in other processes (the dashboard) map the same file and never
+    touch the exchanges. The header carries a seqlock counter like
+    TopOfBookTable: odd while the payload is rewritten, so readers retry
+    instead of parsing a half-written document. When a document outgrows
+    the file, the file is enlarged and remapped.
+    """
+
+    def __init__(self, path: str, size: int = 1 << 20):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self.seq = 0
+        self.published = 0
+        self.map = None
+        self._map(size)
+
+    def _map(self, size: int):
+        if self.map is not None:
+            self.map.close()
+        os.ftruncate(self.fd, size)
+        self.map = mmap.mmap(self.fd, size)
+        self.size = size
+        self._write_header(0, time.time())
+
+    def _write_header(self, length: int, published_at: float):
+        HEADER.pack_into(self.map, 0, MAGIC, SNAPSHOT_VERSION, self.seq, length, published_at)
+
+    def publish(self, state: Dict):
+        payload = _dumps({'version': SNAPSHOT_VERSION, **state})
+        if HEADER.size + len(payload) > self.size:
+            self._map(max(self.size * 2, HEADER.size + len(payload) * 2))
+
+        published_at = time.time()
+        self.seq += 1   # odd: write in progress
+        self._write_header(0, published_at)
+        self.map[HEADER.size:HEADER.size + len(payload)] = payload
+        self.seq += 1
+        self._write_header(len(payload), published_at)
+        self.published += 1
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        os.close(self.fd)
+
+
+def read_snapshot(path: str, retries: int = 50) -> Optional[Dict]:
+    """Latest published state, or None when the file is missing, foreign or mid-write too long.
+
+    The returned dict has 'age_seconds' added: how long ago it was published.
+    """
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                return None
+            with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as view:
+                for _ in range(retries):
+                    magic, version, seq, length, published_at = HEADER.unpack_from(view, 0)
+                    if magic != MAGIC or version != SNAPSHOT_VERSION:
+                        logger.warning(f"Unsupported state snapshot in {path} (version {version})")
+                        return None
+                    if seq & 1 or HEADER.size + length > size:
+                        time.sleep(0.001)
+                        continue
+                    payload = view[HEADER.size:HEADER.size + length]
+                    if HEADER.unpack_from(view, 0)[2] != seq:
+                        continue
+                    if not length:
+                        return None
+                    state = loads(payload)
+                    state['age_seconds'] = time.time() - published_at
+                    return state
+    except (OSError, ValueError) as e:
+        logger.debug(f"State snapshot unavailable: {e}")
+    return None
@@ -32,6 +32,15 @@ import json
 from data_feed import RESTPollingFeed, WebSocketFeed
 from rebalance_monitor import RebalanceMonitor
 from order_executor import LowLatencyExecutor, HighLatencyExecutor
+from async_exchanges import AsyncExchangeManager, apply_endpoint_override
+from spread_scanner import SpreadScanner
+from depth_sweep import sweep_books
+from currency_graph import CurrencyGraph
+from market_recorder import MarketRecorder
+from state_snapshot import StateSnapshotWriter
+from log_pipeline import SAMPLE, JsonLinesFormatter, SuppressedCountFormatter, start_pipeline
+from account_streams import AccountStreamManager, parse_balance
+from rate_limiter import RateLimitScheduler
 
 # ==================== MARKET INTELLIGENCE MODULES ====================
 from auction_context_module import AuctionContextModule
@@ -43,6 +52,44 @@ from data_hub import DataHub
 import logging
 from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
 
+# (spread multiplier, position multiplier) per auction regime; overridable via trading.context_multipliers
+DEFAULT_CONTEXT_MULTIPLIERS = {
+    'accepting': (0.7, 1.3),   # lower threshold, larger position
+    'rejecting': (1.5, 0.7),   # higher threshold, smaller position
+    'imbalanced': (1.2, 0.9)   # cautious
+}
+
+
+class ExchangeWrapper:
+    """Balance view of one exchange for inventory checks and rebalancing"""
+    
+    # Currencies we care about
+    TARGET_CURRENCIES = ('BTC', 'USDT', 'USDC', 'USD', 'BNB', 'PAXG')
+    
+    def __init__(self, name, exchange_obj, free_bal, total_bal):
+        self.name = name
+        self.exchange = exchange_obj
+        self.balances = {}
+        self.free_balances = {}
+        
+        for currency in self.TARGET_CURRENCIES:
+            free_val = free_bal.get(currency, 0.0)
+            total_val = total_bal.get(currency, 0.0)
+            
+            # Only store if we have some balance
+            if free_val > 0 or total_val > 0:
+                self.free_balances[currency] = free_val
+                self.balances[currency] = total_val
+        
+        # Calculate total value in USD
+        btc_price_est = 90000  # Conservative estimate
+        self.total_value = (
+            self.balances.get('BTC', 0) * btc_price_est +
+            self.balances.get('USDT', 0) +
+            self.balances.get('USDC', 0) +
+            self.balances.get('USD', 0)
+        )
+
 class LogLevel(Enum):
     DEBUG = 10
     INFO = 20
@@ -55,6 +102,8 @@ class SystemMetrics:
     """Comprehensive system performance tracking"""
     cycle_count: int = 0
     total_trades: int = 0
+    settled_trades: int = 0    # both legs terminal, realized P&L booked
+    winning_trades: int = 0
     total_profit: float = 0.0
     total_loss: float = 0.0
     win_rate: float = 0.0
@@ -62,19 +111,30 @@ class SystemMetrics:
     api_success_rate: float = 1.0
     uptime_seconds: float = 0.0
     memory_usage_mb: float = 0.0
+    decision_latency_p50_us: float = 0.0
+    decision_latency_p99_us: float = 0.0
+    leg_skew_p50_ms: float = 0.0
+    leg_skew_p99_ms: float = 0.0
+    triangular_cycles_detected: int = 0
     last_system_check: float = field(default_factory=time.time)
     
     def to_dict(self) -> Dict:
         return {
             'cycle_count': self.cycle_count,
             'total_trades': self.total_trades,
+            'settled_trades': self.settled_trades,
             'total_profit': round(self.total_profit, 2),
             'total_loss': round(self.total_loss, 2),
             'win_rate': round(self.win_rate, 3),
             'avg_trade_time_ms': round(self.avg_trade_time_ms, 2),
             'api_success_rate': round(self.api_success_rate, 3),
             'uptime_hours': round(self.uptime_seconds / 3600, 2),
-            'memory_usage_mb': round(self.memory_usage_mb, 1)
+            'memory_usage_mb': round(self.memory_usage_mb, 1),
+            'decision_latency_p50_us': round(self.decision_latency_p50_us, 1),
+            'decision_latency_p99_us': round(self.decision_latency_p99_us, 1),
+            'leg_skew_p50_ms': round(self.leg_skew_p50_ms, 1),
+            'leg_skew_p99_ms': round(self.leg_skew_p99_ms, 1),
+            'triangular_cycles_detected': self.triangular_cycles_detected
         }
 
 class ArbitrageBot:
@@ -101,11 +161,14 @@ class ArbitrageBot:
         
         # Load configuration
         self.config = self.load_configuration()
+        self.log_pipeline.sampler.interval = self.config['monitoring'].get('log_sample_interval', 5.0)
         
         # Initialize system state
         self.system_metrics = SystemMetrics()
         self.is_shutting_down = False
         self.last_heartbeat = time.time()
+        self.latest_balances = {}       # exchange -> {'free', 'total', 'updated_at'} from the last balance fetch
+        self.recent_opportunities = []  # newest last, published in the state snapshot
         
         # Register signal handlers for graceful shutdown
         self.register_signal_handlers()
@@ -123,26 +186,22 @@ class ArbitrageBot:
         self.log_system_startup()
     
     def setup_enterprise_logging(self):
-        """Configure comprehensive logging for production monitoring"""
+        """Configure comprehensive logging for production monitoring.
+        
+        The loggers only enqueue records; a background writer thread formats
+        them and does all console/file I/O, so logging never blocks the event loop.
+        """
         # Create logs directory if it doesn't exist
         os.makedirs('logs', exist_ok=True)
         
-        # Configure root logger
-        self.logger = logging.getLogger('ArbitrageBot')
-        self.logger.setLevel(logging.INFO)
-        
-        # Remove existing handlers to avoid duplicates
-        self.logger.handlers.clear()
-        
         # Console Handler (colored for readability)
         console = logging.StreamHandler()
         console.setLevel(logging.INFO)
-        console_format = logging.Formatter(
+        console_format = SuppressedCountFormatter(
             '%(asctime)s | %(levelname)-8s | %(name)-20s | %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         console.setFormatter(console_format)
-        self.logger.addHandler(console)
         
         # File Handler (detailed for debugging)
         file_handler = RotatingFileHandler(
@@ -152,12 +211,11 @@ class ArbitrageBot:
             encoding='utf-8'
         )
         file_handler.setLevel(logging.DEBUG)
-        file_format = logging.Formatter(
+        file_format = SuppressedCountFormatter(
             '%(asctime)s.%(msecs)03d | %(levelname)-8s | %(name)-20s | %(filename)s:%(lineno)d | %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         file_handler.setFormatter(file_format)
-        self.logger.addHandler(file_handler)
         
         # Error Handler (separate error log)
         error_handler = TimedRotatingFileHandler(
@@ -168,7 +226,6 @@ class ArbitrageBot:
         )
         error_handler.setLevel(logging.ERROR)
         error_handler.setFormatter(file_format)
-        self.logger.addHandler(error_handler)
         
         # Performance Metrics Handler
         metrics_handler = RotatingFileHandler(
@@ -179,12 +236,32 @@ class ArbitrageBot:
         metrics_handler.setLevel(logging.INFO)
         metrics_format = logging.Formatter('%(asctime)s | %(message)s')
         metrics_handler.setFormatter(metrics_format)
+        metrics_handler.addFilter(logging.Filter('Metrics'))
+        
+        # Structured events (JSON lines) from both loggers, for log search and replay tooling
+        events_handler = RotatingFileHandler(
+            'logs/events.jsonl',
+            maxBytes=10*1024*1024,
+            backupCount=5,
+            encoding='utf-8'
+        )
+        events_handler.setLevel(logging.INFO)
+        events_handler.setFormatter(JsonLinesFormatter())
+        
+        bot_only = logging.Filter('ArbitrageBot')
+        for handler in (console, file_handler, error_handler):
+            handler.addFilter(bot_only)
         
+        # One writer thread owns every handler; per-tick lines logged with extra=SAMPLE are rate-limited
+        self.log_pipeline = start_pipeline(
+            [console, file_handler, error_handler, metrics_handler, events_handler]
+        )
+        self.logger = logging.getLogger('ArbitrageBot')
+        self.log_pipeline.attach(self.logger, logging.INFO)
         self.metrics_logger = logging.getLogger('Metrics')
-        self.metrics_logger.addHandler(metrics_handler)
-        self.metrics_logger.setLevel(logging.INFO)
+        self.log_pipeline.attach(self.metrics_logger, logging.INFO)
         
-        self.logger.info(f"✅ Enterprise logging initialized for system: {self.system_id}")
+        self.logger.info("✅ Enterprise logging initialized for system: %s", self.system_id)
     
     def load_configuration(self) -> Dict:
         """Load and validate configuration file"""
@@ -198,18 +275,36 @@ class ArbitrageBot:
             "exchanges": {
                 "enabled": ["kraken", "binance", "coinbase"],
                 "timeout_seconds": 30,
-                "retry_attempts": 3
+                "retry_attempts": 3,
+                "endpoints": {},  # name -> {"rest": ..., "ws": ...}, e.g. the local exchange_simulator.py
+                "stream_connections": 2,  # racing WebSocket connections per venue, first copy of each update wins
+                "stream_recycle_seconds": 60,  # how often the laggiest connection is considered for reconnect
+                "feed_processes": False,  # WebSocket feed: parse each venue in its own process, read via shared memory
+                "account_streams": True,  # balances/orders from private WebSocket streams instead of per-cycle REST
+                "balance_reconcile_seconds": 300,  # REST fetch_balance cross-check of the streamed balances
+                "rest_scheduler": True,  # priority token buckets per venue instead of ccxt's FIFO enableRateLimit
+                "rest_rate_limits": {}  # name -> {"rate": units/s, "burst": units}, overrides rate_limiter.VENUE_RULES
             },
             "trading": {
                 "max_concurrent_trades": 2,
                 "cooldown_after_loss_seconds": 60,
                 "position_sizing_mode": "dynamic",  # dynamic, fixed, aggressive
-                "risk_per_trade_percent": 1.0
+                "risk_per_trade_percent": 1.0,
+                "event_driven_scan": True,  # scan on top-of-book changes when the feed supports it
+                "triangular_min_profit_pct": 0.1  # report currency-graph cycles above this net profit
             },
             "monitoring": {
                 "health_check_interval": 300,
                 "metrics_report_interval": 60,
-                "alert_on_api_error_rate": 0.3
+                "alert_on_api_error_rate": 0.3,
+                "state_snapshot_path": "logs/state_snapshot.bin",  # memory-mapped state read by dashboard.py
+                "state_snapshot_interval": 1.0,
+                "log_sample_interval": 5.0  # seconds between two lines of the same per-tick log call
+            },
+            "capture": {
+                "enabled": False,  # record raw market data messages for replay
+                "directory": "captures",
+                "compress": True
             }
         }
         
@@ -251,16 +346,20 @@ class ArbitrageBot:
             'min_stable_per_exchange': 1500.0,
             'min_bnb_for_binance': 0.1,
             'max_position_size': 5000.0,
+            'exchange_position_limits': {},  # Optional max $ notional per leg, e.g. {'coinbase': 2000.0}
             'min_profit_threshold': 0.50,  # Minimum $ profit per trade
             'slippage_tolerance_percent': 0.1,
-            'max_trades_per_hour': 20
+            'max_trades_per_hour': 20,
+            'context_multipliers': dict(DEFAULT_CONTEXT_MULTIPLIERS)
         }
         
         # Apply any config overrides
         if 'trading' in self.config:
-            for key in ['position_size', 'min_profit_threshold', 'slippage_tolerance_percent']:
+            for key in ['position_size', 'min_profit_threshold', 'slippage_tolerance_percent', 'exchange_position_limits']:
                 if key in self.config['trading']:
                     settings[key] = self.config['trading'][key]
+            for regime, multipliers in self.config['trading'].get('context_multipliers', {}).items():
+                settings['context_multipliers'][regime] = tuple(multipliers)
         
         return settings
     
@@ -318,7 +417,7 @@ class ArbitrageBot:
         
         # Phase 5: Optional Components
         try:
-            self.data_hub = DataHub()
+            self.data_hub = DataHub(endpoints=self.config['exchanges'].get('endpoints'))
             self.use_data_hub = self.config.get('data', {}).get('use_data_hub', False)
             if self.use_data_hub:
                 self.logger.info("✅ DataHub initialized (standby mode)")
@@ -364,6 +463,7 @@ class ArbitrageBot:
         
         enabled_exchanges = self.config['exchanges']['enabled']
         timeout = self.config['exchanges']['timeout_seconds']
+        endpoint_overrides = self.config['exchanges'].get('endpoints', {})
         
         for name in enabled_exchanges:
             if name not in exchange_configs:
@@ -381,6 +481,10 @@ class ArbitrageBot:
                     exchange_class = getattr(ccxt, name)
                     exchange = exchange_class(config)
                 
+                if name in endpoint_overrides:
+                    apply_endpoint_override(exchange, endpoint_overrides[name])
+                    self.logger.info(f"🔀 {name.upper()} endpoints overridden: {endpoint_overrides[name].get('rest')}")
+                
                 # Test connection
                 exchange.load_markets()
                 
@@ -413,10 +517,11 @@ class ArbitrageBot:
     def measure_exchange_latency(self) -> float:
         """Measure network latency to exchanges with multiple samples"""
         latencies = []
+        overrides = self.config['exchanges'].get('endpoints', {})
         endpoints = [
-            ('Kraken', 'https://api.kraken.com/0/public/Time'),
-            ('Binance', 'https://api.binance.com/api/v3/time'),
-            ('Coinbase', 'https://api.coinbase.com/v2/time')
+            ('Kraken', overrides.get('kraken', {}).get('rest', 'https://api.kraken.com') + '/0/public/Time'),
+            ('Binance', overrides.get('binance', {}).get('rest', 'https://api.binance.com') + '/api/v3/time'),
+            ('Coinbase', overrides.get('coinbase', {}).get('rest', 'https://api.coinbase.com') + '/v2/time')
         ]
         
         for name, endpoint in endpoints:
@@ -505,15 +610,70 @@ class ArbitrageBot:
         """Main trading loop with comprehensive error handling and monitoring"""
         self.logger.info("🏁 Starting main trading loop...")
         
+        # Async REST clients: balances, orders and health pings never block the loop
+        endpoint_overrides = self.config['exchanges'].get('endpoints', {})
+        # Orders go ahead of status polls, balances, tickers and health pings on each venue's budget
+        self.rest_scheduler = None
+        if self.config['exchanges'].get('rest_scheduler', True):
+            self.rest_scheduler = RateLimitScheduler(self.config['exchanges'].get('rest_rate_limits'))
+        self.async_exchanges = AsyncExchangeManager(self.exchanges, endpoint_overrides, self.rest_scheduler)
+        await self.async_exchanges.start()
+        
+        # Private account streams: balances and order state without per-cycle REST fetches
+        self.account_streams = None
+        if self.config['exchanges'].get('account_streams', True):
+            self.account_streams = AccountStreamManager(
+                self.async_exchanges.clients,
+                reconcile_interval=self.config['exchanges'].get('balance_reconcile_seconds', 300)
+            )
+            # The executor's reservation ledger reconciles against every streamed balance change
+            self.account_streams.balance_listeners.append(self.order_executor.portfolio_state.sync_balances)
+            await self.account_streams.start()
+        
+        # Order lifecycle: fills from the execution reports, batched REST polling when they are quiet
+        order_tracker = self.order_executor.order_tracker
+        order_tracker.trade_listeners.append(self.on_trade_settled)
+        if self.account_streams:
+            self.account_streams.order_listeners.append(order_tracker.on_order_update)
+        order_tracker.start(self.async_exchanges.clients)
+        
         # Initialize data feed
         try:
-            self.data_feed = self.data_feed_class(self.exchanges)
+            self.data_feed = self.data_feed_class(self.async_exchanges.clients)
+            self.data_feed.recorder = self.create_market_recorder()
+            if hasattr(self.data_feed, 'endpoints'):
+                self.data_feed.endpoints = endpoint_overrides
+            if hasattr(self.data_feed, 'stream_connections'):
+                self.data_feed.stream_connections = self.config['exchanges'].get('stream_connections', 2)
+                self.data_feed.stream_recycle_seconds = self.config['exchanges'].get('stream_recycle_seconds', 60)
+            if hasattr(self.data_feed, 'feed_processes'):
+                self.data_feed.feed_processes = self.config['exchanges'].get('feed_processes', False)
             await self.data_feed.start()
             self.logger.info(f"✅ Data feed started: {self.data_feed_class.__name__}")
         except Exception as e:
             self.logger.critical(f"❌ Failed to start data feed: {e}")
             return
         
+        self.attach_data_feed(self.data_feed)
+        self.order_executor.order_chaser.warm_templates(
+            self.async_exchanges.clients,
+            ['BTC/USDT', 'BTC/USDC', 'BTC/USD']
+        )
+        
+        # Reactive scanning: the feed drives arbitrage decisions, the loop keeps housekeeping
+        self.event_driven = (
+            self.config['trading'].get('event_driven_scan', True)
+            and hasattr(self.data_feed, 'subscribe_top_of_book')
+        )
+        if self.event_driven:
+            self.data_feed.subscribe_top_of_book(self.on_top_of_book_change)
+            self.logger.info("⚡ Event-driven arbitrage scan enabled (top-of-book triggers)")
+        
+        # Dashboard state: published locally so the dashboard never calls the exchanges itself
+        self.snapshot_writer = self.create_snapshot_writer()
+        if self.snapshot_writer:
+            self.snapshot_task = asyncio.create_task(self.publish_state_snapshots())
+        
         # Main trading loop
         cycle_count = 0
         last_metrics_report = time.time()
@@ -527,7 +687,7 @@ class ArbitrageBot:
                 
                 try:
                     # ==================== CYCLE START ====================
-                    self.logger.debug(f"\n🔄 Cycle #{cycle_count} | Mode: {self.bot_mode}")
+                    self.logger.debug("\n🔄 Cycle #%d | Mode: %s", cycle_count, self.bot_mode)
                     
                     # Update heartbeat
                     self.last_heartbeat = time.time()
@@ -552,15 +712,17 @@ class ArbitrageBot:
                         await self.manage_inventory(exchange_wrappers, price_data, market_context)
                     
                     # ==================== ARBITRAGE SEARCH ====================
-                    opportunities = self.find_arbitrage_opportunities(
-                        price_data, 
-                        ['BTC/USDT', 'BTC/USDC'],
-                        market_context
-                    )
-                    
-                    # ==================== TRADE EXECUTION ====================
-                    if opportunities and not self.is_shutting_down:
-                        await self.execute_opportunities(opportunities, market_context)
+                    # In event-driven mode the scan runs from on_top_of_book_change instead
+                    if not self.event_driven:
+                        self.report_cycles(self.currency_graph.update_from_table(self.data_feed.book_table))
+                        opportunities = self.find_arbitrage_opportunities(
+                            self.scan_symbols,
+                            market_context
+                        )
+                        
+                        # ==================== TRADE EXECUTION ====================
+                        if opportunities and not self.is_shutting_down:
+                            await self.execute_opportunities(opportunities, market_context)
                     
                     # ==================== SYSTEM MAINTENANCE ====================
                     current_time = time.time()
@@ -603,6 +765,27 @@ class ArbitrageBot:
             # ==================== GRACEFUL SHUTDOWN ====================
             await self.shutdown_system()
     
+    def attach_data_feed(self, data_feed):
+        """Wire the decision path (scanner, graph, executor pricing) to a started data feed"""
+        self.data_feed = data_feed
+        
+        # Orders, rebalances and valuations read the feed's shared top-of-book table
+        self.order_executor.attach_price_feed(data_feed)
+        if self.rebalance_monitor:
+            self.rebalance_monitor.attach_book_table(data_feed.book_table)
+        self.spread_scanner = SpreadScanner(
+            data_feed.book_table,
+            fee_lookup=lambda name: self.fee_manager.get_current_taker_fee(name)['effective_fee_rate'],
+            size_limits=self.settings['exchange_position_limits']
+        )
+        self.currency_graph = CurrencyGraph(
+            fee_lookup=self.spread_scanner.fee_rate,
+            min_profit_pct=self.config['trading'].get('triangular_min_profit_pct', 0.1)
+        )
+        
+        self.scan_symbols = ['BTC/USDT', 'BTC/USDC']
+        self.execution_task = None
+    
     async def analyze_market_context(self, price_data) -> Optional[MarketContext]:
         """Analyze market context using auction theory and microstructure"""
         try:
@@ -618,10 +801,10 @@ class ArbitrageBot:
                 context_dict = context.to_dict()
                 if context.auction_state != AuctionState.BALANCED:
                     self.logger.info(
-                        f"🧠 Market: {context_dict['auction']} | "
-                        f"Score: {context_dict['auction_score']:.3f} | "
-                        f"Confidence: {context_dict['confidence']:.1f} | "
-                        f"Crowd: {context_dict['crowd']}"
+                        "🧠 Market: %s | Score: %.3f | Confidence: %.1f | Crowd: %s",
+                        context_dict['auction'], context_dict['auction_score'],
+                        context_dict['confidence'], context_dict['crowd'],
+                        extra=SAMPLE
                     )
                 
                 return context
@@ -633,137 +816,46 @@ class ArbitrageBot:
             return None
     
     async def get_exchange_wrappers(self):
-        """Get exchange wrappers with comprehensive error handling and debug logging"""
+        """Per-exchange balance views, from the account streams' store when they run"""
         exchange_wrappers = {}
         
-        for exch_name, exchange in self.exchanges.items():
-            try:
-                self.logger.info(f"🔄 Fetching balance for {exch_name.upper()}...")
-                
-                # 1. FETCH BALANCE
-                raw_balance_data = exchange.fetch_balance()
-                self.logger.debug(f"📦 Raw balance data type for {exch_name}: {type(raw_balance_data)}")
-                
-                # 2. SAFE EXTRACTION OF BALANCE DICTIONARIES
-                free_balances = {}
-                total_balances = {}
-                
-                # Handle the raw balance data structure
-                if isinstance(raw_balance_data, dict):
-                    # Log all top-level keys for debugging
-                    self.logger.debug(f"   Top-level keys: {list(raw_balance_data.keys())}")
-                    
-                    # Extract 'free' and 'total' - PRIMARY FIX IS HERE
-                    # Some exchanges return these as dicts, others differently
-                    free_field = raw_balance_data.get('free')
-                    total_field = raw_balance_data.get('total')
-                    
-                    self.logger.debug(f"   'free' field type: {type(free_field)}")
-                    self.logger.debug(f"   'total' field type: {type(total_field)}")
-                    
-                    # CASE 1: Both are dictionaries (standard CCXT structure)
-                    if isinstance(free_field, dict) and isinstance(total_field, dict):
-                        free_balances = free_field
-                        total_balances = total_field
-                    
-                    # CASE 2: 'info' contains the actual data (some exchanges)
-                    elif 'info' in raw_balance_data and isinstance(raw_balance_data['info'], dict):
-                        info_data = raw_balance_data['info']
-                        self.logger.debug(f"   Using 'info' field, keys: {list(info_data.keys())[:5]}...")
-                        
-                        # Try to find balance data in info
-                        for key, value in info_data.items():
-                            if isinstance(value, (int, float, str)):
-                                try:
-                                    num_val = float(value)
-                                    if num_val > 0:
-                                        free_balances[key.upper()] = num_val
-                                        total_balances[key.upper()] = num_val
-                                except:
-                                    pass
-                    
-                    # CASE 3: Raw data is already the balance dict
-                    else:
-                        # Check if raw data has currency-like keys
-                        currency_keys = [k for k in raw_balance_data.keys() if isinstance(k, str) and len(k) <= 6]
-                        if currency_keys:
-                            for key in currency_keys:
-                                val = raw_balance_data[key]
-                                if isinstance(val, (int, float)):
-                                    free_balances[key.upper()] = float(val)
-                                    total_balances[key.upper()] = float(val)
-                
-                # 3. CREATE THE WRAPPER CLASS WITH SAFE ACCESS
-                class ExchangeWrapper:
-                    def __init__(self, name, exchange_obj, free_bal, total_bal):
-                        self.name = name
-                        self.exchange = exchange_obj
-                        self.balances = {}
-                        self.free_balances = {}
-                        
-                        # Track currencies we care about
-                        target_currencies = ['BTC', 'USDT', 'USDC', 'USD', 'BNB', 'PAXG']
-                        
-                        for currency in target_currencies:
-                            # Safe extraction from free_balances
-                            free_val = 0.0
-                            if isinstance(free_bal, dict):
-                                # Try exact match
-                                if currency in free_bal:
-                                    free_val = free_bal[currency]
-                                # Try case-insensitive match
-                                else:
-                                    for k, v in free_bal.items():
-                                        if isinstance(k, str) and k.upper() == currency:
-                                            free_val = v
-                                            break
-                            
-                            # Safe extraction from total_balances  
-                            total_val = 0.0
-                            if isinstance(total_bal, dict):
-                                if currency in total_bal:
-                                    total_val = total_bal[currency]
-                                else:
-                                    for k, v in total_bal.items():
-                                        if isinstance(k, str) and k.upper() == currency:
-                                            total_val = v
-                                            break
-                            
-                            # Only store if we have some balance
-                            if free_val > 0 or total_val > 0:
-                                self.free_balances[currency] = free_val
-                                self.balances[currency] = total_val
-                        
-                        # Calculate total value in USD
-                        btc_price_est = 90000  # Conservative estimate
-                        self.total_value = (
-                            self.balances.get('BTC', 0) * btc_price_est +
-                            self.balances.get('USDT', 0) +
-                            self.balances.get('USDC', 0) +
-                            self.balances.get('USD', 0)
-                        )
-                
-                # 4. CREATE AND STORE THE WRAPPER
-                wrapper = ExchangeWrapper(exch_name, exchange, free_balances, total_balances)
-                exchange_wrappers[exch_name] = wrapper
-                
-                # 5. LOG SUCCESS
-                btc_display = wrapper.free_balances.get('BTC', 0)
-                usdt_display = wrapper.free_balances.get('USDT', 0)
-                
-                self.logger.info(f"✅ {exch_name.upper()} Balance: "
-                               f"BTC={btc_display:.6f}, "
-                               f"USDT=${usdt_display:.2f}, "
-                               f"Total≈${wrapper.total_value:.2f}")
-                
-            except ccxt.NetworkError as e:
-                self.logger.warning(f"⚠️  Network error fetching {exch_name} balance: {e}")
-            except ccxt.ExchangeError as e:
-                self.logger.warning(f"⚠️  Exchange error fetching {exch_name} balance: {e}")
-            except Exception as e:
-                self.logger.error(f"❌ Unexpected error fetching {exch_name} balance: {e}")
-                import traceback
-                self.logger.error(f"Traceback: {traceback.format_exc()}")
+        if self.account_streams:
+            # Kept current by private WebSocket streams, reconciled over REST in the background
+            balances = {
+                name: (account.free, account.total)
+                for name, account in self.account_streams.accounts.items()
+                if account.reconciled_at
+            }
+        else:
+            # Fetch every venue's balance concurrently on the shared async session
+            balances = {}
+            raw_balances = await self.async_exchanges.fetch_balances()
+            for exch_name, raw_balance_data in raw_balances.items():
+                if isinstance(raw_balance_data, ccxt.NetworkError):
+                    self.logger.warning(f"⚠️  Network error fetching {exch_name} balance: {raw_balance_data}")
+                elif isinstance(raw_balance_data, ccxt.ExchangeError):
+                    self.logger.warning(f"⚠️  Exchange error fetching {exch_name} balance: {raw_balance_data}")
+                elif isinstance(raw_balance_data, Exception):
+                    self.logger.error(f"❌ Unexpected error fetching {exch_name} balance: {raw_balance_data}")
+                else:
+                    balances[exch_name] = parse_balance(raw_balance_data)
+                    self.order_executor.portfolio_state.sync_balances(exch_name, balances[exch_name][0])
+        
+        for exch_name, (free_balances, total_balances) in balances.items():
+            wrapper = ExchangeWrapper(exch_name, self.async_exchanges.clients.get(exch_name), free_balances, total_balances)
+            exchange_wrappers[exch_name] = wrapper
+            self.latest_balances[exch_name] = {
+                'free': dict(wrapper.free_balances),
+                'total': dict(wrapper.balances),
+                'updated_at': time.time()
+            }
+            
+            self.logger.info(
+                "✅ %s Balance: BTC=%.6f, USDT=$%.2f, Total≈$%.2f",
+                exch_name.upper(), wrapper.free_balances.get('BTC', 0),
+                wrapper.free_balances.get('USDT', 0), wrapper.total_value,
+                extra=SAMPLE
+            )
         
         return exchange_wrappers
     
@@ -796,7 +888,7 @@ class ArbitrageBot:
                 if market_context and market_context.execution_confidence > 0.5:
                     success = await self.order_executor.execute_inventory_rebalance(
                         exchange_wrappers,
-                        self.exchanges,
+                        self.async_exchanges.clients,
                         price_data,
                         self.settings,
                         inventory_problem,
@@ -880,11 +972,8 @@ class ArbitrageBot:
         
         return None
     
-    def find_arbitrage_opportunities(self, price_data, symbols, market_context):
-        """Find arbitrage opportunities with market context awareness"""
-        opportunities = []
-        
-        # ==================== PARAMETER CALCULATION ====================
+    def get_trading_params(self, market_context) -> Dict:
+        """Derive the spread threshold and position size from mode and market context"""
         # Base parameters
         if self.bot_mode == 'HIGH_LATENCY':
             base_spread_pct = 0.3  # 0.3%
@@ -897,26 +986,24 @@ class ArbitrageBot:
         spread_multiplier = 1.0
         position_multiplier = 1.0
         confidence = 0.5
+        multipliers = self.settings['context_multipliers']
         
         if market_context:
             confidence = market_context.execution_confidence
             
             if market_context.auction_state == AuctionState.ACCEPTING and confidence > 0.7:
-                # Accepting market: be more aggressive
-                spread_multiplier = 0.7  # Lower threshold
-                position_multiplier = 1.3  # Larger position
+                # Accepting market: be more aggressive (lower threshold, larger position)
+                spread_multiplier, position_multiplier = multipliers['accepting']
                 self.logger.debug("   🟢 Market: ACCEPTING - Aggressive mode")
-                
+            
             elif market_context.auction_state == AuctionState.REJECTING or confidence < 0.4:
-                # Rejecting market: be more conservative
-                spread_multiplier = 1.5  # Higher threshold
-                position_multiplier = 0.7  # Smaller position
+                # Rejecting market: be more conservative (higher threshold, smaller position)
+                spread_multiplier, position_multiplier = multipliers['rejecting']
                 self.logger.debug("   🔴 Market: REJECTING - Conservative mode")
-                
+            
             elif market_context.auction_state in [AuctionState.IMBALANCED_BUYING, AuctionState.IMBALANCED_SELLING]:
                 # Imbalanced: cautious
-                spread_multiplier = 1.2
-                position_multiplier = 0.9
+                spread_multiplier, position_multiplier = multipliers['imbalanced']
                 self.logger.debug("   🟡 Market: IMBALANCED - Cautious mode")
         
         # Apply adjustments with limits
@@ -926,96 +1013,252 @@ class ArbitrageBot:
             max(self.settings['min_order_value'], base_position * position_multiplier)
         )
         
-        self.logger.debug(f"   📊 Trading params: Spread={min_spread_pct:.2f}%, Size=${position_size:.0f}, Confidence={confidence:.2f}")
+        return {
+            'min_spread_pct': min_spread_pct,
+            'position_size': position_size,
+            'confidence': confidence,
+            'auction_state': market_context.auction_state.value if market_context else 'UNKNOWN'
+        }
+    
+    def evaluate_pair(self, symbol, buy_exchange_name, buy_price, sell_exchange_name, sell_price, params):
+        """Evaluate one directed (buy at ask, sell at bid) exchange pair; returns an opportunity or None"""
+        # Must be different exchanges
+        if buy_exchange_name == sell_exchange_name:
+            return None
+        
+        # Must have positive spread
+        if not buy_price or not sell_price or sell_price <= buy_price:
+            return None
+        
+        spread = sell_price - buy_price
+        spread_pct = (spread / buy_price) * 100
+        
+        # Check against dynamic threshold
+        if spread_pct <= params['min_spread_pct']:
+            return None
+        
+        # Same per-exchange size limits and taker fees as the vectorized scan
+        scanner = self.spread_scanner
+        position_size = min(
+            params['position_size'],
+            scanner.size_limit(buy_exchange_name),
+            scanner.size_limit(sell_exchange_name)
+        )
+        amount = position_size / buy_price
+        
+        # Check minimum trade amount
+        if amount < self.settings['min_trade_amount']:
+            return None
         
-        # ==================== OPPORTUNITY SEARCH ====================
-        for symbol in symbols:
-            if symbol not in price_data or not price_data[symbol]:
-                continue
-            
-            symbol_data = price_data[symbol]
-            
-            # Get all exchanges with valid prices
-            exchanges_with_prices = [
-                (name, data) for name, data in symbol_data.items()
-                if data.get('ask') and data.get('bid')
-            ]
-            
-            if len(exchanges_with_prices) < 2:
-                continue
+        # Calculate estimated profit
+        estimated_profit = spread * amount
+        estimated_fees = position_size * (
+            scanner.fee_rate(buy_exchange_name) + scanner.fee_rate(sell_exchange_name)
+        )
+        net_profit = estimated_profit - estimated_fees
+        
+        # Check minimum profit threshold
+        if net_profit < self.settings['min_profit_threshold']:
+            return None
+        
+        return self.size_to_depth({
+            'symbol': symbol,
+            'buy_exchange': buy_exchange_name,
+            'sell_exchange': sell_exchange_name,
+            'buy_price': buy_price,
+            'sell_price': sell_price,
+            'spread': spread,
+            'spread_percentage': spread_pct,
+            'amount': amount,
+            'estimated_profit': estimated_profit,
+            'estimated_fees': estimated_fees,
+            'net_profit': net_profit,
+            'market_confidence': params['confidence'],
+            'auction_state': params['auction_state'],
+            'timestamp': time.time()
+        })
+    
+    def size_to_depth(self, opportunity):
+        """Resize a top-of-book candidate to the liquidity both books show; None when it no longer pays"""
+        symbol = opportunity['symbol']
+        buy_exchange_name = opportunity['buy_exchange']
+        sell_exchange_name = opportunity['sell_exchange']
+        
+        # Shrink to what the reservation ledger can fund, or drop it, before any network call
+        funded = self.order_executor.fundable_amount(opportunity)
+        if funded is not None and funded < opportunity['amount']:
+            scale = funded / opportunity['amount']
+            opportunity['amount'] = funded
+            for key in ('estimated_profit', 'estimated_fees', 'net_profit'):
+                opportunity[key] *= scale
+            if (
+                funded < self.settings['min_trade_amount']
+                or opportunity['net_profit'] < self.settings['min_profit_threshold']
+            ):
+                return None
+        
+        # Depth levels are only stored by feeds that stream books (not REST polling)
+        symbol_data = self.data_feed.price_data.get(symbol, {})
+        asks = symbol_data.get(buy_exchange_name, {}).get('asks')
+        bids = symbol_data.get(sell_exchange_name, {}).get('bids')
+        
+        if asks and bids:
+            buy_fee = self.spread_scanner.fee_rate(buy_exchange_name)
+            sell_fee = self.spread_scanner.fee_rate(sell_exchange_name)
+            # The top-of-book notional is an upper bound; the sweep can only shrink it
+            max_notional = opportunity['amount'] * opportunity['buy_price']
+            fill = sweep_books(asks, bids, buy_fee, sell_fee, max_notional=max_notional)
+            if fill is not None:
+                # The buy leg reserves at the deepest ask swept, not the top: resweep to what that funds
+                funded = self.order_executor.fundable_amount({**opportunity, 'buy_worst_price': fill.buy_worst_price})
+                if funded is not None and funded < fill.amount:
+                    fill = sweep_books(asks, bids, buy_fee, sell_fee, max_notional=max_notional, max_amount=funded)
+            if (
+                fill is None
+                or fill.amount < self.settings['min_trade_amount']
+                or fill.net_profit < self.settings['min_profit_threshold']
+            ):
+                return None
             
-            # Check ALL possible cross-exchange pairs
-            for buy_exchange_name, buy_data in exchanges_with_prices:
-                for sell_exchange_name, sell_data in exchanges_with_prices:
-                    # Must be different exchanges
-                    if buy_exchange_name == sell_exchange_name:
-                        continue
-                    
-                    buy_price = buy_data['ask']
-                    sell_price = sell_data['bid']
-                    
-                    # Must have positive spread
-                    if sell_price <= buy_price:
-                        continue
-                    
-                    spread = sell_price - buy_price
-                    spread_pct = (spread / buy_price) * 100
-                    
-                    # Check against dynamic threshold
-                    if spread_pct > min_spread_pct:
-                        amount = position_size / buy_price
-                        
-                        # Check minimum trade amount
-                        if amount >= self.settings['min_trade_amount']:
-                            # Calculate estimated profit
-                            estimated_profit = spread * amount
-                            estimated_fees = amount * buy_price * 0.001 * 2  # Rough fee estimate
-                            net_profit = estimated_profit - estimated_fees
-                            
-                            # Check minimum profit threshold
-                            if net_profit >= self.settings['min_profit_threshold']:
-                                opportunity = {
-                                    'symbol': symbol,
-                                    'buy_exchange': buy_exchange_name,
-                                    'sell_exchange': sell_exchange_name,
-                                    'buy_price': buy_price,
-                                    'sell_price': sell_price,
-                                    'spread': spread,
-                                    'spread_percentage': spread_pct,
-                                    'amount': amount,
-                                    'estimated_profit': estimated_profit,
-                                    'estimated_fees': estimated_fees,
-                                    'net_profit': net_profit,
-                                    'market_confidence': confidence,
-                                    'auction_state': market_context.auction_state.value if market_context else 'UNKNOWN',
-                                    'timestamp': time.time()
-                                }
-                                
-                                opportunities.append(opportunity)
-                                
-                                self.logger.info(
-                                    f"🔍 Opportunity: Buy {symbol} on {buy_exchange_name} at ${buy_price:.2f}, "
-                                    f"sell on {sell_exchange_name} at ${sell_price:.2f} | "
-                                    f"Spread: ${spread:.2f} ({spread_pct:.2f}%) | "
-                                    f"Profit: ${net_profit:.2f} net"
-                                )
-        
-        # Sort by confidence-adjusted profit
+            opportunity.update({
+                'amount': fill.amount,
+                'estimated_profit': fill.gross_profit,
+                'estimated_fees': fill.fees,
+                'net_profit': fill.net_profit,
+                'buy_vwap': fill.buy_vwap,
+                'sell_vwap': fill.sell_vwap,
+                'buy_worst_price': fill.buy_worst_price,    # leg limit prices: each leg fills the whole sweep
+                'sell_worst_price': fill.sell_worst_price,
+                'depth_levels': fill.levels_used
+            })
+        
+        self.logger.info(
+            "🔍 Opportunity: Buy %s on %s at $%.2f, sell on %s at $%.2f | "
+            "Spread: $%.2f (%.2f%%) | Size: %.6f | Profit: $%.2f net",
+            symbol, buy_exchange_name, opportunity['buy_price'],
+            sell_exchange_name, opportunity['sell_price'],
+            opportunity['spread'], opportunity['spread_percentage'],
+            opportunity['amount'], opportunity['net_profit'],
+            extra=SAMPLE
+        )
+        return opportunity
+    
+    def rank_opportunities(self, opportunities):
+        """Sort by confidence-adjusted profit and cap to the concurrent trade limit"""
+        opportunities.sort(
+            key=lambda x: x['net_profit'] * (1 + x['market_confidence']),
+            reverse=True
+        )
+        
+        # Limit number of opportunities per cycle
+        max_opportunities = self.config['trading'].get('max_concurrent_trades', 2)
+        return opportunities[:max_opportunities]
+    
+    def find_arbitrage_opportunities(self, symbols, market_context):
+        """Find arbitrage opportunities with market context awareness"""
+        
+        # ==================== PARAMETER CALCULATION ====================
+        params = self.get_trading_params(market_context)
+        
+        self.logger.debug(
+            "   📊 Trading params: Spread=%.2f%%, Size=$%.0f, Confidence=%.2f",
+            params['min_spread_pct'], params['position_size'], params['confidence']
+        )
+        
+        # ==================== OPPORTUNITY SEARCH ====================
+        # One vectorized pass over every symbol and exchange pair; only the top-k become dicts.
+        # Extra candidates are kept because depth sizing can shrink or drop any of them.
+        candidates = self.spread_scanner.scan(
+            symbols,
+            params,
+            min_trade_amount=self.settings['min_trade_amount'],
+            min_profit=self.settings['min_profit_threshold'],
+            top_k=self.config['trading'].get('max_concurrent_trades', 2) * 4
+        )
+        opportunities = [
+            opportunity for opportunity in map(self.size_to_depth, candidates)
+            if opportunity
+        ]
+        
         if opportunities:
-            opportunities.sort(
-                key=lambda x: x['net_profit'] * (1 + x['market_confidence']),
-                reverse=True
-            )
-            
-            # Limit number of opportunities per cycle
-            max_opportunities = self.config['trading'].get('max_concurrent_trades', 2)
-            opportunities = opportunities[:max_opportunities]
+            opportunities = self.rank_opportunities(opportunities)
         
         return opportunities
     
+    def on_top_of_book_change(self, symbol: str, exchange: str, received_ns: int):
+        """Re-evaluate only the cross-exchange pairs touched by a best bid/ask change"""
+        if self.is_shutting_down:
+            return
+        
+        decision = self.evaluate_tick(symbol, exchange)
+        if decision is None:
+            return
+        opportunities, market_context = decision
+        
+        # Tick-to-decision latency: from the feed receiving the update to the scan verdict
+        latency_us = (time.perf_counter_ns() - received_ns) / 1000
+        if self.health_monitor:
+            self.health_monitor.record_decision_latency(latency_us)
+        
+        if not opportunities:
+            return
+        
+        for opportunity in opportunities:
+            opportunity['tick_to_decision_us'] = latency_us
+        
+        # Only one execution in flight; ticks arriving meanwhile are re-evaluated afresh
+        if self.execution_task is None or self.execution_task.done():
+            self.execution_task = asyncio.create_task(
+                self.execute_opportunities(self.rank_opportunities(opportunities), market_context)
+            )
+    
+    def evaluate_tick(self, symbol: str, exchange: str):
+        """Decision for one top-of-book change: (opportunities, market_context), or None if not scanned"""
+        book_table = self.data_feed.book_table
+        updated = book_table.get(symbol, exchange)
+        
+        # Multi-leg cycles: the graph re-relaxes only the edges of this market
+        if updated:
+            self.report_cycles(self.currency_graph.update_quote(symbol, exchange, *updated))
+        else:
+            self.report_cycles(self.currency_graph.invalidate(symbol, exchange))
+        
+        if not updated or symbol not in self.scan_symbols:
+            return None
+        updated_bid, updated_ask = updated
+        
+        market_context = self.data_feed.market_contexts.get('BTC/USDT')
+        params = self.get_trading_params(market_context)
+        bid_col, ask_col = book_table.bid, book_table.ask
+        
+        opportunities = []
+        for other_name, slot in book_table.symbol_slots.get(symbol, ()):
+            other_bid, other_ask = bid_col[slot], ask_col[slot]
+            if other_name == exchange or other_bid <= 0 or other_ask <= 0:
+                continue
+            for opportunity in (
+                self.evaluate_pair(symbol, exchange, updated_ask, other_name, other_bid, params),
+                self.evaluate_pair(symbol, other_name, other_ask, exchange, updated_bid, params)
+            ):
+                if opportunity:
+                    opportunities.append(opportunity)
+        
+        return opportunities, market_context
+    
+    def report_cycles(self, cycles):
+        """Log profitable multi-leg currency cycles found by the graph engine"""
+        for cycle in cycles:
+            # Two-leg cross-exchange spreads are already handled by the spread scan
+            if cycle.kind != 'triangular':
+                continue
+            self.system_metrics.triangular_cycles_detected += 1
+            self.logger.info("🔺 Triangular cycle %s", cycle, extra=SAMPLE)
+    
     async def execute_opportunities(self, opportunities, market_context):
         """Execute arbitrage opportunities with comprehensive monitoring"""
         executed_trades = 0
+        self.recent_opportunities.extend(opportunities)
+        del self.recent_opportunities[:-20]
         
         for opportunity in opportunities:
             if self.is_shutting_down:
@@ -1032,37 +1275,24 @@ class ArbitrageBot:
                 # Execute the arbitrage
                 success = await self.order_executor.execute_arbitrage(
                     opportunity,
-                    self.exchanges
+                    self.async_exchanges.clients
                 )
                 
                 if success:
+                    # Both legs are working; P&L is booked from the fills by on_trade_settled
                     executed_trades += 1
                     self.system_metrics.total_trades += 1
-                    self.system_metrics.total_profit += opportunity['net_profit']
-                    
-                    # Update win rate
-                    wins = self.system_metrics.total_trades * self.system_metrics.win_rate
-                    self.system_metrics.win_rate = (wins + 1) / self.system_metrics.total_trades
-                    
                     self.logger.info(
-                        f"✅ Trade executed successfully! "
-                        f"Profit: ${opportunity['net_profit']:.2f} | "
-                        f"Win Rate: {self.system_metrics.win_rate:.1%}"
+                        f"✅ Trade #{opportunity.get('trade_id')} placed, "
+                        f"estimated profit ${opportunity['net_profit']:.2f} | awaiting fills"
                     )
                     
-                    # Check if we've hit daily target
-                    daily_target = self.config['system']['daily_profit_target']
-                    if self.system_metrics.total_profit >= daily_target:
-                        self.logger.info(f"🎯 Daily profit target reached: ${daily_target}")
-                        # Could implement cooldown or reduced aggression here
-                        
                 else:
                     self.logger.warning(f"❌ Trade execution failed")
-                    self.system_metrics.total_loss += abs(opportunity['net_profit'])
-                    
-                    # Update win rate
-                    wins = self.system_metrics.total_trades * self.system_metrics.win_rate
-                    self.system_metrics.win_rate = wins / (self.system_metrics.total_trades + 1)
+                    # A failed or unwound trade may leave partial fills behind
+                    if self.account_streams:
+                        self.account_streams.request_reconcile(opportunity['buy_exchange'])
+                        self.account_streams.request_reconcile(opportunity['sell_exchange'])
                 
                 # Rate limiting between trades
                 if executed_trades > 0:
@@ -1075,18 +1305,47 @@ class ArbitrageBot:
                 if self.health_monitor:
                     self.health_monitor.log_api_error('trade_execution')
     
+    def on_trade_settled(self, trade):
+        """Book a trade's realized P&L once both legs reached a terminal state"""
+        metrics = self.system_metrics
+        pnl = trade.realized_pnl
+        metrics.settled_trades += 1
+        if pnl > 0:
+            metrics.winning_trades += 1
+            metrics.total_profit += pnl
+        else:
+            metrics.total_loss += -pnl
+        metrics.win_rate = metrics.winning_trades / metrics.settled_trades
+        
+        self.logger.info(
+            f"💵 Trade #{trade.trade_id} settled: realized ${pnl:.2f}"
+            f"{'' if trade.pnl_complete else ' excl. unpriced fees'} (estimated ${trade.estimated_profit:.2f}) | "
+            f"buy {trade.buy.state} {trade.buy.filled:.6f}/{trade.buy.amount:.6f} on {trade.buy.exchange}, "
+            f"sell {trade.sell.state} {trade.sell.filled:.6f}/{trade.sell.amount:.6f} on {trade.sell.exchange} | "
+            f"Win Rate: {metrics.win_rate:.1%}"
+        )
+        if abs(trade.residual) > 1e-12:
+            self.logger.warning(f"⚠️  Trade #{trade.trade_id} left {trade.residual:+.8f} {trade.symbol.split('/')[0]} unhedged")
+            if self.account_streams:
+                self.account_streams.request_reconcile(trade.buy.exchange)
+                self.account_streams.request_reconcile(trade.sell.exchange)
+        
+        # Check if we've hit daily target
+        daily_target = self.config['system']['daily_profit_target']
+        if metrics.total_profit - metrics.total_loss >= daily_target:
+            self.logger.info(f"🎯 Daily profit target reached: ${daily_target}")
+    
     async def perform_health_check(self):
         """Perform comprehensive system health check"""
         self.logger.info("🏥 Performing system health check...")
         
-        # Check exchange connectivity
-        for name, exchange in self.exchanges.items():
-            try:
-                # Simple ping to check connectivity
-                exchange.fetch_time()
+        # Check exchange connectivity (all venues pinged concurrently)
+        server_times = await self.async_exchanges.fetch_times()
+        for name, result in server_times.items():
+            if isinstance(result, Exception):
+                self.logger.warning(f"  ⚠️  {name.upper()}: Connection issue - {result}")
+            else:
                 self.logger.debug(f"  ✅ {name.upper()}: Connected")
-            except Exception as e:
-                self.logger.warning(f"  ⚠️  {name.upper()}: Connection issue - {e}")
         
         # Check system resources
         import psutil
@@ -1094,7 +1353,8 @@ class ArbitrageBot:
         memory_mb = process.memory_info().rss / 1024 / 1024
         self.system_metrics.memory_usage_mb = memory_mb
         
-        cpu_percent = process.cpu_percent(interval=1)
+        # Sampling CPU blocks for the interval, keep it off the event loop
+        cpu_percent = await asyncio.to_thread(process.cpu_percent, 1)
         
         self.logger.info(
             f"📊 System Resources: "
@@ -1113,10 +1373,21 @@ class ArbitrageBot:
         """Report comprehensive system metrics"""
         self.system_metrics.uptime_seconds = time.time() - self.start_time
         
+        if self.health_monitor:
+            latency_stats = self.health_monitor.get_decision_latency_stats()
+            self.system_metrics.decision_latency_p50_us = latency_stats['p50_us']
+            self.system_metrics.decision_latency_p99_us = latency_stats['p99_us']
+        
+        if hasattr(self.order_executor, 'get_leg_skew_stats'):
+            skew_stats = self.order_executor.get_leg_skew_stats()
+            self.system_metrics.leg_skew_p50_ms = skew_stats['p50_ms']
+            self.system_metrics.leg_skew_p99_ms = skew_stats['p99_ms']
+        
         metrics = self.system_metrics.to_dict()
+        execution_stats = self.order_executor.order_tracker.get_venue_stats()
         
         # Log to metrics file
-        self.metrics_logger.info(json.dumps(metrics))
+        self.metrics_logger.info(json.dumps({**metrics, 'execution': execution_stats}))
         
         # Log to console (summary)
         self.logger.info(
@@ -1125,8 +1396,129 @@ class ArbitrageBot:
             f"Trades: {metrics['total_trades']} | "
             f"Profit: ${metrics['total_profit']} | "
             f"Win Rate: {metrics['win_rate']:.1%} | "
-            f"API Success: {metrics['api_success_rate']:.1%}"
+            f"API Success: {metrics['api_success_rate']:.1%} | "
+            f"Tick→Decision p50/p99: {metrics['decision_latency_p50_us']:.0f}/{metrics['decision_latency_p99_us']:.0f}µs"
         )
+        
+        # Order outcomes per venue: how much of what we send fills, and how fast
+        for venue, stats in execution_stats.items():
+            if not stats['orders']:
+                continue
+            latency = stats['fill_latency_p50_ms']
+            self.logger.info(
+                f"🧾 {venue.upper()} orders: {stats['orders']} | filled {stats['filled']} | "
+                f"partial {stats['partial']} | cancelled {stats['cancelled']} | expired {stats['expired']} | "
+                f"fill ratio {stats['fill_ratio']:.1%} | fill p50 "
+                + (f"{latency:.0f}ms" if latency is not None else "n/a")
+            )
+        
+        # REST budget per venue: what is waiting, and how long each priority class waits
+        if getattr(self, 'rest_scheduler', None) is not None:
+            for venue, stats in self.rest_scheduler.get_stats().items():
+                waits = ' | '.join(
+                    f"{name} {cls['requests']} req, p99 wait {cls['wait_p99_ms'] or 0:.0f}ms"
+                    + (f", {cls['coalesced']} coalesced" if cls['coalesced'] else '')
+                    for name, cls in stats['classes'].items()
+                )
+                self.logger.info(
+                    f"🚦 {venue.upper()} REST: queue {stats['queue_depth']} | tokens {stats['tokens']:.0f}/{stats['burst']:.0f} | "
+                    f"429s {stats['rate_limited']} | {waits or 'idle'}"
+                )
+        
+        # Racing WebSocket connections: who delivers first and how far behind the others are
+        if hasattr(self.data_feed, 'stream_stats'):
+            for stream in self.data_feed.stream_stats():
+                lags = ' '.join(
+                    f"#{c['connection']}:{c['win_rate']:.0%}/{c['mean_lag_us']:.0f}µs" for c in stream['connections']
+                )
+                self.logger.info(
+                    f"🔀 {stream['stream']}: forwarded {stream['forwarded']} | dup {stream['duplicates']} | "
+                    f"stale {stream['stale']} | first-rate/lag {lags}"
+                )
+        
+        # Feed handler processes: ring backlog and lost records
+        if hasattr(self.data_feed, 'process_stats'):
+            for feed in self.data_feed.process_stats():
+                self.logger.info(
+                    f"🧵 {feed['venue']} feed process: {'up' if feed['alive'] else 'DOWN'} | records {feed['records']} | "
+                    f"backlog {feed['backlog']} | overruns {feed['overruns']} | restarts {feed['restarts']}"
+                )
+    
+    def create_snapshot_writer(self):
+        """Open the memory-mapped state snapshot file"""
+        path = self.config['monitoring'].get('state_snapshot_path')
+        if not path:
+            return None
+        try:
+            writer = StateSnapshotWriter(path)
+            self.logger.info(f"🛰️  Publishing state snapshots to {path}")
+            return writer
+        except Exception as e:
+            self.logger.error(f"❌ Failed to open state snapshot: {e}")
+            return None
+    
+    def build_state_snapshot(self, status: str = 'running') -> Dict:
+        """Compact view of prices, balances, opportunities, metrics and mode"""
+        self.system_metrics.uptime_seconds = time.time() - self.start_time
+        
+        prices = {}
+        book_table = getattr(getattr(self, 'data_feed', None), 'book_table', None)
+        if book_table is not None:
+            for slot, (symbol, exchange) in enumerate(book_table.keys):
+                bid, ask, bid_size, ask_size, updated_at = book_table.read(slot)
+                if bid > 0 and ask > 0:
+                    prices.setdefault(symbol, {})[exchange] = {
+                        'bid': bid, 'ask': ask, 'bid_size': bid_size, 'ask_size': ask_size,
+                        'updated_at': updated_at
+                    }
+        
+        opportunities = [
+            {key: opportunity.get(key) for key in (
+                'symbol', 'buy_exchange', 'sell_exchange', 'buy_price', 'sell_price',
+                'spread_percentage', 'amount', 'net_profit', 'timestamp'
+            )}
+            for opportunity in self.recent_opportunities
+        ]
+        
+        return {
+            'system_id': self.system_id,
+            'status': status,
+            'pid': os.getpid(),
+            'mode': self.bot_mode,
+            'exchanges': list(self.exchanges),
+            'prices': prices,
+            'balances': self.latest_balances,
+            'opportunities': opportunities,
+            'metrics': self.system_metrics.to_dict(),
+            'execution': self.order_executor.order_tracker.get_stats(),
+            'rest_scheduler': self.rest_scheduler.get_stats() if getattr(self, 'rest_scheduler', None) else {}
+        }
+    
+    async def publish_state_snapshots(self):
+        """Publish the state snapshot at a fixed cadence"""
+        interval = self.config['monitoring'].get('state_snapshot_interval', 1.0)
+        while not self.is_shutting_down:
+            try:
+                self.snapshot_writer.publish(self.build_state_snapshot())
+            except Exception as e:
+                self.logger.error(f"❌ State snapshot failed: {e}")
+            await asyncio.sleep(interval)
+    
+    def create_market_recorder(self):
+        """Open the raw market data capture when enabled in config"""
+        capture_config = self.config.get('capture', {})
+        if not capture_config.get('enabled'):
+            return None
+        
+        extension = '.cap.gz' if capture_config.get('compress', True) else '.cap'
+        path = os.path.join(capture_config.get('directory', 'captures'), f"market_{self.system_id}{extension}")
+        try:
+            recorder = MarketRecorder(path, compress=capture_config.get('compress', True))
+            self.logger.info(f"💾 Capturing raw market data to {path}")
+            return recorder
+        except Exception as e:
+            self.logger.error(f"❌ Failed to open market capture: {e}")
+            return None
     
     async def shutdown_system(self):
         """Perform graceful system shutdown"""
@@ -1140,13 +1532,34 @@ class ArbitrageBot:
             except Exception as e:
                 self.logger.error(f"❌ Error stopping data feed: {e}")
         
+        # Last state snapshot tells the dashboard the bot is down
+        if getattr(self, 'snapshot_writer', None) is not None:
+            try:
+                self.snapshot_task.cancel()
+                self.snapshot_writer.publish(self.build_state_snapshot(status='stopped'))
+                self.snapshot_writer.close()
+            except Exception as e:
+                self.logger.error(f"❌ Error closing state snapshot: {e}")
+        
+        # Close market data capture
+        if getattr(self, 'data_feed', None) is not None and self.data_feed.recorder:
+            try:
+                self.data_feed.recorder.close()
+            except Exception as e:
+                self.logger.error(f"❌ Error closing market capture: {e}")
+        
+        # Stop account streams and order polling before their clients close
+        if getattr(self, 'account_streams', None) is not None:
+            await self.account_streams.stop()
+        await self.order_executor.order_tracker.stop()
+        
         # Close exchange connections
-        for name, exchange in self.exchanges.items():
+        if hasattr(self, 'async_exchanges'):
             try:
-                # CCXT doesn't have explicit close, but we can clean up
-                self.logger.debug(f"  Closed {name} connection")
+                await self.async_exchanges.close()
+                self.logger.info("✅ Async exchange clients closed")
             except Exception as e:
-                self.logger.debug(f"  Error closing {name}: {e}")
+                self.logger.debug(f"  Error closing async exchange clients: {e}")
         
         # Final metrics report
         self.report_system_metrics()
@@ -1221,6 +1634,15 @@ import json
 from data_feed import RESTPollingFeed, WebSocketFeed
 from rebalance_monitor import RebalanceMonitor
 from order_executor import LowLatencyExecutor, HighLatencyExecutor
+from async_exchanges import AsyncExchangeManager, apply_endpoint_override
+from spread_scanner import SpreadScanner
+from depth_sweep import sweep_books
+from currency_graph import CurrencyGraph
+from market_recorder import MarketRecorder
+from state_snapshot import StateSnapshotWriter
+from log_pipeline import SAMPLE, JsonLinesFormatter, SuppressedCountFormatter, start_pipeline
+from account_streams import AccountStreamManager, parse_balance
+from rate_limiter import RateLimitScheduler
 
 # ==================== MARKET INTELLIGENCE MODULES ====================
 from auction_context_module import AuctionContextModule
@@ -1232,6 +1654,44 @@ from data_hub import DataHub
 import logging
 from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
 
+# (spread multiplier, position multiplier) per auction regime; overridable via trading.context_multipliers
+DEFAULT_CONTEXT_MULTIPLIERS = {
+    'accepting': (0.7, 1.3),   # lower threshold, larger position
+    'rejecting': (1.5, 0.7),   # higher threshold, smaller position
+    'imbalanced': (1.2, 0.9)   # cautious
+}
+
+
+class ExchangeWrapper:
+    """Balance view of one exchange for inventory checks and rebalancing"""
+    
+    # Currencies we care about
+    TARGET_CURRENCIES = ('BTC', 'USDT', 'USDC', 'USD', 'BNB', 'PAXG')
+    
+    def __init__(self, name, exchange_obj, free_bal, total_bal):
+        self.name = name
+        self.exchange = exchange_obj
+        self.balances = {}
+        self.free_balances = {}
+        
+        for currency in self.TARGET_CURRENCIES:
+            free_val = free_bal.get(currency, 0.0)
+            total_val = total_bal.get(currency, 0.0)
+            
+            # Only store if we have some balance
+            if free_val > 0 or total_val > 0:
+                self.free_balances[currency] = free_val
+                self.balances[currency] = total_val
+        
+        # Calculate total value in USD
+        btc_price_est = 90000  # Conservative estimate
+        self.total_value = (
+            self.balances.get('BTC', 0) * btc_price_est +
+            self.balances.get('USDT', 0) +
+            self.balances.get('USDC', 0) +
+            self.balances.get('USD', 0)
+        )
+
 class LogLevel(Enum):
     DEBUG = 10
     INFO = 20
@@ -1244,6 +1704,8 @@ class SystemMetrics:
     """Comprehensive system performance tracking"""
     cycle_count: int = 0
     total_trades: int = 0
+    settled_trades: int = 0    # both legs terminal, realized P&L booked
+    winning_trades: int = 0
     total_profit: float = 0.0
     total_loss: float = 0.0
     win_rate: float = 0.0
@@ -1251,19 +1713,30 @@ class SystemMetrics:
     api_success_rate: float = 1.0
     uptime_seconds: float = 0.0
     memory_usage_mb: float = 0.0
+    decision_latency_p50_us: float = 0.0
+    decision_latency_p99_us: float = 0.0
+    leg_skew_p50_ms: float = 0.0
+    leg_skew_p99_ms: float = 0.0
+    triangular_cycles_detected: int = 0
     last_system_check: float = field(default_factory=time.time)
     
     def to_dict(self) -> Dict:
         return {
             'cycle_count': self.cycle_count,
             'total_trades': self.total_trades,
+            'settled_trades': self.settled_trades,
             'total_profit': round(self.total_profit, 2),
             'total_loss': round(self.total_loss, 2),
             'win_rate': round(self.win_rate, 3),
             'avg_trade_time_ms': round(self.avg_trade_time_ms, 2),
             'api_success_rate': round(self.api_success_rate, 3),
             'uptime_hours': round(self.uptime_seconds / 3600, 2),
-            'memory_usage_mb': round(self.memory_usage_mb, 1)
+            'memory_usage_mb': round(self.memory_usage_mb, 1),
+            'decision_latency_p50_us': round(self.decision_latency_p50_us, 1),
+            'decision_latency_p99_us': round(self.decision_latency_p99_us, 1),
+            'leg_skew_p50_ms': round(self.leg_skew_p50_ms, 1),
+            'leg_skew_p99_ms': round(self.leg_skew_p99_ms, 1),
+            'triangular_cycles_detected': self.triangular_cycles_detected
         }
 
 class ArbitrageBot:
@@ -1290,11 +1763,14 @@ class ArbitrageBot:
         
         # Load configuration
         self.config = self.load_configuration()
+        self.log_pipeline.sampler.interval = self.config['monitoring'].get('log_sample_interval', 5.0)
         
         # Initialize system state
         self.system_metrics = SystemMetrics()
         self.is_shutting_down = False
         self.last_heartbeat = time.time()
+        self.latest_balances = {}       # exchange -> {'free', 'total', 'updated_at'} from the last balance fetch
+        self.recent_opportunities = []  # newest last, published in the state snapshot
         
         # Register signal handlers for graceful shutdown
         self.register_signal_handlers()
@@ -1312,26 +1788,22 @@ class ArbitrageBot:
         self.log_system_startup()
     
     def setup_enterprise_logging(self):
-        """Configure comprehensive logging for production monitoring"""
+        """Configure comprehensive logging for production monitoring.
+        
+        The loggers only enqueue records; a background writer thread formats
+        them and does all console/file I/O, so logging never blocks the event loop.
+        """
         # Create logs directory if it doesn't exist
         os.makedirs('logs', exist_ok=True)
         
-        # Configure root logger
-        self.logger = logging.getLogger('ArbitrageBot')
-        self.logger.setLevel(logging.INFO)
-        
-        # Remove existing handlers to avoid duplicates
-        self.logger.handlers.clear()
-        
         # Console Handler (colored for readability)
         console = logging.StreamHandler()
         console.setLevel(logging.INFO)
-        console_format = logging.Formatter(
+        console_format = SuppressedCountFormatter(
             '%(asctime)s | %(levelname)-8s | %(name)-20s | %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         console.setFormatter(console_format)
-        self.logger.addHandler(console)
         
         # File Handler (detailed for debugging)
         file_handler = RotatingFileHandler(
@@ -1341,12 +1813,11 @@ class ArbitrageBot:
             encoding='utf-8'
         )
         file_handler.setLevel(logging.DEBUG)
-        file_format = logging.Formatter(
+        file_format = SuppressedCountFormatter(
             '%(asctime)s.%(msecs)03d | %(levelname)-8s | %(name)-20s | %(filename)s:%(lineno)d | %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         file_handler.setFormatter(file_format)
-        self.logger.addHandler(file_handler)
         
         # Error Handler (separate error log)
         error_handler = TimedRotatingFileHandler(
@@ -1357,7 +1828,6 @@ class ArbitrageBot:
         )
         error_handler.setLevel(logging.ERROR)
         error_handler.setFormatter(file_format)
-        self.logger.addHandler(error_handler)
         
         # Performance Metrics Handler
         metrics_handler = RotatingFileHandler(
@@ -1368,12 +1838,32 @@ class ArbitrageBot:
         metrics_handler.setLevel(logging.INFO)
         metrics_format = logging.Formatter('%(asctime)s | %(message)s')
         metrics_handler.setFormatter(metrics_format)
+        metrics_handler.addFilter(logging.Filter('Metrics'))
+        
+        # Structured events (JSON lines) from both loggers, for log search and replay tooling
+        events_handler = RotatingFileHandler(
+            'logs/events.jsonl',
+            maxBytes=10*1024*1024,
+            backupCount=5,
+            encoding='utf-8'
+        )
+        events_handler.setLevel(logging.INFO)
+        events_handler.setFormatter(JsonLinesFormatter())
+        
+        bot_only = logging.Filter('ArbitrageBot')
+        for handler in (console, file_handler, error_handler):
+            handler.addFilter(bot_only)
         
+        # One writer thread owns every handler; per-tick lines logged with extra=SAMPLE are rate-limited
+        self.log_pipeline = start_pipeline(
+            [console, file_handler, error_handler, metrics_handler, events_handler]
+        )
+        self.logger = logging.getLogger('ArbitrageBot')
+        self.log_pipeline.attach(self.logger, logging.INFO)
         self.metrics_logger = logging.getLogger('Metrics')
-        self.metrics_logger.addHandler(metrics_handler)
-        self.metrics_logger.setLevel(logging.INFO)
+        self.log_pipeline.attach(self.metrics_logger, logging.INFO)
         
-        self.logger.info(f"✅ Enterprise logging initialized for system: {self.system_id}")
+        self.logger.info("✅ Enterprise logging initialized for system: %s", self.system_id)
     
     def load_configuration(self) -> Dict:
         """Load and validate configuration file"""
@@ -1387,18 +1877,36 @@ class ArbitrageBot:
             "exchanges": {
                 "enabled": ["kraken", "binance", "coinbase"],
                 "timeout_seconds": 30,
-                "retry_attempts": 3
+                "retry_attempts": 3,
+                "endpoints": {},  # name -> {"rest": ..., "ws": ...}, e.g. the local exchange_simulator.py
+                "stream_connections": 2,  # racing WebSocket connections per venue, first copy of each update wins
+                "stream_recycle_seconds": 60,  # how often the laggiest connection is considered for reconnect
+                "feed_processes": False,  # WebSocket feed: parse each venue in its own process, read via shared memory
+                "account_streams": True,  # balances/orders from private WebSocket streams instead of per-cycle REST
+                "balance_reconcile_seconds": 300,  # REST fetch_balance cross-check of the streamed balances
+                "rest_scheduler": True,  # priority token buckets per venue instead of ccxt's FIFO enableRateLimit
+                "rest_rate_limits": {}  # name -> {"rate": units/s, "burst": units}, overrides rate_limiter.VENUE_RULES
             },
             "trading": {
                 "max_concurrent_trades": 2,
                 "cooldown_after_loss_seconds": 60,
                 "position_sizing_mode": "dynamic",  # dynamic, fixed, aggressive
-                "risk_per_trade_percent": 1.0
+                "risk_per_trade_percent": 1.0,
+                "event_driven_scan": True,  # scan on top-of-book changes when the feed supports it
+                "triangular_min_profit_pct": 0.1  # report currency-graph cycles above this net profit
             },
             "monitoring": {
                 "health_check_interval": 300,
                 "metrics_report_interval": 60,
-                "alert_on_api_error_rate": 0.3
+                "alert_on_api_error_rate": 0.3,
+                "state_snapshot_path": "logs/state_snapshot.bin",  # memory-mapped state read by dashboard.py
+                "state_snapshot_interval": 1.0,
+                "log_sample_interval": 5.0  # seconds between two lines of the same per-tick log call
+            },
+            "capture": {
+                "enabled": False,  # record raw market data messages for replay
+                "directory": "captures",
+                "compress": True
             }
         }
         
@@ -1440,16 +1948,20 @@ class ArbitrageBot:
             'min_stable_per_exchange': 1500.0,
             'min_bnb_for_binance': 0.1,
             'max_position_size': 5000.0,
+            'exchange_position_limits': {},  # Optional max $ notional per leg, e.g. {'coinbase': 2000.0}
             'min_profit_threshold': 0.50,  # Minimum $ profit per trade
             'slippage_tolerance_percent': 0.1,
-            'max_trades_per_hour': 20
+            'max_trades_per_hour': 20,
+            'context_multipliers': dict(DEFAULT_CONTEXT_MULTIPLIERS)
         }
         
         # Apply any config overrides
         if 'trading' in self.config:
-            for key in ['position_size', 'min_profit_threshold', 'slippage_tolerance_percent']:
+            for key in ['position_size', 'min_profit_threshold', 'slippage_tolerance_percent', 'exchange_position_limits']:
                 if key in self.config['trading']:
                     settings[key] = self.config['trading'][key]
+            for regime, multipliers in self.config['trading'].get('context_multipliers', {}).items():
+                settings['context_multipliers'][regime] = tuple(multipliers)
         
         return settings
     
@@ -1507,7 +2019,7 @@ class ArbitrageBot:
         
         # Phase 5: Optional Components
         try:
-            self.data_hub = DataHub()
+            self.data_hub = DataHub(endpoints=self.config['exchanges'].get('endpoints'))
             self.use_data_hub = self.config.get('data', {}).get('use_data_hub', False)
             if self.use_data_hub:
                 self.logger.info("✅ DataHub initialized (standby mode)")
@@ -1553,6 +2065,7 @@ class ArbitrageBot:
         
         enabled_exchanges = self.config['exchanges']['enabled']
         timeout = self.config['exchanges']['timeout_seconds']
+        endpoint_overrides = self.config['exchanges'].get('endpoints', {})
         
         for name in enabled_exchanges:
             if name not in exchange_configs:
@@ -1570,6 +2083,10 @@ class ArbitrageBot:
                     exchange_class = getattr(ccxt, name)
                     exchange = exchange_class(config)
                 
+                if name in endpoint_overrides:
+                    apply_endpoint_override(exchange, endpoint_overrides[name])
+                    self.logger.info(f"🔀 {name.upper()} endpoints overridden: {endpoint_overrides[name].get('rest')}")
+                
                 # Test connection
                 exchange.load_markets()
                 
@@ -1602,10 +2119,11 @@ class ArbitrageBot:
     def measure_exchange_latency(self) -> float:
         """Measure network latency to exchanges with multiple samples"""
         latencies = []
+        overrides = self.config['exchanges'].get('endpoints', {})
         endpoints = [
-            ('Kraken', 'https://api.kraken.com/0/public/Time'),
-            ('Binance', 'https://api.binance.com/api/v3/time'),
-            ('Coinbase', 'https://api.coinbase.com/v2/time')
+            ('Kraken', overrides.get('kraken', {}).get('rest', 'https://api.kraken.com') + '/0/public/Time'),
+            ('Binance', overrides.get('binance', {}).get('rest', 'https://api.binance.com') + '/api/v3/time'),
+            ('Coinbase', overrides.get('coinbase', {}).get('rest', 'https://api.coinbase.com') + '/v2/time')
         ]
         
         for name, endpoint in endpoints:
@@ -1694,15 +2212,70 @@ class ArbitrageBot:
         """Main trading loop with comprehensive error handling and monitoring"""
         self.logger.info("🏁 Starting main trading loop...")
         
+        # Async REST clients: balances, orders and health pings never block the loop
+        endpoint_overrides = self.config['exchanges'].get('endpoints', {})
+        # Orders go ahead of status polls, balances, tickers and health pings on each venue's budget
+        self.rest_scheduler = None
+        if self.config['exchanges'].get('rest_scheduler', True):
+            self.rest_scheduler = RateLimitScheduler(self.config['exchanges'].get('rest_rate_limits'))
+        self.async_exchanges = AsyncExchangeManager(self.exchanges, endpoint_overrides, self.rest_scheduler)
+        await self.async_exchanges.start()
+        
+        # Private account streams: balances and order state without per-cycle REST fetches
+        self.account_streams = None
+        if self.config['exchanges'].get('account_streams', True):
+            self.account_streams = AccountStreamManager(
+                self.async_exchanges.clients,
+                reconcile_interval=self.config['exchanges'].get('balance_reconcile_seconds', 300)
+            )
+            # The executor's reservation ledger reconciles against every streamed balance change
+            self.account_streams.balance_listeners.append(self.order_executor.portfolio_state.sync_balances)
+            await self.account_streams.start()
+        
+        # Order lifecycle: fills from the execution reports, batched REST polling when they are quiet
+        order_tracker = self.order_executor.order_tracker
+        order_tracker.trade_listeners.append(self.on_trade_settled)
+        if self.account_streams:
+            self.account_streams.order_listeners.append(order_tracker.on_order_update)
+        order_tracker.start(self.async_exchanges.clients)
+        
         # Initialize data feed
         try:
-            self.data_feed = self.data_feed_class(self.exchanges)
+            self.data_feed = self.data_feed_class(self.async_exchanges.clients)
+            self.data_feed.recorder = self.create_market_recorder()
+            if hasattr(self.data_feed, 'endpoints'):
+                self.data_feed.endpoints = endpoint_overrides
+            if hasattr(self.data_feed, 'stream_connections'):
+                self.data_feed.stream_connections = self.config['exchanges'].get('stream_connections', 2)
+                self.data_feed.stream_recycle_seconds = self.config['exchanges'].get('stream_recycle_seconds', 60)
+            if hasattr(self.data_feed, 'feed_processes'):
+                self.data_feed.feed_processes = self.config['exchanges'].get('feed_processes', False)
             await self.data_feed.start()
             self.logger.info(f"✅ Data feed started: {self.data_feed_class.__name__}")
         except Exception as e:
             self.logger.critical(f"❌ Failed to start data feed: {e}")
             return
         
+        self.attach_data_feed(self.data_feed)
+        self.order_executor.order_chaser.warm_templates(
+            self.async_exchanges.clients,
+            ['BTC/USDT', 'BTC/USDC', 'BTC/USD']
+        )
+        
+        # Reactive scanning: the feed drives arbitrage decisions, the loop keeps housekeeping
+        self.event_driven = (
+            self.config['trading'].get('event_driven_scan', True)
+            and hasattr(self.data_feed, 'subscribe_top_of_book')
+        )
+        if self.event_driven:
+            self.data_feed.subscribe_top_of_book(self.on_top_of_book_change)
+            self.logger.info("⚡ Event-driven arbitrage scan enabled (top-of-book triggers)")
+        
+        # Dashboard state: published locally so the dashboard never calls the exchanges itself
+        self.snapshot_writer = self.create_snapshot_writer()
+        if self.snapshot_writer:
+            self.snapshot_task = asyncio.create_task(self.publish_state_snapshots())
+        
         # Main trading loop
         cycle_count = 0
         last_metrics_report = time.time()
@@ -1716,7 +2289,7 @@ class ArbitrageBot:
                 
                 try:
                     # ==================== CYCLE START ====================
-                    self.logger.debug(f"\n🔄 Cycle #{cycle_count} | Mode: {self.bot_mode}")
+                    self.logger.debug("\n🔄 Cycle #%d | Mode: %s", cycle_count, self.bot_mode)
                     
                     # Update heartbeat
                     self.last_heartbeat = time.time()
@@ -1741,15 +2314,17 @@ class ArbitrageBot:
                         await self.manage_inventory(exchange_wrappers, price_data, market_context)
                     
                     # ==================== ARBITRAGE SEARCH ====================
-                    opportunities = self.find_arbitrage_opportunities(
-                        price_data, 
-                        ['BTC/USDT', 'BTC/USDC'],
-                        market_context
-                    )
-                    
-                    # ==================== TRADE EXECUTION ====================
-                    if opportunities and not self.is_shutting_down:
-                        await self.execute_opportunities(opportunities, market_context)
+                    # In event-driven mode the scan runs from on_top_of_book_change instead
+                    if not self.event_driven:
+                        self.report_cycles(self.currency_graph.update_from_table(self.data_feed.book_table))
+                        opportunities = self.find_arbitrage_opportunities(
+                            self.scan_symbols,
+                            market_context
+                        )
+                        
+                        # ==================== TRADE EXECUTION ====================
+                        if opportunities and not self.is_shutting_down:
+                            await self.execute_opportunities(opportunities, market_context)
                     
                     # ==================== SYSTEM MAINTENANCE ====================
                     current_time = time.time()
@@ -1792,6 +2367,27 @@ class ArbitrageBot:
             # ==================== GRACEFUL SHUTDOWN ====================
             await self.shutdown_system()
     
+    def attach_data_feed(self, data_feed):
+        """Wire the decision path (scanner, graph, executor pricing) to a started data feed"""
+        self.data_feed = data_feed
+        
+        # Orders, rebalances and valuations read the feed's shared top-of-book table
+        self.order_executor.attach_price_feed(data_feed)
+        if self.rebalance_monitor:
+            self.rebalance_monitor.attach_book_table(data_feed.book_table)
+        self.spread_scanner = SpreadScanner(
+            data_feed.book_table,
+            fee_lookup=lambda name: self.fee_manager.get_current_taker_fee(name)['effective_fee_rate'],
+            size_limits=self.settings['exchange_position_limits']
+        )
+        self.currency_graph = CurrencyGraph(
+            fee_lookup=self.spread_scanner.fee_rate,
+            min_profit_pct=self.config['trading'].get('triangular_min_profit_pct', 0.1)
+        )
+        
+        self.scan_symbols = ['BTC/USDT', 'BTC/USDC']
+        self.execution_task = None
+    
     async def analyze_market_context(self, price_data) -> Optional[MarketContext]:
         """Analyze market context using auction theory and microstructure"""
         try:
@@ -1807,10 +2403,10 @@ class ArbitrageBot:
                 context_dict = context.to_dict()
                 if context.auction_state != AuctionState.BALANCED:
                     self.logger.info(
-                        f"🧠 Market: {context_dict['auction']} | "
-                        f"Score: {context_dict['auction_score']:.3f} | "
-                        f"Confidence: {context_dict['confidence']:.1f} | "
-                        f"Crowd: {context_dict['crowd']}"
+                        "🧠 Market: %s | Score: %.3f | Confidence: %.1f | Crowd: %s",
+                        context_dict['auction'], context_dict['auction_score'],
+                        context_dict['confidence'], context_dict['crowd'],
+                        extra=SAMPLE
                     )
                 
                 return context
@@ -1822,137 +2418,46 @@ class ArbitrageBot:
             return None
     
     async def get_exchange_wrappers(self):
-        """Get exchange wrappers with comprehensive error handling and debug logging"""
+        """Per-exchange balance views, from the account streams' store when they run"""
         exchange_wrappers = {}
         
-        for exch_name, exchange in self.exchanges.items():
-            try:
-                self.logger.info(f"🔄 Fetching balance for {exch_name.upper()}...")
-                
-                # 1. FETCH BALANCE
-                raw_balance_data = exchange.fetch_balance()
-                self.logger.debug(f"📦 Raw balance data type for {exch_name}: {type(raw_balance_data)}")
-                
-                # 2. SAFE EXTRACTION OF BALANCE DICTIONARIES
-                free_balances = {}
-                total_balances = {}
-                
-                # Handle the raw balance data structure
-                if isinstance(raw_balance_data, dict):
-                    # Log all top-level keys for debugging
-                    self.logger.debug(f"   Top-level keys: {list(raw_balance_data.keys())}")
-                    
-                    # Extract 'free' and 'total' - PRIMARY FIX IS HERE
-                    # Some exchanges return these as dicts, others differently
-                    free_field = raw_balance_data.get('free')
-                    total_field = raw_balance_data.get('total')
-                    
-                    self.logger.debug(f"   'free' field type: {type(free_field)}")
-                    self.logger.debug(f"   'total' field type: {type(total_field)}")
-                    
-                    # CASE 1: Both are dictionaries (standard CCXT structure)
-                    if isinstance(free_field, dict) and isinstance(total_field, dict):
-                        free_balances = free_field
-                        total_balances = total_field
-                    
-                    # CASE 2: 'info' contains the actual data (some exchanges)
-                    elif 'info' in raw_balance_data and isinstance(raw_balance_data['info'], dict):
-                        info_data = raw_balance_data['info']
-                        self.logger.debug(f"   Using 'info' field, keys: {list(info_data.keys())[:5]}...")
-                        
-                        # Try to find balance data in info
-                        for key, value in info_data.items():
-                            if isinstance(value, (int, float, str)):
-                                try:
-                                    num_val = float(value)
-                                    if num_val > 0:
-                                        free_balances[key.upper()] = num_val
-                                        total_balances[key.upper()] = num_val
-                                except:
-                                    pass
-                    
-                    # CASE 3: Raw data is already the balance dict
-                    else:
-                        # Check if raw data has currency-like keys
-                        currency_keys = [k for k in raw_balance_data.keys() if isinstance(k, str) and len(k) <= 6]
-                        if currency_keys:
-                            for key in currency_keys:
-                                val = raw_balance_data[key]
-                                if isinstance(val, (int, float)):
-                                    free_balances[key.upper()] = float(val)
-                                    total_balances[key.upper()] = float(val)
-                
-                # 3. CREATE THE WRAPPER CLASS WITH SAFE ACCESS
-                class ExchangeWrapper:
-                    def __init__(self, name, exchange_obj, free_bal, total_bal):
-                        self.name = name
-                        self.exchange = exchange_obj
-                        self.balances = {}
-                        self.free_balances = {}
-                        
-                        # Track currencies we care about
-                        target_currencies = ['BTC', 'USDT', 'USDC', 'USD', 'BNB', 'PAXG']
-                        
-                        for currency in target_currencies:
-                            # Safe extraction from free_balances
-                            free_val = 0.0
-                            if isinstance(free_bal, dict):
-                                # Try exact match
-                                if currency in free_bal:
-                                    free_val = free_bal[currency]
-                                # Try case-insensitive match
-                                else:
-                                    for k, v in free_bal.items():
-                                        if isinstance(k, str) and k.upper() == currency:
-                                            free_val = v
-                                            break
-                            
-                            # Safe extraction from total_balances  
-                            total_val = 0.0
-                            if isinstance(total_bal, dict):
-                                if currency in total_bal:
-                                    total_val = total_bal[currency]
-                                else:
-                                    for k, v in total_bal.items():
-                                        if isinstance(k, str) and k.upper() == currency:
-                                            total_val = v
-                                            break
-                            
-                            # Only store if we have some balance
-                            if free_val > 0 or total_val > 0:
-                                self.free_balances[currency] = free_val
-                                self.balances[currency] = total_val
-                        
-                        # Calculate total value in USD
-                        btc_price_est = 90000  # Conservative estimate
-                        self.total_value = (
-                            self.balances.get('BTC', 0) * btc_price_est +
-                            self.balances.get('USDT', 0) +
-                            self.balances.get('USDC', 0) +
-                            self.balances.get('USD', 0)
-                        )
-                
-                # 4. CREATE AND STORE THE WRAPPER
-                wrapper = ExchangeWrapper(exch_name, exchange, free_balances, total_balances)
-                exchange_wrappers[exch_name] = wrapper
-                
-                # 5. LOG SUCCESS
-                btc_display = wrapper.free_balances.get('BTC', 0)
-                usdt_display = wrapper.free_balances.get('USDT', 0)
-                
-                self.logger.info(f"✅ {exch_name.upper()} Balance: "
-                               f"BTC={btc_display:.6f}, "
-                               f"USDT=${usdt_display:.2f}, "
-                               f"Total≈${wrapper.total_value:.2f}")
-                
-            except ccxt.NetworkError as e:
-                self.logger.warning(f"⚠️  Network error fetching {exch_name} balance: {e}")
-            except ccxt.ExchangeError as e:
-                self.logger.warning(f"⚠️  Exchange error fetching {exch_name} balance: {e}")
-            except Exception as e:
-                self.logger.error(f"❌ Unexpected error fetching {exch_name} balance: {e}")
-                import traceback
-                self.logger.error(f"Traceback: {traceback.format_exc()}")
+        if self.account_streams:
+            # Kept current by private WebSocket streams, reconciled over REST in the background
+            balances = {
+                name: (account.free, account.total)
+                for name, account in self.account_streams.accounts.items()
+                if account.reconciled_at
+            }
+        else:
+            # Fetch every venue's balance concurrently on the shared async session
+            balances = {}
+            raw_balances = await self.async_exchanges.fetch_balances()
+            for exch_name, raw_balance_data in raw_balances.items():
+                if isinstance(raw_balance_data, ccxt.NetworkError):
+                    self.logger.warning(f"⚠️  Network error fetching {exch_name} balance: {raw_balance_data}")
+                elif isinstance(raw_balance_data, ccxt.ExchangeError):
+                    self.logger.warning(f"⚠️  Exchange error fetching {exch_name} balance: {raw_balance_data}")
+                elif isinstance(raw_balance_data, Exception):
+                    self.logger.error(f"❌ Unexpected error fetching {exch_name} balance: {raw_balance_data}")
+                else:
+                    balances[exch_name] = parse_balance(raw_balance_data)
+                    self.order_executor.portfolio_state.sync_balances(exch_name, balances[exch_name][0])
+        
+        for exch_name, (free_balances, total_balances) in balances.items():
+            wrapper = ExchangeWrapper(exch_name, self.async_exchanges.clients.get(exch_name), free_balances, total_balances)
+            exchange_wrappers[exch_name] = wrapper
+            self.latest_balances[exch_name] = {
+                'free': dict(wrapper.free_balances),
+                'total': dict(wrapper.balances),
+                'updated_at': time.time()
+            }
+            
+            self.logger.info(
+                "✅ %s Balance: BTC=%.6f, USDT=$%.2f, Total≈$%.2f",
+                exch_name.upper(), wrapper.free_balances.get('BTC', 0),
+                wrapper.free_balances.get('USDT', 0), wrapper.total_value,
+                extra=SAMPLE
+            )
         
         return exchange_wrappers
     
@@ -1985,7 +2490,7 @@ class ArbitrageBot:
                 if market_context and market_context.execution_confidence > 0.5:
                     success = await self.order_executor.execute_inventory_rebalance(
                         exchange_wrappers,
-                        self.exchanges,
+                        self.async_exchanges.clients,
                         price_data,
                         self.settings,
                         inventory_problem,
@@ -2069,11 +2574,8 @@ class ArbitrageBot:
         
         return None
     
-    def find_arbitrage_opportunities(self, price_data, symbols, market_context):
-        """Find arbitrage opportunities with market context awareness"""
-        opportunities = []
-        
-        # ==================== PARAMETER CALCULATION ====================
+    def get_trading_params(self, market_context) -> Dict:
+        """Derive the spread threshold and position size from mode and market context"""
         # Base parameters
         if self.bot_mode == 'HIGH_LATENCY':
             base_spread_pct = 0.3  # 0.3%
@@ -2086,26 +2588,24 @@ class ArbitrageBot:
         spread_multiplier = 1.0
         position_multiplier = 1.0
         confidence = 0.5
+        multipliers = self.settings['context_multipliers']
         
         if market_context:
             confidence = market_context.execution_confidence
             
             if market_context.auction_state == AuctionState.ACCEPTING and confidence > 0.7:
-                # Accepting market: be more aggressive
-                spread_multiplier = 0.7  # Lower threshold
-                position_multiplier = 1.3  # Larger position
+                # Accepting market: be more aggressive (lower threshold, larger position)
+                spread_multiplier, position_multiplier = multipliers['accepting']
                 self.logger.debug("   🟢 Market: ACCEPTING - Aggressive mode")
-                
+            
             elif market_context.auction_state == AuctionState.REJECTING or confidence < 0.4:
-                # Rejecting market: be more conservative
-                spread_multiplier = 1.5  # Higher threshold
-                position_multiplier = 0.7  # Smaller position
+                # Rejecting market: be more conservative (higher threshold, smaller position)
+                spread_multiplier, position_multiplier = multipliers['rejecting']
                 self.logger.debug("   🔴 Market: REJECTING - Conservative mode")
-                
+            
             elif market_context.auction_state in [AuctionState.IMBALANCED_BUYING, AuctionState.IMBALANCED_SELLING]:
                 # Imbalanced: cautious
-                spread_multiplier = 1.2
-                position_multiplier = 0.9
+                spread_multiplier, position_multiplier = multipliers['imbalanced']
                 self.logger.debug("   🟡 Market: IMBALANCED - Cautious mode")
         
         # Apply adjustments with limits
@@ -2115,96 +2615,252 @@ class ArbitrageBot:
             max(self.settings['min_order_value'], base_position * position_multiplier)
         )
         
-        self.logger.debug(f"   📊 Trading params: Spread={min_spread_pct:.2f}%, Size=${position_size:.0f}, Confidence={confidence:.2f}")
+        return {
+            'min_spread_pct': min_spread_pct,
+            'position_size': position_size,
+            'confidence': confidence,
+            'auction_state': market_context.auction_state.value if market_context else 'UNKNOWN'
+        }
+    
+    def evaluate_pair(self, symbol, buy_exchange_name, buy_price, sell_exchange_name, sell_price, params):
+        """Evaluate one directed (buy at ask, sell at bid) exchange pair; returns an opportunity or None"""
+        # Must be different exchanges
+        if buy_exchange_name == sell_exchange_name:
+            return None
+        
+        # Must have positive spread
+        if not buy_price or not sell_price or sell_price <= buy_price:
+            return None
+        
+        spread = sell_price - buy_price
+        spread_pct = (spread / buy_price) * 100
+        
+        # Check against dynamic threshold
+        if spread_pct <= params['min_spread_pct']:
+            return None
+        
+        # Same per-exchange size limits and taker fees as the vectorized scan
+        scanner = self.spread_scanner
+        position_size = min(
+            params['position_size'],
+            scanner.size_limit(buy_exchange_name),
+            scanner.size_limit(sell_exchange_name)
+        )
+        amount = position_size / buy_price
+        
+        # Check minimum trade amount
+        if amount < self.settings['min_trade_amount']:
+            return None
         
-        # ==================== OPPORTUNITY SEARCH ====================
-        for symbol in symbols:
-            if symbol not in price_data or not price_data[symbol]:
-                continue
-            
-            symbol_data = price_data[symbol]
-            
-            # Get all exchanges with valid prices
-            exchanges_with_prices = [
-                (name, data) for name, data in symbol_data.items()
-                if data.get('ask') and data.get('bid')
-            ]
-            
-            if len(exchanges_with_prices) < 2:
-                continue
+        # Calculate estimated profit
+        estimated_profit = spread * amount
+        estimated_fees = position_size * (
+            scanner.fee_rate(buy_exchange_name) + scanner.fee_rate(sell_exchange_name)
+        )
+        net_profit = estimated_profit - estimated_fees
+        
+        # Check minimum profit threshold
+        if net_profit < self.settings['min_profit_threshold']:
+            return None
+        
+        return self.size_to_depth({
+            'symbol': symbol,
+            'buy_exchange': buy_exchange_name,
+            'sell_exchange': sell_exchange_name,
+            'buy_price': buy_price,
+            'sell_price': sell_price,
+            'spread': spread,
+            'spread_percentage': spread_pct,
+            'amount': amount,
+            'estimated_profit': estimated_profit,
+            'estimated_fees': estimated_fees,
+            'net_profit': net_profit,
+            'market_confidence': params['confidence'],
+            'auction_state': params['auction_state'],
+            'timestamp': time.time()
+        })
+    
+    def size_to_depth(self, opportunity):
+        """Resize a top-of-book candidate to the liquidity both books show; None when it no longer pays"""
+        symbol = opportunity['symbol']
+        buy_exchange_name = opportunity['buy_exchange']
+        sell_exchange_name = opportunity['sell_exchange']
+        
+        # Shrink to what the reservation ledger can fund, or drop it, before any network call
+        funded = self.order_executor.fundable_amount(opportunity)
+        if funded is not None and funded < opportunity['amount']:
+            scale = funded / opportunity['amount']
+            opportunity['amount'] = funded
+            for key in ('estimated_profit', 'estimated_fees', 'net_profit'):
+                opportunity[key] *= scale
+            if (
+                funded < self.settings['min_trade_amount']
+                or opportunity['net_profit'] < self.settings['min_profit_threshold']
+            ):
+                return None
+        
+        # Depth levels are only stored by feeds that stream books (not REST polling)
+        symbol_data = self.data_feed.price_data.get(symbol, {})
+        asks = symbol_data.get(buy_exchange_name, {}).get('asks')
+        bids = symbol_data.get(sell_exchange_name, {}).get('bids')
+        
+        if asks and bids:
+            buy_fee = self.spread_scanner.fee_rate(buy_exchange_name)
+            sell_fee = self.spread_scanner.fee_rate(sell_exchange_name)
+            # The top-of-book notional is an upper bound; the sweep can only shrink it
+            max_notional = opportunity['amount'] * opportunity['buy_price']
+            fill = sweep_books(asks, bids, buy_fee, sell_fee, max_notional=max_notional)
+            if fill is not None:
+                # The buy leg reserves at the deepest ask swept, not the top: resweep to what that funds
+                funded = self.order_executor.fundable_amount({**opportunity, 'buy_worst_price': fill.buy_worst_price})
+                if funded is not None and funded < fill.amount:
+                    fill = sweep_books(asks, bids, buy_fee, sell_fee, max_notional=max_notional, max_amount=funded)
+            if (
+                fill is None
+                or fill.amount < self.settings['min_trade_amount']
+                or fill.net_profit < self.settings['min_profit_threshold']
+            ):
+                return None
             
-            # Check ALL possible cross-exchange pairs
-            for buy_exchange_name, buy_data in exchanges_with_prices:
-                for sell_exchange_name, sell_data in exchanges_with_prices:
-                    # Must be different exchanges
-                    if buy_exchange_name == sell_exchange_name:
-                        continue
-                    
-                    buy_price = buy_data['ask']
-                    sell_price = sell_data['bid']
-                    
-                    # Must have positive spread
-                    if sell_price <= buy_price:
-                        continue
-                    
-                    spread = sell_price - buy_price
-                    spread_pct = (spread / buy_price) * 100
-                    
-                    # Check against dynamic threshold
-                    if spread_pct > min_spread_pct:
-                        amount = position_size / buy_price
-                        
-                        # Check minimum trade amount
-                        if amount >= self.settings['min_trade_amount']:
-                            # Calculate estimated profit
-                            estimated_profit = spread * amount
-                            estimated_fees = amount * buy_price * 0.001 * 2  # Rough fee estimate
-                            net_profit = estimated_profit - estimated_fees
-                            
-                            # Check minimum profit threshold
-                            if net_profit >= self.settings['min_profit_threshold']:
-                                opportunity = {
-                                    'symbol': symbol,
-                                    'buy_exchange': buy_exchange_name,
-                                    'sell_exchange': sell_exchange_name,
-                                    'buy_price': buy_price,
-                                    'sell_price': sell_price,
-                                    'spread': spread,
-                                    'spread_percentage': spread_pct,
-                                    'amount': amount,
-                                    'estimated_profit': estimated_profit,
-                                    'estimated_fees': estimated_fees,
-                                    'net_profit': net_profit,
-                                    'market_confidence': confidence,
-                                    'auction_state': market_context.auction_state.value if market_context else 'UNKNOWN',
-                                    'timestamp': time.time()
-                                }
-                                
-                                opportunities.append(opportunity)
-                                
-                                self.logger.info(
-                                    f"🔍 Opportunity: Buy {symbol} on {buy_exchange_name} at ${buy_price:.2f}, "
-                                    f"sell on {sell_exchange_name} at ${sell_price:.2f} | "
-                                    f"Spread: ${spread:.2f} ({spread_pct:.2f}%) | "
-                                    f"Profit: ${net_profit:.2f} net"
-                                )
-        
-        # Sort by confidence-adjusted profit
+            opportunity.update({
+                'amount': fill.amount,
+                'estimated_profit': fill.gross_profit,
+                'estimated_fees': fill.fees,
+                'net_profit': fill.net_profit,
+                'buy_vwap': fill.buy_vwap,
+                'sell_vwap': fill.sell_vwap,
+                'buy_worst_price': fill.buy_worst_price,    # leg limit prices: each leg fills the whole sweep
+                'sell_worst_price': fill.sell_worst_price,
+                'depth_levels': fill.levels_used
+            })
+        
+        self.logger.info(
+            "🔍 Opportunity: Buy %s on %s at $%.2f, sell on %s at $%.2f | "
+            "Spread: $%.2f (%.2f%%) | Size: %.6f | Profit: $%.2f net",
+            symbol, buy_exchange_name, opportunity['buy_price'],
+            sell_exchange_name, opportunity['sell_price'],
+            opportunity['spread'], opportunity['spread_percentage'],
+            opportunity['amount'], opportunity['net_profit'],
+            extra=SAMPLE
+        )
+        return opportunity
+    
+    def rank_opportunities(self, opportunities):
+        """Sort by confidence-adjusted profit and cap to the concurrent trade limit"""
+        opportunities.sort(
+            key=lambda x: x['net_profit'] * (1 + x['market_confidence']),
+            reverse=True
+        )
+        
+        # Limit number of opportunities per cycle
+        max_opportunities = self.config['trading'].get('max_concurrent_trades', 2)
+        return opportunities[:max_opportunities]
+    
+    def find_arbitrage_opportunities(self, symbols, market_context):
+        """Find arbitrage opportunities with market context awareness"""
+        
+        # ==================== PARAMETER CALCULATION ====================
+        params = self.get_trading_params(market_context)
+        
+        self.logger.debug(
+            "   📊 Trading params: Spread=%.2f%%, Size=$%.0f, Confidence=%.2f",
+            params['min_spread_pct'], params['position_size'], params['confidence']
+        )
+        
+        # ==================== OPPORTUNITY SEARCH ====================
+        # One vectorized pass over every symbol and exchange pair; only the top-k become dicts.
+        # Extra candidates are kept because depth sizing can shrink or drop any of them.
+        candidates = self.spread_scanner.scan(
+            symbols,
+            params,
+            min_trade_amount=self.settings['min_trade_amount'],
+            min_profit=self.settings['min_profit_threshold'],
+            top_k=self.config['trading'].get('max_concurrent_trades', 2) * 4
+        )
+        opportunities = [
+            opportunity for opportunity in map(self.size_to_depth, candidates)
+            if opportunity
+        ]
+        
         if opportunities:
-            opportunities.sort(
-                key=lambda x: x['net_profit'] * (1 + x['market_confidence']),
-                reverse=True
-            )
-            
-            # Limit number of opportunities per cycle
-            max_opportunities = self.config['trading'].get('max_concurrent_trades', 2)
-            opportunities = opportunities[:max_opportunities]
+            opportunities = self.rank_opportunities(opportunities)
         
         return opportunities
     
+    def on_top_of_book_change(self, symbol: str, exchange: str, received_ns: int):
+        """Re-evaluate only the cross-exchange pairs touched by a best bid/ask change"""
+        if self.is_shutting_down:
+            return
+        
+        decision = self.evaluate_tick(symbol, exchange)
+        if decision is None:
+            return
+        opportunities, market_context = decision
+        
+        # Tick-to-decision latency: from the feed receiving the update to the scan verdict
+        latency_us = (time.perf_counter_ns() - received_ns) / 1000
+        if self.health_monitor:
+            self.health_monitor.record_decision_latency(latency_us)
+        
+        if not opportunities:
+            return
+        
+        for opportunity in opportunities:
+            opportunity['tick_to_decision_us'] = latency_us
+        
+        # Only one execution in flight; ticks arriving meanwhile are re-evaluated afresh
+        if self.execution_task is None or self.execution_task.done():
+            self.execution_task = asyncio.create_task(
+                self.execute_opportunities(self.rank_opportunities(opportunities), market_context)
+            )
+    
+    def evaluate_tick(self, symbol: str, exchange: str):
+        """Decision for one top-of-book change: (opportunities, market_context), or None if not scanned"""
+        book_table = self.data_feed.book_table
+        updated = book_table.get(symbol, exchange)
+        
+        # Multi-leg cycles: the graph re-relaxes only the edges of this market
+        if updated:
+            self.report_cycles(self.currency_graph.update_quote(symbol, exchange, *updated))
+        else:
+            self.report_cycles(self.currency_graph.invalidate(symbol, exchange))
+        
+        if not updated or symbol not in self.scan_symbols:
+            return None
+        updated_bid, updated_ask = updated
+        
+        market_context = self.data_feed.market_contexts.get('BTC/USDT')
+        params = self.get_trading_params(market_context)
+        bid_col, ask_col = book_table.bid, book_table.ask
+        
+        opportunities = []
+        for other_name, slot in book_table.symbol_slots.get(symbol, ()):
+            other_bid, other_ask = bid_col[slot], ask_col[slot]
+            if other_name == exchange or other_bid <= 0 or other_ask <= 0:
+                continue
+            for opportunity in (
+                self.evaluate_pair(symbol, exchange, updated_ask, other_name, other_bid, params),
+                self.evaluate_pair(symbol, other_name, other_ask, exchange, updated_bid, params)
+            ):
+                if opportunity:
+                    opportunities.append(opportunity)
+        
+        return opportunities, market_context
+    
+    def report_cycles(self, cycles):
+        """Log profitable multi-leg currency cycles found by the graph engine"""
+        for cycle in cycles:
+            # Two-leg cross-exchange spreads are already handled by the spread scan
+            if cycle.kind != 'triangular':
+                continue
+            self.system_metrics.triangular_cycles_detected += 1
+            self.logger.info("🔺 Triangular cycle %s", cycle, extra=SAMPLE)
+    
     async def execute_opportunities(self, opportunities, market_context):
         """Execute arbitrage opportunities with comprehensive monitoring"""
         executed_trades = 0
+        self.recent_opportunities.extend(opportunities)
+        del self.recent_opportunities[:-20]
         
         for opportunity in opportunities:
             if self.is_shutting_down:
@@ -2221,37 +2877,24 @@ class ArbitrageBot:
                 # Execute the arbitrage
                 success = await self.order_executor.execute_arbitrage(
                     opportunity,
-                    self.exchanges
+                    self.async_exchanges.clients
                 )
                 
                 if success:
+                    # Both legs are working; P&L is booked from the fills by on_trade_settled
                     executed_trades += 1
                     self.system_metrics.total_trades += 1
-                    self.system_metrics.total_profit += opportunity['net_profit']
-                    
-                    # Update win rate
-                    wins = self.system_metrics.total_trades * self.system_metrics.win_rate
-                    self.system_metrics.win_rate = (wins + 1) / self.system_metrics.total_trades
-                    
                     self.logger.info(
-                        f"✅ Trade executed successfully! "
-                        f"Profit: ${opportunity['net_profit']:.2f} | "
-                        f"Win Rate: {self.system_metrics.win_rate:.1%}"
+                        f"✅ Trade #{opportunity.get('trade_id')} placed, "
+                        f"estimated profit ${opportunity['net_profit']:.2f} | awaiting fills"
                     )
                     
-                    # Check if we've hit daily target
-                    daily_target = self.config['system']['daily_profit_target']
-                    if self.system_metrics.total_profit >= daily_target:
-                        self.logger.info(f"🎯 Daily profit target reached: ${daily_target}")
-                        # Could implement cooldown or reduced aggression here
-                        
                 else:
                     self.logger.warning(f"❌ Trade execution failed")
-                    self.system_metrics.total_loss += abs(opportunity['net_profit'])
-                    
-                    # Update win rate
-                    wins = self.system_metrics.total_trades * self.system_metrics.win_rate
-                    self.system_metrics.win_rate = wins / (self.system_metrics.total_trades + 1)
+                    # A failed or unwound trade may leave partial fills behind
+                    if self.account_streams:
+                        self.account_streams.request_reconcile(opportunity['buy_exchange'])
+                        self.account_streams.request_reconcile(opportunity['sell_exchange'])
                 
                 # Rate limiting between trades
                 if executed_trades > 0:
@@ -2264,18 +2907,47 @@ class ArbitrageBot:
                 if self.health_monitor:
                     self.health_monitor.log_api_error('trade_execution')
     
+    def on_trade_settled(self, trade):
+        """Book a trade's realized P&L once both legs reached a terminal state"""
+        metrics = self.system_metrics
+        pnl = trade.realized_pnl
+        metrics.settled_trades += 1
+        if pnl > 0:
+            metrics.winning_trades += 1
+            metrics.total_profit += pnl
+        else:
+            metrics.total_loss += -pnl
+        metrics.win_rate = metrics.winning_trades / metrics.settled_trades
+        
+        self.logger.info(
+            f"💵 Trade #{trade.trade_id} settled: realized ${pnl:.2f}"
+            f"{'' if trade.pnl_complete else ' excl. unpriced fees'} (estimated ${trade.estimated_profit:.2f}) | "
+            f"buy {trade.buy.state} {trade.buy.filled:.6f}/{trade.buy.amount:.6f} on {trade.buy.exchange}, "
+            f"sell {trade.sell.state} {trade.sell.filled:.6f}/{trade.sell.amount:.6f} on {trade.sell.exchange} | "
+            f"Win Rate: {metrics.win_rate:.1%}"
+        )
+        if abs(trade.residual) > 1e-12:
+            self.logger.warning(f"⚠️  Trade #{trade.trade_id} left {trade.residual:+.8f} {trade.symbol.split('/')[0]} unhedged")
+            if self.account_streams:
+                self.account_streams.request_reconcile(trade.buy.exchange)
+                self.account_streams.request_reconcile(trade.sell.exchange)
+        
+        # Check if we've hit daily target
+        daily_target = self.config['system']['daily_profit_target']
+        if metrics.total_profit - metrics.total_loss >= daily_target:
+            self.logger.info(f"🎯 Daily profit target reached: ${daily_target}")
+    
     async def perform_health_check(self):
         """Perform comprehensive system health check"""
         self.logger.info("🏥 Performing system health check...")
         
-        # Check exchange connectivity
-        for name, exchange in self.exchanges.items():
-            try:
-                # Simple ping to check connectivity
-                exchange.fetch_time()
+        # Check exchange connectivity (all venues pinged concurrently)
+        server_times = await self.async_exchanges.fetch_times()
+        for name, result in server_times.items():
+            if isinstance(result, Exception):
+                self.logger.warning(f"  ⚠️  {name.upper()}: Connection issue - {result}")
+            else:
                 self.logger.debug(f"  ✅ {name.upper()}: Connected")
-            except Exception as e:
-                self.logger.warning(f"  ⚠️  {name.upper()}: Connection issue - {e}")
         
         # Check system resources
         import psutil
@@ -2283,7 +2955,8 @@ class ArbitrageBot:
         memory_mb = process.memory_info().rss / 1024 / 1024
         self.system_metrics.memory_usage_mb = memory_mb
         
-        cpu_percent = process.cpu_percent(interval=1)
+        # Sampling CPU blocks for the interval, keep it off the event loop
+        cpu_percent = await asyncio.to_thread(process.cpu_percent, 1)
         
         self.logger.info(
             f"📊 System Resources: "
@@ -2302,10 +2975,21 @@ class ArbitrageBot:
         """Report comprehensive system metrics"""
         self.system_metrics.uptime_seconds = time.time() - self.start_time
         
+        if self.health_monitor:
+            latency_stats = self.health_monitor.get_decision_latency_stats()
+            self.system_metrics.decision_latency_p50_us = latency_stats['p50_us']
+            self.system_metrics.decision_latency_p99_us = latency_stats['p99_us']
+        
+        if hasattr(self.order_executor, 'get_leg_skew_stats'):
+            skew_stats = self.order_executor.get_leg_skew_stats()
+            self.system_metrics.leg_skew_p50_ms = skew_stats['p50_ms']
+            self.system_metrics.leg_skew_p99_ms = skew_stats['p99_ms']
+        
         metrics = self.system_metrics.to_dict()
+        execution_stats = self.order_executor.order_tracker.get_venue_stats()
         
         # Log to metrics file
-        self.metrics_logger.info(json.dumps(metrics))
+        self.metrics_logger.info(json.dumps({**metrics, 'execution': execution_stats}))
         
         # Log to console (summary)
         self.logger.info(
@@ -2314,8 +2998,129 @@ class ArbitrageBot:
             f"Trades: {metrics['total_trades']} | "
             f"Profit: ${metrics['total_profit']} | "
             f"Win Rate: {metrics['win_rate']:.1%} | "
-            f"API Success: {metrics['api_success_rate']:.1%}"
+            f"API Success: {metrics['api_success_rate']:.1%} | "
+            f"Tick→Decision p50/p99: {metrics['decision_latency_p50_us']:.0f}/{metrics['decision_latency_p99_us']:.0f}µs"
         )
+        
+        # Order outcomes per venue: how much of what we send fills, and how fast
+        for venue, stats in execution_stats.items():
+            if not stats['orders']:
+                continue
+            latency = stats['fill_latency_p50_ms']
+            self.logger.info(
+                f"🧾 {venue.upper()} orders: {stats['orders']} | filled {stats['filled']} | "
+                f"partial {stats['partial']} | cancelled {stats['cancelled']} | expired {stats['expired']} | "
+                f"fill ratio {stats['fill_ratio']:.1%} | fill p50 "
+                + (f"{latency:.0f}ms" if latency is not None else "n/a")
+            )
+        
+        # REST budget per venue: what is waiting, and how long each priority class waits
+        if getattr(self, 'rest_scheduler', None) is not None:
+            for venue, stats in self.rest_scheduler.get_stats().items():
+                waits = ' | '.join(
+                    f"{name} {cls['requests']} req, p99 wait {cls['wait_p99_ms'] or 0:.0f}ms"
+                    + (f", {cls['coalesced']} coalesced" if cls['coalesced'] else '')
+                    for name, cls in stats['classes'].items()
+                )
+                self.logger.info(
+                    f"🚦 {venue.upper()} REST: queue {stats['queue_depth']} | tokens {stats['tokens']:.0f}/{stats['burst']:.0f} | "
+                    f"429s {stats['rate_limited']} | {waits or 'idle'}"
+                )
+        
+        # Racing WebSocket connections: who delivers first and how far behind the others are
+        if hasattr(self.data_feed, 'stream_stats'):
+            for stream in self.data_feed.stream_stats():
+                lags = ' '.join(
+                    f"#{c['connection']}:{c['win_rate']:.0%}/{c['mean_lag_us']:.0f}µs" for c in stream['connections']
+                )
+                self.logger.info(
+                    f"🔀 {stream['stream']}: forwarded {stream['forwarded']} | dup {stream['duplicates']} | "
+                    f"stale {stream['stale']} | first-rate/lag {lags}"
+                )
+        
+        # Feed handler processes: ring backlog and lost records
+        if hasattr(self.data_feed, 'process_stats'):
+            for feed in self.data_feed.process_stats():
+                self.logger.info(
+                    f"🧵 {feed['venue']} feed process: {'up' if feed['alive'] else 'DOWN'} | records {feed['records']} | "
+                    f"backlog {feed['backlog']} | overruns {feed['overruns']} | restarts {feed['restarts']}"
+                )
+    
+    def create_snapshot_writer(self):
+        """Open the memory-mapped state snapshot file"""
+        path = self.config['monitoring'].get('state_snapshot_path')
+        if not path:
+            return None
+        try:
+            writer = StateSnapshotWriter(path)
+            self.logger.info(f"🛰️  Publishing state snapshots to {path}")
+            return writer
+        except Exception as e:
+            self.logger.error(f"❌ Failed to open state snapshot: {e}")
+            return None
+    
+    def build_state_snapshot(self, status: str = 'running') -> Dict:
+        """Compact view of prices, balances, opportunities, metrics and mode"""
+        self.system_metrics.uptime_seconds = time.time() - self.start_time
+        
+        prices = {}
+        book_table = getattr(getattr(self, 'data_feed', None), 'book_table', None)
+        if book_table is not None:
+            for slot, (symbol, exchange) in enumerate(book_table.keys):
+                bid, ask, bid_size, ask_size, updated_at = book_table.read(slot)
+                if bid > 0 and ask > 0:
+                    prices.setdefault(symbol, {})[exchange] = {
+                        'bid': bid, 'ask': ask, 'bid_size': bid_size, 'ask_size': ask_size,
+                        'updated_at': updated_at
+                    }
+        
+        opportunities = [
+            {key: opportunity.get(key) for key in (
+                'symbol', 'buy_exchange', 'sell_exchange', 'buy_price', 'sell_price',
+                'spread_percentage', 'amount', 'net_profit', 'timestamp'
+            )}
+            for opportunity in self.recent_opportunities
+        ]
+        
+        return {
+            'system_id': self.system_id,
+            'status': status,
+            'pid': os.getpid(),
+            'mode': self.bot_mode,
+            'exchanges': list(self.exchanges),
+            'prices': prices,
+            'balances': self.latest_balances,
+            'opportunities': opportunities,
+            'metrics': self.system_metrics.to_dict(),
+            'execution': self.order_executor.order_tracker.get_stats(),
+            'rest_scheduler': self.rest_scheduler.get_stats() if getattr(self, 'rest_scheduler', None) else {}
+        }
+    
+    async def publish_state_snapshots(self):
+        """Publish the state snapshot at a fixed cadence"""
+        interval = self.config['monitoring'].get('state_snapshot_interval', 1.0)
+        while not self.is_shutting_down:
+            try:
+                self.snapshot_writer.publish(self.build_state_snapshot())
+            except Exception as e:
+                self.logger.error(f"❌ State snapshot failed: {e}")
+            await asyncio.sleep(interval)
+    
+    def create_market_recorder(self):
+        """Open the raw market data capture when enabled in config"""
+        capture_config = self.config.get('capture', {})
+        if not capture_config.get('enabled'):
+            return None
+        
+        extension = '.cap.gz' if capture_config.get('compress', True) else '.cap'
+        path = os.path.join(capture_config.get('directory', 'captures'), f"market_{self.system_id}{extension}")
+        try:
+            recorder = MarketRecorder(path, compress=capture_config.get('compress', True))
+            self.logger.info(f"💾 Capturing raw market data to {path}")
+            return recorder
+        except Exception as e:
+            self.logger.error(f"❌ Failed to open market capture: {e}")
+            return None
     
     async def shutdown_system(self):
         """Perform graceful system shutdown"""
@@ -2329,13 +3134,34 @@ class ArbitrageBot:
             except Exception as e:
                 self.logger.error(f"❌ Error stopping data feed: {e}")
         
+        # Last state snapshot tells the dashboard the bot is down
+        if getattr(self, 'snapshot_writer', None) is not None:
+            try:
+                self.snapshot_task.cancel()
+                self.snapshot_writer.publish(self.build_state_snapshot(status='stopped'))
+                self.snapshot_writer.close()
+            except Exception as e:
+                self.logger.error(f"❌ Error closing state snapshot: {e}")
+        
+        # Close market data capture
+        if getattr(self, 'data_feed', None) is not None and self.data_feed.recorder:
+            try:
+                self.data_feed.recorder.close()
+            except Exception as e:
+                self.logger.error(f"❌ Error closing market capture: {e}")
+        
+        # Stop account streams and order polling before their clients close
+        if getattr(self, 'account_streams', None) is not None:
+            await self.account_streams.stop()
+        await self.order_executor.order_tracker.stop()
+        
         # Close exchange connections
-        for name, exchange in self.exchanges.items():
+        if hasattr(self, 'async_exchanges'):
             try:
-                # CCXT doesn't have explicit close, but we can clean up
-                self.logger.debug(f"  Closed {name} connection")
+                await self.async_exchanges.close()
+                self.logger.info("✅ Async exchange clients closed")
             except Exception as e:
-                self.logger.debug(f"  Error closing {name}: {e}")
+                self.logger.debug(f"  Error closing async exchange clients: {e}")
         
         # Final metrics report
         self.report_system_metrics()
@@ -0,0 +1,105 @@
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+
+class TopOfBookTable:
+    """Preallocated top-of-book table with one fixed slot per (symbol, exchange).
+
+    Prices, sizes and timestamps live in flat ``array('d')`` columns that are
+    updated in place, so readers never walk nested dicts and the columns can be
+    viewed zero-copy (e.g. ``numpy.frombuffer``). Each slot carries a sequence
+    counter that is odd while a write is in progress (seqlock), which lets
+    readers on other threads take consistent snapshots without a lock.
+    """
+
+    COLUMNS = ('bid', 'ask', 'bid_size', 'ask_size', 'timestamp')
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.bid = array('d', bytes(8 * capacity))
+        self.ask = array('d', bytes(8 * capacity))
+        self.bid_size = array('d', bytes(8 * capacity))
+        self.ask_size = array('d', bytes(8 * capacity))
+        self.timestamp = array('d', bytes(8 * capacity))
+        self.seq = array('Q', bytes(8 * capacity))
+        self.slots = {}         # (symbol, exchange) -> slot
+        self.symbol_slots = {}  # symbol -> [(exchange, slot), ...]
+        self.keys = []          # slot -> (symbol, exchange)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def slot(self, symbol: str, exchange: str) -> int:
+        """Return the slot for a key, assigning the next free one on first use"""
+        slot = self.slots.get((symbol, exchange))
+        if slot is not None:
+            return slot
+        if len(self.keys) >= self.capacity:
+            raise RuntimeError(f"Top-of-book table full ({self.capacity} slots)")
+        slot = len(self.keys)
+        self.keys.append((symbol, exchange))
+        self.slots[(symbol, exchange)] = slot
+        self.symbol_slots.setdefault(symbol, []).append((exchange, slot))
+        return slot
+
+    def update(self, symbol: str, exchange: str, bid: float, ask: float,
+               bid_size: float = 0.0, ask_size: float = 0.0, timestamp: float = 0.0) -> bool:
+        """Write one quote in place; returns True when the best bid or ask moved"""
+        slot = self.slots.get((symbol, exchange))
+        if slot is None:
+            slot = self.slot(symbol, exchange)
+        changed = self.bid[slot] != bid or self.ask[slot] != ask
+
+        self.seq[slot] += 1
+        self.bid[slot] = bid
+        self.ask[slot] = ask
+        self.bid_size[slot] = bid_size
+        self.ask_size[slot] = ask_size
+        self.timestamp[slot] = timestamp
+        self.seq[slot] += 1
+        return changed
+
+    def invalidate(self, symbol: str, exchange: str):
+        """Mark a quote unusable (e.g. the local book lost sync)"""
+        slot = self.slots.get((symbol, exchange))
+        if slot is not None:
+            self.update(symbol, exchange, 0.0, 0.0)
+
+    def read(self, slot: int) -> Tuple[float, float, float, float, float]:
+        """Consistent (bid, ask, bid_size, ask_size, timestamp) for one slot"""
+        while True:
+            seq = self.seq[slot]
+            if seq & 1:
+                continue
+            values = (self.bid[slot], self.ask[slot], self.bid_size[slot],
+                      self.ask_size[slot], self.timestamp[slot])
+            if self.seq[slot] == seq:
+                return values
+
+    def get(self, symbol: str, exchange: str) -> Optional[Tuple[float, float]]:
+        """(best_bid, best_ask) for one key, or None when missing or invalid"""
+        slot = self.slots.get((symbol, exchange))
+        if slot is None:
+            return None
+        bid, ask = self.bid[slot], self.ask[slot]
+        if bid <= 0 or ask <= 0:
+            return None
+        return bid, ask
+
+    def quotes(self, symbol: str) -> List[Tuple[str, float, float]]:
+        """Valid (exchange, bid, ask) quotes for a symbol"""
+        bid_col, ask_col = self.bid, self.ask
+        return [
+            (exchange, bid_col[slot], ask_col[slot])
+            for exchange, slot in self.symbol_slots.get(symbol, ())
+            if bid_col[slot] > 0 and ask_col[slot] > 0
+        ]
+
+    def snapshot(self, out: Optional[Dict[str, array]] = None) -> Dict[str, array]:
+        """Copy every column into ``out`` (reused between calls) as one point-in-time view"""
+        if out is None:
+            out = {name: array('d', bytes(8 * self.capacity)) for name in self.COLUMNS}
+        used = len(self.keys)
+        for name in self.COLUMNS:
+            memoryview(out[name])[:used] = memoryview(getattr(self, name))[:used]
+        return out